@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+REST API dla silnika chainów w systemie Morris.
+Udostępnia endpointy do odczytu metryk pracy Chain Engine
+oraz obsługi kolejki martwych wiadomości (nieudanych uruchomień chainów).
+"""
+
+from flask import Blueprint, jsonify, request, current_app, url_for
+import logging
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Utworzenie blueprintu dla API silnika chainów
+engine_bp = Blueprint('engine_api', __name__)
+
+@engine_bp.route('/api/engine/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Pobiera metryki pracy silnika chainów (kolejka, wykorzystanie wątków, liczniki)
+    oraz kolejki wiadomości odebranych przez klienta MQTT.
+    
+    Returns:
+        Response: Metryki w formacie JSON
+    """
+    # Dostęp do Chain Engine z kontekstu aplikacji
+    chain_engine = current_app.config.get('chain_engine')
+    
+    if not chain_engine:
+        logger.error("Chain Engine nie jest dostępny w kontekście aplikacji")
+        return jsonify({
+            "status": "error",
+            "message": "Chain Engine nie jest dostępny"
+        }), 500
+    
+    metrics = chain_engine.get_metrics()
+    
+    # Kolejka wiadomości odebranych przez klienta MQTT
+    mqtt_client = current_app.config.get('mqtt_client')
+    if mqtt_client:
+        metrics["mqtt"] = mqtt_client.get_metrics()
+    
+    return jsonify({
+        "status": "success",
+        "metrics": metrics
+    })
+
+def _get_dead_letters():
+    """
+    Zwraca silnik chainów z włączoną kolejką martwych wiadomości lub odpowiedź z błędem.
+    """
+    chain_engine = current_app.config.get('chain_engine')
+
+    if not chain_engine:
+        logger.error("Chain Engine nie jest dostępny w kontekście aplikacji")
+        return None, (jsonify({
+            "status": "error",
+            "message": "Chain Engine nie jest dostępny"
+        }), 500)
+
+    if chain_engine.dead_letters is None:
+        return None, (jsonify({
+            "status": "error",
+            "message": "Kolejka martwych wiadomości jest wyłączona (dead_letter.enabled)"
+        }), 404)
+
+    return chain_engine, None
+
+@engine_bp.route('/api/engine/dead-letters', methods=['GET'])
+def get_dead_letters():
+    """
+    Pobiera nieudane uruchomienia chainów z kolejki martwych wiadomości.
+    Parametry zapytania: chain_id, limit (domyślnie 100), offset.
+
+    Returns:
+        Response: Wpisy kolejki i jej metryki w formacie JSON
+    """
+    chain_engine, error = _get_dead_letters()
+    if error:
+        return error
+
+    try:
+        limit = int(request.args.get('limit', 100))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "Parametry limit i offset muszą być liczbami całkowitymi"
+        }), 400
+
+    entries = chain_engine.dead_letters.pending(
+        limit=limit, chain_id=request.args.get('chain_id'), offset=offset
+    )
+
+    return jsonify({
+        "status": "success",
+        "count": len(entries),
+        "entries": entries,
+        "metrics": chain_engine.dead_letters.get_metrics()
+    })
+
+@engine_bp.route('/api/engine/dead-letters/replay', methods=['POST'])
+def replay_dead_letters():
+    """
+    Przyjmuje ponowne wykonanie uruchomień z kolejki martwych wiadomości. Zadanie jest
+    wykonywane w puli wątków silnika; postęp i podsumowanie zwraca adres status_url.
+    Dane JSON (opcjonalne): limit (domyślnie 100), chain_id, rate (uruchomień na sekundę), offset.
+
+    Returns:
+        Response: Identyfikator zadania i adres jego statusu (202) lub błąd 503 przy pełnej kolejce
+    """
+    chain_engine, error = _get_dead_letters()
+    if error:
+        return error
+
+    options = request.get_json(silent=True) or {}
+    try:
+        limit = int(options.get('limit', 100))
+        offset = int(options.get('offset', 0))
+        rate = float(options['rate']) if options.get('rate') else None
+    except (TypeError, ValueError):
+        return jsonify({
+            "status": "error",
+            "message": "Pola limit, offset i rate muszą być liczbami"
+        }), 400
+
+    run_id = chain_engine.submit_replay(
+        limit=limit, chain_id=options.get('chain_id'), rate=rate, offset=offset
+    )
+    if run_id is None:
+        return jsonify({
+            "status": "error",
+            "message": "Przekroczono limit oczekujących zadań, spróbuj ponownie później"
+        }), 503
+
+    status_url = url_for('engine_api.get_replay', run_id=run_id)
+    response = jsonify({
+        "status": "accepted",
+        "run_id": run_id,
+        "status_url": status_url
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+@engine_bp.route('/api/engine/dead-letters/replay/<run_id>', methods=['GET'])
+def get_replay(run_id):
+    """
+    Zwraca status ponownego wykonania z kolejki martwych wiadomości. Pole results zawiera
+    bieżącą liczbę udanych, nieudanych i pominiętych uruchomień, a po zakończeniu
+    także liczbę wpisów pozostałych w kolejce (pending).
+
+    Args:
+        run_id (str): Identyfikator zadania zwrócony w odpowiedzi 202
+
+    Returns:
+        Response: Opis zadania w formacie JSON albo błąd 404
+    """
+    chain_engine, error = _get_dead_letters()
+    if error:
+        return error
+
+    run = chain_engine.get_run(run_id)
+    if run is None:
+        return jsonify({"status": "error", "message": f"Nie znaleziono zadania {run_id}"}), 404
+
+    return jsonify({"status": "success", "run": run})
+
+@engine_bp.route('/api/engine/dead-letters', methods=['DELETE'])
+def clear_dead_letters():
+    """
+    Usuwa wszystkie wpisy z kolejki martwych wiadomości.
+
+    Returns:
+        Response: Liczba usuniętych wpisów w formacie JSON
+    """
+    chain_engine, error = _get_dead_letters()
+    if error:
+        return error
+
+    return jsonify({
+        "status": "success",
+        "removed": chain_engine.dead_letters.clear()
+    })
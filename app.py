@@ -5,8 +5,10 @@ import os
 from datetime import datetime
 from routes.webhook import webhook_bp
 from api.plugins import plugins_bp
+from api.engine import engine_bp
 from mqtt_client import MqttClient
 from core.chain_engine import ChainEngine
+from core.step_policy import DeadlineExceeded
 from plugins.manager import PluginManager
 
 # Import nowych blueprintów dla panelu administracyjnego
@@ -46,9 +48,13 @@ plugin_manager = PluginManager(mqtt_client=mqtt_client)
 # Ustawienie PluginManager w MQTT Client
 mqtt_client.set_plugin_manager(plugin_manager)
 
-# Dodanie Chain Engine i Plugin Manager do kontekstu aplikacji
+# Statusy wtyczek z PluginManager sterują wyłącznikami zdalnych wtyczek w Chain Engine
+chain_engine.set_plugin_manager(plugin_manager)
+
+# Dodanie Chain Engine, Plugin Manager i klienta MQTT do kontekstu aplikacji
 app.config["chain_engine"] = chain_engine
 app.config["plugin_manager"] = plugin_manager
+app.config["mqtt_client"] = mqtt_client
 
 
 # Konfiguracja kontekstu dla szablonów
@@ -73,6 +79,7 @@ def inject_logo():
 # Rejestracja blueprintów
 app.register_blueprint(webhook_bp)
 app.register_blueprint(plugins_bp)
+app.register_blueprint(engine_bp)
 # Rejestracja nowych blueprintów dla panelu administracyjnego
 app.register_blueprint(pages_bp)
 app.register_blueprint(chains_bp)
@@ -97,6 +104,7 @@ def index():
                 "test_mqtt": "/send-test",
                 "chains": "/chains",
                 "run_chain": "/run-chain/<chain_id>",
+                "engine_metrics": "/api/engine/metrics",
                 "plugins": {
                     "list": "/api/plugins",
                     "register": "/api/plugins (POST)",
@@ -308,14 +316,14 @@ def run_chain_manually(chain_id):
     # Pobranie danych JSON
     payload = request.get_json()
 
-    # Pobranie triggera dla chaina
-    trigger = chain_engine.chains[chain_id].get("trigger", f"manual:{chain_id}")
-
     try:
-        # Uruchomienie chaina
-        result = chain_engine.run_chain(trigger, payload)
+        # Uruchomienie wskazanego chaina (trigger może być współdzielony z innymi chainami)
+        result = chain_engine.run_chain_by_id(chain_id, payload)
 
         return jsonify({"status": "success", "chain_id": chain_id, "result": result})
+    except DeadlineExceeded as e:
+        logger.warning(f"Przerwano chain {chain_id}: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 504
     except Exception as e:
         logger.error(f"Błąd podczas uruchamiania chaina {chain_id}: {e}")
         return (
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark webhooków zbiorczych.
+Porównuje liczbę rekordów na sekundę przy wysyłaniu każdego zdarzenia osobnym
+żądaniem /hook/<modul> oraz paczkami NDJSON do /hook/<modul>/bulk
+(klient testowy Flask, chain z jednym krokiem lokalnym).
+
+Uruchomienie:
+    python benchmarks/bench_bulk_webhook.py
+"""
+
+import json
+import os
+import sys
+import logging
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+from plugins.base import BasePlugin
+from routes.webhook import webhook_bp
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+RECORDS = 5000
+BULK_SIZES = (100, 1000)
+PAYLOAD = {"message": "hello", "device": "sensor-1", "value": 42}
+
+
+class EchoPlugin(BasePlugin):
+    def process(self, data, params=None):
+        return data
+
+
+def create_client():
+    engine = ChainEngine(mqtt_client=MagicMock(), chains_file=os.devnull)
+    engine.plugin_classes["EchoPlugin"] = EchoPlugin
+    engine.chains["bench"] = {"trigger": "webhook:bench", "steps": [{"plugin": "EchoPlugin"}]}
+    engine._rebuild_trigger_index()
+
+    app = Flask(__name__)
+    app.register_blueprint(webhook_bp)
+    app.config["chain_engine"] = engine
+    return engine, app.test_client()
+
+
+def main():
+    engine, client = create_client()
+    line = json.dumps(PAYLOAD)
+
+    print(f"{'tryb':>16} | {'rekordy / s':>12}")
+    print("-" * 31)
+
+    started = time.perf_counter()
+    for _ in range(RECORDS):
+        client.post("/hook/bench", data=line, content_type="application/json")
+    print(f"{'pojedynczo':>16} | {RECORDS / (time.perf_counter() - started):>12.0f}")
+
+    for size in BULK_SIZES:
+        body = "\n".join([line] * size)
+        started = time.perf_counter()
+        for _ in range(RECORDS // size):
+            client.post("/hook/bench/bulk", data=body, content_type="application/x-ndjson")
+        print(f"{f'bulk ({size})':>16} | {RECORDS / (time.perf_counter() - started):>12.0f}")
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark kodeka JSON wiadomości MQTT.
+Mierzy liczbę operacji dekodowania (treść w bajtach) i kodowania na sekundę
+dla każdej dostępnej implementacji (orjson, msgspec, json).
+
+Uruchomienie:
+    python benchmarks/bench_codec.py
+"""
+
+import os
+import sys
+import logging
+import time
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import codec
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 100000
+PAYLOAD = {
+    "device": "sensor-1",
+    "timestamp": "2025-04-05T12:34:56Z",
+    "readings": [{"sensor": f"t{i}", "value": 21.5 + i, "unit": "C"} for i in range(8)],
+    "status": "online",
+}
+
+
+def main():
+    print(f"{'kodek':>8} | {'loads / s':>10} | {'dumps / s':>10}")
+    print("-" * 34)
+
+    for name in codec.PREFERENCE:
+        if name not in codec.BACKENDS:
+            print(f"{name:>8} | {'-':>10} | {'-':>10}")
+            continue
+        codec.use_backend(name)
+        encoded = codec.dumps(PAYLOAD)
+
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            codec.loads(encoded)
+        loads_rate = MESSAGES / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            codec.dumps(PAYLOAD)
+        dumps_rate = MESSAGES / (time.perf_counter() - started)
+
+        print(f"{name:>8} | {loads_rate:>10.0f} | {dumps_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark trwałej kolejki wejściowej (SQLite WAL).
+Mierzy liczbę zapisów (put) i potwierdzeń (ack) na sekundę dla każdej
+polityki zapisu na dysk w katalogu tymczasowym.
+
+Uruchomienie:
+    python benchmarks/bench_durable_queue.py
+"""
+
+import os
+import sys
+import logging
+import tempfile
+import time
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.durable_queue import FSYNC_POLICIES, DurableQueue
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 50000
+PAYLOAD = {"message": "hello", "device": "sensor-1", "value": 42}
+
+
+def main():
+    print(f"{'fsync':>8} | {'put / s':>10} | {'ack / s':>10}")
+    print("-" * 34)
+
+    for fsync in FSYNC_POLICIES:
+        with tempfile.TemporaryDirectory() as directory:
+            queue = DurableQueue(os.path.join(directory, "inbound.db"), fsync=fsync)
+
+            started = time.perf_counter()
+            ids = [queue.put("mqtt:sensors/1", PAYLOAD) for _ in range(MESSAGES)]
+            put_rate = MESSAGES / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for record_id in ids:
+                queue.ack(record_id)
+            ack_rate = MESSAGES / (time.perf_counter() - started)
+
+            queue.close()
+            print(f"{fsync:>8} | {put_rate:>10.0f} | {ack_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
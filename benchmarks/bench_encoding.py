@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark kodowań żądań zdalnych wtyczek.
+Mierzy liczbę operacji kodowania i dekodowania na sekundę oraz rozmiar treści
+żądania z danymi liczbowymi czujników dla każdego kodowania (msgpack, cbor, json).
+Kodowania binarne wymagają bibliotek msgpack i cbor2.
+
+Uruchomienie:
+    python benchmarks/bench_encoding.py
+"""
+
+import os
+import sys
+import logging
+import time
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import codec
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 50000
+REQUEST = {
+    "action": "run_plugin",
+    "plugin_id": "climate",
+    "correlation_id": "9f1c2b7e4d5a4c3b8a6e0f1d2c3b4a59",
+    "data": {
+        "device": "bridge-1",
+        "timestamp": 1743856496.25,
+        "readings": [
+            {"sensor": i, "temperature": 21.5 + i / 10, "humidity": 40 + i, "battery": 97}
+            for i in range(16)
+        ],
+    },
+    "config": {"timeout": 5},
+}
+
+
+def main():
+    print(f"JSON: {codec.backend()}")
+    print(f"{'kodowanie':>9} | {'bajty':>6} | {'encode / s':>10} | {'decode / s':>10}")
+    print("-" * 45)
+
+    for name in codec.ENCODING_PREFERENCE:
+        if name not in codec.ENCODINGS:
+            print(f"{name:>9} | {'-':>6} | {'-':>10} | {'-':>10}")
+            continue
+        encoded = codec.encode(REQUEST, name)
+
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            codec.encode(REQUEST, name)
+        encode_rate = MESSAGES / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            codec.decode(encoded)
+        decode_rate = MESSAGES / (time.perf_counter() - started)
+
+        print(f"{name:>9} | {len(encoded):>6} | {encode_rate:>10.0f} | {decode_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark narzutu pojedynczego kroku z wtyczką lokalną w Chain Engine.
+Porównuje dawną ścieżkę (import modułu i nowa instancja przy każdym kroku)
+z instancjami wtyczek trzymanymi w cache'u.
+
+Uruchomienie:
+    python benchmarks/bench_local_step.py
+"""
+
+import os
+import sys
+import logging
+import importlib
+import timeit
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+ITERATIONS = 100000
+PLUGIN_NAME = "UppercasePlugin"
+CONFIG = {"keys": ["message"]}
+PAYLOAD = {"message": "hello", "value": 42}
+
+
+def uncached_step(plugin_name, data, config):
+    """
+    Dawna implementacja kroku - nazwa modułu, import, getattr i nowa instancja za każdym razem.
+    """
+    module_name = "".join(
+        ["_" + c.lower() if c.isupper() else c for c in plugin_name]
+    ).lstrip("_")
+    module = importlib.import_module(f"plugins.{module_name}")
+    plugin_class = getattr(module, plugin_name)
+    plugin = plugin_class(config)
+    return plugin.process(data)
+
+
+def main():
+    engine = ChainEngine(chains_file=os.devnull)
+
+    before = timeit.timeit(
+        lambda: uncached_step(PLUGIN_NAME, PAYLOAD, CONFIG), number=ITERATIONS
+    )
+    after = timeit.timeit(
+        lambda: engine._run_local_plugin(PLUGIN_NAME, PAYLOAD, CONFIG),
+        number=ITERATIONS,
+    )
+
+    # Sam czas process() - punkt odniesienia do wyliczenia narzutu kroku
+    plugin = engine._get_plugin_instance(PLUGIN_NAME, CONFIG)
+    process_only = timeit.timeit(lambda: plugin.process(PAYLOAD), number=ITERATIONS)
+
+    print(f"{'wariant':>20} | {'krok [us]':>10} | {'narzut [us]':>11}")
+    print("-" * 47)
+    for label, total in (
+        ("bez cache (przed)", before),
+        ("z cache (po)", after),
+        ("samo process()", process_only),
+    ):
+        print(
+            f"{label:>20} | {total / ITERATIONS * 1e6:>10.3f} | "
+            f"{(total - process_only) / ITERATIONS * 1e6:>11.3f}"
+        )
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
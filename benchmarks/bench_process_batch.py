@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark przetwarzania mikro-paczek przez kroki z process_batch().
+Porównuje koszt na wiadomość dla chaina z UppercasePlugin przy paczkach
+1, 64 i 1024 elementów z uruchamianiem chaina osobno dla każdej wiadomości.
+
+Uruchomienie:
+    python benchmarks/bench_process_batch.py
+"""
+
+import os
+import sys
+import logging
+import time
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 65536
+BATCH_SIZES = (1, 64, 1024)
+PAYLOAD = {"message": "hello", "device": "sensor-1", "value": 42}
+
+
+def main():
+    engine = ChainEngine(chains_file=os.devnull)
+    engine.chains = {
+        "bench": {
+            "trigger": "bench",
+            "steps": [{"plugin": "UppercasePlugin"}, {"plugin": "UppercasePlugin"}],
+        }
+    }
+    engine._rebuild_trigger_index()
+    payloads = [dict(PAYLOAD, n=i) for i in range(MESSAGES)]
+
+    started = time.perf_counter()
+    for payload in payloads:
+        engine.run_chains("bench", payload)
+    baseline = (time.perf_counter() - started) / MESSAGES
+
+    print(f"{'paczka':>10} | {'na wiadomość [us]':>17} | {'przyspieszenie':>14}")
+    print("-" * 48)
+    print(f"{'run_chains':>10} | {baseline * 1e6:>17.2f} | {1.0:>13.2f}x")
+
+    for size in BATCH_SIZES:
+        started = time.perf_counter()
+        for offset in range(0, MESSAGES, size):
+            engine.run_chains_batch("bench", payloads[offset:offset + size])
+        per_message = (time.perf_counter() - started) / MESSAGES
+        print(f"{size:>10} | {per_message * 1e6:>17.2f} | {baseline / per_message:>13.2f}x")
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark przepustowości chaina z wtyczką obciążającą CPU.
+Porównuje wykonywanie w wątkach (ograniczone przez GIL) z pulą procesów
+(`execution: process`) przy równoległym przetwarzaniu wiadomości.
+
+Uruchomienie:
+    python benchmarks/bench_process_pool.py
+"""
+
+import os
+import sys
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 64
+ROUNDS = 200000
+
+
+class CpuHeavyPlugin(BasePlugin):
+    """
+    Wtyczka obciążająca CPU (pętla w czystym Pythonie trzymająca GIL).
+    """
+
+    def process(self, data, params=None):
+        total = 0
+        for i in range(ROUNDS):
+            total = (total + i * i) % 1000003
+        result = dict(data)
+        result["checksum"] = total
+        return result
+
+
+def run(execution, workers):
+    """
+    Przetwarza serię wiadomości i zwraca liczbę wiadomości na sekundę.
+    """
+    engine = ChainEngine(chains_file=os.devnull, config={"process_pool": {"workers": workers}})
+    engine.plugin_classes["CpuHeavyPlugin"] = CpuHeavyPlugin
+    engine.chains = {
+        "bench": {
+            "trigger": "bench",
+            "steps": [{"plugin": "CpuHeavyPlugin", "config": {"execution": execution}}],
+        }
+    }
+    engine._rebuild_trigger_index()
+
+    # Rozgrzewka - uruchomienie procesów roboczych
+    engine.run_chain("bench", {"n": -1})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as executor:
+        list(executor.map(lambda i: engine.run_chain("bench", {"n": i}), range(MESSAGES)))
+    elapsed = time.perf_counter() - started
+
+    engine.shutdown()
+    return MESSAGES / elapsed
+
+
+def main():
+    cores = os.cpu_count() or 1
+    print(f"Liczba rdzeni CPU: {cores}")
+    print(f"{'wariant':>10} | {'procesy':>7} | {'wiad./s':>9}")
+    print("-" * 33)
+    print(f"{'wątki':>10} | {'-':>7} | {run('thread', cores):>9.1f}")
+    workers = 1
+    while workers <= cores:
+        print(f"{'procesy':>10} | {workers:>7} | {run('process', workers):>9.1f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark liczby round tripów MQTT na wiadomość dla kroku ze zdalną wtyczką.
+Porównuje wywołania pojedyncze (jedno żądanie na wiadomość) z trybem grupowania
+(`"batch"` w konfiguracji kroku) przy serii wiadomości przetwarzanych równolegle.
+
+Urządzenie zdalne jest symulowane - odpowiada po stałym opóźnieniu sieciowym.
+
+Uruchomienie:
+    python benchmarks/bench_remote_batching.py
+"""
+
+import os
+import sys
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+MESSAGES = 2000
+CONCURRENCY = 64
+LATENCY = 0.002  # Symulowane opóźnienie round tripu (s)
+BATCH = {"max_size": 32, "max_wait_ms": 5}
+
+
+class _Message:
+    """
+    Minimalna wiadomość MQTT (temat i treść w bajtach).
+    """
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class SimulatedMqttClient:
+    """
+    Klient MQTT symulujący zdalną wtyczkę mnożącą pole 'n' przez 10.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.publishes = 0
+        self.lock = threading.Lock()
+
+    def publish(self, topic, payload, **kwargs):
+        with self.lock:
+            self.publishes += 1
+        device_id = topic.split("/")[1]
+
+        if payload["action"] == "run_plugin_batch":
+            response = {"items": [{"data": {"n": item["n"] * 10}} for item in payload["items"]]}
+        else:
+            response = {"data": {"n": payload["data"]["n"] * 10}}
+        response["correlation_id"] = payload["correlation_id"]
+
+        msg = _Message(f"plugin/{device_id}/output", json.dumps(response).encode())
+        timer = threading.Timer(LATENCY, self.engine._handle_plugin_response, args=(msg,))
+        timer.daemon = True
+        timer.start()
+        return True
+
+
+def run(step_config):
+    """
+    Przetwarza serię wiadomości i zwraca (czas, liczba publikacji).
+    """
+    client = SimulatedMqttClient()
+    engine = ChainEngine(chains_file=os.devnull)
+    engine.mqtt_client = client
+    client.engine = engine
+    engine.add_chain(
+        "bench",
+        {"trigger": "bench", "steps": [{"plugin": "remote:device1:times10", "config": step_config}]},
+    )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        results = list(
+            executor.map(lambda i: engine.run_chain("bench", {"n": i}), range(MESSAGES))
+        )
+    elapsed = time.perf_counter() - started
+
+    assert results == [{"n": i * 10} for i in range(MESSAGES)]
+    engine.shutdown()
+    return elapsed, client.publishes
+
+
+def main():
+    print(f"{'wariant':>12} | {'czas [s]':>9} | {'wiad./s':>9} | {'round tripy/wiad.':>17}")
+    print("-" * 57)
+    for label, step_config in (
+        ("pojedynczo", {"timeout": 5}),
+        ("paczki", {"timeout": 5, "batch": BATCH}),
+    ):
+        elapsed, publishes = run(step_config)
+        print(
+            f"{label:>12} | {elapsed:>9.3f} | {MESSAGES / elapsed:>9.0f} | "
+            f"{publishes / MESSAGES:>17.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark wyszukiwania chaina dla triggera w Chain Engine.
+Mierzy czas get_chain_for_trigger dla rosnącej liczby chainów (10 - 10 000).
+
+Uruchomienie:
+    python benchmarks/bench_trigger_lookup.py
+"""
+
+import os
+import sys
+import logging
+import timeit
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.chain_engine import ChainEngine
+
+# Wyłączenie logowania podczas pomiarów
+logging.disable(logging.CRITICAL)
+
+CHAIN_COUNTS = [10, 100, 1000, 10000]
+LOOKUPS = 100000
+
+
+def build_engine(chain_count):
+    """
+    Tworzy silnik z podaną liczbą chainów (bez zapisu do pliku).
+
+    Args:
+        chain_count (int): Liczba chainów
+
+    Returns:
+        ChainEngine: Silnik z załadowanymi chainami
+    """
+    engine = ChainEngine(chains_file=os.devnull)
+    engine._save_chains = lambda: None
+    for i in range(chain_count):
+        engine.add_chain(
+            f"chain_{i}",
+            {"trigger": f"mqtt:core/sensor/{i}", "steps": [{"plugin": "LogPlugin"}]},
+        )
+    return engine
+
+
+def linear_lookup(engine, trigger_id):
+    """
+    Dawna implementacja - liniowe przeszukiwanie wszystkich chainów.
+    """
+    for chain_id, chain in engine.chains.items():
+        if chain.get("trigger") == trigger_id:
+            return chain_id, chain
+    return None, None
+
+
+def main():
+    print(f"{'chainy':>8} | {'indeks [us]':>12} | {'liniowo [us]':>12}")
+    print("-" * 38)
+    for chain_count in CHAIN_COUNTS:
+        engine = build_engine(chain_count)
+        # Najgorszy przypadek dla skanu liniowego - ostatni chain
+        trigger_id = f"mqtt:core/sensor/{chain_count - 1}"
+
+        indexed = timeit.timeit(
+            lambda: engine.get_chain_for_trigger(trigger_id), number=LOOKUPS
+        )
+        linear_number = max(10, LOOKUPS // chain_count)
+        linear = timeit.timeit(
+            lambda: linear_lookup(engine, trigger_id), number=linear_number
+        )
+
+        print(
+            f"{chain_count:>8} | {indexed / LOOKUPS * 1e6:>12.3f} | "
+            f"{linear / linear_number * 1e6:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł asynchronicznego (asyncio) trybu wykonywania chainów dla systemu Morris.
+Chainy czekające na zdalne wtyczki MQTT są korutynami zamiast zajętych wątków,
+dzięki czemu tysiące równoległych uruchomień nie wymagają tysięcy wątków systemowych.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import time
+
+from core.chain_engine import DEFAULT_REMOTE_TIMEOUT, ReadOnlyPayload
+from core.chain_plan import STEP_LOCAL, STEP_PROCESS, STEP_REMOTE, dag_result, join_outputs
+from core.dead_letter import capture_failures, note_failure
+from core.result_cache import MISS, should_store
+from core.step_policy import (
+    DeadlineExceeded,
+    RemotePluginError,
+    bounded_timeout,
+    check_deadline,
+    deadline_scope,
+    retry_delay,
+    time_left,
+)
+from core.streaming import DAG_STREAM_ERROR, close_stream, is_stream
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncChainEngine:
+    """
+    Asynchroniczna nakładka na ChainEngine.
+
+    Korzysta z chainów, skompilowanych planów, cache'a instancji wtyczek
+    i korelacji odpowiedzi zdalnych wtyczek silnika synchronicznego:
+    - wtyczki z `async def process` są wywoływane bezpośrednio w pętli zdarzeń,
+    - wtyczki synchroniczne są uruchamiane w puli wątków (run_in_executor),
+    - wtyczki z `execution: process` są oczekiwane na wynik z puli procesów,
+    - odpowiedzi zdalnych wtyczek są oczekiwane jako asyncio.Future.
+    """
+
+    def __init__(self, engine, executor=None):
+        """
+        Inicjalizacja asynchronicznego trybu silnika.
+
+        Args:
+            engine (ChainEngine): Silnik chainów (definicje chainów, wtyczki, klient MQTT)
+            executor (Executor, optional): Pula dla wtyczek synchronicznych.
+                                           Domyślnie pula pętli zdarzeń.
+        """
+        self.engine = engine
+        self.executor = executor
+
+    async def run_chain(self, trigger_id, payload):
+        """
+        Uruchamia chain pasujący do podanego triggera.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
+        """
+        chain_id, chain = self.engine.get_chain_for_trigger(trigger_id)
+
+        if not chain_id:
+            logger.warning(f"Nie znaleziono chaina dla triggera: {trigger_id}")
+            return payload
+
+        logger.info(f"Uruchamianie chaina '{chain_id}' dla triggera '{trigger_id}' (asyncio)")
+
+        return await self._execute_chain(chain_id, chain, payload)
+
+    async def run_chain_by_id(self, chain_id, payload):
+        """
+        Uruchamia chain o podanym identyfikatorze, niezależnie od triggera.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
+        """
+        chain = self.engine.chains.get(chain_id)
+
+        if chain is None:
+            logger.warning(f"Nie znaleziono chaina: {chain_id}")
+            return payload
+
+        return await self._execute_chain(chain_id, chain, payload)
+
+    async def run_chains(self, trigger_id, payload):
+        """
+        Uruchamia równolegle (asyncio.gather) wszystkie chainy pasujące do triggera.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            dict: Słownik {chain_id: wynik}; pusty jeśli nie znaleziono chainów
+
+        Raises:
+            DeadlineExceeded: Gdy któryś z chainów nie zakończył się przed upływem terminu
+        """
+        chains = self.engine.get_chains_for_trigger(trigger_id)
+
+        if not chains:
+            logger.warning(f"Nie znaleziono chaina dla triggera: {trigger_id}")
+            return {}
+
+        shared_payload = ReadOnlyPayload.wrap(payload)
+        results = await asyncio.gather(
+            *(self._execute_chain(chain_id, chain, shared_payload) for chain_id, chain in chains),
+            return_exceptions=True,
+        )
+
+        output = {}
+        for (chain_id, _), result in zip(chains, results):
+            if isinstance(result, DeadlineExceeded):
+                raise result
+            if isinstance(result, Exception):
+                logger.error(f"Błąd podczas wykonywania chaina '{chain_id}': {result}")
+                result = payload
+            output[chain_id] = result
+        return output
+
+    async def _execute_chain(self, chain_id, chain, payload):
+        """
+        Wykonuje chain, zapisując uruchomienie z błędem kroku w kolejce martwych
+        wiadomości silnika (jeśli jest włączona).
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
+
+        Raises:
+            DeadlineExceeded: Gdy chain nie zakończył się przed upływem terminu
+        """
+        dead_letters = self.engine.dead_letters
+        if dead_letters is None:
+            return await self._run_chain_payload(chain_id, chain, payload)
+
+        with capture_failures() as failures:
+            try:
+                return await self._run_chain_payload(chain_id, chain, payload)
+            except DeadlineExceeded as e:
+                note_failure(None, None, e)
+                raise
+            finally:
+                if failures:
+                    dead_letters.append(chain_id, payload, failures)
+
+    async def _run_chain_payload(self, chain_id, chain, payload):
+        """
+        Wykonuje kolejne kroki skompilowanego planu chaina.
+        Chain z `deadline_ms` jest anulowany (wraz z oczekującymi krokami) po upływie terminu.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
+
+        Raises:
+            DeadlineExceeded: Gdy chain nie zakończył się przed upływem terminu
+        """
+        if isinstance(payload, dict) and not isinstance(payload, ReadOnlyPayload):
+            current_data = payload.copy()
+        else:
+            current_data = payload
+
+        plan = self.engine._get_plan(chain_id, chain)
+        if plan.deadline is None:
+            return await self._run_plan(plan, current_data)
+
+        with deadline_scope(time.monotonic() + plan.deadline):
+            try:
+                return await asyncio.wait_for(self._run_plan(plan, current_data), time_left())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Upłynął termin wykonania: chain '{chain_id}'") from None
+
+    async def _run_plan(self, plan, current_data):
+        """
+        Wykonuje kroki skompilowanego planu chaina.
+
+        Args:
+            plan (ChainPlan): Plan chaina
+            current_data (dict): Dane wejściowe (kopia lub dane tylko do odczytu)
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
+        """
+        chain_id = plan.chain_id
+        chain = plan.chain
+
+        if plan.dag is not None:
+            current_data = await self._execute_dag(plan, current_data)
+        else:
+            for index, step in enumerate(plan.steps):
+                # Kontynuujemy przetwarzanie mimo błędu, aby nie przerywać całego chaina
+                current_data = await self._run_step(step, step.number, current_data)
+
+                if is_stream(current_data):
+                    # Strumień rekordów (iterator synchroniczny) przetwarzany w puli wątków
+                    loop = asyncio.get_running_loop()
+                    # Kopia kontekstu przenosi termin i zbieranie błędów kroków do wątku
+                    return await loop.run_in_executor(
+                        self.executor,
+                        contextvars.copy_context().run,
+                        self.engine._finish_stream,
+                        chain_id,
+                        chain,
+                        plan.steps[index + 1 :],
+                        current_data,
+                        step,
+                    )
+
+        logger.info(f"Zakończono przetwarzanie chaina '{chain_id}' (asyncio)")
+        return current_data
+
+    async def _execute_dag(self, plan, payload):
+        """
+        Wykonuje kroki chaina DAG - każdy krok jest korutyną czekającą na swoje zależności.
+
+        Args:
+            plan (ChainPlan): Plan chaina z węzłami grafu
+            payload (dict): Dane wejściowe
+
+        Returns:
+            dict: Wynik kroków końcowych (scalony, jeśli jest ich kilka)
+        """
+        nodes = plan.dag
+        outputs = [None] * len(nodes)
+        tasks = [None] * len(nodes)
+        roots = sum(1 for node in nodes if not node.depends_on)
+        root_input = ReadOnlyPayload.wrap(payload) if roots > 1 else payload
+
+        async def run_node(i):
+            node = nodes[i]
+            if node.depends_on:
+                await asyncio.gather(*(tasks[d] for d in set(node.depends_on)))
+                data = join_outputs(node, nodes, outputs)
+            else:
+                data = root_input
+
+            output = await self._run_step(node.step, node.step_id, data)
+            if is_stream(output):
+                close_stream(output)
+                logger.error(
+                    f"Błąd podczas wykonywania kroku {node.step_id} (plugin '{node.step.plugin}'): {DAG_STREAM_ERROR}"
+                )
+                note_failure(node.step_id, node.step.plugin, TypeError(DAG_STREAM_ERROR))
+                output = data
+            # Wynik używany przez kilka gałęzi jest współdzielony w trybie tylko do odczytu
+            outputs[i] = ReadOnlyPayload.wrap(output) if len(node.dependents) > 1 else output
+
+        # Węzły są w kolejności topologicznej - zadania zależności istnieją przed zadaniami zależnymi
+        for i in range(len(nodes)):
+            tasks[i] = asyncio.ensure_future(run_node(i))
+        await asyncio.gather(*tasks)
+
+        return dag_result(nodes, outputs)
+
+    async def _run_step(self, step, label, data):
+        """
+        Wykonuje krok planu. Po błędzie kroku uruchamiany jest krok zastępczy (`fallback`),
+        a jeśli go nie ma - błąd jest logowany, a dalej przekazywane są dane wejściowe.
+
+        Args:
+            step (PlanStep): Skompilowany krok
+            label: Numer lub identyfikator kroku (do logów)
+            data (dict): Dane wejściowe kroku
+
+        Returns:
+            dict: Wynik kroku lub dane wejściowe w przypadku błędu
+        """
+        cache = step.cache
+        key = cache.make_key(data) if cache is not None else None
+        if key is not None:
+            result = cache.get(key)
+            if result is not MISS:
+                return result
+
+        try:
+            if step.policy is None:
+                result = await self._run_step_once(step, data)
+            else:
+                result = await self._run_step_with_policy(step, label, data)
+
+        except DeadlineExceeded:
+            raise
+
+        except Exception as e:
+            if step.fallback is not None:
+                logger.warning(
+                    f"Krok {label} (plugin '{step.plugin}') nie powiódł się ({e}) - "
+                    f"uruchamianie kroku zastępczego '{step.fallback.plugin}'"
+                )
+                return await self._run_step(step.fallback, label, data)
+
+            logger.error(f"Błąd podczas wykonywania kroku {label} (plugin '{step.plugin}'): {e}")
+            note_failure(label, step.plugin, e)
+            return data
+
+        if key is not None and should_store(result, data):
+            cache.put(key, result)
+        return result
+
+    async def _run_step_once(self, step, data):
+        """
+        Wykonuje krok planu zgodnie z jego rodzajem (błąd kroku zgłasza wyjątek).
+        """
+        if step.kind == STEP_LOCAL:
+            return await self._run_local_step(step, data)
+        if step.kind == STEP_PROCESS:
+            return await asyncio.wrap_future(step.run.submit(data))
+        if step.kind == STEP_REMOTE:
+            return await self._run_remote_step(step, data)
+        return step.run(data)
+
+    async def _run_step_with_policy(self, step, label, data):
+        """
+        Wykonuje krok z limitem czasu próby i ponowieniami (`timeout_ms`, `retries`, `backoff`).
+        Próba przekraczająca limit jest anulowana - chain nie czeka na jej wynik.
+        """
+        policy = step.policy
+        label = f"{label} (plugin '{step.plugin}')"
+        attempt = 0
+        while True:
+            check_deadline(f"krok {label}")
+            attempt_deadline = (
+                time.monotonic() + policy.timeout if policy.timeout is not None else None
+            )
+            try:
+                with deadline_scope(attempt_deadline):
+                    return await asyncio.wait_for(self._run_step_once(step, data), time_left())
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                delay = retry_delay(policy, attempt, e, label)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _run_local_step(self, step, data):
+        """
+        Uruchamia krok z wtyczką lokalną - korutynę bezpośrednio, funkcję synchroniczną w puli wątków.
+        """
+        process = self.engine._get_plugin_instance(step.plugin, step.config).process
+
+        if inspect.iscoroutinefunction(process):
+            return await process(data)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, process, data)
+
+    async def _run_remote_step(self, step, data):
+        """
+        Uruchamia krok ze zdalną wtyczką MQTT i czeka na odpowiedź bez blokowania wątku.
+        Timeout, błąd wtyczki i otwarty wyłącznik zgłaszają wyjątek
+        (StepTimeout, RemotePluginError, CircuitOpenError).
+        """
+        engine = self.engine
+        if not engine.mqtt_client:
+            raise RemotePluginError("Nie można uruchomić zdalnego pluginu - brak klienta MQTT")
+
+        breaker = engine._acquire_circuit(step.device_id, step.plugin_id)
+        try:
+            response = await self._await_remote_step(step, data)
+        except BaseException:
+            # Również anulowanie (upływ terminu) zwalnia wywołanie próbne wyłącznika
+            engine._record_circuit(breaker, None)
+            raise
+
+        engine._record_circuit(breaker, response)
+        return engine._remote_response_data(step.device_id, step.plugin_id, data, response)
+
+    async def _await_remote_step(self, step, data):
+        """
+        Wysyła żądanie do zdalnej wtyczki (lub dodaje dane do paczki) i czeka na odpowiedź.
+
+        Returns:
+            dict: Odpowiedź wtyczki lub None w przypadku timeoutu
+        """
+        engine = self.engine
+        config = step.config
+        timeout = bounded_timeout(config.get("timeout", DEFAULT_REMOTE_TIMEOUT))
+
+        if config.get("batch"):
+            batcher = engine._get_remote_batcher(step.device_id, step.plugin_id, config)
+            future = batcher.submit(data)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                batcher.abandon(future)
+                return None
+
+        request_data = {
+            "action": "run_plugin",
+            "plugin_id": step.plugin_id,
+            "data": data,
+            "config": config,
+        }
+        if time_left() is not None:
+            request_data["deadline_ms"] = int(timeout * 1000)
+
+        correlation_id, future = engine._send_remote_request(step.device_id, request_data)
+        if future is None:
+            raise RemotePluginError(
+                f"Nie udało się wysłać żądania do zdalnego pluginu '{step.plugin_id}' "
+                f"na urządzeniu '{step.device_id}'"
+            )
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            engine.pending_requests.pop(correlation_id, None)
@@ -6,18 +6,194 @@ Moduł Chain Engine dla systemu Morris.
 Odpowiada za uruchamianie chainów (przepływów) w odpowiedzi na triggery.
 """
 
+import copy
 import json
 import logging
 import importlib
 import threading
-import time
 import os
-from queue import Queue
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from core import codec
+from core.circuit_breaker import FAILING_STATUSES, CircuitBreaker, CircuitOpenError
+from core.dead_letter import DeadLetterStore, capture_failures, failure_record, note_failure
+from core.durable_queue import DurableQueue
+from core.chain_plan import (
+    STEP_LOCAL,
+    STEP_PROCESS,
+    bind_process,
+    compile_chain,
+    dag_order,
+    dag_result,
+    is_dag_chain,
+    join_outputs,
+)
+from core.process_pool import PluginProcessPool
+from core.remote_batcher import RemoteBatcher
+from core.result_cache import ResultCache
+from core.run_registry import RunRegistry
+from core.step_policy import (
+    DeadlineExceeded,
+    RemotePluginError,
+    StepTimeout,
+    bounded_timeout,
+    check_deadline,
+    deadline_scope,
+    time_left,
+    validate_policy,
+)
+from core.streaming import (
+    DAG_STREAM_ERROR,
+    close_stream,
+    create_sink,
+    drain,
+    is_stream,
+    step_records,
+    stream_step,
+    validate_sink,
+)
+from core.topic_trie import TopicTrie
+from core.worker_pool import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    WorkerPool,
+)
 
 # Konfiguracja loggera
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prefiks triggerów uruchamianych przez wiadomości MQTT
+MQTT_TRIGGER_PREFIX = "mqtt:"
+
+# Trigger uruchomień ponownego wykonania z kolejki martwych wiadomości (rejestr uruchomień)
+DEAD_LETTER_REPLAY_TRIGGER = "dead-letters:replay"
+
+# Domyślny czas oczekiwania na odpowiedź zdalnej wtyczki (w sekundach)
+DEFAULT_REMOTE_TIMEOUT = 5
+
+# Domyślna konfiguracja silnika (nadpisywana przez config/engine.json)
+DEFAULT_CONFIG = {
+    # Liczba wątków do równoległego uruchamiania wielu chainów dla jednego triggera
+    "fanout_workers": 8,
+    # Liczba wątków do równoległego wykonywania niezależnych kroków chainów DAG
+    "dag_workers": 8,
+    # Pula wątków dla run_chain_async (np. wiadomości MQTT)
+    "worker_pool": {
+        "workers": 4,
+        "queue_size": 1000,
+        "overflow_policy": "block",
+        "block_timeout": 5,
+    },
+    # Mikro-paczki dla run_chain_async: kolejkowane uruchomienia tego samego triggera
+    # są przetwarzane razem (process_batch wtyczek); 1 = wyłączone
+    "micro_batch": {
+        "max_size": 1,
+    },
+    # Domyślne parametry cache'a wyników kroków `cacheable` (ttl w sekundach)
+    "result_cache": {
+        "max_size": 1024,
+        "ttl": 300,
+    },
+    # Wyłączniki (circuit breaker) zdalnych wtyczek: odsetek błędów w oknie (sekundy)
+    # otwierający wyłącznik i czas otwarcia przed wywołaniami próbnymi
+    "circuit_breaker": {
+        "enabled": True,
+        "failure_rate": 0.5,
+        "min_calls": 5,
+        "window_seconds": 30,
+        "open_seconds": 15,
+        "half_open_calls": 1,
+    },
+    # Kolejka martwych wiadomości: nieudane uruchomienia chainów zapisywane w segmentach
+    # NDJSON (rozmiary w bajtach) do ponownego wykonania
+    "dead_letter": {
+        "enabled": False,
+        "directory": "data/dead_letters",
+        "segment_bytes": 4 * 1024 * 1024,
+        "max_bytes": 64 * 1024 * 1024,
+        "fsync": False,
+    },
+    # Trwała kolejka wejściowa: dane triggerów zapisywane przed uruchomieniem chainów
+    # i przetwarzane ponownie po restarcie (fsync: always, normal lub off)
+    "inbound_queue": {
+        "enabled": False,
+        "path": "data/inbound.db",
+        "fsync": "normal",
+    },
+    # Rejestr uruchomień asynchronicznych (np. webhooki w trybie asynchronicznym):
+    # limit liczby uruchomień i czas przechowywania zakończonych (ttl w sekundach)
+    "run_registry": {
+        "max_runs": 10000,
+        "ttl": 3600,
+    },
+    # Webhooki zbiorcze (/hook/<modul>/bulk): liczba rekordów przekazywanych
+    # razem do run_chains_batch
+    "bulk_ingest": {
+        "batch_size": 256,
+    },
+    # Biblioteka kodeka JSON wiadomości MQTT: auto (orjson, msgspec lub json), orjson, msgspec, json
+    "json_codec": "auto",
+    # Kodowania żądań zdalnych wtyczek, które mogą zostać uzgodnione z ogłoszeniem wtyczki
+    # (msgpack i cbor wymagają bibliotek msgpack i cbor2); ["json"] wyłącza kodowania binarne
+    "remote_encodings": ["msgpack", "cbor", "json"],
+    # Pula procesów dla wtyczek z `execution: process` (workers: None = liczba rdzeni CPU)
+    "process_pool": {
+        "workers": None,
+    },
+}
+
+
+class ReadOnlyPayload(dict):
+    """
+    Słownik tylko do odczytu używany do współdzielenia danych wejściowych
+    między wieloma chainami uruchomionymi dla tego samego triggera.
+
+    Ochrona jest płytka - zagnieżdżone struktury nie są kopiowane.
+    Metoda copy() zwraca zwykły, modyfikowalny słownik.
+    """
+
+    @classmethod
+    def wrap(cls, payload):
+        """
+        Opakowuje słownik w ReadOnlyPayload (inne typy zwraca bez zmian).
+
+        Args:
+            payload: Dane wejściowe
+
+        Returns:
+            ReadOnlyPayload lub oryginalne dane, jeśli nie są słownikiem
+        """
+        if isinstance(payload, cls) or not isinstance(payload, dict):
+            return payload
+        return cls(payload)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Dane wejściowe współdzielone między chainami są tylko do odczytu")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
 
 class ChainEngine:
     """
@@ -25,20 +201,100 @@ class ChainEngine:
     Obsługuje uruchamianie chainów w odpowiedzi na triggery oraz przetwarzanie danych przez wtyczki.
     """
 
-    def __init__(self, mqtt_client=None, chains_file="data/chains.json"):
+    def __init__(
+        self,
+        mqtt_client=None,
+        chains_file="data/chains.json",
+        config_path="config/engine.json",
+        config=None,
+    ):
         """
         Inicjalizacja silnika chainów.
 
         Args:
             mqtt_client: Instancja klienta MQTT do komunikacji z zdalnymi wtyczkami.
             chains_file (str): Ścieżka do pliku z definicjami chainów.
+            config_path (str): Ścieżka do pliku konfiguracyjnego silnika.
+            config (dict, optional): Konfiguracja nadpisująca wartości z pliku. Domyślnie None.
         """
         self.mqtt_client = mqtt_client
         self.chains_file = chains_file
+        self.config = self._load_config(config_path, config)
+        codec.use_backend(self.config["json_codec"])
         self.chains = {}
-        self.plugins = {}
-        self.remote_responses = {}
-        self.response_queues = {}
+        # Indeks trigger -> lista identyfikatorów chainów (kolejność jak w self.chains)
+        self.trigger_index = {}
+        # Drzewo filtrów MQTT z symbolami wieloznacznymi (+, #) -> identyfikatory chainów
+        self.topic_trie = TopicTrie()
+        # Filtry tematów triggerów `mqtt:` zarejestrowane w routerze klienta MQTT
+        self.mqtt_routes = set()
+        self.lock = threading.RLock()  # Blokada dla modyfikacji chainów i indeksu
+        self.fanout_workers = self.config["fanout_workers"]
+        self.fanout_executor = None  # Tworzony przy pierwszym fan-oucie
+        self.dag_workers = self.config["dag_workers"]
+        self.dag_executor = None  # Tworzony przy pierwszym chainie DAG z równoległymi gałęziami
+
+        # Ograniczona pula wątków dla asynchronicznego uruchamiania chainów
+        pool_config = self.config["worker_pool"]
+        self.worker_pool = WorkerPool(
+            workers=pool_config["workers"],
+            queue_size=pool_config["queue_size"],
+            overflow_policy=pool_config["overflow_policy"],
+            block_timeout=pool_config["block_timeout"],
+            name="morris-chain",
+        )
+        # Mikro-paczki uruchomień asynchronicznych (trigger -> kolejka (dane, callback))
+        self.micro_batch_size = max(1, int(self.config["micro_batch"]["max_size"]))
+        self.micro_batch_queues = {}
+        self.micro_batch_scheduled = set()
+        self.micro_batch_lock = threading.Condition()
+        self.micro_batch_dropped = 0
+        self.micro_batch_rejected = 0
+        # Pula procesów dla wtyczek obciążających CPU (procesy tworzone przy pierwszym użyciu)
+        self.process_pool = PluginProcessPool(
+            workers=self.config["process_pool"]["workers"]
+        )
+        # Cache wyników kroków `cacheable` ((wtyczka, klucz konfiguracji) -> ResultCache)
+        self.result_caches = {}
+        # Skompilowane plany wykonania chainów (chain_id -> ChainPlan)
+        self.plans = {}
+        # Cache klas wtyczek lokalnych (nazwa -> klasa) rozwiązywanych przy ładowaniu chainów
+        self.plugin_classes = {}
+        # Cache instancji wtyczek lokalnych ((nazwa, klucz konfiguracji) -> instancja)
+        self.plugin_instances = {}
+        # Szybki dostęp do instancji po (nazwa, id(konfiguracji)) -> (konfiguracja, instancja)
+        self.plugin_instance_refs = {}
+        # Oczekujące żądania do zdalnych wtyczek (correlation_id -> (urządzenie, Future))
+        self.pending_requests = {}
+        # Grupowanie wywołań zdalnych wtyczek ((urządzenie, wtyczka, klucz konfiguracji) -> RemoteBatcher)
+        self.remote_batchers = {}
+        # Wyłączniki zdalnych wtyczek ((urządzenie, wtyczka) -> CircuitBreaker)
+        self.circuit_breakers = {}
+        # Plugin Manager dostarczający statusy zdalnych wtyczek (ustawiany przez set_plugin_manager)
+        self.plugin_manager = None
+        # Kolejka martwych wiadomości (None, jeśli wyłączona)
+        dead_letter_config = self.config["dead_letter"]
+        self.dead_letters = None
+        if dead_letter_config["enabled"]:
+            self.dead_letters = DeadLetterStore(
+                dead_letter_config["directory"],
+                segment_bytes=dead_letter_config["segment_bytes"],
+                max_bytes=dead_letter_config["max_bytes"],
+                fsync=dead_letter_config["fsync"],
+            )
+
+        # Trwała kolejka wejściowa (None, jeśli wyłączona)
+        inbound_config = self.config["inbound_queue"]
+        self.inbound_queue = None
+        if inbound_config["enabled"]:
+            self.inbound_queue = DurableQueue(inbound_config["path"], fsync=inbound_config["fsync"])
+        self.stopped = threading.Event()
+
+        # Statusy i wyniki uruchomień przyjętych bez oczekiwania na wynik
+        self.run_registry = RunRegistry(
+            max_runs=self.config["run_registry"]["max_runs"],
+            ttl=self.config["run_registry"]["ttl"],
+        )
 
         # Wczytanie chainów z pliku
         self.load_chains()
@@ -47,6 +303,41 @@ class ChainEngine:
         if self.mqtt_client:
             self._setup_mqtt_callbacks()
 
+        # Ponowne przetworzenie danych niepotwierdzonych przed poprzednim zatrzymaniem
+        if self.inbound_queue is not None and self.inbound_queue.recovered_ids:
+            threading.Thread(
+                target=self._recover_inbound, name="morris-inbound-recovery", daemon=True
+            ).start()
+
+    def _load_config(self, config_path, overrides=None):
+        """
+        Wczytuje konfigurację silnika z pliku JSON i łączy ją z wartościami domyślnymi.
+
+        Args:
+            config_path (str): Ścieżka do pliku konfiguracyjnego
+            overrides (dict, optional): Wartości nadpisujące konfigurację z pliku
+
+        Returns:
+            dict: Słownik z konfiguracją
+        """
+        file_config = {}
+        if config_path and os.path.exists(config_path):
+            try:
+                with open(config_path, "r") as f:
+                    file_config = json.load(f)
+            except Exception as e:
+                logger.error(f"Błąd podczas wczytywania konfiguracji silnika: {e}")
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        for source in (file_config, overrides or {}):
+            for key, value in source.items():
+                if isinstance(config.get(key), dict) and isinstance(value, dict):
+                    config[key].update(value)
+                else:
+                    config[key] = value
+
+        return config
+
     def load_chains(self):
         """
         Ładuje definicje chainów z pliku JSON.
@@ -62,12 +353,19 @@ class ChainEngine:
                 chains_data = json.load(f)
 
             # Weryfikacja i dodanie chainów
-            for chain_id, chain_definition in chains_data.items():
-                if self._validate_chain(chain_definition):
-                    self.chains[chain_id] = chain_definition
-                    logger.info(f"Załadowano chain: {chain_id}")
-                else:
-                    logger.error(f"Nieprawidłowa definicja chaina: {chain_id}")
+            with self.lock:
+                for chain_id, chain_definition in chains_data.items():
+                    if self._validate_chain(chain_definition):
+                        self.chains[chain_id] = chain_definition
+                        self.plans[chain_id] = compile_chain(
+                            self, chain_id, chain_definition
+                        )
+                        logger.info(f"Załadowano chain: {chain_id}")
+                    else:
+                        logger.error(f"Nieprawidłowa definicja chaina: {chain_id}")
+
+                # Przebudowa indeksu triggerów po wczytaniu wszystkich chainów
+                self._rebuild_trigger_index()
 
             logger.info(
                 f"Załadowano {len(self.chains)} chainów z pliku {self.chains_file}"
@@ -95,6 +393,15 @@ class ChainEngine:
             logger.error("Definicja chaina musi zawierać pole 'trigger'")
             return False
 
+        trigger_id = chain_definition["trigger"]
+        if (
+            isinstance(trigger_id, str)
+            and trigger_id.startswith(MQTT_TRIGGER_PREFIX)
+            and not TopicTrie.validate_filter(trigger_id[len(MQTT_TRIGGER_PREFIX) :])
+        ):
+            logger.error(f"Nieprawidłowy filtr tematu MQTT w triggerze: {trigger_id}")
+            return False
+
         if "steps" not in chain_definition or not isinstance(
             chain_definition["steps"], list
         ):
@@ -107,24 +414,164 @@ class ChainEngine:
                 logger.error(f"Krok {i} nie zawiera wymaganego pola 'plugin'")
                 return False
 
+            error = validate_policy(step, f"Krok {i}")
+            if error:
+                logger.error(error)
+                return False
+
+            # Krok zastępczy uruchamiany po niepowodzeniu kroku
+            fallback = step.get("fallback")
+            if fallback is not None:
+                if not isinstance(fallback, dict) or "plugin" not in fallback:
+                    logger.error(f"Krok zastępczy kroku {i} musi być słownikiem z polem 'plugin'")
+                    return False
+                error = validate_policy(fallback, f"Krok zastępczy kroku {i}")
+                if error:
+                    logger.error(error)
+                    return False
+
+        # Limity czasu, ponowienia i termin wykonania chaina
+        error = validate_policy(chain_definition, "Chain")
+        if error:
+            logger.error(error)
+            return False
+
+        # Tryb asynchroniczny webhooka (odpowiedź 202 z identyfikatorem uruchomienia)
+        if not isinstance(chain_definition.get("async", False), bool):
+            logger.error("Pole 'async' chaina musi być wartością logiczną")
+            return False
+
+        # Ujście strumienia rekordów
+        if "sink" in chain_definition:
+            error = validate_sink(chain_definition["sink"])
+            if error:
+                logger.error(error)
+                return False
+
+        # Chainy DAG - unikalne identyfikatory, istniejące zależności, brak cykli
+        if is_dag_chain(chain_definition):
+            try:
+                dag_order(chain_definition["steps"])
+            except ValueError as e:
+                logger.error(f"Nieprawidłowy graf kroków chaina: {e}")
+                return False
+
         return True
 
     def get_chain_for_trigger(self, trigger_id):
         """
         Znajduje chain pasujący do podanego triggera.
 
+        Triggery MQTT (`mqtt:<temat>`) są dopasowywane także do filtrów
+        z symbolami wieloznacznymi `+` i `#` zadeklarowanych w chainach.
+
         Args:
             trigger_id (str): Identyfikator triggera
 
         Returns:
             tuple: (chain_id, chain_definition) lub (None, None) jeśli nie znaleziono
         """
-        for chain_id, chain in self.chains.items():
-            if chain.get("trigger") == trigger_id:
+        for chain_id in self._match_trigger(trigger_id):
+            chain = self.chains.get(chain_id)
+            if chain is not None:
                 return chain_id, chain
 
         return None, None
 
+    def _match_trigger(self, trigger_id):
+        """
+        Zwraca identyfikatory chainów pasujących do triggera.
+        Najpierw dokładne dopasowania z indeksu, następnie dopasowania
+        filtrów MQTT z drzewa tematów.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+
+        Returns:
+            list: Lista identyfikatorów chainów
+        """
+        chain_ids = self.trigger_index.get(trigger_id, [])
+
+        if self.topic_trie.size and trigger_id.startswith(MQTT_TRIGGER_PREFIX):
+            wildcard_ids = self.topic_trie.match(trigger_id[len(MQTT_TRIGGER_PREFIX) :])
+            if wildcard_ids:
+                chain_ids = list(dict.fromkeys(chain_ids + wildcard_ids))
+
+        return chain_ids
+
+    def _rebuild_trigger_index(self):
+        """
+        Buduje od nowa indeks triggerów na podstawie wszystkich chainów.
+        """
+        index = {}
+        topic_trie = TopicTrie()
+        for chain_id, chain in self.chains.items():
+            trigger_id = chain.get("trigger")
+            index.setdefault(trigger_id, []).append(chain_id)
+            if self._is_wildcard_trigger(trigger_id):
+                topic_trie.insert(trigger_id[len(MQTT_TRIGGER_PREFIX) :], chain_id)
+
+        # Podmiana całych struktur - czytelnicy widzą stary albo nowy indeks
+        self.trigger_index = index
+        self.topic_trie = topic_trie
+        self._sync_mqtt_routes()
+
+    @staticmethod
+    def _is_wildcard_trigger(trigger_id):
+        """
+        Sprawdza, czy trigger jest filtrem MQTT z symbolami wieloznacznymi.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+
+        Returns:
+            bool: True jeśli trigger to `mqtt:` z `+` lub `#`
+        """
+        return (
+            isinstance(trigger_id, str)
+            and trigger_id.startswith(MQTT_TRIGGER_PREFIX)
+            and TopicTrie.is_wildcard(trigger_id)
+        )
+
+    def _index_chain(self, chain_id, trigger_id):
+        """
+        Dodaje chain do indeksu triggerów.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            trigger_id (str): Trigger chaina
+        """
+        chain_ids = self.trigger_index.get(trigger_id, [])
+        if chain_id not in chain_ids:
+            # Nowa lista zamiast modyfikacji w miejscu (bezpieczne dla czytelników)
+            self.trigger_index[trigger_id] = chain_ids + [chain_id]
+
+        if self._is_wildcard_trigger(trigger_id):
+            self.topic_trie.insert(trigger_id[len(MQTT_TRIGGER_PREFIX) :], chain_id)
+        self._sync_mqtt_routes()
+
+    def _unindex_chain(self, chain_id, trigger_id):
+        """
+        Usuwa chain z indeksu triggerów.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            trigger_id (str): Trigger chaina
+        """
+        if self._is_wildcard_trigger(trigger_id):
+            self.topic_trie.remove(trigger_id[len(MQTT_TRIGGER_PREFIX) :], chain_id)
+
+        chain_ids = self.trigger_index.get(trigger_id)
+        if not chain_ids or chain_id not in chain_ids:
+            return
+
+        remaining = [cid for cid in chain_ids if cid != chain_id]
+        if remaining:
+            self.trigger_index[trigger_id] = remaining
+        else:
+            del self.trigger_index[trigger_id]
+            self._sync_mqtt_routes()
+
     def add_chain(self, chain_id, chain_definition):
         """
         Dodaje nowy chain do systemu.
@@ -140,7 +587,20 @@ class ChainEngine:
             logger.error(f"Nie można dodać chaina {chain_id} - nieprawidłowa definicja")
             return False
 
-        self.chains[chain_id] = chain_definition
+        with self.lock:
+            previous = self.chains.get(chain_id)
+            trigger_id = chain_definition.get("trigger")
+            if previous is not None and previous.get("trigger") != trigger_id:
+                self._unindex_chain(chain_id, previous.get("trigger"))
+
+            self.chains[chain_id] = chain_definition
+            self._index_chain(chain_id, trigger_id)
+            self.plans[chain_id] = compile_chain(self, chain_id, chain_definition)
+
+        if previous is not None:
+            self._release_plugin_instances(only_unused=True)
+            self._release_remote_batchers()
+
         logger.info(f"Dodano chain: {chain_id}")
 
         # Zapisanie zaktualizowanych chainów do pliku
@@ -158,11 +618,18 @@ class ChainEngine:
         Returns:
             bool: True jeśli usunięcie się powiodło, False w przeciwnym wypadku
         """
-        if chain_id not in self.chains:
-            logger.warning(f"Nie można usunąć chaina {chain_id} - nie istnieje")
-            return False
+        with self.lock:
+            if chain_id not in self.chains:
+                logger.warning(f"Nie można usunąć chaina {chain_id} - nie istnieje")
+                return False
+
+            chain = self.chains.pop(chain_id)
+            self.plans.pop(chain_id, None)
+            self._unindex_chain(chain_id, chain.get("trigger"))
+
+        self._release_plugin_instances(only_unused=True)
+        self._release_remote_batchers()
 
-        del self.chains[chain_id]
         logger.info(f"Usunięto chain: {chain_id}")
 
         # Zapisanie zaktualizowanych chainów do pliku
@@ -188,6 +655,24 @@ class ChainEngine:
         except Exception as e:
             logger.error(f"Błąd podczas zapisywania chainów: {e}")
 
+    def get_chains_for_trigger(self, trigger_id):
+        """
+        Znajduje wszystkie chainy pasujące do podanego triggera.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+
+        Returns:
+            list: Lista krotek (chain_id, chain_definition); pusta jeśli nie znaleziono
+        """
+        chains = []
+        for chain_id in self._match_trigger(trigger_id):
+            chain = self.chains.get(chain_id)
+            if chain is not None:
+                chains.append((chain_id, chain))
+
+        return chains
+
     def run_chain(self, trigger_id, payload):
         """
         Uruchamia chain pasujący do podanego triggera.
@@ -208,338 +693,1973 @@ class ChainEngine:
 
         logger.info(f"Uruchamianie chaina '{chain_id}' dla triggera '{trigger_id}'")
 
-        # Kopia danych wejściowych, aby nie modyfikować oryginału
-        current_data = payload.copy() if isinstance(payload, dict) else payload
-
-        # Wykonanie każdego kroku w chainie
-        for step_index, step in enumerate(chain.get("steps", [])):
-            plugin_name = step.get("plugin", "")
-            plugin_config = step.get("config", {})
-
-            logger.info(f"Krok {step_index+1}: Uruchamianie pluginu '{plugin_name}'")
-
-            try:
-                # Sprawdzenie, czy to plugin lokalny czy zdalny
-                if ":" in plugin_name:
-                    # Plugin zdalny (np. "remote:device1:temperature")
-                    current_data = self._run_remote_plugin(
-                        plugin_name, current_data, plugin_config
-                    )
-                else:
-                    # Plugin lokalny
-                    current_data = self._run_local_plugin(
-                        plugin_name, current_data, plugin_config
-                    )
-
-            except Exception as e:
-                logger.error(
-                    f"Błąd podczas wykonywania kroku {step_index+1} (plugin '{plugin_name}'): {e}"
-                )
-                # Kontynuujemy przetwarzanie mimo błędu, aby nie przerywać całego chaina
-
-        logger.info(f"Zakończono przetwarzanie chaina '{chain_id}'")
-        return current_data
+        return self._execute_chain(chain_id, chain, payload)
 
-    def run_chain_async(self, trigger_id, payload, callback=None):
+    def run_chain_by_id(self, chain_id, payload):
         """
-        Asynchronicznie uruchamia chain pasujący do podanego triggera.
+        Uruchamia chain o podanym identyfikatorze, niezależnie od triggera.
 
         Args:
-            trigger_id (str): Identyfikator triggera
+            chain_id (str): Identyfikator chaina
             payload (dict): Dane wejściowe do przetworzenia
-            callback (function, optional): Funkcja wywoływana po zakończeniu przetwarzania
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
         """
+        chain = self.chains.get(chain_id)
 
-        def _run_chain_thread():
-            result = self.run_chain(trigger_id, payload)
-            if callback:
-                callback(result)
+        if chain is None:
+            logger.warning(f"Nie znaleziono chaina: {chain_id}")
+            return payload
 
-        # Uruchomienie przetwarzania w osobnym wątku
-        thread = threading.Thread(target=_run_chain_thread)
-        thread.daemon = True
-        thread.start()
+        logger.info(f"Uruchamianie chaina '{chain_id}'")
 
-        logger.info(
-            f"Uruchomiono asynchroniczne przetwarzanie chaina dla triggera '{trigger_id}'"
-        )
+        return self._execute_chain(chain_id, chain, payload)
 
-    def _run_local_plugin(self, plugin_name, data, config):
+    def run_chains(self, trigger_id, payload, started_at=None):
         """
-        Uruchamia lokalny plugin.
+        Uruchamia wszystkie chainy pasujące do podanego triggera (fan-out).
+        Chainy wykonywane są równolegle w ograniczonej puli wątków, a dane
+        wejściowe są współdzielone między nimi w trybie tylko do odczytu.
 
         Args:
-            plugin_name (str): Nazwa pluginu
-            data (dict): Dane wejściowe
-            config (dict): Konfiguracja pluginu
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+            started_at (float, optional): Chwila przyjęcia uruchomienia (time.monotonic()),
+                                          od której liczony jest termin chainów z `deadline_ms`
 
         Returns:
-            dict: Wynik przetwarzania przez plugin
+            dict: Słownik {chain_id: wynik}; pusty jeśli nie znaleziono chainów
+
+        Raises:
+            DeadlineExceeded: Gdy któryś z chainów nie zakończył się przed upływem terminu
+                              (przy kilku chainach - po zakończeniu pozostałych)
         """
-        try:
-            # Konwersja nazwy pluginu z PascalCase na snake_case dla importu
-            module_name = "".join(
-                ["_" + c.lower() if c.isupper() else c for c in plugin_name]
-            ).lstrip("_")
-            module_path = f"plugins.{module_name}"
+        chains = self.get_chains_for_trigger(trigger_id)
 
-            logger.info(f"Próba importu modułu: {module_path}")
-            module = importlib.import_module(module_path)
+        if not chains:
+            logger.warning(f"Nie znaleziono chaina dla triggera: {trigger_id}")
+            return {}
 
-            # Utworzenie instancji pluginu
-            plugin_class = getattr(module, plugin_name)
-            logger.info(f"Tworzenie instancji pluginu: {plugin_name}")
-            plugin = plugin_class(config)
+        logger.info(
+            f"Uruchamianie {len(chains)} chainów dla triggera '{trigger_id}': "
+            f"{', '.join(chain_id for chain_id, _ in chains)}"
+        )
 
-            # Uruchomienie pluginu
-            logger.info(f"Uruchamianie pluginu: {plugin_name}")
-            result = plugin.process(data)
+        # Pojedynczy chain wykonujemy w bieżącym wątku na kopii danych (jak run_chain),
+        # więc wtyczki mogą modyfikować swoje dane wejściowe
+        if len(chains) == 1:
+            chain_id, chain = chains[0]
+            return {chain_id: self._execute_chain(chain_id, chain, payload, started_at)}
 
-            return result
+        # Jedna współdzielona kopia tylko do odczytu zamiast kopii dla każdego chaina
+        shared_payload = ReadOnlyPayload.wrap(payload)
 
-        except ImportError as e:
-            logger.error(f"Nie można zaimportować pluginu: {plugin_name}. Błąd: {e}")
-            return data
+        executor = self._get_fanout_executor()
+        futures = {
+            chain_id: executor.submit(
+                self._execute_chain, chain_id, chain, shared_payload, started_at
+            )
+            for chain_id, chain in chains
+        }
 
-        except AttributeError as e:
-            logger.error(f"Nie znaleziono klasy pluginu '{plugin_name}': {e}")
-            return data
+        results = {}
+        expired = None
+        for chain_id, future in futures.items():
+            try:
+                results[chain_id] = future.result()
+            except DeadlineExceeded as e:
+                # Upływ terminu zgłaszany jak przy pojedynczym chainie, a nie jako wynik
+                expired = expired or e
+            except Exception as e:
+                logger.error(f"Błąd podczas wykonywania chaina '{chain_id}': {e}")
+                results[chain_id] = payload
 
-        except Exception as e:
-            logger.error(f"Błąd podczas uruchamiania pluginu '{plugin_name}': {e}")
-            return data
+        if expired is not None:
+            raise expired
+        return results
 
-    def _run_remote_plugin(self, plugin_name, data, config):
+    def _get_fanout_executor(self):
         """
-        Uruchamia zdalny plugin poprzez MQTT.
-
-        Args:
-            plugin_name (str): Nazwa pluginu w formacie "remote:device:plugin"
-            data (dict): Dane wejściowe
-            config (dict): Konfiguracja pluginu
+        Zwraca (tworząc przy pierwszym użyciu) pulę wątków dla fan-outu chainów.
 
         Returns:
-            dict: Wynik przetwarzania przez plugin
+            ThreadPoolExecutor: Pula wątków o ograniczonym rozmiarze
         """
-        if not self.mqtt_client:
-            logger.error("Nie można uruchomić zdalnego pluginu - brak klienta MQTT")
-            return data
-
-        try:
-            # Parsowanie nazwy pluginu
-            parts = plugin_name.split(":")
-            if len(parts) < 3:
-                logger.error(f"Nieprawidłowa nazwa zdalnego pluginu: {plugin_name}")
-                return data
+        if self.fanout_executor is None:
+            with self.lock:
+                if self.fanout_executor is None:
+                    self.fanout_executor = ThreadPoolExecutor(
+                        max_workers=self.fanout_workers,
+                        thread_name_prefix="morris-fanout",
+                    )
+        return self.fanout_executor
 
-            device_id = parts[1]
-            plugin_id = parts[2]
+    def _execute_chain(self, chain_id, chain, payload, started_at=None, failures=None):
+        """
+        Wykonuje kolejne kroki chaina na danych wejściowych. Przy włączonej kolejce
+        martwych wiadomości uruchomienie z błędem kroku (lub po upływie terminu)
+        jest w niej zapisywane razem z danymi wejściowymi.
 
-            # Przygotowanie danych do wysłania
-            request_data = {
-                "action": "run_plugin",
-                "plugin_id": plugin_id,
-                "data": data,
-                "config": config,
-            }
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+            payload (dict): Dane wejściowe do przetworzenia
+            started_at (float, optional): Chwila przyjęcia uruchomienia (time.monotonic())
+            failures (list, optional): Lista, do której dopisywane są błędy kroków uruchomienia
 
-            # Publikacja żądania
-            topic = f"plugin/{device_id}/input"
-            self.mqtt_client.publish(topic=topic, payload=request_data)
+        Returns:
+            dict: Wynik przetwarzania przez chain
 
-            logger.info(f"Wysłano żądanie do zdalnego pluginu '{plugin_name}'")
+        Raises:
+            DeadlineExceeded: Gdy chain nie zakończył się przed upływem terminu
+        """
+        if self.dead_letters is None and failures is None:
+            return self._run_chain_payload(chain_id, chain, payload, started_at)
 
-            # UWAGA: W obecnej implementacji nie czekamy na odpowiedź od zdalnego pluginu
-            # W przyszłości można dodać mechanizm oczekiwania na odpowiedź
+        with capture_failures() as captured:
+            try:
+                return self._run_chain_payload(chain_id, chain, payload, started_at)
+            except DeadlineExceeded as e:
+                note_failure(None, None, e)
+                raise
+            finally:
+                if failures is not None:
+                    failures.extend(captured)
+                if captured and self.dead_letters is not None:
+                    self.dead_letters.append(chain_id, payload, captured)
+
+    def _run_chain_payload(self, chain_id, chain, payload, started_at=None):
+        """
+        Wykonuje kolejne kroki chaina na danych wejściowych.
+        Dla chainów z `deadline_ms` uruchomienie jest przerywane po upływie terminu.
 
-            return data
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+            payload (dict): Dane wejściowe do przetworzenia
+            started_at (float, optional): Chwila przyjęcia uruchomienia (time.monotonic());
+                                          domyślnie początek wykonania
 
-        except Exception as e:
-            logger.error(
-                f"Błąd podczas uruchamiania zdalnego pluginu '{plugin_name}': {e}"
-            )
-            return data
+        Returns:
+            dict: Wynik przetwarzania przez chain
 
-    def _handle_plugin_response(self, msg):
+        Raises:
+            DeadlineExceeded: Gdy chain nie zakończył się przed upływem terminu
         """
-        Obsługuje odpowiedź od zdalnej wtyczki.
+        # Kopia danych wejściowych, aby nie modyfikować oryginału.
+        # Dane współdzielone (ReadOnlyPayload) nie wymagają kopii - nie da się ich zmienić.
+        if isinstance(payload, dict) and not isinstance(payload, ReadOnlyPayload):
+            current_data = payload.copy()
+        else:
+            current_data = payload
+
+        plan = self._get_plan(chain_id, chain)
+        if plan.deadline is None:
+            return self._run_plan(plan, current_data)
+
+        if started_at is None:
+            started_at = time.monotonic()
+        with deadline_scope(started_at + plan.deadline):
+            return self._run_plan(plan, current_data)
+
+    def _run_plan(self, plan, current_data):
+        """
+        Wykonuje kroki skompilowanego planu chaina.
 
         Args:
-            msg: Wiadomość MQTT zawierająca odpowiedź od zdalnej wtyczki
+            plan (ChainPlan): Plan chaina
+            current_data (dict): Dane wejściowe (kopia lub dane tylko do odczytu)
+
+        Returns:
+            dict: Wynik przetwarzania przez chain
         """
-        try:
-            # Parsowanie tematu wiadomości
-            topic_parts = msg.topic.split("/")
-            if len(topic_parts) < 3:
-                logger.error(f"Nieprawidłowy format tematu odpowiedzi: {msg.topic}")
-                return
+        chain_id = plan.chain_id
+        if plan.dag is not None:
+            current_data = self._execute_dag(plan, current_data)
+            logger.info(f"Zakończono przetwarzanie chaina '{chain_id}'")
+            return current_data
 
-            device_id = topic_parts[1]
-            response_key = f"plugin/{device_id}"
+        log_steps = logger.isEnabledFor(logging.DEBUG)
+        deadline_label = f"chain '{chain_id}'" if plan.deadline is not None else None
+
+        # Wykonanie każdego kroku skompilowanego planu
+        for index, step in enumerate(plan.steps):
+            if log_steps:
+                logger.debug(f"Krok {step.number}: Uruchamianie pluginu '{step.plugin}'")
+
+            if deadline_label:
+                check_deadline(deadline_label)
 
-            # Parsowanie treści wiadomości
             try:
-                payload = json.loads(msg.payload.decode())
-            except json.JSONDecodeError:
+                current_data = step.run(current_data)
+
+            except DeadlineExceeded:
+                raise
+
+            except Exception as e:
                 logger.error(
-                    f"Otrzymana odpowiedź nie jest poprawnym JSON: {msg.payload}"
+                    f"Błąd podczas wykonywania kroku {step.number} (plugin '{step.plugin}'): {e}"
                 )
-                return
-
-            logger.debug(
-                f"Otrzymano odpowiedź od zdalnej wtyczki {device_id}: {payload}"
-            )
+                note_failure(step.number, step.plugin, e)
+                # Kontynuujemy przetwarzanie mimo błędu, aby nie przerywać całego chaina
+                continue
 
-            # Jeśli istnieje kolejka dla tej wtyczki, dodaj odpowiedź
-            if response_key in self.response_queues:
-                self.response_queues[response_key].put(payload)
+            if is_stream(current_data):
+                # Krok zwrócił strumień rekordów - pozostałe kroki przetwarzają go rekord po rekordzie
+                return self._finish_stream(
+                    chain_id, plan.chain, plan.steps[index + 1 :], current_data, step
+                )
 
-            # Zapisz odpowiedź w słowniku (dla kompatybilności)
-            self.remote_responses[response_key] = payload
+        if deadline_label:
+            # Ostatni krok mógł zwrócić dane wejściowe po timeoucie wywołanym upływem terminu
+            check_deadline(deadline_label)
 
-        except Exception as e:
-            logger.error(
-                f"Błąd podczas przetwarzania odpowiedzi od zdalnej wtyczki: {e}"
-            )
+        logger.info(f"Zakończono przetwarzanie chaina '{chain_id}'")
+        return current_data
 
-    def _setup_mqtt_callbacks(self):
+    def _finish_stream(self, chain_id, chain, steps, records, source=None):
         """
-        Konfiguruje callbacki MQTT dla obsługi odpowiedzi od zdalnych wtyczek.
-        """
-        if not self.mqtt_client:
-            logger.warning("Brak klienta MQTT - nie można skonfigurować callbacków")
-            return
-
-        # Sprawdzenie, czy klient MQTT jest już zainicjalizowany
-        if not hasattr(self.mqtt_client, "client") or self.mqtt_client.client is None:
-            logger.warning(
-                "Klient MQTT nie jest jeszcze zainicjalizowany - callbacki zostaną skonfigurowane później"
-            )
-            return
+        Przepuszcza strumień rekordów przez pozostałe kroki chaina do ujścia (sink).
 
-        # Zapisanie oryginalnego callbacka
-        original_on_message = self.mqtt_client.client.on_message
-
-        # Utworzenie wrappera dla callbacka on_message
-        def on_message_wrapper(client, userdata, msg):
-            # Sprawdzenie, czy wiadomość jest odpowiedzią od zdalnej wtyczki
-            if msg.topic.startswith("plugin/") and msg.topic.endswith("/output"):
-                self._handle_plugin_response(msg)
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina (pole 'sink' określa ujście, domyślnie collect)
+            steps (tuple): Kroki planu pozostałe do wykonania
+            records (Iterator): Strumień rekordów
+            source (PlanStep, optional): Krok, który zwrócił strumień (błędy generatora
+                                         są zapisywane jako jego błędy)
 
-            # Wywołanie oryginalnego callbacka
-            if original_on_message:
-                original_on_message(client, userdata, msg)
+        Returns:
+            dict: Podsumowanie ujścia (liczba rekordów; dla collect również lista rekordów)
 
-        # Ustawienie wrappera jako callbacka
-        self.mqtt_client.client.on_message = on_message_wrapper
+        Raises:
+            DeadlineExceeded: Gdy upłynął termin uruchomienia
+        """
+        if source is not None:
+            records = step_records(source, records)
+        for step in steps:
+            records = stream_step(step, records)
 
-        logger.info("Skonfigurowano callbacki MQTT dla zdalnych wtyczek")
+        summary = drain(records, create_sink(chain.get("sink"), self.mqtt_client))
+        logger.info(
+            f"Zakończono strumieniowe przetwarzanie chaina '{chain_id}' ({summary['count']} rekordów)"
+        )
+        return summary
 
-    def _process_remote_plugin(self, plugin_name, data, params=None, timeout=5):
+    def _execute_dag(self, plan, payload):
         """
-        Przetwarza dane przez zdalną wtyczkę za pomocą MQTT.
+        Wykonuje kroki chaina DAG z maksymalną równoległością.
+        Krok jest uruchamiany, gdy zakończą się wszystkie kroki z jego 'depends_on';
+        niezależne gałęzie wykonywane są równolegle w puli wątków.
 
         Args:
-            plugin_name (str): Nazwa zdalnej wtyczki (bez prefiksu 'remote:').
-            data (dict): Dane do przetworzenia.
-            params (dict, optional): Parametry dla wtyczki. Domyślnie None.
-            timeout (int, optional): Maksymalny czas oczekiwania na odpowiedź w sekundach. Domyślnie 5.
+            plan (ChainPlan): Plan chaina z węzłami grafu
+            payload (dict): Dane wejściowe (kopia lub dane tylko do odczytu)
 
         Returns:
-            dict: Przetworzone dane lub oryginalne dane w przypadku błędu.
+            dict: Wynik kroków końcowych (scalony, jeśli jest ich kilka)
         """
-        if not self.mqtt_client:
-            logger.error(
-                f"Brak klienta MQTT. Nie można wywołać zdalnej wtyczki {plugin_name}."
-            )
-            return data
+        nodes = plan.dag
+        outputs = [None] * len(nodes)
+        remaining = [len(set(node.depends_on)) for node in nodes]
+        ready = [i for i, count in enumerate(remaining) if count == 0]
 
-        # Przygotowanie danych do wysłania
-        request_data = {"data": data, "params": params or {}}
+        # Wiele kroków początkowych współdzieli dane wejściowe w trybie tylko do odczytu
+        root_input = ReadOnlyPayload.wrap(payload) if len(ready) > 1 else payload
 
-        # Klucz dla odpowiedzi
-        response_key = f"plugin/{plugin_name}"
+        deadline_label = f"chain '{plan.chain_id}'" if plan.deadline is not None else None
+        running = {}
+        try:
+            while ready or running:
+                if deadline_label:
+                    check_deadline(deadline_label)
+                finished = self._advance_dag(nodes, ready, running, outputs, root_input)
+
+                for i in finished:
+                    dependents = nodes[i].dependents
+                    # Wynik używany przez kilka gałęzi jest współdzielony w trybie tylko do odczytu
+                    if len(dependents) > 1:
+                        outputs[i] = ReadOnlyPayload.wrap(outputs[i])
+                    for dependent in dependents:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+
+        except DeadlineExceeded:
+            # Gałęzie, które nie zdążyły się rozpocząć, nie zajmą puli wątków
+            for future in running:
+                future.cancel()
+            raise
+
+        if deadline_label:
+            check_deadline(deadline_label)
+        return dag_result(nodes, outputs)
+
+    def _advance_dag(self, nodes, ready, running, outputs, root_input):
+        """
+        Uruchamia gotowe kroki chaina DAG i czeka na zakończenie co najmniej jednego z nich.
 
-        # Utworzenie kolejki dla odpowiedzi
-        response_queue = Queue()
-        self.response_queues[response_key] = response_queue
+        Args:
+            nodes (tuple): Węzły grafu kroków
+            ready (list): Indeksy kroków gotowych do uruchomienia (opróżniana)
+            running (dict): Uruchomione kroki {Future: indeks} (aktualizowany)
+            outputs (list): Wyniki kroków (aktualizowana)
+            root_input (dict): Dane wejściowe chaina
 
-        # Wyczyszczenie poprzedniej odpowiedzi
-        if response_key in self.remote_responses:
-            del self.remote_responses[response_key]
+        Returns:
+            list: Indeksy zakończonych kroków
+        """
+        if len(ready) == 1 and not running:
+            # Pojedynczy gotowy krok (odcinek liniowy) - wykonanie w bieżącym wątku
+            i = ready.pop()
+            outputs[i] = self._run_dag_step(nodes[i], self._dag_input(nodes, i, outputs, root_input))
+            return [i]
+
+        executor = self._get_dag_executor()
+        for i in ready:
+            # Gałęzie dziedziczą termin uruchomienia (zmienne kontekstowe)
+            future = executor.submit(
+                contextvars.copy_context().run,
+                self._run_dag_step,
+                nodes[i],
+                self._dag_input(nodes, i, outputs, root_input),
+            )
+            running[future] = i
+        ready.clear()
+
+        done, _ = wait_futures(running, timeout=time_left(), return_when=FIRST_COMPLETED)
+        finished = []
+        for future in done:
+            i = running.pop(future)
+            outputs[i] = future.result()
+            finished.append(i)
+        return finished
+
+    @staticmethod
+    def _dag_input(nodes, i, outputs, root_input):
+        """
+        Zwraca dane wejściowe kroku DAG (dane chaina lub połączone wyniki zależności).
+        """
+        node = nodes[i]
+        if not node.depends_on:
+            return root_input
+        return join_outputs(node, nodes, outputs)
+
+    def _run_dag_step(self, node, data):
+        """
+        Wykonuje krok chaina DAG. Błąd kroku jest logowany, a dalej przekazywane są dane wejściowe.
+        """
+        step = node.step
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Krok '{node.step_id}': Uruchamianie pluginu '{step.plugin}'")
+        try:
+            output = step.run(data)
+            if is_stream(output):
+                close_stream(output)
+                raise TypeError(DAG_STREAM_ERROR)
+            return output
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Błąd podczas wykonywania kroku '{node.step_id}' (plugin '{step.plugin}'): {e}"
+            )
+            note_failure(node.step_id, step.plugin, e)
+            return data
+
+    def _get_dag_executor(self):
+        """
+        Zwraca (tworząc przy pierwszym użyciu) pulę wątków dla równoległych gałęzi chainów DAG.
+
+        Returns:
+            ThreadPoolExecutor: Pula wątków o ograniczonym rozmiarze
+        """
+        if self.dag_executor is None:
+            with self.lock:
+                if self.dag_executor is None:
+                    self.dag_executor = ThreadPoolExecutor(
+                        max_workers=self.dag_workers,
+                        thread_name_prefix="morris-dag",
+                    )
+        return self.dag_executor
+
+    def _get_plan(self, chain_id, chain):
+        """
+        Zwraca skompilowany plan chaina, kompilując go tylko gdy definicja się zmieniła.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+
+        Returns:
+            ChainPlan: Plan wykonania chaina
+        """
+        plan = self.plans.get(chain_id)
+        if plan is None or plan.chain is not chain:
+            plan = compile_chain(self, chain_id, chain)
+            if self.chains.get(chain_id) is chain:
+                self.plans[chain_id] = plan
+        return plan
+
+    def run_chain_async(self, trigger_id, payload, callback=None, block=True):
+        """
+        Asynchronicznie uruchamia wszystkie chainy pasujące do podanego triggera.
+        Zadanie trafia do ograniczonej puli wątków (worker_pool); przy pełnej kolejce
+        obowiązuje skonfigurowana polityka przepełnienia. Przy włączonych mikro-paczkach
+        (micro_batch.max_size > 1) uruchomienia czekające w kolejce są przetwarzane razem.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+            callback (function, optional): Funkcja wywoływana z wynikiem każdego chaina
+                                           po zakończeniu jego przetwarzania
+            block (bool): Czy przy polityce block czekać na miejsce w kolejce; False
+                          odrzuca uruchomienie od razu (np. wywołanie z wątku dispatchera MQTT)
+
+        Returns:
+            bool: True jeśli zadanie zostało przyjęte przez pulę, False jeśli zostało odrzucone
+        """
+
+        # Zapis w trwałej kolejce przed przyjęciem uruchomienia
+        record_id = self.persist_inbound(trigger_id, payload)
+
+        if self.micro_batch_size > 1:
+            return self._enqueue_micro_batch(trigger_id, payload, callback, record_id, block)
+
+        # Termin chainów z `deadline_ms` obejmuje czas oczekiwania w kolejce puli
+        started_at = time.monotonic()
+
+        def _run_chain_task():
+            with self._inbound_scope(record_id):
+                results = self.run_chains(trigger_id, payload, started_at)
+            if callback:
+                for result in results.values():
+                    callback(result)
+
+        # Przekazanie przetwarzania do puli wątków (porzucone przez drop_oldest - potwierdzenie wpisu)
+        accepted = self.worker_pool.submit(
+            _run_chain_task, on_drop=lambda: self.ack_inbound(record_id), block=block
+        )
+        if not accepted:
+            # Odrzucone uruchomienie nie zostanie przetworzone ponownie po restarcie
+            self.ack_inbound(record_id)
+
+        if accepted:
+            logger.info(
+                f"Zlecono asynchroniczne przetwarzanie chaina dla triggera '{trigger_id}'"
+            )
+        else:
+            logger.warning(
+                f"Pula wątków odrzuciła przetwarzanie chaina dla triggera '{trigger_id}'"
+            )
+
+        return accepted
+
+    def submit_run(self, trigger_id, payload):
+        """
+        Przyjmuje uruchomienie wszystkich chainów pasujących do triggera bez oczekiwania
+        na wynik. Zadanie trafia do puli wątków (worker_pool), a jego status i wyniki
+        są dostępne w rejestrze uruchomień (run_registry) pod zwróconym identyfikatorem.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+
+        Returns:
+            str: Identyfikator uruchomienia lub None, jeśli pula wątków odrzuciła zadanie
+                 lub rejestr uruchomień jest pełny uruchomień w toku
+        """
+        run_id = self.run_registry.create(trigger_id)
+        if run_id is None:
+            return None
+        # Zapis w trwałej kolejce przed przyjęciem uruchomienia
+        record_id = self.persist_inbound(trigger_id, payload)
+        # Termin chainów z `deadline_ms` obejmuje czas oczekiwania w kolejce puli
+        started_at = time.monotonic()
+
+        def _run_task():
+            self.run_registry.start(run_id)
+            try:
+                with self._inbound_scope(record_id):
+                    results = self.run_chains(trigger_id, payload, started_at)
+            except Exception as e:
+                logger.error(f"Błąd uruchomienia '{run_id}' dla triggera '{trigger_id}': {e}")
+                self.run_registry.finish(run_id, error=str(e))
+            else:
+                self.run_registry.finish(run_id, results=results)
+
+        def _drop_task():
+            # Uruchomienie porzucone przez pulę (drop_oldest) nie może pozostać w stanie oczekiwania
+            logger.warning(f"Pula wątków porzuciła uruchomienie '{run_id}' dla triggera '{trigger_id}'")
+            self.ack_inbound(record_id)
+            self.run_registry.finish(run_id, error="Uruchomienie porzucone - kolejka puli wątków była pełna")
+
+        if not self.worker_pool.submit(_run_task, on_drop=_drop_task):
+            logger.warning(
+                f"Pula wątków odrzuciła uruchomienie asynchroniczne dla triggera '{trigger_id}'"
+            )
+            self.ack_inbound(record_id)
+            self.run_registry.discard(run_id)
+            return None
+
+        logger.info(f"Przyjęto uruchomienie '{run_id}' dla triggera '{trigger_id}'")
+        return run_id
+
+    def get_run(self, run_id):
+        """
+        Zwraca status i wyniki uruchomienia przyjętego przez submit_run.
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+
+        Returns:
+            dict: Opis uruchomienia lub None, jeśli nie istnieje lub wygasło
+        """
+        return self.run_registry.get(run_id)
+
+    def _enqueue_micro_batch(self, trigger_id, payload, callback, record_id=None, block=True):
+        """
+        Dodaje uruchomienie do kolejki mikro-paczek triggera. Do puli wątków trafia
+        co najwyżej jedno zadanie opróżniające kolejkę danego triggera, więc przy
+        zajętych wątkach kolejne wiadomości są zbierane i przetwarzane razem.
+        Przy pełnej kolejce stosowana jest polityka przepełnienia puli wątków
+        (worker_pool.overflow_policy).
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe do przetworzenia
+            callback (function, optional): Funkcja wywoływana z wynikiem każdego chaina
+            record_id (int, optional): Identyfikator wpisu trwałej kolejki wejściowej
+            block (bool): Czy przy polityce block czekać na miejsce w kolejce
+
+        Returns:
+            bool: True jeśli uruchomienie zostało przyjęte, False jeśli zostało odrzucone
+                  lub porzucone zgodnie z polityką przepełnienia
+        """
+        queue_size = self.worker_pool.queue_size
+        policy = self.worker_pool.overflow_policy
+        dropped_id = None
+
+        with self.micro_batch_lock:
+            if len(self.micro_batch_queues.get(trigger_id, ())) >= queue_size:
+                if policy == OVERFLOW_BLOCK:
+                    has_space = block and self.micro_batch_lock.wait_for(
+                        lambda: len(self.micro_batch_queues.get(trigger_id, ())) < queue_size,
+                        timeout=self.worker_pool.block_timeout,
+                    )
+                    if not has_space:
+                        self.micro_batch_rejected += 1
+                        logger.warning(
+                            f"Kolejka mikro-paczek triggera '{trigger_id}': przekroczono czas "
+                            f"oczekiwania na miejsce"
+                        )
+                        self.ack_inbound(record_id)
+                        return False
+
+                elif policy == OVERFLOW_DROP_OLDEST:
+                    _, _, dropped_id = self.micro_batch_queues[trigger_id].popleft()
+                    self.micro_batch_dropped += 1
+                    logger.warning(
+                        f"Kolejka mikro-paczek triggera '{trigger_id}' jest pełna, "
+                        f"porzucono najstarsze zadanie"
+                    )
+
+                else:
+                    if policy == OVERFLOW_DROP_NEWEST:
+                        self.micro_batch_dropped += 1
+                    else:
+                        self.micro_batch_rejected += 1
+                    logger.warning(
+                        f"Kolejka mikro-paczek triggera '{trigger_id}' jest pełna, odrzucono zadanie"
+                    )
+                    self.ack_inbound(record_id)
+                    return False
+
+            queue = self.micro_batch_queues.setdefault(trigger_id, deque())
+            queue.append((payload, callback, record_id))
+            schedule = trigger_id not in self.micro_batch_scheduled
+            if schedule:
+                self.micro_batch_scheduled.add(trigger_id)
+
+        self.ack_inbound(dropped_id)
+        if schedule and not self._schedule_micro_batch(trigger_id, block=block):
+            with self.micro_batch_lock:
+                rejected = self.micro_batch_queues.pop(trigger_id, None) or ()
+                self.micro_batch_scheduled.discard(trigger_id)
+            for _, _, rejected_id in rejected:
+                self.ack_inbound(rejected_id)
+            logger.warning(
+                f"Pula wątków odrzuciła przetwarzanie chaina dla triggera '{trigger_id}'"
+            )
+            return False
+
+        return True
+
+    def _drain_micro_batch(self, trigger_id):
+        """
+        Przetwarza mikro-paczkę zebranych uruchomień triggera (zadanie puli wątków).
+        Jeśli w kolejce zostały kolejne uruchomienia, zgłasza następne zadanie,
+        aby nie blokować wątku kosztem innych triggerów.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+        """
+        while True:
+            with self.micro_batch_lock:
+                queue = self.micro_batch_queues.get(trigger_id)
+                if not queue:
+                    self.micro_batch_queues.pop(trigger_id, None)
+                    self.micro_batch_scheduled.discard(trigger_id)
+                    return
+                batch = [queue.popleft() for _ in range(min(len(queue), self.micro_batch_size))]
+                self.micro_batch_lock.notify_all()
+
+            logger.debug(
+                f"Przetwarzanie mikro-paczki {len(batch)} uruchomień dla triggera '{trigger_id}'"
+            )
+            with self._inbound_scope(*(record_id for _, _, record_id in batch)):
+                results = self.run_chains_batch(trigger_id, [payload for payload, _, _ in batch])
+            for (_, callback, _), chain_results in zip(batch, results):
+                if callback:
+                    for result in chain_results.values():
+                        callback(result)
+
+            # Zgłoszenie bez czekania - przy pełnej kolejce puli paczki są
+            # przetwarzane dalej w bieżącym wątku
+            with self.micro_batch_lock:
+                pending = bool(self.micro_batch_queues.get(trigger_id))
+            if pending and self._schedule_micro_batch(trigger_id, block=False):
+                return
+
+    def _schedule_micro_batch(self, trigger_id, block=True):
+        """
+        Zgłasza do puli wątków zadanie opróżniające kolejkę mikro-paczek triggera.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            block (bool): Czy przy polityce block czekać na miejsce w kolejce puli
+
+        Returns:
+            bool: True jeśli zadanie zostało przyjęte
+        """
+        return self.worker_pool.submit(
+            self._drain_micro_batch,
+            trigger_id,
+            on_drop=lambda: self._drop_micro_batch(trigger_id),
+            block=block,
+        )
+
+    def _drop_micro_batch(self, trigger_id):
+        """
+        Obsługuje zadanie opróżniające kolejkę mikro-paczek usunięte z kolejki puli
+        (polityka drop_oldest) - uruchomienia triggera są porzucane, a ich wpisy
+        trwałej kolejki potwierdzane, aby kolejne wiadomości mogły zgłosić nowe zadanie.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+        """
+        with self.micro_batch_lock:
+            dropped = self.micro_batch_queues.pop(trigger_id, None) or ()
+            self.micro_batch_scheduled.discard(trigger_id)
+            self.micro_batch_dropped += len(dropped)
+            self.micro_batch_lock.notify_all()
+        for _, _, record_id in dropped:
+            self.ack_inbound(record_id)
+        logger.warning(
+            f"Pula wątków porzuciła {len(dropped)} uruchomień z kolejki mikro-paczek triggera '{trigger_id}'"
+        )
+
+    def run_chains_batch(self, trigger_id, payloads, failures=None):
+        """
+        Uruchamia chainy pasujące do triggera dla listy danych wejściowych.
+        Kroki z wtyczkami lokalnymi otrzymują całą listę (process_batch), pozostałe
+        kroki są wykonywane dla każdego elementu. Przy kilku chainach są one
+        wykonywane równolegle w puli wątków fan-outu (jak w run_chains).
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payloads (list): Lista danych wejściowych
+            failures (list, optional): Listy (po jednej dla każdego elementu), do których
+                                       dopisywane są błędy kroków wszystkich chainów
+
+        Returns:
+            list: Lista słowników {chain_id: wynik} w kolejności danych wejściowych
+
+        Raises:
+            DeadlineExceeded: Gdy któryś z chainów nie zakończył się przed upływem terminu
+                              (przy kilku chainach - po zakończeniu pozostałych)
+        """
+        chains = self.get_chains_for_trigger(trigger_id)
+        results = [{} for _ in payloads]
+
+        if not chains:
+            logger.warning(f"Nie znaleziono chaina dla triggera: {trigger_id}")
+            return results
+
+        if len(chains) == 1:
+            chain_id, chain = chains[0]
+            outputs = self._execute_chain_batch(chain_id, chain, payloads, failures)
+            for result, output in zip(results, outputs):
+                result[chain_id] = output
+            return results
+
+        shared_payloads = [ReadOnlyPayload.wrap(payload) for payload in payloads]
+
+        executor = self._get_fanout_executor()
+        futures = {
+            chain_id: executor.submit(
+                self._execute_chain_batch, chain_id, chain, shared_payloads, failures
+            )
+            for chain_id, chain in chains
+        }
+
+        expired = None
+        for chain_id, future in futures.items():
+            try:
+                outputs = future.result()
+            except DeadlineExceeded as e:
+                expired = expired or e
+                continue
+            except Exception as e:
+                logger.error(f"Błąd podczas wykonywania chaina '{chain_id}': {e}")
+                outputs = payloads
+                if failures is not None:
+                    for item_failures in failures:
+                        item_failures.append(failure_record(None, None, e))
+            for result, output in zip(results, outputs):
+                result[chain_id] = output
+
+        if expired is not None:
+            raise expired
+        return results
+
+    def _execute_chain_batch(self, chain_id, chain, payloads, failures=None):
+        """
+        Wykonuje kroki chaina dla listy danych wejściowych.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            chain (dict): Definicja chaina
+            payloads (list): Lista danych wejściowych
+            failures (list, optional): Listy (po jednej dla każdego elementu), do których
+                                       dopisywane są błędy kroków
+
+        Returns:
+            list: Lista wyników w kolejności danych wejściowych
+        """
+        plan = self._get_plan(chain_id, chain)
+        if plan.dag is not None or plan.deadline is not None or len(payloads) == 1:
+            return [
+                self._execute_chain(
+                    chain_id, chain, payload, failures=failures[i] if failures is not None else None
+                )
+                for i, payload in enumerate(payloads)
+            ]
+
+        items = [
+            payload.copy()
+            if isinstance(payload, dict) and not isinstance(payload, ReadOnlyPayload)
+            else payload
+            for payload in payloads
+        ]
+
+        # Błędy kroków dla każdego elementu paczki (kolejka martwych wiadomości i wywołujący)
+        collect = self.dead_letters is not None or failures is not None
+        step_failures = [[] for _ in items] if collect else [None] * len(items)
+        # Indeksy elementów przetwarzanych dalej paczką (bez elementów w trybie strumieniowym)
+        active = list(range(len(items)))
+
+        for index, step in enumerate(plan.steps):
+            outputs = self._run_step_batch(
+                step, [items[i] for i in active], [step_failures[i] for i in active]
+            )
+
+            still_active = []
+            for i, output in zip(active, outputs):
+                if is_stream(output):
+                    # Krok zwrócił strumień rekordów - pozostałe kroki dla tego elementu
+                    # przetwarzają go rekord po rekordzie (jak w _run_plan)
+                    with capture_failures() as stream_failures:
+                        items[i] = self._finish_stream(
+                            chain_id, chain, plan.steps[index + 1 :], output, step
+                        )
+                    if step_failures[i] is not None:
+                        step_failures[i].extend(stream_failures)
+                else:
+                    items[i] = output
+                    still_active.append(i)
+            active = still_active
+            if not active:
+                break
+
+        for i, (payload, item_failures) in enumerate(zip(payloads, step_failures)):
+            if not item_failures:
+                continue
+            if failures is not None:
+                failures[i].extend(item_failures)
+            if self.dead_letters is not None:
+                self.dead_letters.append(chain_id, payload, item_failures)
+
+        logger.info(f"Zakończono przetwarzanie chaina '{chain_id}' dla {len(items)} uruchomień")
+        return items
+
+    def _run_step_batch(self, step, items, failures):
+        """
+        Wykonuje krok planu dla listy danych - jednym wywołaniem run_batch, jeśli krok
+        je udostępnia, a w przeciwnym razie (lub po nieudanej paczce) dla każdego elementu.
+
+        Args:
+            step (PlanStep): Skompilowany krok
+            items (list): Lista danych wejściowych
+            failures (list): Listy błędów kroków dla każdego elementu (lub None)
+
+        Returns:
+            list: Lista wyników w kolejności danych wejściowych
+        """
+        run_batch = getattr(step.run, "run_batch", None)
+        if run_batch is not None:
+            try:
+                outputs = run_batch(items)
+                if len(outputs) == len(items):
+                    return outputs
+                logger.error(
+                    f"Krok {step.number} (plugin '{step.plugin}') zwrócił {len(outputs)} wyników "
+                    f"dla {len(items)} danych wejściowych"
+                )
+            except Exception as e:
+                logger.error(
+                    f"Błąd podczas wykonywania kroku {step.number} (plugin '{step.plugin}') dla paczki: {e}"
+                )
+            # Paczka nieudana - ponowienie dla każdego elementu osobno
+
+        return [
+            self._run_step_item(step, item, item_failures)
+            for item, item_failures in zip(items, failures)
+        ]
+
+    def _run_step_item(self, step, data, failures=None):
+        """
+        Wykonuje krok planu dla pojedynczych danych (błąd kroku przekazuje dane dalej
+        i jest dopisywany do listy failures, jeśli ją podano).
+        """
+        try:
+            return step.run(data)
+        except Exception as e:
+            logger.error(
+                f"Błąd podczas wykonywania kroku {step.number} (plugin '{step.plugin}'): {e}"
+            )
+            if failures is not None:
+                failures.append(failure_record(step.number, step.plugin, e))
+            return data
+
+    def get_metrics(self):
+        """
+        Zwraca metryki pracy silnika chainów.
+
+        Returns:
+            dict: Metryki silnika (m.in. głębokość kolejki i wykorzystanie puli wątków)
+        """
+        return {
+            "chains": len(self.chains),
+            "worker_pool": self.worker_pool.get_metrics(),
+            "process_pool": self.process_pool.get_metrics(),
+            "result_cache": [
+                dict(cache.get_metrics(), plugin=plugin_name)
+                for (plugin_name, _), cache in list(self.result_caches.items())
+            ],
+            "micro_batch": {
+                "max_size": self.micro_batch_size,
+                "queued": sum(len(queue) for queue in list(self.micro_batch_queues.values())),
+                "dropped": self.micro_batch_dropped,
+                "rejected": self.micro_batch_rejected,
+            },
+            "remote_batching": {
+                f"{device_id}:{plugin_id}": batcher.get_metrics()
+                for (device_id, plugin_id, _), batcher in list(self.remote_batchers.items())
+            },
+            "circuit_breakers": {
+                breaker.name: breaker.get_metrics()
+                for breaker in list(self.circuit_breakers.values())
+            },
+            "dead_letter": self.dead_letters.get_metrics() if self.dead_letters else None,
+            "inbound_queue": self.inbound_queue.get_metrics() if self.inbound_queue else None,
+            "runs": self.run_registry.get_metrics(),
+        }
+
+    def persist_inbound(self, trigger_id, payload):
+        """
+        Zapisuje dane wejściowe triggera w trwałej kolejce wejściowej (jeśli jest włączona).
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe
+
+        Returns:
+            int: Identyfikator wpisu lub None, jeśli kolejka jest wyłączona
+        """
+        if self.inbound_queue is None:
+            return None
+        return self.inbound_queue.put(trigger_id, payload)
+
+    def ack_inbound(self, record_id):
+        """
+        Potwierdza przetworzenie wpisu trwałej kolejki wejściowej.
+
+        Args:
+            record_id (int): Identyfikator wpisu (None jest ignorowany)
+        """
+        if record_id is not None and self.inbound_queue is not None:
+            self.inbound_queue.ack(record_id)
+
+    @contextmanager
+    def durable_run(self, trigger_id, payload):
+        """
+        Zapisuje dane wejściowe w trwałej kolejce na czas przetwarzania w bloku
+        (np. synchroniczna obsługa webhooka). Wpis jest potwierdzany po zakończeniu
+        bloku, także błędem; przerwanie procesu pozostawia go do ponownego przetworzenia.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe
+        """
+        with self._inbound_scope(self.persist_inbound(trigger_id, payload)):
+            yield
+
+    @contextmanager
+    def durable_batch(self, trigger_id, payloads):
+        """
+        Odpowiednik durable_run dla paczki danych wejściowych (np. webhook zbiorczy):
+        każdy element jest zapisywany w trwałej kolejce, a wszystkie są potwierdzane
+        po zakończeniu bloku.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payloads (list): Lista danych wejściowych
+        """
+        record_ids = [self.persist_inbound(trigger_id, payload) for payload in payloads]
+        with self._inbound_scope(*record_ids):
+            yield
+
+    @contextmanager
+    def _inbound_scope(self, *record_ids):
+        """
+        Potwierdza wpisy trwałej kolejki po zakończeniu bloku (także wyjątkiem Exception).
+        Wyjątki zatrzymujące proces (KeyboardInterrupt, SystemExit) nie potwierdzają wpisów.
+        """
+        try:
+            yield
+        except Exception:
+            for record_id in record_ids:
+                self.ack_inbound(record_id)
+            raise
+        for record_id in record_ids:
+            self.ack_inbound(record_id)
+
+    def _recover_inbound(self):
+        """
+        Zgłasza do puli wątków uruchomienia niepotwierdzone przed poprzednim zatrzymaniem
+        procesu (wątek uruchamiany przy starcie silnika).
+        """
+        recovered = 0
+        for record_id, trigger_id, payload in self.inbound_queue.recover():
+            task = self._run_recovered_inbound
+            while not self.worker_pool.submit(task, record_id, trigger_id, payload):
+                # Pełna kolejka puli - ponowienie po chwili (wpis pozostaje w trwałej kolejce)
+                if self.stopped.wait(0.1):
+                    return
+            recovered += 1
+
+        logger.info(f"Zgłoszono ponowne przetworzenie {recovered} wpisów trwałej kolejki wejściowej")
+
+    def _run_recovered_inbound(self, record_id, trigger_id, payload):
+        """
+        Przetwarza odzyskany wpis trwałej kolejki wejściowej (zadanie puli wątków).
+        """
+        with self._inbound_scope(record_id):
+            self.run_chains(trigger_id, payload)
+
+    def submit_replay(self, limit=100, chain_id=None, rate=None, offset=0):
+        """
+        Przyjmuje ponowne wykonanie uruchomień z kolejki martwych wiadomości bez oczekiwania
+        na jego zakończenie. Zadanie trafia do puli wątków (worker_pool), a postęp i podsumowanie
+        są dostępne w rejestrze uruchomień (run_registry) pod zwróconym identyfikatorem.
+
+        Args:
+            limit (int): Maksymalna liczba ponawianych uruchomień
+            chain_id (str, optional): Tylko uruchomienia danego chaina
+            rate (float, optional): Maksymalna liczba uruchomień na sekundę
+            offset (int): Liczba pominiętych wpisów
+
+        Returns:
+            str: Identyfikator uruchomienia lub None, jeśli pula wątków lub rejestr
+                 uruchomień odrzuciły zadanie
+
+        Raises:
+            RuntimeError: Gdy kolejka martwych wiadomości jest wyłączona
+        """
+        if self.dead_letters is None:
+            raise RuntimeError("Kolejka martwych wiadomości jest wyłączona")
+
+        run_id = self.run_registry.create(DEAD_LETTER_REPLAY_TRIGGER)
+        if run_id is None:
+            return None
+
+        def _replay_task():
+            self.run_registry.start(run_id)
+            try:
+                summary = self.replay_dead_letters(
+                    limit=limit,
+                    chain_id=chain_id,
+                    rate=rate,
+                    offset=offset,
+                    progress=lambda summary: self.run_registry.update(run_id, summary),
+                )
+            except Exception as e:
+                logger.error(f"Błąd ponownego wykonania z kolejki martwych wiadomości: {e}")
+                self.run_registry.finish(run_id, error=str(e))
+            else:
+                self.run_registry.finish(run_id, results=summary)
+
+        def _drop_task():
+            self.run_registry.finish(
+                run_id, error="Zadanie porzucone - kolejka puli wątków była pełna"
+            )
+
+        if not self.worker_pool.submit(_replay_task, on_drop=_drop_task):
+            logger.warning("Pula wątków odrzuciła ponowne wykonanie z kolejki martwych wiadomości")
+            self.run_registry.discard(run_id)
+            return None
+
+        return run_id
+
+    def replay_dead_letters(self, limit=100, chain_id=None, rate=None, offset=0, progress=None):
+        """
+        Ponownie wykonuje uruchomienia z kolejki martwych wiadomości (od najstarszego).
+        Udane uruchomienia są usuwane z kolejki; nieudane pozostają w niej bez zmian
+        i nie są zapisywane ponownie.
+
+        Args:
+            limit (int): Maksymalna liczba ponawianych uruchomień
+            chain_id (str, optional): Tylko uruchomienia danego chaina
+            rate (float, optional): Maksymalna liczba uruchomień na sekundę
+            offset (int): Liczba pominiętych wpisów (np. nieudanych w poprzedniej paczce)
+            progress (callable, optional): Funkcja wywoływana z kopią bieżącego podsumowania
+                                           po każdym wpisie
+
+        Returns:
+            dict: Liczba udanych (replayed), nieudanych (failed) i pominiętych (skipped)
+                  uruchomień oraz liczba wpisów pozostałych w kolejce (pending)
+
+        Raises:
+            RuntimeError: Gdy kolejka martwych wiadomości jest wyłączona
+        """
+        if self.dead_letters is None:
+            raise RuntimeError("Kolejka martwych wiadomości jest wyłączona")
+
+        summary = {"replayed": 0, "failed": 0, "skipped": 0}
+        interval = 1.0 / rate if rate else 0.0
+        next_at = time.monotonic()
+
+        for entry in self.dead_letters.pending(limit=limit, chain_id=chain_id, offset=offset):
+            chain = self.chains.get(entry["chain_id"])
+            if chain is None:
+                logger.warning(
+                    f"Pominięto wpis {entry['id']} kolejki martwych wiadomości - "
+                    f"nie znaleziono chaina '{entry['chain_id']}'"
+                )
+                summary["skipped"] += 1
+                continue
+
+            if interval:
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_at = max(next_at, time.monotonic()) + interval
+
+            with capture_failures() as failures:
+                try:
+                    self._run_chain_payload(entry["chain_id"], chain, entry["payload"])
+                except DeadlineExceeded as e:
+                    note_failure(None, None, e)
+
+            if failures:
+                summary["failed"] += 1
+            else:
+                self.dead_letters.ack([entry["id"]])
+                summary["replayed"] += 1
+            if progress is not None:
+                progress(dict(summary))
+
+        summary["pending"] = self.dead_letters.get_metrics()["pending"]
+        logger.info(
+            f"Ponowiono uruchomienia z kolejki martwych wiadomości: {summary['replayed']} udanych, "
+            f"{summary['failed']} nieudanych, {summary['skipped']} pominiętych"
+        )
+        return summary
+
+    def shutdown(self, wait=True):
+        """
+        Zatrzymuje pule wątków silnika i zwalnia instancje wtyczek.
+
+        Args:
+            wait (bool): Czy czekać na zakończenie bieżących zadań
+        """
+        self.stopped.set()
+        self.worker_pool.shutdown(wait=wait)
+
+        # Wysłanie niepełnych paczek wywołań zdalnych
+        for batcher in list(self.remote_batchers.values()):
+            batcher.close()
+
+        if self.fanout_executor is not None:
+            self.fanout_executor.shutdown(wait=wait)
+            self.fanout_executor = None
+        if self.dag_executor is not None:
+            self.dag_executor.shutdown(wait=wait)
+            self.dag_executor = None
+        self.process_pool.shutdown(wait=wait)
+
+        # Wywołanie teardown() dla wszystkich instancji wtyczek
+        self._release_plugin_instances()
+
+        if self.dead_letters is not None:
+            self.dead_letters.close()
+        if self.inbound_queue is not None and wait:
+            self.inbound_queue.close()
+
+    def _run_local_plugin(self, plugin_name, data, config):
+        """
+        Uruchamia lokalny plugin.
+
+        Args:
+            plugin_name (str): Nazwa pluginu
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu
+
+        Returns:
+            dict: Wynik przetwarzania przez plugin
+        """
+        try:
+            # Instancja z cache'a (klasa rozwiązywana raz, instancja raz na konfigurację)
+            plugin = self._get_plugin_instance(plugin_name, config)
+
+            # Uruchomienie pluginu
+            logger.debug(f"Uruchamianie pluginu: {plugin_name}")
+            result = bind_process(plugin)(data)
+
+            return result
+
+        except ImportError as e:
+            logger.error(f"Nie można zaimportować pluginu: {plugin_name}. Błąd: {e}")
+            return data
+
+        except AttributeError as e:
+            logger.error(f"Nie znaleziono klasy pluginu '{plugin_name}': {e}")
+            return data
+
+        except Exception as e:
+            logger.error(f"Błąd podczas uruchamiania pluginu '{plugin_name}': {e}")
+            return data
+
+    @staticmethod
+    def _plugin_module_path(plugin_name):
+        """
+        Zwraca ścieżkę modułu wtyczki lokalnej (PascalCase -> snake_case).
+
+        Args:
+            plugin_name (str): Nazwa klasy wtyczki (np. "UppercasePlugin")
+
+        Returns:
+            str: Ścieżka modułu (np. "plugins.uppercase_plugin")
+        """
+        module_name = "".join(
+            ["_" + c.lower() if c.isupper() else c for c in plugin_name]
+        ).lstrip("_")
+        return f"plugins.{module_name}"
+
+    @staticmethod
+    def _config_key(config):
+        """
+        Zwraca stabilny klucz konfiguracji wtyczki do użycia w cache'u instancji.
+
+        Args:
+            config (dict): Konfiguracja wtyczki
+
+        Returns:
+            str: Konfiguracja zserializowana z posortowanymi kluczami
+        """
+        return json.dumps(config or {}, sort_keys=True, default=str)
+
+    def _resolve_plugin_class(self, plugin_name):
+        """
+        Zwraca klasę wtyczki lokalnej, importując jej moduł tylko przy pierwszym użyciu.
+
+        Args:
+            plugin_name (str): Nazwa klasy wtyczki
+
+        Returns:
+            type: Klasa wtyczki
+
+        Raises:
+            ImportError: Gdy nie można zaimportować modułu wtyczki
+            AttributeError: Gdy moduł nie zawiera klasy wtyczki
+        """
+        plugin_class = self.plugin_classes.get(plugin_name)
+        if plugin_class is not None:
+            return plugin_class
+
+        module_path = self._plugin_module_path(plugin_name)
+        logger.info(f"Próba importu modułu: {module_path}")
+        module = importlib.import_module(module_path)
+        plugin_class = getattr(module, plugin_name)
+
+        self.plugin_classes[plugin_name] = plugin_class
+        return plugin_class
+
+    def _get_plugin_instance(self, plugin_name, config=None):
+        """
+        Pobiera z cache'a lub tworzy instancję wtyczki dla pary (wtyczka, konfiguracja).
+        Nowa instancja jest inicjalizowana przez wywołanie jej metody setup().
+
+        Args:
+            plugin_name (str): Nazwa klasy wtyczki
+            config (dict, optional): Konfiguracja wtyczki
+
+        Returns:
+            BasePlugin: Instancja wtyczki
+        """
+        # Szybka ścieżka - ten sam obiekt konfiguracji (np. z definicji chaina)
+        # nie wymaga ponownej serializacji do klucza
+        fast_key = (plugin_name, id(config))
+        entry = self.plugin_instance_refs.get(fast_key)
+        if entry is not None and entry[0] is config:
+            return entry[1]
+
+        key = (plugin_name, self._config_key(config))
+        plugin = self.plugin_instances.get(key)
+
+        if plugin is None:
+            with self.lock:
+                plugin = self.plugin_instances.get(key)
+                if plugin is None:
+                    plugin_class = self._resolve_plugin_class(plugin_name)
+                    logger.info(f"Tworzenie instancji pluginu: {plugin_name}")
+                    plugin = plugin_class(config)
+                    if hasattr(plugin, "setup"):
+                        plugin.setup()
+                    self.plugin_instances[key] = plugin
+
+        # Referencja do konfiguracji chroni przed ponownym użyciem tego samego id()
+        self.plugin_instance_refs[fast_key] = (config, plugin)
+        return plugin
+
+    def _release_plugin_instances(self, only_unused=False):
+        """
+        Zwalnia instancje wtyczek z cache'a, wywołując ich metodę teardown().
+
+        Args:
+            only_unused (bool): Jeśli True, zwalnia tylko instancje, których
+                                nie używa już żaden chain
+        """
+        with self.lock:
+            used_keys = set()
+            if only_unused:
+                for chain in self.chains.values():
+                    for step in self._iter_steps(chain):
+                        used_keys.add(
+                            (step.get("plugin", ""), self._config_key(step.get("config", {})))
+                        )
+
+            released = [key for key in self.plugin_instances if key not in used_keys]
+            plugins = [self.plugin_instances.pop(key) for key in released]
+
+            if plugins:
+                released_ids = {id(plugin) for plugin in plugins}
+                self.plugin_instance_refs = {
+                    fast_key: entry
+                    for fast_key, entry in self.plugin_instance_refs.items()
+                    if id(entry[1]) not in released_ids
+                }
+
+        for plugin in plugins:
+            try:
+                if hasattr(plugin, "teardown"):
+                    plugin.teardown()
+            except Exception as e:
+                logger.error(f"Błąd podczas zwalniania pluginu '{plugin.name}': {e}")
+
+    @staticmethod
+    def _iter_steps(chain):
+        """
+        Zwraca definicje kroków chaina razem z ich krokami zastępczymi (`fallback`).
+
+        Args:
+            chain (dict): Definicja chaina
+
+        Yields:
+            dict: Definicja kroku
+        """
+        steps = list(chain.get("steps", []))
+        while steps:
+            step = steps.pop()
+            if isinstance(step.get("fallback"), dict):
+                steps.append(step["fallback"])
+            yield step
+
+    def _release_remote_batchers(self):
+        """
+        Usuwa obiekty grupujące wywołania zdalne, których nie używa już żaden chain
+        (np. po usunięciu chaina lub zmianie konfiguracji kroku). Niepełne paczki
+        są wysyłane, a timery zatrzymywane.
+        """
+        with self.lock:
+            used_keys = set()
+            for chain in self.chains.values():
+                for step in self._iter_steps(chain):
+                    parts = step.get("plugin", "").split(":")
+                    config = step.get("config", {})
+                    if len(parts) >= 3 and parts[0] == "remote" and config.get("batch"):
+                        used_keys.add((parts[1], parts[2], self._config_key(config)))
+
+            released = [key for key in self.remote_batchers if key not in used_keys]
+            batchers = [self.remote_batchers.pop(key) for key in released]
+
+        for batcher in batchers:
+            batcher.close()
+
+    def _run_remote_plugin(self, plugin_name, data, config):
+        """
+        Uruchamia zdalny plugin poprzez MQTT.
+
+        Args:
+            plugin_name (str): Nazwa pluginu w formacie "remote:device:plugin"
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu
+
+        Returns:
+            dict: Wynik przetwarzania przez plugin
+        """
+        # Parsowanie nazwy pluginu
+        parts = plugin_name.split(":")
+        if len(parts) < 3:
+            logger.error(f"Nieprawidłowa nazwa zdalnego pluginu: {plugin_name}")
+            return data
+
+        return self._call_remote_plugin(parts[1], parts[2], data, config)
 
-        # Wysłanie danych do zdalnej wtyczki
-        input_topic = f"plugin/{plugin_name}/input"
-        self.mqtt_client.publish(topic=input_topic, payload=request_data)
-        logger.info(f"Wysłano dane do zdalnej wtyczki {plugin_name}")
+    def _call_remote_plugin(self, device_id, plugin_id, data, config):
+        """
+        Wywołuje zdalny plugin (nazwa pluginu już sparsowana) i czeka na jego odpowiedź.
+        Żądanie zawiera identyfikator korelacji, dzięki czemu wiele równoległych
+        wywołań tego samego pluginu nie nadpisuje swoich odpowiedzi.
+
+        Args:
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator pluginu na urządzeniu
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu (opcjonalnie 'timeout' w sekundach)
 
+        Returns:
+            dict: Wynik przetwarzania przez plugin lub dane wejściowe w przypadku błędu
+        """
         try:
-            # Oczekiwanie na odpowiedź
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    # Próba pobrania odpowiedzi z kolejki
-                    response = response_queue.get(block=False)
+            return self._invoke_remote_plugin(device_id, plugin_id, data, config)
 
-                    # Usunięcie kolejki
-                    del self.response_queues[response_key]
+        except (StepTimeout, CircuitOpenError) as e:
+            logger.warning(str(e))
+            return data
 
-                    # Zwrócenie przetworzonych danych
-                    return response.get("data", data)
-                except Exception:
-                    # Brak odpowiedzi, czekaj dalej
-                    time.sleep(0.1)
+        except RemotePluginError as e:
+            logger.error(str(e))
+            return data
 
-            # Timeout - brak odpowiedzi w określonym czasie
-            logger.warning(
-                f"Timeout podczas oczekiwania na odpowiedź od zdalnej wtyczki {plugin_name}"
+        except Exception as e:
+            logger.error(
+                f"Błąd podczas uruchamiania zdalnego pluginu '{plugin_id}' na urządzeniu '{device_id}': {e}"
+            )
+            return data
+
+    def _invoke_remote_plugin(self, device_id, plugin_id, data, config):
+        """
+        Wywołuje zdalny plugin i czeka na odpowiedź najwyżej do upływu timeoutu
+        z konfiguracji ('timeout') oraz terminu bieżącej próby kroku lub chaina.
+        Pozostały czas jest przekazywany urządzeniu w polu 'deadline_ms' żądania.
+
+        Args:
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator pluginu na urządzeniu
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu (opcjonalnie 'timeout' w sekundach)
+
+        Returns:
+            dict: Wynik przetwarzania przez plugin
+
+        Raises:
+            StepTimeout: Gdy odpowiedź nie nadeszła w wyznaczonym czasie
+            RemotePluginError: Gdy żądania nie udało się wysłać lub plugin zwrócił błąd
+        """
+        if not self.mqtt_client:
+            raise RemotePluginError("Nie można uruchomić zdalnego pluginu - brak klienta MQTT")
+
+        breaker = self._acquire_circuit(device_id, plugin_id)
+
+        # Przygotowanie danych do wysłania
+        request_data = {
+            "action": "run_plugin",
+            "plugin_id": plugin_id,
+            "data": data,
+            "config": config,
+        }
+
+        timeout = bounded_timeout(config.get("timeout", DEFAULT_REMOTE_TIMEOUT))
+        if time_left() is not None:
+            request_data["deadline_ms"] = int(timeout * 1000)
+
+        try:
+            # Publikacja żądania i oczekiwanie na odpowiedź
+            correlation_id, future = self._send_remote_request(device_id, request_data)
+            if future is None:
+                raise RemotePluginError(
+                    f"Nie udało się wysłać żądania do zdalnego pluginu '{plugin_id}' na urządzeniu '{device_id}'"
+                )
+
+            logger.info(
+                f"Wysłano żądanie {correlation_id} do zdalnego pluginu '{plugin_id}' na urządzeniu '{device_id}'"
             )
 
-            # Usunięcie kolejki
-            del self.response_queues[response_key]
+            response = self._await_remote_response(correlation_id, future, timeout)
+        except Exception:
+            self._record_circuit(breaker, None)
+            raise
+
+        self._record_circuit(breaker, response)
+        return self._remote_response_data(device_id, plugin_id, data, response)
+
+    def _call_remote_plugin_batched(self, batcher, data, config):
+        """
+        Wywołuje zdalny plugin w trybie grupowania - dane trafiają do wspólnej paczki,
+        a wynik jest odczytywany z odpowiedzi zbiorczej.
+
+        Args:
+            batcher (RemoteBatcher): Obiekt grupujący wywołania danego pluginu
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu (opcjonalnie 'timeout' w sekundach)
+
+        Returns:
+            dict: Wynik przetwarzania przez plugin lub dane wejściowe w przypadku błędu
+        """
+        try:
+            return self._invoke_remote_plugin_batched(batcher, data, config)
+
+        except (StepTimeout, CircuitOpenError) as e:
+            logger.warning(str(e))
+            return data
 
+        except RemotePluginError as e:
+            logger.error(str(e))
             return data
 
         except Exception as e:
             logger.error(
-                f"Błąd podczas przetwarzania przez zdalną wtyczkę {plugin_name}: {e}"
+                f"Błąd podczas uruchamiania zdalnego pluginu '{batcher.plugin_id}' na urządzeniu '{batcher.device_id}': {e}"
             )
+            return data
 
-            # Usunięcie kolejki w przypadku błędu
-            if response_key in self.response_queues:
-                del self.response_queues[response_key]
+    def _invoke_remote_plugin_batched(self, batcher, data, config):
+        """
+        Wywołuje zdalny plugin w trybie grupowania i czeka na wynik najwyżej do upływu
+        timeoutu z konfiguracji oraz terminu bieżącej próby kroku lub chaina.
 
-            return data
+        Args:
+            batcher (RemoteBatcher): Obiekt grupujący wywołania danego pluginu
+            data (dict): Dane wejściowe
+            config (dict): Konfiguracja pluginu (opcjonalnie 'timeout' w sekundach)
+
+        Returns:
+            dict: Wynik przetwarzania przez plugin
+
+        Raises:
+            StepTimeout: Gdy odpowiedź nie nadeszła w wyznaczonym czasie
+            RemotePluginError: Gdy plugin zwrócił błąd
+        """
+        if not self.mqtt_client:
+            raise RemotePluginError("Nie można uruchomić zdalnego pluginu - brak klienta MQTT")
+
+        breaker = self._acquire_circuit(batcher.device_id, batcher.plugin_id)
+
+        timeout = bounded_timeout(config.get("timeout", DEFAULT_REMOTE_TIMEOUT))
+        try:
+            future = batcher.submit(data)
+            try:
+                response = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                response = None
+                # Rezygnacja z wyniku elementu - odpowiedź paczki jest nadal odbierana
+                # dla pozostałych elementów
+                batcher.abandon(future)
+        except Exception:
+            self._record_circuit(breaker, None)
+            raise
+
+        self._record_circuit(breaker, response)
+        return self._remote_response_data(batcher.device_id, batcher.plugin_id, data, response)
+
+    @staticmethod
+    def _remote_response_data(device_id, plugin_id, data, response):
+        """
+        Zwraca dane z odpowiedzi zdalnego pluginu.
+
+        Args:
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator pluginu na urządzeniu
+            data (dict): Dane wejściowe (zwracane, jeśli odpowiedź nie zawiera danych)
+            response (dict): Odpowiedź pluginu lub None w przypadku timeoutu
+
+        Returns:
+            dict: Dane zwrócone przez plugin
+
+        Raises:
+            StepTimeout: Gdy odpowiedź nie nadeszła (None)
+            RemotePluginError: Gdy plugin zwrócił błąd
+        """
+        if response is None:
+            raise StepTimeout(
+                f"Timeout podczas oczekiwania na odpowiedź od zdalnego pluginu '{plugin_id}' na urządzeniu '{device_id}'"
+            )
+
+        if "error" in response:
+            raise RemotePluginError(
+                f"Zdalny plugin '{plugin_id}' na urządzeniu '{device_id}' zwrócił błąd: {response['error']}"
+            )
+
+        return response.get("data", data)
+
+    def set_plugin_manager(self, plugin_manager):
+        """
+        Ustawia Plugin Manager - zmiany statusów zdalnych wtyczek (offline, error)
+        otwierają ich wyłączniki.
+
+        Args:
+            plugin_manager (PluginManager): Manager wtyczek
+        """
+        self.plugin_manager = plugin_manager
+        plugin_manager.add_status_listener(self._on_plugin_status)
+
+    def _get_circuit_breaker(self, device_id, plugin_id):
+        """
+        Zwraca (lub tworzy) wyłącznik zdalnej wtyczki.
+
+        Args:
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator pluginu na urządzeniu
+
+        Returns:
+            CircuitBreaker: Wyłącznik lub None, jeśli wyłączniki są wyłączone w konfiguracji
+        """
+        key = (device_id, plugin_id)
+        breaker = self.circuit_breakers.get(key)
+        if breaker is not None:
+            return breaker
+
+        options = dict(self.config["circuit_breaker"])
+        if not options.pop("enabled", True):
+            return None
+
+        with self.lock:
+            breaker = self.circuit_breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(f"{device_id}:{plugin_id}", **options)
+                status = self._remote_plugin_status(device_id, plugin_id)
+                if status in FAILING_STATUSES:
+                    breaker.trip(f"status wtyczki: {status}")
+                self.circuit_breakers[key] = breaker
+        return breaker
+
+    def _acquire_circuit(self, device_id, plugin_id):
+        """
+        Sprawdza wyłącznik zdalnej wtyczki przed wywołaniem.
+
+        Returns:
+            CircuitBreaker: Wyłącznik (wynik wywołania należy zapisać przez _record_circuit) lub None
+
+        Raises:
+            CircuitOpenError: Gdy wyłącznik jest otwarty
+        """
+        breaker = self._get_circuit_breaker(device_id, plugin_id)
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(
+                f"Wyłącznik zdalnego pluginu '{plugin_id}' na urządzeniu '{device_id}' jest otwarty"
+            )
+        return breaker
+
+    @staticmethod
+    def _record_circuit(breaker, response):
+        """
+        Zapisuje wynik wywołania zdalnej wtyczki w wyłączniku. Brak odpowiedzi (timeout,
+        błąd publikacji) jest błędem; odpowiedź z polem 'error' świadczy o dostępności
+        urządzenia i nie otwiera wyłącznika.
+        """
+        if breaker is None:
+            return
+        if response is None:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _remote_plugin_status(self, device_id, plugin_id):
+        """
+        Zwraca status zdalnej wtyczki z Plugin Managera (wpis 'urządzenie:wtyczka',
+        nazwa wtyczki lub nazwa urządzenia).
+
+        Returns:
+            str: Status lub None, jeśli Plugin Manager nie zna wtyczki
+        """
+        plugin = self._remote_plugin_info(device_id, plugin_id)
+        return plugin.get("status") if plugin else None
+
+    def _remote_plugin_info(self, device_id, plugin_id=None):
+        """
+        Zwraca dane zdalnej wtyczki z Plugin Managera (wpis 'urządzenie:wtyczka',
+        nazwa wtyczki lub nazwa urządzenia).
+
+        Returns:
+            dict: Dane z ogłoszenia wtyczki lub None, jeśli Plugin Manager nie zna wtyczki
+        """
+        if self.plugin_manager is None:
+            return None
+        names = (f"{device_id}:{plugin_id}", plugin_id, device_id) if plugin_id else (device_id,)
+        for name in names:
+            plugin = self.plugin_manager.get_plugin(name)
+            if plugin:
+                return plugin
+        return None
+
+    def _remote_encoding(self, device_id, plugin_id=None):
+        """
+        Uzgadnia kodowanie żądań zdalnej wtyczki na podstawie pola `encodings`
+        (lub `encoding`) jej ogłoszenia i dozwolonych kodowań `remote_encodings`.
+
+        Returns:
+            str: Nazwa kodowania (json, jeśli wtyczka nie ogłosiła innego)
+        """
+        plugin = self._remote_plugin_info(device_id, plugin_id)
+        if not plugin:
+            return codec.JSON_ENCODING
+        offered = plugin.get("encodings", plugin.get("encoding"))
+        return codec.negotiate_encoding(offered, self.config["remote_encodings"])
+
+    def _on_plugin_status(self, name, status):
+        """
+        Reaguje na zmianę statusu wtyczki w Plugin Managerze - status offline lub error
+        otwiera wyłączniki pasujących wtyczek, pozostałe statusy pozwalają na wywołanie próbne.
+
+        Args:
+            name (str): Nazwa wtyczki lub urządzenia
+            status (str): Nowy status
+        """
+        for (device_id, plugin_id), breaker in list(self.circuit_breakers.items()):
+            if name not in (device_id, plugin_id, breaker.name):
+                continue
+            if status in FAILING_STATUSES:
+                breaker.trip(f"status wtyczki '{name}': {status}")
+            else:
+                breaker.probe(f"status wtyczki '{name}': {status}")
+
+    def _get_result_cache(self, plan_step):
+        """
+        Zwraca (lub tworzy) cache wyników dla kroku oznaczonego jako `cacheable`.
+        Oznaczenie pochodzi z konfiguracji kroku (`"cacheable": true` lub słownik
+        z `ttl` i `max_size`) albo z atrybutu `cacheable` klasy wtyczki lokalnej.
+        Kroki o tej samej wtyczce i konfiguracji współdzielą cache.
+
+        Args:
+            plan_step (PlanStep): Skompilowany krok
+
+        Returns:
+            ResultCache: Cache wyników lub None, jeśli krok nie jest `cacheable`
+        """
+        config = plan_step.config
+        setting = config.get("cacheable")
+        if setting is None and plan_step.kind in (STEP_LOCAL, STEP_PROCESS):
+            try:
+                setting = getattr(self._resolve_plugin_class(plan_step.plugin), "cacheable", False)
+            except Exception:
+                setting = False
+
+        if not setting:
+            return None
+
+        options = setting if isinstance(setting, dict) else {}
+        defaults = self.config["result_cache"]
+        config_key = self._config_key(config)
+        key = (plan_step.plugin, config_key)
+
+        with self.lock:
+            cache = self.result_caches.get(key)
+            if cache is None:
+                cache = ResultCache(
+                    plan_step.plugin,
+                    config_key,
+                    max_size=options.get("max_size", defaults["max_size"]),
+                    ttl=options.get("ttl", defaults["ttl"]),
+                )
+                self.result_caches[key] = cache
+        return cache
+
+    def _get_remote_batcher(self, device_id, plugin_id, config):
+        """
+        Zwraca (lub tworzy) obiekt grupujący wywołania zdalnego pluginu.
+        Kroki o tym samym urządzeniu, pluginie i konfiguracji współdzielą paczki.
+
+        Args:
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator pluginu na urządzeniu
+            config (dict): Konfiguracja kroku (z kluczem 'batch')
+
+        Returns:
+            RemoteBatcher: Obiekt grupujący wywołania
+        """
+        key = (device_id, plugin_id, self._config_key(config))
+        with self.lock:
+            batcher = self.remote_batchers.get(key)
+            if batcher is None:
+                batcher = RemoteBatcher.from_config(self, device_id, plugin_id, config)
+                self.remote_batchers[key] = batcher
+        return batcher
+
+    def _send_remote_request(self, device_id, request_data):
+        """
+        Publikuje żądanie do zdalnej wtyczki i rejestruje oczekującą odpowiedź.
+        Treść jest kodowana w kodowaniu uzgodnionym z ogłoszeniem wtyczki (_remote_encoding).
+
+        Args:
+            device_id (str): Identyfikator urządzenia (temat plugin/<device_id>/input)
+            request_data (dict): Treść żądania (zostanie uzupełniona o correlation_id)
+
+        Returns:
+            tuple: (correlation_id, Future) lub (None, None) jeśli publikacja się nie powiodła
+        """
+        correlation_id = uuid.uuid4().hex
+        future = Future()
+        request_data["correlation_id"] = correlation_id
+
+        # Rejestracja przed publikacją - odpowiedź może przyjść natychmiast
+        self.pending_requests[correlation_id] = (device_id, future)
+
+        # Słownik JSON koduje klient MQTT; kodowania binarne są kodowane tutaj
+        payload = request_data
+        encoding = self._remote_encoding(device_id, request_data.get("plugin_id"))
+        if encoding != codec.JSON_ENCODING:
+            try:
+                payload = codec.encode(request_data, encoding)
+            except TypeError as e:
+                self.pending_requests.pop(correlation_id, None)
+                logger.error(
+                    f"Nie można zakodować żądania do zdalnej wtyczki na urządzeniu '{device_id}' ({encoding}): {e}"
+                )
+                return None, None
+
+        # Publikacja z pominięciem kolejki wychodzącej klienta MQTT - bez połączenia
+        # wywołanie od razu kończy się błędem, a żądanie nie zostanie wysłane po upływie
+        # limitu czasu (po ponownym połączeniu z brokerem)
+        published = self.mqtt_client.publish(
+            topic=f"plugin/{device_id}/input", payload=payload, queued=False
+        )
+        if published is False:
+            self.pending_requests.pop(correlation_id, None)
+            logger.error(
+                f"Nie udało się wysłać żądania do zdalnej wtyczki na urządzeniu '{device_id}'"
+            )
+            return None, None
+
+        return correlation_id, future
 
-    def _get_plugin_instance(self, plugin_name):
+    def _await_remote_response(self, correlation_id, future, timeout):
         """
-        Pobiera lub tworzy instancję wtyczki.
+        Czeka na odpowiedź zdalnej wtyczki dla danego identyfikatora korelacji.
 
         Args:
-            plugin_name (str): Nazwa wtyczki.
+            correlation_id (str): Identyfikator korelacji żądania
+            future (Future): Obiekt rozwiązywany przez _handle_plugin_response
+            timeout (float): Maksymalny czas oczekiwania w sekundach
 
         Returns:
-            BasePlugin: Instancja wtyczki lub None w przypadku błędu.
+            dict: Odpowiedź zdalnej wtyczki lub None w przypadku timeoutu
+        """
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        finally:
+            self.pending_requests.pop(correlation_id, None)
+
+    def _handle_plugin_response(self, msg):
         """
-        # Sprawdzenie, czy wtyczka jest już załadowana
-        if plugin_name in self.plugins:
-            return self.plugins[plugin_name]
+        Obsługuje odpowiedź od zdalnej wtyczki.
 
+        Args:
+            msg: Wiadomość MQTT zawierająca odpowiedź od zdalnej wtyczki
+        """
         try:
-            # Dynamiczne importowanie modułu wtyczki
-            module_name = f"plugins.{plugin_name.lower()}"
-            module = importlib.import_module(module_name)
+            # Parsowanie tematu wiadomości
+            topic_parts = msg.topic.split("/")
+            if len(topic_parts) < 3:
+                logger.error(f"Nieprawidłowy format tematu odpowiedzi: {msg.topic}")
+                return
+
+            device_id = topic_parts[1]
+
+            # Dekodowanie treści wiadomości (JSON, MessagePack lub CBOR - jak żądanie)
+            try:
+                payload = codec.decode(msg.payload)
+            except ValueError as e:
+                logger.error(
+                    f"Nie można zdekodować odpowiedzi od zdalnej wtyczki {device_id}: {e}"
+                )
+                return
+
+            logger.debug(
+                f"Otrzymano odpowiedź od zdalnej wtyczki {device_id}: {payload}"
+            )
 
-            # Pobranie klasy wtyczki
-            plugin_class = getattr(module, plugin_name)
+            correlation_id = payload.get("correlation_id") if isinstance(payload, dict) else None
+            if correlation_id is None:
+                # Wtyczki bez obsługi korelacji - najstarsze oczekujące żądanie do urządzenia
+                correlation_id = next(
+                    (
+                        cid
+                        for cid, (pending_device, _) in list(self.pending_requests.items())
+                        if pending_device == device_id
+                    ),
+                    None,
+                )
 
-            # Utworzenie instancji wtyczki
-            plugin_instance = plugin_class()
+            pending = self.pending_requests.pop(correlation_id, None)
+            if pending is None:
+                logger.debug(
+                    f"Brak oczekującego żądania dla odpowiedzi {correlation_id} od {device_id}"
+                )
+                return
 
-            # Zapisanie instancji do cache'a
-            self.plugins[plugin_name] = plugin_instance
+            future = pending[1]
+            if not future.done():
+                future.set_result(payload)
 
-            return plugin_instance
         except Exception as e:
-            logger.error(f"Błąd podczas ładowania wtyczki {plugin_name}: {e}")
-            return None
+            logger.error(
+                f"Błąd podczas przetwarzania odpowiedzi od zdalnej wtyczki: {e}"
+            )
+
+    def _setup_mqtt_callbacks(self):
+        """
+        Rejestruje w routerze tematów klienta MQTT handler odpowiedzi zdalnych wtyczek.
+        Handlery triggerów `mqtt:` są rejestrowane przy zmianach indeksu triggerów.
+        """
+        if not self.mqtt_client:
+            logger.warning("Brak klienta MQTT - nie można skonfigurować callbacków")
+            return
+
+        self.mqtt_client.register_handler("plugin/+/output", self._handle_plugin_response)
+
+        logger.info("Skonfigurowano callbacki MQTT dla zdalnych wtyczek")
+
+    def _sync_mqtt_routes(self):
+        """
+        Uzgadnia handlery triggerów w routerze tematów klienta MQTT z indeksem triggerów:
+        rejestruje filtry tematów nowych triggerów `mqtt:` i usuwa nieużywane.
+        """
+        if not self.mqtt_client:
+            return
+
+        topics = {
+            trigger_id[len(MQTT_TRIGGER_PREFIX) :]
+            for trigger_id in self.trigger_index
+            if isinstance(trigger_id, str) and trigger_id.startswith(MQTT_TRIGGER_PREFIX)
+        }
+
+        for topic in self.mqtt_routes - topics:
+            self.mqtt_client.unregister_handler(topic, self._handle_mqtt_trigger)
+        for topic in topics - self.mqtt_routes:
+            try:
+                self.mqtt_client.register_handler(topic, self._handle_mqtt_trigger)
+            except ValueError as e:
+                logger.error(f"Nie można zarejestrować triggera MQTT: {e}")
+                topics.discard(topic)
+
+        self.mqtt_routes = topics
+
+    def _handle_mqtt_trigger(self, msg):
+        """
+        Uruchamia asynchronicznie chainy dla wiadomości z tematu triggera `mqtt:`.
+
+        Args:
+            msg: Wiadomość MQTT (topic, payload)
+        """
+        trigger_id = f"{MQTT_TRIGGER_PREFIX}{msg.topic}"
+
+        try:
+            payload = codec.loads(msg.payload)
+        except ValueError:
+            logger.warning(f"Otrzymana wiadomość nie jest poprawnym JSON: {msg.payload}")
+            return
+
+        def on_chain_complete(result):
+            logger.info(
+                f"Chain dla triggera '{trigger_id}' zakończył przetwarzanie. Wynik: {result}"
+            )
+
+        # Bez czekania na miejsce w kolejce puli - zablokowany dispatcher wstrzymałby
+        # odpowiedzi zdalnych wtyczek, na które czekają chainy w puli
+        if not self.run_chain_async(trigger_id, payload, on_chain_complete, block=False):
+            logger.warning(
+                f"Wiadomość dla triggera '{trigger_id}' została odrzucona - kolejka chainów jest pełna"
+            )
+
+    def _process_remote_plugin(self, plugin_name, data, params=None, timeout=DEFAULT_REMOTE_TIMEOUT):
+        """
+        Przetwarza dane przez zdalną wtyczkę za pomocą MQTT.
+
+        Args:
+            plugin_name (str): Nazwa zdalnej wtyczki (bez prefiksu 'remote:').
+            data (dict): Dane do przetworzenia.
+            params (dict, optional): Parametry dla wtyczki. Domyślnie None.
+            timeout (int, optional): Maksymalny czas oczekiwania na odpowiedź w sekundach. Domyślnie 5.
+
+        Returns:
+            dict: Przetworzone dane lub oryginalne dane w przypadku błędu.
+        """
+        if not self.mqtt_client:
+            logger.error(
+                f"Brak klienta MQTT. Nie można wywołać zdalnej wtyczki {plugin_name}."
+            )
+            return data
+
+        # Przygotowanie danych do wysłania
+        request_data = {"data": data, "params": params or {}}
+
+        try:
+            # Wysłanie danych do zdalnej wtyczki
+            correlation_id, future = self._send_remote_request(plugin_name, request_data)
+            if future is None:
+                return data
+
+            logger.info(f"Wysłano dane do zdalnej wtyczki {plugin_name}")
+
+            # Oczekiwanie na odpowiedź (bez odpytywania - Future rozwiązywany przy odbiorze)
+            response = self._await_remote_response(correlation_id, future, bounded_timeout(timeout))
+            if response is None:
+                # Timeout - brak odpowiedzi w określonym czasie
+                logger.warning(
+                    f"Timeout podczas oczekiwania na odpowiedź od zdalnej wtyczki {plugin_name}"
+                )
+                return data
+
+            # Zwrócenie przetworzonych danych
+            return response.get("data", data)
+
+        except Exception as e:
+            logger.error(
+                f"Błąd podczas przetwarzania przez zdalną wtyczkę {plugin_name}: {e}"
+            )
+            return data
@@ -0,0 +1,632 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł skompilowanych planów wykonania chainów dla systemu Morris.
+Definicja chaina (słownik) jest kompilowana raz do niemutowalnego planu,
+dzięki czemu pętla wykonująca kroki nie odczytuje słowników ani nie parsuje nazw wtyczek.
+"""
+
+import asyncio
+import copy
+import inspect
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from core.process_pool import EXECUTION_PROCESS, EXECUTION_THREAD
+from core.result_cache import CachedStepRunner
+from core.step_policy import (
+    DeadlineExceeded,
+    PolicyStepRunner,
+    StepTimeout,
+    step_policy,
+    time_left,
+)
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rodzaje kroków planu
+STEP_LOCAL = "local"
+STEP_REMOTE = "remote"
+STEP_PROCESS = "process"
+STEP_INVALID = "invalid"
+
+# Skompilowany krok chaina:
+#   number    - numer kroku (od 1), używany w logach
+#   plugin    - pełna nazwa wtyczki z definicji chaina
+#   kind      - rodzaj kroku (local, process, remote, invalid)
+#   run       - funkcja przyjmująca dane wejściowe i zwracająca wynik kroku
+#   config    - zwalidowana kopia konfiguracji kroku
+#   device_id - identyfikator urządzenia (tylko kroki zdalne)
+#   plugin_id - identyfikator wtyczki zdalnej (tylko kroki zdalne)
+#   cache     - cache wyników (ResultCache) dla kroków `cacheable`, inaczej None
+#   policy    - limit czasu i ponowienia kroku (StepPolicy), inaczej None
+#   fallback  - krok zastępczy (PlanStep) uruchamiany po niepowodzeniu kroku, inaczej None
+PlanStep = namedtuple(
+    "PlanStep",
+    [
+        "number",
+        "plugin",
+        "kind",
+        "run",
+        "config",
+        "device_id",
+        "plugin_id",
+        "cache",
+        "policy",
+        "fallback",
+    ],
+    defaults=(None, None, None),
+)
+
+# Sposoby łączenia wyników gałęzi w kroku z wieloma zależnościami (DAG)
+JOIN_MERGE = "merge"  # Płytkie scalenie słowników w kolejności depends_on
+JOIN_BY_ID = "by_id"  # Słownik {id kroku: wynik}
+JOIN_MODES = (JOIN_MERGE, JOIN_BY_ID)
+
+# Węzeł grafu kroków (chainy DAG):
+#   step_id    - identyfikator kroku (pole 'id' lub numer kroku)
+#   step       - skompilowany krok PlanStep
+#   depends_on - krotka indeksów węzłów, od których zależy krok (w kolejności depends_on)
+#   join       - sposób łączenia wyników zależności (merge, by_id)
+#   dependents - krotka indeksów węzłów korzystających z wyniku kroku
+DagNode = namedtuple("DagNode", ["step_id", "step", "depends_on", "join", "dependents"])
+
+# Skompilowany plan chaina:
+#   chain_id - identyfikator chaina
+#   chain    - definicja chaina, z której zbudowano plan (do wykrywania zmian)
+#   steps    - krotka kroków PlanStep
+#   dag      - dla chainów DAG krotka węzłów DagNode w kolejności topologicznej, inaczej None
+#   deadline - łączny termin wykonania chaina w sekundach (`deadline_ms`), inaczej None
+ChainPlan = namedtuple(
+    "ChainPlan", ["chain_id", "chain", "steps", "dag", "deadline"], defaults=(None, None)
+)
+
+
+# Pętla zdarzeń w osobnym wątku dla wtyczek `async def process` wywoływanych
+# z wątku, w którym działa już pętla asyncio (tworzona przy pierwszym użyciu)
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    """
+    Zwraca (tworząc przy pierwszym użyciu) pętlę zdarzeń działającą w osobnym wątku.
+
+    Returns:
+        asyncio.AbstractEventLoop: Pętla zdarzeń wątku w tle
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="morris-async-plugins", daemon=True
+            ).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def _in_running_loop():
+    """
+    Sprawdza, czy w bieżącym wątku działa pętla asyncio.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def bind_process(plugin):
+    """
+    Zwraca synchroniczną funkcję przetwarzania dla instancji wtyczki.
+    Wtyczki z `async def process` są uruchamiane przez asyncio.run() i przerywane
+    po upływie terminu kroku lub chaina. Jeśli w bieżącym wątku działa już pętla
+    asyncio (asyncio.run() zgłosiłby RuntimeError), korutyna jest wykonywana
+    w pętli osobnego wątku, a wywołanie czeka na jej wynik.
+
+    Args:
+        plugin: Instancja wtyczki
+
+    Returns:
+        callable: Funkcja przyjmująca dane wejściowe i zwracająca wynik
+    """
+    process = plugin.process
+    if not inspect.iscoroutinefunction(process):
+        return process
+
+    def run_coroutine(data):
+        timeout = time_left()
+        if _in_running_loop():
+            future = asyncio.run_coroutine_threadsafe(process(data), _get_background_loop())
+            try:
+                return future.result(timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise StepTimeout(
+                    f"Plugin '{type(plugin).__name__}' przekroczył limit czasu"
+                ) from None
+        if timeout is None:
+            return asyncio.run(process(data))
+        try:
+            return asyncio.run(asyncio.wait_for(process(data), timeout))
+        except asyncio.TimeoutError:
+            raise StepTimeout(f"Plugin '{type(plugin).__name__}' przekroczył limit czasu") from None
+
+    return run_coroutine
+
+
+class LocalStepRunner:
+    """
+    Wywołanie kroku z wtyczką lokalną.
+
+    Metoda process() instancji wtyczki jest wiązana przy kompilacji planu.
+    Jeśli klasy wtyczki nie udało się wtedy załadować, zostanie ona rozwiązana
+    przy pierwszym uruchomieniu kroku.
+    """
+
+    __slots__ = ("engine", "plugin_name", "config", "process")
+
+    def __init__(self, engine, plugin_name, config):
+        """
+        Inicjalizacja kroku lokalnego.
+
+        Args:
+            engine (ChainEngine): Silnik udostępniający cache instancji wtyczek
+            plugin_name (str): Nazwa klasy wtyczki
+            config (dict): Konfiguracja wtyczki
+        """
+        self.engine = engine
+        self.plugin_name = plugin_name
+        self.config = config
+        self.process = None
+
+        try:
+            self.process = bind_process(engine._get_plugin_instance(plugin_name, config))
+        except Exception as e:
+            logger.debug(f"Plugin '{plugin_name}' zostanie załadowany przy pierwszym uruchomieniu: {e}")
+
+    def __call__(self, data):
+        process = self.process
+        if process is None:
+            process = bind_process(self.engine._get_plugin_instance(self.plugin_name, self.config))
+            self.process = process
+        return process(data)
+
+    def run_batch(self, payloads):
+        """
+        Uruchamia krok dla listy danych wejściowych przez process_batch() wtyczki.
+        Wtyczki bez process_batch() lub asynchroniczne są wywoływane dla każdego elementu.
+
+        Args:
+            payloads (list): Lista danych wejściowych
+
+        Returns:
+            list: Lista wyników w kolejności danych wejściowych
+        """
+        plugin = self.engine._get_plugin_instance(self.plugin_name, self.config)
+        process_batch = getattr(plugin, "process_batch", None)
+        if process_batch is None or inspect.iscoroutinefunction(plugin.process):
+            return [self(data) for data in payloads]
+        return process_batch(payloads)
+
+
+class ProcessStepRunner:
+    """
+    Wywołanie kroku z wtyczką lokalną w puli procesów (`execution: process`).
+
+    Wywołanie blokuje bieżący wątek do czasu otrzymania wyniku, ale nie zajmuje GIL
+    procesu głównego - obliczenia wykonuje proces roboczy.
+    """
+
+    __slots__ = ("engine", "plugin_class", "config", "config_key")
+
+    def __init__(self, engine, plugin_class, config):
+        """
+        Inicjalizacja kroku wykonywanego w puli procesów.
+
+        Args:
+            engine (ChainEngine): Silnik udostępniający pulę procesów
+            plugin_class (type): Klasa wtyczki
+            config (dict): Konfiguracja wtyczki
+        """
+        self.engine = engine
+        self.plugin_class = plugin_class
+        self.config = config
+        self.config_key = engine._config_key(config)
+        engine.process_pool.register(plugin_class, self.config_key, config)
+
+    def submit(self, data):
+        """
+        Zgłasza uruchomienie kroku w puli procesów.
+
+        Returns:
+            Future: Wynik przetwarzania przez wtyczkę
+        """
+        return self.engine.process_pool.submit(
+            self.plugin_class, self.config_key, self.config, data
+        )
+
+    def __call__(self, data):
+        future = self.submit(data)
+        try:
+            return future.result(timeout=time_left())
+        except FutureTimeoutError:
+            # Zadanie oczekujące w kolejce puli nie zostanie uruchomione
+            future.cancel()
+            raise StepTimeout(
+                f"Plugin '{self.plugin_class.__name__}' w puli procesów przekroczył limit czasu"
+            ) from None
+
+
+class FallbackStepRunner:
+    """
+    Wywołanie kroku z krokiem zastępczym (`fallback`) uruchamianym po niepowodzeniu
+    (błąd, timeout, otwarty wyłącznik zdalnej wtyczki).
+    """
+
+    __slots__ = ("run", "fallback", "label", "submit", "run_batch")
+
+    def __init__(self, run, fallback, label):
+        """
+        Inicjalizacja kroku z krokiem zastępczym.
+
+        Args:
+            run (callable): Funkcja wykonująca krok (zgłaszająca wyjątek przy niepowodzeniu)
+            fallback (PlanStep): Skompilowany krok zastępczy
+            label (str): Opis kroku do logów
+        """
+        self.run = run
+        self.fallback = fallback
+        self.label = label
+        # Kroki w puli procesów udostępniają submit() (tryb asyncio)
+        self.submit = getattr(run, "submit", None)
+        # Nieudana paczka jest ponawiana dla każdego elementu, z krokiem zastępczym
+        self.run_batch = getattr(run, "run_batch", None)
+
+    def __call__(self, data):
+        try:
+            return self.run(data)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(
+                f"Krok {self.label} nie powiódł się ({e}) - uruchamianie kroku zastępczego "
+                f"'{self.fallback.plugin}'"
+            )
+            return self.fallback.run(data)
+
+
+def _execution_mode(engine, plugin_name, config):
+    """
+    Zwraca tryb wykonywania wtyczki lokalnej i jej klasę.
+    Tryb z konfiguracji kroku (`execution`) ma pierwszeństwo przed atrybutem klasy.
+
+    Returns:
+        tuple: (tryb wykonywania, klasa wtyczki lub None jeśli nie udało się jej rozwiązać)
+    """
+    try:
+        plugin_class = engine._resolve_plugin_class(plugin_name)
+    except Exception:
+        return config.get("execution", EXECUTION_THREAD), None
+
+    return config.get("execution") or getattr(plugin_class, "execution", EXECUTION_THREAD), plugin_class
+
+
+def _invalid_step(plugin_name, message):
+    """
+    Tworzy funkcję kroku, którego nie da się wykonać (loguje błąd i przekazuje dane dalej).
+    """
+
+    def run(data):
+        logger.error(message)
+        return data
+
+    return run
+
+
+def compile_step(engine, number, step, chain=None):
+    """
+    Kompiluje pojedynczy krok chaina. Kroki z limitem czasu lub ponowieniami
+    (`timeout_ms`, `retries`, `backoff` w kroku lub chainie) są opakowywane polityką
+    wykonania, kroki oznaczone jako `cacheable` (w konfiguracji kroku lub atrybutem
+    klasy wtyczki) - cache'em wyników, a kroki z polem `fallback` - krokiem zastępczym.
+
+    Args:
+        engine (ChainEngine): Silnik chainów
+        number (int): Numer kroku (od 1)
+        step (dict): Definicja kroku
+        chain (dict, optional): Definicja chaina (domyślne wartości polityki)
+
+    Returns:
+        PlanStep: Skompilowany krok
+    """
+    policy = step_policy(step, chain or {})
+    fallback = step.get("fallback")
+    if isinstance(fallback, dict):
+        fallback = compile_step(engine, number, fallback, chain)
+    else:
+        fallback = None
+
+    # Błędy kroków zdalnych muszą dotrzeć do polityki, kroku zastępczego i kolejki martwych wiadomości
+    strict = policy is not None or fallback is not None or engine.dead_letters is not None
+    plan_step = _compile_step(engine, number, step, strict=strict)
+    if plan_step.kind == STEP_INVALID:
+        return plan_step
+
+    label = f"{number} (plugin '{plan_step.plugin}')"
+    if policy is not None:
+        plan_step = plan_step._replace(
+            run=PolicyStepRunner(plan_step.run, policy, label), policy=policy
+        )
+
+    cache = engine._get_result_cache(plan_step)
+    if cache is not None:
+        plan_step = plan_step._replace(run=CachedStepRunner(cache, plan_step.run), cache=cache)
+
+    # Krok zastępczy poza cache'em - jego wynik nie jest zapamiętywany jako wynik kroku
+    if fallback is not None:
+        plan_step = plan_step._replace(
+            run=FallbackStepRunner(plan_step.run, fallback, label), fallback=fallback
+        )
+    return plan_step
+
+
+def _compile_step(engine, number, step, strict=False):
+    """
+    Kompiluje pojedynczy krok chaina (bez polityki wykonania i cache'a wyników).
+
+    Args:
+        engine (ChainEngine): Silnik chainów
+        number (int): Numer kroku (od 1)
+        step (dict): Definicja kroku
+        strict (bool): Kroki zdalne zgłaszają wyjątek zamiast zwracać dane wejściowe
+                       po błędzie lub timeoucie (potrzebne do ponowień)
+
+    Returns:
+        PlanStep: Skompilowany krok
+    """
+    plugin_name = step.get("plugin", "")
+    config = step.get("config", {})
+
+    if config is None:
+        config = {}
+    if not isinstance(config, dict):
+        message = f"Nieprawidłowa konfiguracja kroku {number} (plugin '{plugin_name}') - oczekiwano słownika"
+        return PlanStep(
+            number, plugin_name, STEP_INVALID, _invalid_step(plugin_name, message), {}, None, None
+        )
+
+    # Kopia chroni plan przed późniejszymi zmianami definicji chaina
+    config = copy.deepcopy(config)
+
+    if ":" not in plugin_name:
+        execution, plugin_class = _execution_mode(engine, plugin_name, config)
+        if execution == EXECUTION_PROCESS and plugin_class is None:
+            logger.warning(
+                f"Plugin '{plugin_name}' nie został załadowany - krok {number} zostanie wykonany w bieżącym wątku"
+            )
+        elif execution == EXECUTION_PROCESS:
+            return PlanStep(
+                number,
+                plugin_name,
+                STEP_PROCESS,
+                ProcessStepRunner(engine, plugin_class, config),
+                config,
+                None,
+                None,
+            )
+
+        return PlanStep(
+            number,
+            plugin_name,
+            STEP_LOCAL,
+            LocalStepRunner(engine, plugin_name, config),
+            config,
+            None,
+            None,
+        )
+
+    # Plugin zdalny (np. "remote:device1:temperature")
+    parts = plugin_name.split(":")
+    if len(parts) < 3:
+        message = f"Nieprawidłowa nazwa zdalnego pluginu: {plugin_name}"
+        return PlanStep(
+            number, plugin_name, STEP_INVALID, _invalid_step(plugin_name, message), config, None, None
+        )
+
+    device_id = parts[1]
+    plugin_id = parts[2]
+
+    if config.get("batch"):
+        # Tryb grupowania - wiele uruchomień chaina współdzieli jedno żądanie MQTT
+        batcher = engine._get_remote_batcher(device_id, plugin_id, config)
+
+        call = engine._invoke_remote_plugin_batched if strict else engine._call_remote_plugin_batched
+
+        def run_remote(data):
+            return call(batcher, data, config)
+
+    else:
+        call = engine._invoke_remote_plugin if strict else engine._call_remote_plugin
+
+        def run_remote(data):
+            return call(device_id, plugin_id, data, config)
+
+    return PlanStep(
+        number, plugin_name, STEP_REMOTE, run_remote, config, device_id, plugin_id
+    )
+
+
+def is_dag_chain(chain):
+    """
+    Sprawdza, czy chain jest zdefiniowany jako graf (co najmniej jeden krok ma 'depends_on').
+
+    Args:
+        chain (dict): Definicja chaina
+
+    Returns:
+        bool: True dla chainów DAG
+    """
+    return any(
+        isinstance(step, dict) and "depends_on" in step for step in chain.get("steps", [])
+    )
+
+
+def dag_order(steps):
+    """
+    Wyznacza kolejność topologiczną kroków chaina DAG.
+
+    Args:
+        steps (list): Lista definicji kroków (z opcjonalnymi polami 'id', 'depends_on', 'join')
+
+    Returns:
+        tuple: (lista identyfikatorów kroków, lista indeksów kroków w kolejności topologicznej)
+
+    Raises:
+        ValueError: Gdy identyfikatory się powtarzają, zależność nie istnieje lub graf zawiera cykl
+    """
+    step_ids = [str(step.get("id", number)) for number, step in enumerate(steps, start=1)]
+    if len(set(step_ids)) != len(step_ids):
+        raise ValueError("Identyfikatory kroków muszą być unikalne")
+
+    index = {step_id: i for i, step_id in enumerate(step_ids)}
+    dependencies = []
+    for step_id, step in zip(step_ids, steps):
+        depends_on = step.get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        if not isinstance(depends_on, list):
+            raise ValueError(f"Pole 'depends_on' kroku '{step_id}' musi być listą")
+        for dependency in depends_on:
+            if str(dependency) not in index:
+                raise ValueError(f"Krok '{step_id}' zależy od nieistniejącego kroku '{dependency}'")
+        if step.get("join", JOIN_MERGE) not in JOIN_MODES:
+            raise ValueError(f"Nieznany sposób łączenia wyników w kroku '{step_id}': {step.get('join')}")
+        dependencies.append([index[str(dependency)] for dependency in depends_on])
+
+    # Algorytm Kahna
+    remaining = [len(set(deps)) for deps in dependencies]
+    dependents = [[] for _ in steps]
+    for i, deps in enumerate(dependencies):
+        for dependency in set(deps):
+            dependents[dependency].append(i)
+
+    order = [i for i, count in enumerate(remaining) if count == 0]
+    for i in order:
+        for dependent in dependents[i]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) != len(steps):
+        cycle = [step_ids[i] for i, count in enumerate(remaining) if count > 0]
+        raise ValueError(f"Zależności kroków tworzą cykl: {', '.join(cycle)}")
+
+    return step_ids, order
+
+
+def _compile_dag(steps, definitions):
+    """
+    Buduje węzły grafu kroków w kolejności topologicznej.
+    """
+    step_ids, order = dag_order(definitions)
+    # Identyfikator kroku -> pozycja węzła w kolejności topologicznej
+    position = {step_ids[index]: pos for pos, index in enumerate(order)}
+
+    nodes = []
+    for index in order:
+        definition = definitions[index]
+        depends_on = definition.get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        dependency_ids = [str(dependency) for dependency in depends_on]
+        nodes.append(
+            DagNode(
+                step_ids[index],
+                steps[index],
+                tuple(position[dependency] for dependency in dependency_ids),
+                definition.get("join", JOIN_MERGE),
+                (),
+            )
+        )
+
+    dependents = [[] for _ in nodes]
+    for pos, node in enumerate(nodes):
+        for dependency in dict.fromkeys(node.depends_on):
+            dependents[dependency].append(pos)
+
+    return tuple(
+        node._replace(dependents=tuple(indices)) for node, indices in zip(nodes, dependents)
+    )
+
+
+def join_outputs(node, nodes, outputs):
+    """
+    Łączy wyniki zależności kroku DAG w dane wejściowe kroku.
+
+    Args:
+        node (DagNode): Węzeł kroku
+        nodes (tuple): Wszystkie węzły planu
+        outputs (list): Wyniki węzłów (indeksowane pozycją w planie)
+
+    Returns:
+        dict: Dane wejściowe kroku
+    """
+    if node.join == JOIN_BY_ID:
+        return {nodes[i].step_id: outputs[i] for i in node.depends_on}
+
+    if len(node.depends_on) == 1:
+        return outputs[node.depends_on[0]]
+
+    merged = {}
+    for i in node.depends_on:
+        output = outputs[i]
+        if isinstance(output, dict):
+            merged.update(output)
+        else:
+            merged[nodes[i].step_id] = output
+    return merged
+
+
+def dag_result(nodes, outputs):
+    """
+    Zwraca wynik chaina DAG - wynik jedynego kroku końcowego lub scalone wyniki kroków końcowych.
+
+    Args:
+        nodes (tuple): Węzły planu
+        outputs (list): Wyniki węzłów
+
+    Returns:
+        dict: Wynik chaina
+    """
+    sinks = tuple(i for i, node in enumerate(nodes) if not node.dependents)
+    return join_outputs(DagNode("result", None, sinks, JOIN_MERGE, ()), nodes, outputs)
+
+
+def compile_chain(engine, chain_id, chain):
+    """
+    Kompiluje definicję chaina do niemutowalnego planu wykonania.
+
+    Args:
+        engine (ChainEngine): Silnik chainów
+        chain_id (str): Identyfikator chaina
+        chain (dict): Definicja chaina
+
+    Returns:
+        ChainPlan: Skompilowany plan chaina
+    """
+    definitions = chain.get("steps", [])
+    steps = tuple(
+        compile_step(engine, number, step, chain)
+        for number, step in enumerate(definitions, start=1)
+    )
+    deadline_ms = chain.get("deadline_ms")
+    deadline = deadline_ms / 1000.0 if deadline_ms else None
+    dag = _compile_dag(steps, definitions) if is_dag_chain(chain) else None
+    return ChainPlan(chain_id, chain, steps, dag, deadline)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł wyłączników (circuit breaker) zdalnych wtyczek dla systemu Morris.
+Wyłącznik śledzi wyniki wywołań zdalnej wtyczki w oknie czasowym i po przekroczeniu
+progu błędów (lub po zgłoszeniu statusu offline/error przez Plugin Manager)
+odrzuca kolejne wywołania bez czekania na timeout. Po upływie czasu otwarcia
+przepuszcza wywołania próbne (half-open) i zamyka się po udanej próbie.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from core.step_policy import RemotePluginError
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stany wyłącznika
+STATE_CLOSED = "closed"  # Wywołania przepuszczane, wyniki zliczane w oknie
+STATE_OPEN = "open"  # Wywołania odrzucane do upływu czasu otwarcia
+STATE_HALF_OPEN = "half_open"  # Przepuszczane pojedyncze wywołania próbne
+
+# Statusy Plugin Managera otwierające wyłącznik
+FAILING_STATUSES = ("offline", "error")
+
+
+class CircuitOpenError(RemotePluginError):
+    """
+    Wywołanie zdalnej wtyczki odrzucone przez otwarty wyłącznik.
+    """
+
+
+class CircuitBreaker:
+    """
+    Wyłącznik wywołań jednej zdalnej wtyczki.
+    """
+
+    def __init__(
+        self,
+        name,
+        failure_rate=0.5,
+        min_calls=5,
+        window_seconds=30,
+        open_seconds=15,
+        half_open_calls=1,
+    ):
+        """
+        Inicjalizacja wyłącznika.
+
+        Args:
+            name (str): Nazwa wyłącznika (urządzenie:wtyczka)
+            failure_rate (float): Odsetek nieudanych wywołań w oknie otwierający wyłącznik
+            min_calls (int): Minimalna liczba wywołań w oknie do oceny odsetka błędów
+            window_seconds (float): Długość okna czasowego w sekundach
+            open_seconds (float): Czas otwarcia przed wywołaniami próbnymi w sekundach
+            half_open_calls (int): Liczba równoczesnych wywołań próbnych
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, int(min_calls))
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, int(half_open_calls))
+
+        self.state = STATE_CLOSED
+        self.lock = threading.Lock()
+        # Wyniki wywołań w oknie: (czas, czy nieudane)
+        self.outcomes = deque()
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+        self.reason = None
+
+        # Metryki
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """
+        Sprawdza, czy wywołanie może zostać wykonane.
+
+        Returns:
+            bool: False, jeśli wyłącznik jest otwarty (lub wykorzystano limit wywołań próbnych)
+        """
+        with self.lock:
+            if self.state == STATE_CLOSED:
+                return True
+
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._set_state(STATE_HALF_OPEN, "upłynął czas otwarcia")
+
+            if self.probes >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self.probes += 1
+            return True
+
+    def record_success(self):
+        """
+        Zapisuje udane wywołanie. Udana próba zamyka wyłącznik.
+        """
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self._close()
+            elif self.state == STATE_CLOSED:
+                self._record(False)
+
+    def record_failure(self):
+        """
+        Zapisuje nieudane wywołanie (timeout, błąd publikacji). Nieudana próba
+        lub przekroczenie progu błędów w oknie otwiera wyłącznik.
+        """
+        with self.lock:
+            if self.state == STATE_HALF_OPEN:
+                self._open("nieudane wywołanie próbne")
+            elif self.state == STATE_CLOSED:
+                self._record(True)
+                calls = len(self.outcomes)
+                if calls >= self.min_calls and self.failures / calls >= self.failure_rate:
+                    self._open(f"{self.failures}/{calls} nieudanych wywołań")
+
+    def trip(self, reason):
+        """
+        Otwiera wyłącznik niezależnie od wyników wywołań (np. status offline wtyczki).
+
+        Args:
+            reason (str): Przyczyna otwarcia
+        """
+        with self.lock:
+            if self.state != STATE_OPEN:
+                self._open(reason)
+
+    def probe(self, reason):
+        """
+        Przełącza otwarty wyłącznik w stan próbny przed upływem czasu otwarcia
+        (np. gdy wtyczka ponownie ogłosiła się jako online).
+
+        Args:
+            reason (str): Przyczyna zmiany stanu
+        """
+        with self.lock:
+            if self.state == STATE_OPEN:
+                self._set_state(STATE_HALF_OPEN, reason)
+
+    def get_metrics(self):
+        """
+        Zwraca metryki wyłącznika.
+
+        Returns:
+            dict: Stan, odsetek błędów w oknie i liczniki odrzuceń oraz otwarć
+        """
+        with self.lock:
+            self._expire(time.monotonic())
+            calls = len(self.outcomes)
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "calls": calls,
+                "failure_rate": self.failures / calls if calls else 0.0,
+                "rejected": self.rejected,
+                "opened": self.opened,
+            }
+
+    def _record(self, failed):
+        now = time.monotonic()
+        self.outcomes.append((now, failed))
+        if failed:
+            self.failures += 1
+        self._expire(now)
+
+    def _expire(self, now):
+        outcomes = self.outcomes
+        horizon = now - self.window_seconds
+        while outcomes and outcomes[0][0] < horizon:
+            if outcomes.popleft()[1]:
+                self.failures -= 1
+
+    def _open(self, reason):
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._set_state(STATE_OPEN, reason)
+
+    def _close(self):
+        self.outcomes.clear()
+        self.failures = 0
+        self._set_state(STATE_CLOSED, "udane wywołanie próbne")
+
+    def _set_state(self, state, reason):
+        self.state = state
+        self.reason = reason
+        self.probes = 0
+        log = logger.warning if state == STATE_OPEN else logger.info
+        log(f"Wyłącznik '{self.name}': {state} ({reason})")
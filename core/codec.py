@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł kodeka JSON dla systemu Morris.
+Koduje i dekoduje treść wiadomości MQTT (bajty) najszybszą dostępną biblioteką:
+orjson, msgspec lub - gdy żadna nie jest zainstalowana - standardowym modułem json.
+Żądania i odpowiedzi zdalnych wtyczek mogą używać kodowania binarnego (MessagePack,
+CBOR) uzgodnionego w ogłoszeniu wtyczki, jeśli zainstalowano bibliotekę msgpack lub cbor2.
+Treść wiadomości pozostaje w bajtach do czasu dekodowania przez handler, któremu
+router przekazał wiadomość, więc wiadomości bez odbiorcy nie są dekodowane.
+"""
+
+import json
+import logging
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Nazwa automatycznego wyboru biblioteki
+AUTO = "auto"
+
+# Zarejestrowane implementacje: nazwa -> (loads, dumps)
+BACKENDS = {}
+# Kolejność wyboru przy AUTO (od najszybszej)
+PREFERENCE = ("orjson", "msgspec", "json")
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _json_dumps(obj, default=None):
+    return json.dumps(obj, ensure_ascii=False, default=default).encode("utf-8")
+
+
+BACKENDS["json"] = (_json_loads, _json_dumps)
+
+try:
+    import orjson
+
+    def _orjson_dumps(obj, default=None):
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Typy nieobsługiwane przez orjson (np. liczby całkowite > 64 bity)
+            return _json_dumps(obj, default)
+
+    BACKENDS["orjson"] = (orjson.loads, _orjson_dumps)
+except ImportError:
+    pass
+
+try:
+    import msgspec
+
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def _msgspec_loads(data):
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def _msgspec_dumps(obj, default=None):
+        try:
+            return msgspec.json.encode(obj, enc_hook=default)
+        except (TypeError, msgspec.EncodeError):
+            return _json_dumps(obj, default)
+
+    BACKENDS["msgspec"] = (_msgspec_loads, _msgspec_dumps)
+except ImportError:
+    pass
+
+_backend = None
+_loads = None
+_dumps = None
+
+
+def register_backend(name, loads_fn, dumps_fn):
+    """
+    Rejestruje własną implementację kodeka (np. z inną biblioteką JSON).
+
+    Args:
+        name (str): Nazwa implementacji
+        loads_fn (callable): Funkcja loads(bytes | str) zgłaszająca ValueError dla niepoprawnych danych
+        dumps_fn (callable): Funkcja dumps(obj, default=None) zwracająca bajty UTF-8
+    """
+    BACKENDS[name] = (loads_fn, dumps_fn)
+
+
+def use_backend(name=AUTO):
+    """
+    Wybiera implementację kodeka używaną przez loads() i dumps().
+
+    Args:
+        name (str): Nazwa zarejestrowanej implementacji lub "auto" (najszybsza dostępna)
+
+    Returns:
+        str: Nazwa wybranej implementacji
+
+    Raises:
+        ValueError: Gdy implementacja nie jest dostępna
+    """
+    global _backend, _loads, _dumps
+
+    if name == AUTO:
+        name = next(backend for backend in PREFERENCE if backend in BACKENDS)
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Kodek JSON '{name}' nie jest dostępny (dostępne: {', '.join(BACKENDS)})"
+        )
+
+    if name != _backend:
+        _loads, _dumps = BACKENDS[name]
+        _backend = name
+        logger.debug(f"Kodek JSON: {name}")
+    return name
+
+
+def backend():
+    """
+    Zwraca nazwę używanej implementacji kodeka.
+
+    Returns:
+        str: Nazwa implementacji (orjson, msgspec, json lub zarejestrowana)
+    """
+    return _backend
+
+
+def loads(data):
+    """
+    Dekoduje dokument JSON.
+
+    Args:
+        data (bytes | str): Treść dokumentu (np. treść wiadomości MQTT)
+
+    Returns:
+        Zdekodowany obiekt
+
+    Raises:
+        ValueError: Gdy dane nie są poprawnym dokumentem JSON (UTF-8)
+    """
+    return _loads(data)
+
+
+def dumps(obj, default=None):
+    """
+    Koduje obiekt do JSON.
+
+    Args:
+        obj: Obiekt do zakodowania
+        default (callable, optional): Funkcja zamieniająca nieobsługiwane obiekty
+
+    Returns:
+        bytes: Dokument JSON w UTF-8
+
+    Raises:
+        TypeError: Gdy obiektu nie da się zakodować
+    """
+    return _dumps(obj, default)
+
+
+use_backend(AUTO)
+
+
+# Kodowanie tekstowe (JSON) - używane, gdy wtyczka nie ogłosiła innego
+JSON_ENCODING = "json"
+
+# Kodowania treści żądań zdalnych wtyczek: nazwa -> (decode, encode)
+ENCODINGS = {JSON_ENCODING: (loads, dumps)}
+# Kolejność wyboru kodowania (od najbardziej zwartego)
+ENCODING_PREFERENCE = ("msgpack", "cbor", JSON_ENCODING)
+
+# Pierwszy bajt słownika w kodowaniu MessagePack (fixmap, map16, map32) i CBOR (typ główny 5)
+_MSGPACK_MAP_BYTES = frozenset(range(0x80, 0x90)) | {0xDE, 0xDF}
+_CBOR_MAP_BYTES = frozenset(range(0xA0, 0xBC)) | {0xBF}
+
+try:
+    import msgpack
+
+    def _msgpack_decode(data):
+        try:
+            return msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except Exception as e:
+            raise ValueError(f"Nieprawidłowe dane MessagePack: {e}") from e
+
+    def _msgpack_encode(obj):
+        try:
+            return msgpack.packb(obj, use_bin_type=True)
+        except OverflowError as e:
+            raise TypeError(str(e)) from e
+
+    ENCODINGS["msgpack"] = (_msgpack_decode, _msgpack_encode)
+except ImportError:
+    pass
+
+try:
+    import cbor2
+
+    def _cbor_decode(data):
+        try:
+            return cbor2.loads(data)
+        except Exception as e:
+            raise ValueError(f"Nieprawidłowe dane CBOR: {e}") from e
+
+    def _cbor_encode(obj):
+        try:
+            return cbor2.dumps(obj)
+        except cbor2.CBOREncodeError as e:
+            raise TypeError(str(e)) from e
+
+    ENCODINGS["cbor"] = (_cbor_decode, _cbor_encode)
+except ImportError:
+    pass
+
+
+def register_encoding(name, decode_fn, encode_fn):
+    """
+    Rejestruje własne kodowanie treści żądań zdalnych wtyczek.
+
+    Args:
+        name (str): Nazwa kodowania (ogłaszana przez wtyczki)
+        decode_fn (callable): Funkcja decode(bytes) zgłaszająca ValueError dla niepoprawnych danych
+        encode_fn (callable): Funkcja encode(obj) zwracająca bajty
+    """
+    ENCODINGS[name] = (decode_fn, encode_fn)
+
+
+def negotiate_encoding(offered, allowed=ENCODING_PREFERENCE):
+    """
+    Wybiera kodowanie dla zdalnej wtyczki: pierwsze z kodowań ogłoszonych przez wtyczkę
+    (w kolejności jej preferencji), które jest dozwolone i dostępne. Wtyczki bez
+    ogłoszonych kodowań otrzymują JSON.
+
+    Args:
+        offered (str | list): Kodowanie lub lista kodowań ogłoszonych przez wtyczkę (może być None)
+        allowed (list): Kodowania dozwolone w konfiguracji silnika
+
+    Returns:
+        str: Nazwa wybranego kodowania
+    """
+    if isinstance(offered, str):
+        offered = [offered]
+    for name in offered or ():
+        if name in allowed and name in ENCODINGS:
+            return name
+    return JSON_ENCODING
+
+
+def detect_encoding(data):
+    """
+    Rozpoznaje kodowanie słownika po pierwszym bajcie treści (odpowiedzi zdalnych
+    wtyczek są słownikami).
+
+    Args:
+        data (bytes | str): Treść wiadomości
+
+    Returns:
+        str: "msgpack", "cbor" lub "json" (pozostałe przypadki)
+    """
+    if not data or isinstance(data, str):
+        return JSON_ENCODING
+    first = data[0]
+    if first in _MSGPACK_MAP_BYTES:
+        return "msgpack"
+    if first in _CBOR_MAP_BYTES:
+        return "cbor"
+    return JSON_ENCODING
+
+
+def encode(obj, encoding=JSON_ENCODING):
+    """
+    Koduje obiekt w podanym kodowaniu.
+
+    Args:
+        obj: Obiekt do zakodowania
+        encoding (str): Nazwa kodowania (json, msgpack, cbor lub zarejestrowane)
+
+    Returns:
+        bytes: Zakodowana treść
+
+    Raises:
+        ValueError: Gdy kodowanie nie jest dostępne
+        TypeError: Gdy obiektu nie da się zakodować
+    """
+    try:
+        encode_fn = ENCODINGS[encoding][1]
+    except KeyError:
+        raise ValueError(f"Kodowanie '{encoding}' nie jest dostępne") from None
+    return encode_fn(obj)
+
+
+def decode(data, encoding=None):
+    """
+    Dekoduje treść w podanym kodowaniu.
+
+    Args:
+        data (bytes | str): Treść wiadomości
+        encoding (str, optional): Nazwa kodowania; domyślnie rozpoznawane przez detect_encoding()
+
+    Returns:
+        Zdekodowany obiekt
+
+    Raises:
+        ValueError: Gdy dane są niepoprawne lub kodowanie nie jest dostępne
+    """
+    if encoding is None:
+        encoding = detect_encoding(data)
+    try:
+        decode_fn = ENCODINGS[encoding][0]
+    except KeyError:
+        raise ValueError(f"Kodowanie '{encoding}' nie jest dostępne") from None
+    return decode_fn(data)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł kolejki martwych wiadomości (dead-letter queue) dla systemu Morris.
+Uruchomienia chainów, w których krok zakończył się błędem, są zapisywane razem
+z danymi wejściowymi i opisem błędów do segmentów NDJSON (tylko dopisywanie),
+z limitem łącznego rozmiaru. Zapisane uruchomienia można ponownie wykonać
+po usunięciu przyczyny błędu - udane ponowienia są potwierdzane i usuwane.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Nazwy plików kolejki
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson"
+ACKED_FILE = "acked.txt"
+
+# Błędy kroków bieżącego uruchomienia chaina (lista) lub None poza przechwytywaniem
+_failures = contextvars.ContextVar("morris_failures", default=None)
+
+
+@contextmanager
+def capture_failures():
+    """
+    Zbiera błędy kroków zgłoszone przez note_failure() w bloku (także w gałęziach
+    DAG i zadaniach asyncio, które dziedziczą zmienne kontekstowe).
+
+    Yields:
+        list: Lista opisów błędów kroków
+    """
+    failures = []
+    token = _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _failures.reset(token)
+
+
+def note_failure(step, plugin, error):
+    """
+    Zapisuje błąd kroku bieżącego uruchomienia (jeśli błędy są przechwytywane).
+
+    Args:
+        step: Numer lub identyfikator kroku (None dla błędów całego uruchomienia)
+        plugin (str): Nazwa wtyczki kroku
+        error (Exception): Błąd kroku
+    """
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(failure_record(step, plugin, error))
+
+
+def failure_record(step, plugin, error):
+    """
+    Zwraca opis błędu kroku zapisywany w kolejce martwych wiadomości.
+
+    Args:
+        step: Numer lub identyfikator kroku
+        plugin (str): Nazwa wtyczki kroku
+        error (Exception): Błąd kroku
+
+    Returns:
+        dict: Krok, wtyczka, komunikat i typ błędu
+    """
+    return {
+        "step": step,
+        "plugin": plugin,
+        "error": str(error),
+        "error_type": type(error).__name__,
+    }
+
+
+class DeadLetterStore:
+    """
+    Kolejka martwych wiadomości w segmentach NDJSON.
+
+    Wpisy są tylko dopisywane do bieżącego segmentu; identyfikatory potwierdzonych
+    (ponownie wykonanych) wpisów trafiają do osobnego pliku. Segment, którego wszystkie
+    wpisy zostały potwierdzone, jest usuwany, a po przekroczeniu `max_bytes` usuwane
+    są najstarsze segmenty (wraz z niepotwierdzonymi wpisami).
+    """
+
+    def __init__(self, directory, segment_bytes=4 * 1024 * 1024, max_bytes=64 * 1024 * 1024, fsync=False):
+        """
+        Inicjalizacja kolejki - wczytanie istniejących segmentów.
+
+        Args:
+            directory (str): Katalog segmentów
+            segment_bytes (int): Rozmiar segmentu, po którym zaczynany jest nowy
+            max_bytes (int): Limit łącznego rozmiaru segmentów
+            fsync (bool): Wymuszenie zapisu na dysk po każdym wpisie
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.lock = threading.Lock()
+
+        # Segmenty od najstarszego: numer -> {"path", "size", "pending": zbiór identyfikatorów}
+        self.segments = {}
+        # Identyfikator wpisu -> numer segmentu (tylko wpisy niepotwierdzone)
+        self.locations = {}
+        # Potwierdzone wpisy istniejących segmentów
+        self.acked = set()
+        self.file = None
+
+        # Metryki
+        self.recorded = 0
+        self.replayed = 0
+        self.dropped = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def append(self, chain_id, payload, failures):
+        """
+        Zapisuje nieudane uruchomienie chaina.
+
+        Args:
+            chain_id (str): Identyfikator chaina
+            payload (dict): Dane wejściowe uruchomienia
+            failures (list): Błędy kroków (note_failure)
+
+        Returns:
+            str: Identyfikator wpisu
+        """
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "timestamp": datetime.now().isoformat(),
+            "chain_id": chain_id,
+            "failures": failures,
+            "payload": payload,
+        }
+        line = (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+        with self.lock:
+            seq = self._current_segment(len(line))
+            segment = self.segments[seq]
+            self.file.write(line)
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+
+            segment["size"] += len(line)
+            segment["pending"].add(entry_id)
+            self.locations[entry_id] = seq
+            self.recorded += 1
+            self._enforce_limit()
+
+        return entry_id
+
+    def pending(self, limit=None, chain_id=None, offset=0):
+        """
+        Zwraca niepotwierdzone wpisy od najstarszego.
+
+        Args:
+            limit (int, optional): Maksymalna liczba wpisów
+            chain_id (str, optional): Tylko wpisy danego chaina
+            offset (int): Liczba pominiętych pasujących wpisów
+
+        Returns:
+            list: Lista wpisów (słowniki z polami id, timestamp, chain_id, failures, payload)
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+            segments = [
+                (segment["path"], set(segment["pending"])) for segment in self.segments.values()
+            ]
+
+        entries = []
+        for path, pending in segments:
+            for entry in self._read_segment(path):
+                if entry["id"] not in pending:
+                    continue
+                if chain_id is not None and entry.get("chain_id") != chain_id:
+                    continue
+                if offset > 0:
+                    offset -= 1
+                    continue
+                entries.append(entry)
+                if limit is not None and len(entries) >= limit:
+                    return entries
+        return entries
+
+    def ack(self, entry_ids):
+        """
+        Potwierdza (usuwa z kolejki) ponownie wykonane wpisy.
+
+        Args:
+            entry_ids (list): Identyfikatory wpisów
+        """
+        with self.lock:
+            emptied = []
+            acked = []
+            for entry_id in entry_ids:
+                seq = self.locations.pop(entry_id, None)
+                if seq is None:
+                    continue
+                segment = self.segments[seq]
+                segment["pending"].discard(entry_id)
+                acked.append(entry_id)
+                if not segment["pending"]:
+                    emptied.append(seq)
+
+            if not acked:
+                return
+            self.replayed += len(acked)
+            self.acked.update(acked)
+
+            current = max(self.segments)
+            removed = [seq for seq in emptied if seq != current]
+            for seq in removed:
+                self._remove_segment(seq)
+
+            if removed:
+                self._write_acked()
+            else:
+                with open(self._acked_path(), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{entry_id}\n" for entry_id in acked))
+
+    def clear(self):
+        """
+        Usuwa wszystkie wpisy kolejki.
+
+        Returns:
+            int: Liczba usuniętych niepotwierdzonych wpisów
+        """
+        with self.lock:
+            removed = len(self.locations)
+            for seq in list(self.segments):
+                self._remove_segment(seq)
+            self.acked.clear()
+            self._write_acked()
+        logger.info(f"Wyczyszczono kolejkę martwych wiadomości ({removed} wpisów)")
+        return removed
+
+    def get_metrics(self):
+        """
+        Zwraca metryki kolejki.
+
+        Returns:
+            dict: Liczba oczekujących wpisów, rozmiar segmentów i liczniki zapisów,
+                  ponowień oraz wpisów usuniętych przez limit rozmiaru
+        """
+        with self.lock:
+            return {
+                "pending": len(self.locations),
+                "segments": len(self.segments),
+                "bytes": sum(segment["size"] for segment in self.segments.values()),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "dropped": self.dropped,
+            }
+
+    def close(self):
+        """
+        Zamyka bieżący segment.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _load(self):
+        names = sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        acked = set()
+        if os.path.exists(self._acked_path()):
+            with open(self._acked_path(), "r", encoding="utf-8") as f:
+                acked = {line.strip() for line in f if line.strip()}
+
+        for name in names:
+            try:
+                seq = int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            except ValueError:
+                continue
+            path = os.path.join(self.directory, name)
+            pending = set()
+            for entry in self._read_segment(path):
+                entry_id = entry["id"]
+                if entry_id in acked:
+                    self.acked.add(entry_id)
+                else:
+                    pending.add(entry_id)
+                    self.locations[entry_id] = seq
+            self.segments[seq] = {"path": path, "size": os.path.getsize(path), "pending": pending}
+
+        if self.segments:
+            logger.info(
+                f"Wczytano kolejkę martwych wiadomości: {len(self.locations)} wpisów "
+                f"w {len(self.segments)} segmentach"
+            )
+
+    @staticmethod
+    def _read_segment(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # Niepełny ostatni wiersz (przerwany zapis) jest pomijany
+                    if not line.endswith("\n"):
+                        break
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Pominięto uszkodzony wpis w segmencie {path}")
+        except FileNotFoundError:
+            return
+
+    def _current_segment(self, size):
+        if self.segments:
+            seq = max(self.segments)
+            segment = self.segments[seq]
+            if segment["size"] == 0 or segment["size"] + size <= self.segment_bytes:
+                if self.file is None:
+                    self.file = open(segment["path"], "ab")
+                return seq
+            seq += 1
+        else:
+            seq = 1
+
+        if self.file is not None:
+            self.file.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+        self.file = open(path, "ab")
+        self.segments[seq] = {"path": path, "size": 0, "pending": set()}
+        return seq
+
+    def _enforce_limit(self):
+        removed = False
+        while len(self.segments) > 1 and (
+            sum(segment["size"] for segment in self.segments.values()) > self.max_bytes
+        ):
+            seq = min(self.segments)
+            dropped = len(self.segments[seq]["pending"])
+            self.dropped += dropped
+            self._remove_segment(seq)
+            removed = True
+            logger.warning(
+                f"Przekroczono limit rozmiaru kolejki martwych wiadomości - usunięto "
+                f"najstarszy segment ({dropped} wpisów)"
+            )
+        if removed:
+            self._write_acked()
+
+    def _remove_segment(self, seq):
+        segment = self.segments.pop(seq)
+        if self.file is not None and not self.segments:
+            self.file.close()
+            self.file = None
+        for entry_id in segment["pending"]:
+            self.locations.pop(entry_id, None)
+        # Potwierdzenia usuwanego segmentu nie są już potrzebne
+        self.acked.difference_update(
+            entry["id"] for entry in self._read_segment(segment["path"])
+        )
+        try:
+            os.remove(segment["path"])
+        except FileNotFoundError:
+            pass
+
+    def _write_acked(self):
+        path = self._acked_path()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{entry_id}\n" for entry_id in self.acked))
+        os.replace(temp_path, path)
+
+    def _acked_path(self):
+        return os.path.join(self.directory, ACKED_FILE)
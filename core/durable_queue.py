@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł trwałej kolejki wejściowej dla systemu Morris.
+Dane z triggerów (webhooki, MQTT) są zapisywane w bazie SQLite (tryb WAL) przed
+uruchomieniem chainów i usuwane (potwierdzane) dopiero po zakończeniu przetwarzania.
+Wpisy niepotwierdzone przed zatrzymaniem lub awarią procesu są przetwarzane
+ponownie po starcie (co najmniej jednokrotne przetwarzanie).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Polityki zapisu na dysk (PRAGMA synchronous w trybie WAL)
+FSYNC_ALWAYS = "always"  # fsync przy każdym zatwierdzeniu - odporność na utratę zasilania
+FSYNC_NORMAL = "normal"  # fsync przy checkpoincie WAL - odporność na awarię procesu
+FSYNC_OFF = "off"  # Bez fsync - zapis zależy od systemu operacyjnego
+FSYNC_POLICIES = {
+    FSYNC_ALWAYS: "FULL",
+    FSYNC_NORMAL: "NORMAL",
+    FSYNC_OFF: "OFF",
+}
+
+
+class DurableQueue:
+    """
+    Trwała kolejka danych wejściowych chainów w bazie SQLite.
+
+    Każde wstawienie jest osobną transakcją (tryb autocommit), więc wpis jest
+    zapisany w dzienniku WAL, zanim put() zwróci identyfikator. Stan "w trakcie
+    przetwarzania" nie jest zapisywany - po ponownym otwarciu kolejki wszystkie
+    niepotwierdzone wpisy są zwracane przez recover().
+    """
+
+    def __init__(self, path, fsync=FSYNC_NORMAL):
+        """
+        Inicjalizacja kolejki - otwarcie (lub utworzenie) bazy.
+
+        Args:
+            path (str): Ścieżka do pliku bazy
+            fsync (str): Polityka zapisu na dysk: always, normal lub off
+
+        Raises:
+            ValueError: Gdy polityka zapisu jest nieznana
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Nieznana polityka zapisu kolejki: {fsync}")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"PRAGMA synchronous={FSYNC_POLICIES[fsync]}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS inbound ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "trigger_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+
+        # Wpisy niepotwierdzone przed poprzednim zatrzymaniem procesu
+        self.recovered_ids = [
+            row[0] for row in self.connection.execute("SELECT id FROM inbound ORDER BY id")
+        ]
+        self.depth = len(self.recovered_ids)
+
+        # Metryki
+        self.enqueued = 0
+        self.acked = 0
+
+        if self.recovered_ids:
+            logger.info(
+                f"Trwała kolejka wejściowa zawiera {self.depth} niepotwierdzonych wpisów do ponownego przetworzenia"
+            )
+
+    def put(self, trigger_id, payload):
+        """
+        Zapisuje dane wejściowe triggera w kolejce.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+            payload (dict): Dane wejściowe
+
+        Returns:
+            int: Identyfikator wpisu (do potwierdzenia przez ack)
+        """
+        data = json.dumps(payload, ensure_ascii=False, default=str)
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO inbound (trigger_id, payload, created_at) VALUES (?, ?, ?)",
+                (trigger_id, data, time.time()),
+            )
+            self.enqueued += 1
+            self.depth += 1
+            return cursor.lastrowid
+
+    def ack(self, record_id):
+        """
+        Potwierdza przetworzenie wpisu (usuwa go z kolejki).
+
+        Args:
+            record_id (int): Identyfikator wpisu
+        """
+        with self.lock:
+            cursor = self.connection.execute("DELETE FROM inbound WHERE id = ?", (record_id,))
+            if cursor.rowcount:
+                self.acked += 1
+                self.depth -= 1
+
+    def recover(self):
+        """
+        Zwraca wpisy niepotwierdzone przed poprzednim zatrzymaniem procesu
+        (od najstarszego). Wpisy pozostają w kolejce do czasu potwierdzenia.
+
+        Yields:
+            tuple: (identyfikator wpisu, identyfikator triggera, dane wejściowe)
+        """
+        for record_id in self.recovered_ids:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT trigger_id, payload FROM inbound WHERE id = ?", (record_id,)
+                ).fetchone()
+            if row is None:
+                continue
+            try:
+                payload = json.loads(row[1])
+            except ValueError:
+                logger.error(f"Pominięto uszkodzony wpis {record_id} trwałej kolejki wejściowej")
+                self.ack(record_id)
+                continue
+            yield record_id, row[0], payload
+
+    def get_metrics(self):
+        """
+        Zwraca metryki kolejki.
+
+        Returns:
+            dict: Liczba niepotwierdzonych wpisów, zapisanych, potwierdzonych i odzyskanych po starcie
+        """
+        return {
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "acked": self.acked,
+            "recovered": len(self.recovered_ids),
+            "fsync": self.fsync,
+        }
+
+    def close(self):
+        """
+        Zamyka bazę kolejki.
+        """
+        with self.lock:
+            self.connection.close()
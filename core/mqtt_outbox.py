@@ -0,0 +1,501 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł kolejki wychodzącej (outbox) klienta MQTT dla systemu Morris.
+Publikacja umieszcza wiadomość w ograniczonej kolejce w pamięci i od razu wraca.
+Wiadomości wysyła osobny wątek, który zbiera napływające serie w paczki. Po utracie
+połączenia z brokerem wysyłka jest wstrzymywana i wznawiana po ponownym połączeniu.
+Przy przepełnionej kolejce wiadomości z QoS 1 i 2 mogą być zapisywane na dysku
+(SQLite) i są wysyłane po przywróceniu połączenia - także po restarcie procesu.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Wiadomość oczekująca na wysłanie (spill_id - identyfikator wpisu na dysku lub None)
+OutboxMessage = namedtuple(
+    "OutboxMessage", ["topic", "payload", "qos", "retain", "spill_id"], defaults=(None,)
+)
+
+
+def _to_bytes(payload):
+    # Treść zapisywana na dysku - te same konwersje co w paho (str, liczby, None)
+    if payload is None:
+        return b""
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return str(payload).encode("ascii")
+
+
+class SpillStore:
+    """
+    Wiadomości kolejki wychodzącej zapisane na dysku w bazie SQLite (tryb WAL).
+    Wpis jest usuwany dopiero po przekazaniu wiadomości do klienta MQTT.
+    """
+
+    def __init__(self, path):
+        """
+        Inicjalizacja magazynu - otwarcie (lub utworzenie) bazy.
+
+        Args:
+            path (str): Ścieżka do pliku bazy
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "topic TEXT NOT NULL, "
+            "payload BLOB NOT NULL, "
+            "qos INTEGER NOT NULL, "
+            "retain INTEGER NOT NULL)"
+        )
+        self.depth = self.connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def put(self, message):
+        """
+        Zapisuje wiadomość na dysku.
+
+        Args:
+            message (OutboxMessage): Wiadomość
+
+        Returns:
+            int: Identyfikator wpisu
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO outbox (topic, payload, qos, retain) VALUES (?, ?, ?, ?)",
+                (message.topic, _to_bytes(message.payload), message.qos, int(message.retain)),
+            )
+            self.depth += 1
+            return cursor.lastrowid
+
+    def load(self, after_id, limit):
+        """
+        Odczytuje kolejne wiadomości (od najstarszej) bez usuwania ich z dysku.
+
+        Args:
+            after_id (int): Identyfikator ostatniego odczytanego wpisu
+            limit (int): Maksymalna liczba wiadomości
+
+        Returns:
+            list: Lista OutboxMessage z ustawionym spill_id
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, topic, payload, qos, retain FROM outbox WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [
+            OutboxMessage(topic, payload, qos, bool(retain), record_id)
+            for record_id, topic, payload, qos, retain in rows
+        ]
+
+    def delete(self, record_ids):
+        """
+        Usuwa wysłane wiadomości z dysku.
+
+        Args:
+            record_ids (list): Identyfikatory wpisów
+        """
+        with self.lock:
+            for record_id in record_ids:
+                cursor = self.connection.execute("DELETE FROM outbox WHERE id = ?", (record_id,))
+                self.depth -= cursor.rowcount
+
+    def close(self):
+        """
+        Zamyka bazę magazynu.
+        """
+        with self.lock:
+            self.connection.close()
+
+
+class MqttOutbox:
+    """
+    Ograniczona kolejka wiadomości wychodzących opróżniana przez wątek wysyłający.
+
+    Wiadomości są wysyłane paczkami (seria publikacji w krótkim oknie linger_ms trafia
+    do jednej paczki). Wiadomość zachowywana (retain) QoS 0 nadpisana w paczce przez
+    późniejszą wiadomość zachowywaną na ten sam temat nie jest wysyłana; wiadomości
+    QoS 1 i 2 są zawsze wysyłane. Nieudana wysyłka (brak połączenia) wstrzymuje
+    kolejkę do ponownego połączenia (wake) lub upływu retry_interval - wiadomości nie
+    są tracone. Przy pełnej kolejce lub wstrzymanej wysyłce (suspend, brak połączenia)
+    wiadomości QoS 1 i 2 trafiają na dysk (jeśli podano spill_path), a przy pełnej
+    kolejce wiadomości QoS 0 są porzucane.
+    """
+
+    def __init__(
+        self,
+        send,
+        queue_size=10000,
+        batch_size=100,
+        linger_ms=5,
+        retry_interval=1.0,
+        spill_path=None,
+        name="morris-mqtt-outbox",
+    ):
+        """
+        Inicjalizacja kolejki wychodzącej.
+
+        Args:
+            send (callable): Funkcja send(topic, payload, qos, retain) zwracająca True po
+                             przekazaniu wiadomości do klienta MQTT i False, gdy wysyłkę należy
+                             ponowić (np. brak połączenia). Wyjątek oznacza odrzucenie wiadomości.
+            queue_size (int): Maksymalna liczba wiadomości w pamięci
+            batch_size (int): Maksymalna liczba wiadomości w paczce
+            linger_ms (float): Czas zbierania serii wiadomości przed wysłaniem paczki (ms)
+            retry_interval (float): Odstęp ponawiania wysyłki po niepowodzeniu (sekundy)
+            spill_path (str, optional): Ścieżka bazy SQLite na wiadomości nadmiarowe
+            name (str): Nazwa wątku wysyłającego
+        """
+        self.send = send
+        self.queue_size = max(1, int(queue_size))
+        self.batch_size = max(1, int(batch_size))
+        self.linger = max(0.0, linger_ms / 1000)
+        self.retry_interval = retry_interval
+        self.name = name
+        self.spill = SpillStore(spill_path) if spill_path else None
+
+        self.messages = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.in_flight = 0
+        self.retry_at = 0.0
+        self.stalled = False
+        # Wpisy na dysku jeszcze nieprzeniesione do pamięci (o identyfikatorze > spill_cursor)
+        self.spill_pending = self.spill.depth if self.spill else 0
+        self.spill_cursor = 0
+
+        # Metryki
+        self.enqueued = 0
+        self.published = 0
+        self.coalesced = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+
+        if self.spill_pending:
+            logger.info(
+                f"Kolejka wychodząca MQTT zawiera {self.spill_pending} wiadomości zapisanych na dysku"
+            )
+
+    def start(self):
+        """
+        Uruchamia wątek wysyłający (jeśli nie został jeszcze uruchomiony).
+        """
+        with self.condition:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def put(self, topic, payload, qos=0, retain=False):
+        """
+        Umieszcza wiadomość w kolejce. Nie czeka na wysłanie ani na połączenie z brokerem.
+
+        Args:
+            topic (str): Temat
+            payload (str/bytes): Treść wiadomości
+            qos (int): Poziom QoS
+            retain (bool): Czy wiadomość ma być zachowana przez broker
+
+        Returns:
+            bool: True jeśli wiadomość została przyjęta (w pamięci lub na dysku),
+                  False jeśli kolejka jest pełna i wiadomość została porzucona
+        """
+        message = OutboxMessage(topic, payload, qos, retain)
+
+        with self.condition:
+            self._start_locked()
+
+            # Wiadomości QoS 1 i 2 trafiają za wiadomości zapisane wcześniej na dysku,
+            # a bez połączenia z brokerem - od razu na dysk zamiast zajmować pamięć
+            if qos > 0 and (self.spill_pending or (self.stalled and self.spill is not None)):
+                return self._spill_locked(message)
+
+            if len(self.messages) >= self.queue_size:
+                if qos > 0 and self.spill is not None:
+                    return self._spill_locked(message)
+                self.dropped += 1
+                logger.warning(f"Kolejka wychodząca MQTT pełna, porzucono wiadomość na temat {topic}")
+                return False
+
+            self.messages.append(message)
+            self.enqueued += 1
+            # Budzenie wątku wysyłającego po pierwszej wiadomości serii lub pełnej paczce
+            if len(self.messages) == 1 or len(self.messages) >= self.batch_size:
+                self.condition.notify_all()
+        return True
+
+    def _spill_locked(self, message):
+        try:
+            self.spill.put(message)
+        except sqlite3.Error as e:
+            self.dropped += 1
+            logger.error(f"Nie można zapisać wiadomości na temat {message.topic} na dysku: {e}")
+            return False
+        self.spill_pending += 1
+        self.spilled += 1
+        self.enqueued += 1
+        self.condition.notify_all()
+        return True
+
+    def wake(self):
+        """
+        Wznawia wstrzymaną wysyłkę (wywoływane po ponownym połączeniu z brokerem).
+        """
+        with self.condition:
+            self.retry_at = 0.0
+            if self.spill_pending:
+                self._start_locked()
+            self.condition.notify_all()
+
+    def suspend(self):
+        """
+        Oznacza wysyłkę jako wstrzymaną (wywoływane po utracie połączenia z brokerem).
+        Do czasu udanej wysyłki nowe wiadomości QoS 1 i 2 trafiają na dysk.
+        """
+        with self.condition:
+            if not self.stalled:
+                self.stalled = True
+                logger.warning(
+                    f"Wysyłka wiadomości MQTT wstrzymana - {len(self.messages)} wiadomości oczekuje na połączenie z brokerem"
+                )
+
+    def _has_work_locked(self):
+        return bool(self.messages or self.spill_pending)
+
+    def _next_batch(self):
+        """
+        Czeka na wiadomości i zwraca kolejną paczkę do wysłania.
+
+        Returns:
+            list: Paczka wiadomości lub None po zatrzymaniu kolejki
+        """
+        with self.condition:
+            while self.running:
+                delay = self.retry_at - time.monotonic()
+                if self._has_work_locked() and delay <= 0:
+                    break
+                self.condition.wait(delay if delay > 0 else None)
+            if not self.running:
+                return None
+
+            # Zbieranie serii wiadomości (okno linger_ms lub do zapełnienia paczki)
+            deadline = time.monotonic() + self.linger
+            while self.running and len(self.messages) < self.batch_size and not self.spill_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            if self.spill_pending and len(self.messages) < self.batch_size:
+                self._load_spill_locked()
+
+            batch = [self.messages.popleft() for _ in range(min(self.batch_size, len(self.messages)))]
+            self.in_flight = len(batch)
+            return batch
+
+    def _load_spill_locked(self):
+        try:
+            loaded = self.spill.load(self.spill_cursor, self.batch_size)
+        except sqlite3.Error as e:
+            logger.error(f"Nie można odczytać wiadomości zapisanych na dysku: {e}")
+            # Ponowienie odczytu po retry_interval (lub wake()) zamiast w pętli bez przerwy
+            self.retry_at = time.monotonic() + self.retry_interval
+            return
+        if not loaded:
+            self.spill_pending = 0
+            return
+        self.spill_cursor = loaded[-1].spill_id
+        self.spill_pending = max(0, self.spill_pending - len(loaded))
+        self.messages.extend(loaded)
+
+    @staticmethod
+    def _coalesce(batch):
+        """
+        Usuwa z paczki wiadomości zachowywane (retain) QoS 0 nadpisane przez późniejsze
+        wiadomości zachowywane na ten sam temat. Wiadomości QoS 1 i 2 nie są pomijane -
+        ich dostarczenie jest gwarantowane.
+
+        Returns:
+            tuple: (wiadomości do wysłania, pominięte wiadomości)
+        """
+        kept = []
+        skipped = []
+        topics = set()
+        for message in reversed(batch):
+            if message.retain:
+                if message.qos == 0 and message.topic in topics:
+                    skipped.append(message)
+                    continue
+                topics.add(message.topic)
+            kept.append(message)
+        kept.reverse()
+        return kept, skipped
+
+    def _run(self):
+        """
+        Pętla wątku wysyłającego.
+        """
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            messages, skipped = self._coalesce(batch)
+            done_ids = [message.spill_id for message in skipped if message.spill_id is not None]
+            sent = 0
+            failed = 0
+            remaining = []
+
+            for index, message in enumerate(messages):
+                try:
+                    delivered = self.send(message.topic, message.payload, message.qos, message.retain)
+                except Exception as e:
+                    # Wiadomości nie da się wysłać (np. nieprawidłowy temat) - ponowienie nic nie zmieni
+                    logger.error(f"Odrzucono wiadomość MQTT na temat {message.topic}: {e}")
+                    delivered = True
+                    failed += 1
+                else:
+                    if not delivered:
+                        remaining = messages[index:]
+                        break
+                    sent += 1
+                if message.spill_id is not None:
+                    done_ids.append(message.spill_id)
+
+            if done_ids:
+                try:
+                    self.spill.delete(done_ids)
+                except sqlite3.Error as e:
+                    logger.error(f"Nie można usunąć wysłanych wiadomości z dysku: {e}")
+
+            with self.condition:
+                self.published += sent
+                self.failed += failed
+                self.coalesced += len(skipped)
+                self.batches += 1
+                self.in_flight = 0
+                if remaining:
+                    self.messages.extendleft(reversed(remaining))
+                    self.retries += 1
+                    self.retry_at = time.monotonic() + self.retry_interval
+                    if not self.stalled:
+                        self.stalled = True
+                        logger.warning(
+                            f"Wysyłka wiadomości MQTT wstrzymana - {len(self.messages)} wiadomości oczekuje na połączenie z brokerem"
+                        )
+                elif self.stalled:
+                    self.stalled = False
+                    logger.info("Wznowiono wysyłkę wiadomości MQTT z kolejki wychodzącej")
+                self.condition.notify_all()
+
+            if sent:
+                logger.debug(f"Wysłano paczkę {sent} wiadomości MQTT")
+
+    def flush(self, timeout=None):
+        """
+        Czeka na wysłanie wszystkich wiadomości z kolejki.
+
+        Args:
+            timeout (float, optional): Maksymalny czas oczekiwania w sekundach
+
+        Returns:
+            bool: True jeśli kolejka została opróżniona
+        """
+        with self.condition:
+            self.condition.notify_all()
+            return self.condition.wait_for(
+                lambda: not self._has_work_locked() and not self.in_flight, timeout=timeout
+            )
+
+    def stop(self, timeout=2):
+        """
+        Zatrzymuje wątek wysyłający po próbie wysłania oczekujących wiadomości.
+        Niewysłane wiadomości QoS 1 i 2 są zapisywane na dysku (jeśli podano spill_path).
+
+        Args:
+            timeout (float): Maksymalny czas oczekiwania na wysłanie wiadomości w sekundach
+        """
+        if not self.running:
+            return
+        if not self.stalled:
+            self.flush(timeout=timeout)
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+        with self.condition:
+            unsent = list(self.messages)
+            self.messages.clear()
+            lost = 0
+            for message in unsent:
+                if message.spill_id is not None:
+                    continue
+                if message.qos > 0 and self.spill is not None:
+                    self._spill_locked(message)
+                    self.enqueued -= 1
+                else:
+                    lost += 1
+            # Wpisy przeniesione do pamięci zostaną ponownie odczytane z dysku
+            if self.spill is not None:
+                self.spill_cursor = 0
+                self.spill_pending = self.spill.depth
+            self.dropped += lost
+
+        if lost:
+            logger.warning(f"Zatrzymano kolejkę wychodzącą MQTT - porzucono {lost} niewysłanych wiadomości")
+
+    def get_metrics(self):
+        """
+        Zwraca metryki kolejki wychodzącej.
+
+        Returns:
+            dict: Głębokość kolejki (w pamięci i na dysku) oraz liczniki wiadomości
+        """
+        with self.condition:
+            return {
+                "queue_depth": len(self.messages),
+                "queue_size": self.queue_size,
+                "spill_depth": self.spill.depth if self.spill else 0,
+                "stalled": self.stalled,
+                "enqueued": self.enqueued,
+                "published": self.published,
+                "coalesced": self.coalesced,
+                "spilled": self.spilled,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "retries": self.retries,
+                "batches": self.batches,
+            }
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł puli procesów dla wtyczek lokalnych obciążających CPU w systemie Morris.
+Wtyczki z `execution: process` są wykonywane w stałej puli procesów roboczych,
+więc nie blokują GIL procesu głównego (Flask, callbacki MQTT).
+"""
+
+import importlib
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tryby wykonywania wtyczek lokalnych
+EXECUTION_THREAD = "thread"
+EXECUTION_PROCESS = "process"
+
+# Cache instancji wtyczek w procesie roboczym ((moduł, klasa, klucz konfiguracji) -> instancja)
+_worker_instances = {}
+
+
+def _worker_instance(module_name, class_name, config_key, config):
+    """
+    Zwraca instancję wtyczki z cache'a procesu roboczego, tworząc ją przy pierwszym użyciu.
+    """
+    key = (module_name, class_name, config_key)
+    plugin = _worker_instances.get(key)
+    if plugin is None:
+        plugin_class = getattr(importlib.import_module(module_name), class_name)
+        plugin = plugin_class(config)
+        setup = getattr(plugin, "setup", None)
+        if callable(setup):
+            setup()
+        _worker_instances[key] = plugin
+    return plugin
+
+
+def _teardown_worker():
+    """
+    Zwalnia instancje wtyczek procesu roboczego, wywołując ich metodę teardown().
+    """
+    while _worker_instances:
+        (_, class_name, _), plugin = _worker_instances.popitem()
+        teardown = getattr(plugin, "teardown", None)
+        if not callable(teardown):
+            continue
+        try:
+            teardown()
+        except Exception as e:
+            logger.error(f"Błąd podczas zwalniania wtyczki '{class_name}' w procesie roboczym: {e}")
+
+
+def _init_worker(preload):
+    """
+    Inicjalizator procesu roboczego - importuje moduły i tworzy instancje wtyczek z listy preload.
+    Instancje są zwalniane (teardown) przy zakończeniu procesu.
+
+    Args:
+        preload (list): Lista krotek (moduł, klasa, klucz konfiguracji, konfiguracja)
+    """
+    # Finalizator multiprocessing zamiast atexit - procesy utworzone przez fork
+    # kończą się przez os._exit(), który pomija funkcje atexit
+    util.Finalize(None, _teardown_worker, exitpriority=10)
+    for module_name, class_name, config_key, config in preload:
+        try:
+            _worker_instance(module_name, class_name, config_key, config)
+        except Exception as e:
+            logger.error(f"Nie udało się wczytać wtyczki '{class_name}' w procesie roboczym: {e}")
+
+
+def _run_in_worker(module_name, class_name, config_key, config, data):
+    """
+    Uruchamia wtyczkę w procesie roboczym (funkcja wywoływana przez ProcessPoolExecutor).
+    """
+    return _worker_instance(module_name, class_name, config_key, config).process(data)
+
+
+class PluginProcessPool:
+    """
+    Stała pula procesów roboczych dla wtyczek lokalnych.
+
+    Procesy są tworzone przy pierwszym zgłoszeniu zadania i mają wczytane moduły
+    oraz instancje wtyczek znanych w tym momencie. Dane wejściowe i wyniki są
+    przekazywane przez pickle (domyślny protokół multiprocessing - pickle.DEFAULT_PROTOCOL),
+    bez dodatkowej serializacji JSON. Przy zatrzymaniu puli procesy robocze wywołują
+    teardown() swoich instancji wtyczek.
+    """
+
+    def __init__(self, workers=None, name="morris-process"):
+        """
+        Inicjalizacja puli procesów.
+
+        Args:
+            workers (int, optional): Liczba procesów roboczych. Domyślnie liczba rdzeni CPU.
+            name (str): Nazwa puli używana w logach
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.name = name
+        self.executor = None
+        self.lock = threading.Lock()
+        # Wtyczki wczytywane przy starcie procesów ((moduł, klasa, klucz konfiguracji) -> konfiguracja)
+        self.preload = {}
+
+        # Metryki
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def register(self, plugin_class, config_key, config):
+        """
+        Dodaje wtyczkę do listy wczytywanej przy starcie procesów roboczych.
+
+        Args:
+            plugin_class (type): Klasa wtyczki
+            config_key (str): Klucz konfiguracji (identyfikuje instancję w procesie roboczym)
+            config (dict): Konfiguracja wtyczki
+        """
+        key = (plugin_class.__module__, plugin_class.__name__, config_key)
+        with self.lock:
+            self.preload.setdefault(key, config)
+
+    def submit(self, plugin_class, config_key, config, data):
+        """
+        Zgłasza uruchomienie wtyczki w procesie roboczym.
+
+        Args:
+            plugin_class (type): Klasa wtyczki (importowalna w procesie roboczym)
+            config_key (str): Klucz konfiguracji
+            config (dict): Konfiguracja wtyczki
+            data (dict): Dane wejściowe
+
+        Returns:
+            Future: Wynik metody process() wtyczki
+        """
+        executor = self._get_executor()
+        future = executor.submit(
+            _run_in_worker,
+            plugin_class.__module__,
+            plugin_class.__name__,
+            config_key,
+            config,
+            dict(data) if isinstance(data, dict) else data,
+        )
+        with self.lock:
+            self.submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self.lock:
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def _get_executor(self):
+        """
+        Zwraca (tworząc przy pierwszym użyciu) pulę procesów.
+        """
+        if self.executor is None:
+            with self.lock:
+                if self.executor is None:
+                    preload = [key + (config,) for key, config in self.preload.items()]
+                    self.executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        initializer=_init_worker,
+                        initargs=(preload,),
+                    )
+                    logger.info(
+                        f"Uruchomiono pulę procesów '{self.name}' ({self.workers} procesów, "
+                        f"{len(preload)} wtyczek wczytanych)"
+                    )
+        return self.executor
+
+    def shutdown(self, wait=True):
+        """
+        Zatrzymuje procesy robocze.
+
+        Args:
+            wait (bool): Czy czekać na zakończenie bieżących zadań
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+            logger.info(f"Zatrzymano pulę procesów '{self.name}'")
+
+    def get_metrics(self):
+        """
+        Zwraca metryki pracy puli procesów.
+
+        Returns:
+            dict: Liczba procesów i liczniki zadań
+        """
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "running": self.executor is not None,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - self.completed - self.failed,
+            }
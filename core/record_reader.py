@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł przyrostowego odczytu rekordów dla systemu Morris.
+Rekordy w formacie NDJSON (jeden dokument JSON w wierszu) lub jako tablica JSON
+są odczytywane kolejno ze strumienia (np. treści żądania HTTP) bez wczytywania
+całej treści do pamięci.
+"""
+
+import codecs
+import json
+import logging
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Typy treści obsługiwane przez iter_records
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+JSON_MIMETYPES = ("application/json",)
+
+# Rozmiar fragmentu odczytywanego ze strumienia (w bajtach)
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_records(stream, mimetype, chunk_size=CHUNK_SIZE):
+    """
+    Odczytuje kolejne rekordy ze strumienia w formacie zależnym od typu treści.
+
+    Args:
+        stream: Strumień binarny (metody read/readline)
+        mimetype (str): Typ treści: NDJSON_MIMETYPES lub JSON_MIMETYPES (tablica JSON)
+        chunk_size (int): Rozmiar fragmentu odczytywanego ze strumienia
+
+    Yields:
+        tuple: (rekord, None) lub (None, opis błędu) dla nieprawidłowego rekordu
+
+    Raises:
+        ValueError: Gdy typ treści nie jest obsługiwany
+    """
+    if mimetype in NDJSON_MIMETYPES:
+        return iter_ndjson(stream)
+    if mimetype in JSON_MIMETYPES:
+        return iter_json_array(stream, chunk_size)
+    raise ValueError(f"Nieobsługiwany typ treści: {mimetype}")
+
+
+def iter_ndjson(stream):
+    """
+    Odczytuje rekordy NDJSON wiersz po wierszu. Nieprawidłowy wiersz jest
+    zgłaszany jako błąd rekordu, a odczyt jest kontynuowany. Puste wiersze są pomijane.
+
+    Args:
+        stream: Strumień binarny
+
+    Yields:
+        tuple: (rekord, None) lub (None, opis błędu)
+    """
+    for line_number, line in enumerate(iter(stream.readline, b""), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, f"Nieprawidłowy JSON w wierszu {line_number}: {e}"
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """
+    Odczytuje elementy tablicy JSON fragmentami strumienia. Błąd składni przerywa
+    odczyt - zgłaszany jest jako ostatni błąd rekordu.
+
+    Args:
+        stream: Strumień binarny
+        chunk_size (int): Rozmiar fragmentu odczytywanego ze strumienia
+
+    Yields:
+        tuple: (rekord, None) lub (None, opis błędu)
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    exhausted = False
+    started = False
+    expect_value = True
+    after_comma = False
+
+    def _fill():
+        # Dopisanie kolejnego fragmentu strumienia; False po końcu danych
+        nonlocal buffer, position, exhausted
+        if exhausted:
+            return False
+        chunk = stream.read(chunk_size)
+        exhausted = not chunk
+        buffer = buffer[position:] + text.decode(chunk, final=exhausted)
+        position = 0
+        return not exhausted
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position >= len(buffer):
+            if not _fill():
+                yield None, "Niepełna tablica JSON - brak znaku ']'" if started else "Oczekiwano tablicy JSON"
+                return
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != "[":
+                yield None, "Oczekiwano tablicy JSON"
+                return
+            started = True
+            position += 1
+            continue
+
+        if char == "]":
+            if after_comma:
+                yield None, "Oczekiwano elementu tablicy JSON po ','"
+            return
+        if char == "," and not expect_value:
+            expect_value = after_comma = True
+            position += 1
+            continue
+        if not expect_value:
+            yield None, "Oczekiwano ',' lub ']' po elemencie tablicy JSON"
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except ValueError as e:
+            # Element może być podzielony między fragmenty strumienia
+            if _fill():
+                continue
+            yield None, f"Nieprawidłowy element tablicy JSON: {e}"
+            return
+        if (
+            not exhausted
+            and isinstance(record, (int, float))
+            and not isinstance(record, bool)
+            and buffer[end:].lstrip(_WHITESPACE)[:1] not in (",", "]")
+        ):
+            # Liczba przecięta granicą fragmentu (np. "12." lub "1e") może mieć dalsze
+            # znaki w kolejnym fragmencie - dekodowanie po dopisaniu danych
+            _fill()
+            continue
+
+        position = end
+        expect_value = after_comma = False
+        yield record, None
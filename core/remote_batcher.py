@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł grupowania (batching) wywołań zdalnych wtyczek MQTT dla systemu Morris.
+Zbiera dane z wielu równoległych uruchomień chaina i wysyła je jednym żądaniem,
+a odpowiedź zbiorczą rozdziela z powrotem na poszczególne uruchomienia.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+from core.step_policy import RemotePluginError
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Domyślne parametry grupowania
+DEFAULT_BATCH_MAX_SIZE = 32
+DEFAULT_BATCH_MAX_WAIT_MS = 20
+
+
+class RemoteBatcher:
+    """
+    Grupuje wywołania jednej zdalnej wtyczki (urządzenie + wtyczka + konfiguracja).
+
+    Paczka jest wysyłana, gdy zbierze się `max_size` elementów albo upłynie
+    `max_wait_ms` od dodania pierwszego elementu. Żądanie zbiorcze ma postać:
+        {"action": "run_plugin_batch", "plugin_id": ..., "items": [...], "config": ..., "correlation_id": ...}
+    a odpowiedź na plugin/<urządzenie>/output:
+        {"correlation_id": ..., "items": [{"data": ...} | {"error": ...}, ...]}
+    """
+
+    def __init__(self, engine, device_id, plugin_id, config, max_size, max_wait_ms):
+        """
+        Inicjalizacja grupowania wywołań.
+
+        Args:
+            engine (ChainEngine): Silnik publikujący żądania do zdalnych wtyczek
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator wtyczki na urządzeniu
+            config (dict): Konfiguracja wtyczki wysyłana z żądaniem
+            max_size (int): Maksymalna liczba elementów w paczce
+            max_wait_ms (float): Maksymalny czas oczekiwania na zapełnienie paczki (ms)
+        """
+        self.engine = engine
+        self.device_id = device_id
+        self.plugin_id = plugin_id
+        self.config = config
+        self.max_size = max(1, int(max_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self.lock = threading.Lock()
+        self.items = []
+        self.futures = []
+        self.timer = None
+
+        # Metryki
+        self.batches = 0
+        self.messages = 0
+
+    @classmethod
+    def from_config(cls, engine, device_id, plugin_id, config):
+        """
+        Tworzy obiekt grupowania na podstawie klucza 'batch' z konfiguracji kroku.
+
+        Args:
+            engine (ChainEngine): Silnik chainów
+            device_id (str): Identyfikator urządzenia
+            plugin_id (str): Identyfikator wtyczki
+            config (dict): Konfiguracja kroku (z kluczem 'batch': true lub słownikiem)
+
+        Returns:
+            RemoteBatcher: Obiekt grupowania wywołań
+        """
+        batch_config = config.get("batch")
+        if not isinstance(batch_config, dict):
+            batch_config = {}
+        return cls(
+            engine,
+            device_id,
+            plugin_id,
+            config,
+            batch_config.get("max_size", DEFAULT_BATCH_MAX_SIZE),
+            batch_config.get("max_wait_ms", DEFAULT_BATCH_MAX_WAIT_MS),
+        )
+
+    def submit(self, data):
+        """
+        Dodaje dane do bieżącej paczki.
+
+        Args:
+            data (dict): Dane wejściowe jednego uruchomienia chaina
+
+        Returns:
+            Future: Obiekt rozwiązywany odpowiedzią dla tego elementu ({"data": ...} lub {"error": ...})
+        """
+        future = Future()
+        flush_now = False
+
+        with self.lock:
+            self.items.append(data)
+            self.futures.append(future)
+            self.messages += 1
+
+            if len(self.items) >= self.max_size:
+                flush_now = True
+            elif self.timer is None:
+                self.timer = threading.Timer(self.max_wait, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        if flush_now:
+            self.flush()
+
+        return future
+
+    def flush(self):
+        """
+        Wysyła zebraną paczkę (jeśli nie jest pusta) jednym żądaniem MQTT.
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            # Elementy, z których wyniku zrezygnowano (timeout) przed wysłaniem, są pomijane
+            pending = [
+                (item, future) for item, future in zip(self.items, self.futures) if not future.done()
+            ]
+            self.items, self.futures = [], []
+            if not pending:
+                return
+
+            items = [item for item, _ in pending]
+            futures = [future for _, future in pending]
+            self.batches += 1
+
+        request_data = {
+            "action": "run_plugin_batch",
+            "plugin_id": self.plugin_id,
+            "items": items,
+            "config": self.config,
+        }
+
+        try:
+            correlation_id, batch_future = self.engine._send_remote_request(
+                self.device_id, request_data
+            )
+        except Exception as e:
+            logger.error(f"Błąd podczas wysyłania paczki do zdalnej wtyczki '{self.plugin_id}': {e}")
+            correlation_id, batch_future = None, None
+
+        if batch_future is None:
+            error = RemotePluginError(
+                f"Nie udało się wysłać paczki do zdalnej wtyczki '{self.plugin_id}' "
+                f"na urządzeniu '{self.device_id}'"
+            )
+            for future in futures:
+                self._resolve(future, error=error)
+            return
+
+        for future in futures:
+            future.batch_correlation_id = correlation_id
+            future.batch_futures = futures
+        # Wszystkie elementy mogły przekroczyć limit czasu w trakcie wysyłania
+        self._release_if_abandoned(correlation_id, futures)
+
+        logger.debug(
+            f"Wysłano paczkę {correlation_id} ({len(items)} elementów) do zdalnej wtyczki '{self.plugin_id}'"
+        )
+
+        batch_future.add_done_callback(
+            lambda done: self._split_response(done, futures)
+        )
+
+    def _split_response(self, batch_future, futures):
+        """
+        Rozdziela odpowiedź zbiorczą na Future poszczególnych elementów paczki.
+        """
+        try:
+            response = batch_future.result()
+        except Exception as e:
+            response = {"error": str(e)}
+
+        results = response.get("items") if isinstance(response, dict) else None
+
+        if not isinstance(results, list) or len(results) != len(futures):
+            error = (
+                response.get("error") if isinstance(response, dict) else None
+            ) or "Nieprawidłowa odpowiedź zbiorcza od zdalnej wtyczki"
+            for future in futures:
+                self._resolve(future, {"error": error})
+            return
+
+        for future, result in zip(futures, results):
+            self._resolve(future, result if isinstance(result, dict) else {"data": result})
+
+    @staticmethod
+    def _resolve(future, result=None, error=None):
+        """
+        Ustawia wynik lub wyjątek Future elementu, jeśli nie został anulowany (abandon).
+        """
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def abandon(self, future):
+        """
+        Rezygnuje z wyniku elementu paczki (np. po upływie jego limitu czasu).
+        Oczekujące żądanie paczki jest usuwane dopiero wtedy, gdy z wyników
+        zrezygnowano lub je otrzymano dla wszystkich elementów - odpowiedź dla
+        pozostałych elementów jest nadal odbierana.
+
+        Args:
+            future (Future): Obiekt zwrócony przez submit()
+        """
+        future.cancel()
+        futures = getattr(future, "batch_futures", None)
+        if futures is not None:
+            self._release_if_abandoned(future.batch_correlation_id, futures)
+
+    def _release_if_abandoned(self, correlation_id, futures):
+        if all(future.done() for future in futures):
+            self.engine.pending_requests.pop(correlation_id, None)
+
+    def close(self):
+        """
+        Wysyła niepełną paczkę i zatrzymuje timer.
+        """
+        self.flush()
+
+    def get_metrics(self):
+        """
+        Zwraca metryki grupowania.
+
+        Returns:
+            dict: Liczba wiadomości, paczek (round tripów) i średni rozmiar paczki
+        """
+        with self.lock:
+            return {
+                "messages": self.messages,
+                "batches": self.batches,
+                "pending": len(self.items),
+                "round_trips_per_message": (
+                    self.batches / self.messages if self.messages else 0.0
+                ),
+            }
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł pamięci podręcznej wyników kroków chainów dla systemu Morris.
+Kroki oznaczone jako `cacheable` (deterministyczne, bez efektów ubocznych)
+są pomijane, jeśli dla tej samej wtyczki, konfiguracji i danych wejściowych
+istnieje aktualny wynik w cache'u LRU z czasem życia (TTL).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Znacznik braku wartości w cache'u (wynik kroku może być None)
+MISS = object()
+
+
+class ResultCache:
+    """
+    Cache LRU z czasem życia wpisów (TTL) dla wyników jednego kroku.
+
+    Kluczem jest skrót BLAKE2b z (wtyczka, konfiguracja, dane wejściowe) w postaci
+    kanonicznego JSON-a. Wyniki słownikowe są kopiowane (płytko) przy zapisie
+    i odczycie, aby kolejne kroki nie modyfikowały wpisów w cache'u.
+    """
+
+    def __init__(self, plugin_name, config_key, max_size=1024, ttl=300):
+        """
+        Inicjalizacja cache'a wyników.
+
+        Args:
+            plugin_name (str): Nazwa wtyczki kroku
+            config_key (str): Kanoniczna postać konfiguracji kroku
+            max_size (int): Maksymalna liczba wpisów
+            ttl (float): Czas życia wpisu w sekundach (0 lub None - bez limitu)
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl) if ttl else None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.prefix = f"{plugin_name}\0{config_key}\0".encode("utf-8")
+
+        # Metryki
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, data):
+        """
+        Wyznacza klucz cache'a dla danych wejściowych.
+
+        Args:
+            data: Dane wejściowe kroku
+
+        Returns:
+            bytes: Skrót danych lub None, jeśli danych nie da się zserializować
+        """
+        try:
+            encoded = json.dumps(
+                data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+            ).encode("utf-8")
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(self.prefix + encoded, digest_size=16).digest()
+
+    def get(self, key):
+        """
+        Zwraca wynik zapisany pod kluczem.
+
+        Args:
+            key (bytes): Klucz z make_key()
+
+        Returns:
+            Wynik kroku lub MISS, jeśli wpisu nie ma lub wygasł
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        return value.copy() if isinstance(value, dict) else value
+
+    def put(self, key, value):
+        """
+        Zapisuje wynik kroku, usuwając najdawniej używane wpisy po przekroczeniu rozmiaru.
+
+        Args:
+            key (bytes): Klucz z make_key()
+            value: Wynik kroku
+        """
+        if isinstance(value, dict):
+            value = value.copy()
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Usuwa wszystkie wpisy.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def get_metrics(self):
+        """
+        Zwraca metryki cache'a.
+
+        Returns:
+            dict: Rozmiar oraz liczniki trafień, chybień, usunięć i wygaśnięć
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def should_store(result, data):
+    """
+    Sprawdza, czy wynik kroku można zapisać w cache'u.
+    Pomijane są strumienie oraz wyniki będące danymi wejściowymi - silnik zwraca
+    dane wejściowe bez zmian po błędzie lub timeoucie wtyczki, a takiego wyniku
+    nie należy utrwalać.
+
+    Args:
+        result: Wynik kroku
+        data: Dane wejściowe kroku
+
+    Returns:
+        bool: True jeśli wynik można zapisać
+    """
+    if result is data:
+        return False
+    return result is None or isinstance(result, (dict, list, str, int, float, bool))
+
+
+class CachedStepRunner:
+    """
+    Wywołanie kroku poprzedzone sprawdzeniem cache'a wyników.
+    """
+
+    __slots__ = ("cache", "run", "submit", "run_batch")
+
+    def __init__(self, cache, run):
+        """
+        Inicjalizacja kroku z cache'em.
+
+        Args:
+            cache (ResultCache): Cache wyników kroku
+            run (callable): Funkcja wykonująca krok
+        """
+        self.cache = cache
+        self.run = run
+        # Kroki w puli procesów udostępniają submit() (tryb asyncio)
+        self.submit = getattr(run, "submit", None)
+        # Kroki lokalne udostępniają run_batch() (process_batch dla mikro-paczek)
+        self.run_batch = self._run_batch if getattr(run, "run_batch", None) else None
+
+    def __call__(self, data):
+        key = self.cache.make_key(data)
+        if key is None:
+            return self.run(data)
+
+        result = self.cache.get(key)
+        if result is not MISS:
+            return result
+
+        result = self.run(data)
+        if should_store(result, data):
+            self.cache.put(key, result)
+        return result
+
+    def _run_batch(self, payloads):
+        """
+        Wykonuje krok dla listy danych wejściowych. Trafienia są zwracane z cache'a,
+        a do run_batch() kroku trafiają tylko pozostałe elementy.
+
+        Args:
+            payloads (list): Lista danych wejściowych
+
+        Returns:
+            list: Lista wyników w kolejności danych wejściowych
+        """
+        keys = [self.cache.make_key(data) for data in payloads]
+        results = [MISS if key is None else self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is MISS]
+        if not missing:
+            return results
+
+        outputs = self.run.run_batch([payloads[i] for i in missing])
+        if len(outputs) != len(missing):
+            return outputs  # Niezgodna liczba wyników obsługiwana przez wywołującego
+
+        for i, result in zip(missing, outputs):
+            results[i] = result
+            if keys[i] is not None and should_store(result, payloads[i]):
+                self.cache.put(keys[i], result)
+        return results
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł rejestru uruchomień asynchronicznych dla systemu Morris.
+Uruchomienia przyjęte bez oczekiwania na wynik (np. webhook w trybie asynchronicznym)
+otrzymują identyfikator, pod którym można sprawdzić ich status i wynik.
+Rejestr jest przechowywany w pamięci, ma ograniczony rozmiar, a zakończone
+uruchomienia są usuwane po upływie czasu życia. Przy pełnym rejestrze usuwane są
+najdawniej zakończone uruchomienia; uruchomienia w toku nie są nigdy usuwane.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Statusy uruchomień
+RUN_QUEUED = "queued"  # Oczekuje w kolejce puli wątków
+RUN_RUNNING = "running"  # W trakcie przetwarzania
+RUN_COMPLETED = "completed"  # Zakończone - wyniki chainów w polu 'results'
+RUN_FAILED = "failed"  # Przerwane błędem (np. upływ terminu) - opis w polu 'error'
+RUN_STATUSES = (RUN_QUEUED, RUN_RUNNING, RUN_COMPLETED, RUN_FAILED)
+
+
+class RunRegistry:
+    """
+    Rejestr statusów i wyników uruchomień asynchronicznych.
+    """
+
+    def __init__(self, max_runs=10000, ttl=3600):
+        """
+        Inicjalizacja rejestru.
+
+        Args:
+            max_runs (int): Maksymalna liczba przechowywanych uruchomień (ponad limit usuwane
+                            są najdawniej zakończone, a bez nich nowe uruchomienia są odrzucane)
+            ttl (float): Czas przechowywania zakończonych uruchomień w sekundach
+        """
+        self.max_runs = max(1, int(max_runs))
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # Identyfikator -> opis uruchomienia (w kolejności utworzenia)
+        self.runs = OrderedDict()
+        # Identyfikator -> chwila zakończenia (time.monotonic(), w kolejności zakończenia)
+        self.finished = OrderedDict()
+
+        # Metryki
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def create(self, trigger_id):
+        """
+        Rejestruje nowe uruchomienie w stanie oczekiwania.
+
+        Args:
+            trigger_id (str): Identyfikator triggera
+
+        Returns:
+            str: Identyfikator uruchomienia lub None, jeśli rejestr jest pełny uruchomień w toku
+        """
+        run_id = uuid.uuid4().hex
+        with self.lock:
+            self._expire()
+            while len(self.runs) >= self.max_runs:
+                if not self.finished:
+                    self.rejected += 1
+                    logger.warning(
+                        f"Rejestr uruchomień jest pełny ({self.max_runs} uruchomień w toku), "
+                        f"odrzucono uruchomienie dla triggera '{trigger_id}'"
+                    )
+                    return None
+                evicted_id, _ = self.finished.popitem(last=False)
+                self.runs.pop(evicted_id, None)
+                self.evicted += 1
+            self.runs[run_id] = {
+                "id": run_id,
+                "trigger": trigger_id,
+                "status": RUN_QUEUED,
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "results": None,
+                "error": None,
+            }
+            self.created += 1
+        return run_id
+
+    def start(self, run_id):
+        """
+        Oznacza uruchomienie jako przetwarzane.
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+        """
+        with self.lock:
+            run = self.runs.get(run_id)
+            if run is not None:
+                run["status"] = RUN_RUNNING
+                run["started_at"] = datetime.now().isoformat()
+
+    def update(self, run_id, results):
+        """
+        Zapisuje częściowe wyniki uruchomienia w toku (postęp długiego zadania).
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+            results (dict): Bieżące wyniki uruchomienia
+        """
+        with self.lock:
+            run = self.runs.get(run_id)
+            if run is not None and run_id not in self.finished:
+                run["results"] = results
+
+    def finish(self, run_id, results=None, error=None):
+        """
+        Zapisuje wynik zakończonego uruchomienia.
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+            results (dict, optional): Wyniki chainów {chain_id: wynik}
+            error (str, optional): Opis błędu, jeśli uruchomienie zostało przerwane
+        """
+        with self.lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return
+            run["status"] = RUN_FAILED if error is not None else RUN_COMPLETED
+            run["finished_at"] = datetime.now().isoformat()
+            run["results"] = results
+            run["error"] = error
+            self.finished[run_id] = time.monotonic()
+
+    def discard(self, run_id):
+        """
+        Usuwa uruchomienie z rejestru (np. odrzucone przez pulę wątków).
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+        """
+        with self.lock:
+            self.runs.pop(run_id, None)
+            self.finished.pop(run_id, None)
+
+    def get(self, run_id):
+        """
+        Zwraca opis uruchomienia.
+
+        Args:
+            run_id (str): Identyfikator uruchomienia
+
+        Returns:
+            dict: Kopia opisu uruchomienia lub None, jeśli nie istnieje (lub wygasło)
+        """
+        with self.lock:
+            self._expire()
+            run = self.runs.get(run_id)
+            return dict(run) if run is not None else None
+
+    def get_metrics(self):
+        """
+        Zwraca metryki rejestru.
+
+        Returns:
+            dict: Liczba uruchomień w każdym statusie oraz liczniki utworzonych, usuniętych
+                  i odrzuconych
+        """
+        with self.lock:
+            self._expire()
+            metrics = {status: 0 for status in RUN_STATUSES}
+            for run in self.runs.values():
+                metrics[run["status"]] += 1
+            metrics["created"] = self.created
+            metrics["evicted"] = self.evicted
+            metrics["rejected"] = self.rejected
+            return metrics
+
+    def _expire(self):
+        horizon = time.monotonic() - self.ttl
+        finished = self.finished
+        while finished:
+            run_id, finished_at = next(iter(finished.items()))
+            if finished_at > horizon:
+                break
+            finished.popitem(last=False)
+            self.runs.pop(run_id, None)
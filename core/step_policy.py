@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł polityk wykonania kroków chainów dla systemu Morris.
+Kroki i chainy mogą określać limit czasu kroku (`timeout_ms`), liczbę ponowień
+(`retries`) z opóźnieniem wykładniczym (`backoff`) oraz łączny termin chaina
+(`deadline_ms`). Termin bieżącego uruchomienia jest przechowywany w zmiennej
+kontekstowej, dzięki czemu wywołania zdalne i pula procesów czekają najwyżej
+tyle, ile zostało do jego upływu.
+"""
+
+import contextvars
+import logging
+import random
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Klucze polityki w definicji kroku (wartości kroku mają pierwszeństwo przed wartościami chaina)
+POLICY_KEYS = ("timeout_ms", "retries", "backoff")
+
+# Domyślne opóźnienie ponowień (w milisekundach)
+DEFAULT_BACKOFF = {
+    "initial_ms": 100,
+    "multiplier": 2.0,
+    "max_ms": 5000,
+    "jitter": True,
+}
+
+# Polityka kroku:
+#   timeout - limit czasu pojedynczej próby w sekundach lub None
+#   retries - liczba ponowień po nieudanej próbie
+#   backoff - parametry opóźnienia ponowień (Backoff)
+StepPolicy = namedtuple("StepPolicy", ["timeout", "retries", "backoff"])
+
+# Opóźnienie ponowień: initial i max w sekundach, jitter - losowe skrócenie opóźnienia
+Backoff = namedtuple("Backoff", ["initial", "multiplier", "max", "jitter"])
+
+# Termin (time.monotonic()) bieżącego uruchomienia lub próby kroku
+_deadline = contextvars.ContextVar("morris_deadline", default=None)
+
+
+class StepTimeout(TimeoutError):
+    """
+    Próba wykonania kroku przekroczyła swój limit czasu.
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Upłynął łączny termin uruchomienia chaina - uruchomienie jest przerywane.
+    """
+
+
+class RemotePluginError(RuntimeError):
+    """
+    Zdalna wtyczka zwróciła błąd lub nie dało się wysłać do niej żądania.
+    """
+
+
+def validate_policy(definition, label):
+    """
+    Sprawdza poprawność pól polityki w definicji kroku lub chaina.
+
+    Args:
+        definition (dict): Definicja kroku lub chaina
+        label (str): Opis miejsca definicji (do komunikatu błędu)
+
+    Returns:
+        str: Opis błędu lub None, jeśli pola są poprawne
+    """
+    for key in ("timeout_ms", "deadline_ms"):
+        value = definition.get(key)
+        if value is not None and (not _is_number(value) or value <= 0):
+            return f"{label}: pole '{key}' musi być liczbą dodatnią"
+
+    retries = definition.get("retries")
+    if retries is not None and (type(retries) is not int or retries < 0):
+        return f"{label}: pole 'retries' musi być nieujemną liczbą całkowitą"
+
+    backoff = definition.get("backoff")
+    if backoff is not None:
+        if not isinstance(backoff, dict):
+            return f"{label}: pole 'backoff' musi być słownikiem"
+        for key in ("initial_ms", "multiplier", "max_ms"):
+            value = backoff.get(key)
+            if value is not None and (not _is_number(value) or value < 0):
+                return f"{label}: pole 'backoff.{key}' musi być liczbą nieujemną"
+    return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def step_policy(step, chain):
+    """
+    Wyznacza politykę kroku z definicji kroku i wartości domyślnych chaina.
+
+    Args:
+        step (dict): Definicja kroku
+        chain (dict): Definicja chaina
+
+    Returns:
+        StepPolicy: Polityka kroku lub None, jeśli krok i chain jej nie określają
+    """
+    settings = {key: chain[key] for key in POLICY_KEYS if chain.get(key) is not None}
+    settings.update((key, step[key]) for key in POLICY_KEYS if step.get(key) is not None)
+    if not settings:
+        return None
+
+    backoff = dict(DEFAULT_BACKOFF, **settings.get("backoff", {}))
+    timeout_ms = settings.get("timeout_ms")
+    return StepPolicy(
+        timeout_ms / 1000.0 if timeout_ms else None,
+        settings.get("retries", 0),
+        Backoff(
+            backoff["initial_ms"] / 1000.0,
+            backoff["multiplier"],
+            backoff["max_ms"] / 1000.0,
+            bool(backoff["jitter"]),
+        ),
+    )
+
+
+def backoff_delay(backoff, attempt):
+    """
+    Zwraca opóźnienie przed kolejnym ponowieniem.
+
+    Args:
+        backoff (Backoff): Parametry opóźnienia
+        attempt (int): Numer nieudanej próby (od 0)
+
+    Returns:
+        float: Opóźnienie w sekundach
+    """
+    delay = min(backoff.initial * backoff.multiplier ** attempt, backoff.max)
+    if backoff.jitter:
+        # "Full jitter" - ponowienia wielu uruchomień nie trafiają w tę samą chwilę
+        delay = random.uniform(0, delay)
+    return delay
+
+
+def time_left():
+    """
+    Zwraca czas pozostały do terminu bieżącego uruchomienia (lub próby kroku).
+
+    Returns:
+        float: Liczba sekund (nie mniej niż 0) lub None, jeśli termin nie jest ustawiony
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def bounded_timeout(timeout):
+    """
+    Ogranicza czas oczekiwania do czasu pozostałego do terminu.
+
+    Args:
+        timeout (float): Czas oczekiwania w sekundach (None - bez limitu)
+
+    Returns:
+        float: Mniejsza z wartości timeout i czasu pozostałego do terminu
+    """
+    left = time_left()
+    if left is None:
+        return timeout
+    if timeout is None:
+        return left
+    return min(timeout, left)
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """
+    Ustawia termin dla kodu wykonywanego w bloku. Termin zewnętrzny nie jest
+    wydłużany - obowiązuje wcześniejszy z nich.
+
+    Args:
+        deadline (float): Termin (time.monotonic()) lub None
+    """
+    current = _deadline.get()
+    if deadline is None or (current is not None and current <= deadline):
+        yield
+        return
+
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline(label):
+    """
+    Przerywa uruchomienie, jeśli upłynął jego termin.
+
+    Args:
+        label (str): Opis uruchomienia (do komunikatu błędu)
+
+    Raises:
+        DeadlineExceeded: Gdy termin uruchomienia upłynął
+    """
+    deadline = _deadline.get()
+    if deadline is not None and deadline <= time.monotonic():
+        raise DeadlineExceeded(f"Upłynął termin wykonania: {label}")
+
+
+def retry_delay(policy, attempt, error, label):
+    """
+    Zwraca opóźnienie przed ponowieniem nieudanej próby kroku.
+
+    Args:
+        policy (StepPolicy): Polityka kroku
+        attempt (int): Numer nieudanej próby (od 0)
+        error (Exception): Błąd próby
+        label (str): Opis kroku do logów
+
+    Returns:
+        float: Opóźnienie w sekundach
+
+    Raises:
+        Exception: Błąd próby, jeśli wyczerpano ponowienia
+        DeadlineExceeded: Gdy ponowienie nie zdąży się rozpocząć przed upływem terminu
+    """
+    if attempt >= policy.retries:
+        raise error
+
+    delay = backoff_delay(policy.backoff, attempt)
+    left = time_left()
+    if left is not None and delay >= left:
+        raise DeadlineExceeded(
+            f"Brak czasu na ponowienie kroku {label} przed upływem terminu"
+        ) from error
+
+    logger.warning(
+        f"Krok {label} nie powiódł się ({error}) - ponowienie {attempt + 1}/{policy.retries} "
+        f"za {delay * 1000:.0f} ms"
+    )
+    return delay
+
+
+class PolicyStepRunner:
+    """
+    Wywołanie kroku z limitem czasu próby i ponowieniami z opóźnieniem wykładniczym.
+
+    Limit czasu próby jest przekazywany jako termin w zmiennej kontekstowej - czekają
+    na niego wywołania zdalne, pula procesów i wtyczki z `async def process`.
+    Wtyczki synchroniczne wykonywane w bieżącym wątku nie mogą zostać przerwane;
+    mogą same sprawdzać pozostały czas przez time_left().
+    """
+
+    __slots__ = ("run", "policy", "label", "submit", "run_batch")
+
+    def __init__(self, run, policy, label):
+        """
+        Inicjalizacja kroku z polityką wykonania.
+
+        Args:
+            run (callable): Funkcja wykonująca krok (zgłaszająca wyjątek przy niepowodzeniu)
+            policy (StepPolicy): Polityka kroku
+            label (str): Opis kroku do logów
+        """
+        self.run = run
+        self.policy = policy
+        self.label = label
+        # Kroki w puli procesów udostępniają submit() (tryb asyncio)
+        self.submit = getattr(run, "submit", None)
+        # Kroki lokalne udostępniają run_batch() - cała paczka jest jedną próbą
+        self.run_batch = self._run_batch if getattr(run, "run_batch", None) else None
+
+    def __call__(self, data):
+        return self._attempt(self.run, data)
+
+    def _run_batch(self, payloads):
+        return self._attempt(self.run.run_batch, payloads)
+
+    def _attempt(self, run, data):
+        policy = self.policy
+        attempt = 0
+        while True:
+            check_deadline(f"krok {self.label}")
+            attempt_deadline = (
+                time.monotonic() + policy.timeout if policy.timeout is not None else None
+            )
+            try:
+                with deadline_scope(attempt_deadline):
+                    return run(data)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                delay = retry_delay(policy, attempt, e, self.label)
+                attempt += 1
+                time.sleep(delay)
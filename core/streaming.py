@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł strumieniowego przetwarzania rekordów w chainach systemu Morris.
+Krok, którego wtyczka zwraca generator (lub inny iterator), przełącza chain
+w tryb strumieniowy: kolejne kroki przetwarzają rekordy pojedynczo, a wyniki
+są na bieżąco zapisywane do ujścia (sink), więc w pamięci nie jest trzymana
+cała kolekcja rekordów.
+"""
+
+import json
+import logging
+import os
+from collections.abc import Iterator
+
+from core.dead_letter import note_failure
+from core.step_policy import DeadlineExceeded, check_deadline
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rodzaje ujść strumienia
+SINK_COLLECT = "collect"  # Lista rekordów w wyniku chaina (materializuje strumień)
+SINK_FILE = "file"  # Plik NDJSON (jeden rekord JSON na linię)
+SINK_MQTT = "mqtt"  # Publikacja każdego rekordu na temat MQTT
+SINK_TYPES = (SINK_COLLECT, SINK_FILE, SINK_MQTT)
+
+# Domyślna liczba rekordów między opróżnieniami bufora pliku
+DEFAULT_FLUSH_EVERY = 100
+
+# Komunikat błędu kroku chaina DAG, który zwrócił strumień rekordów
+DAG_STREAM_ERROR = "krok chaina DAG zwrócił strumień rekordów - tryb strumieniowy dotyczy chainów liniowych"
+
+
+def is_stream(value):
+    """
+    Sprawdza, czy wynik kroku jest strumieniem rekordów.
+
+    Args:
+        value: Wynik kroku
+
+    Returns:
+        bool: True dla generatorów i innych iteratorów
+    """
+    return type(value) is not dict and isinstance(value, Iterator)
+
+
+def close_stream(records):
+    """
+    Zamyka nieprzetworzony strumień rekordów (np. generator wtyczki), jeśli to możliwe.
+
+    Args:
+        records (Iterator): Strumień rekordów
+    """
+    close = getattr(records, "close", None)
+    if close is not None:
+        close()
+
+
+class StreamStepError(Exception):
+    """
+    Błąd generatora rekordów kroku (zapisany już przez note_failure), przerywający strumień.
+    """
+
+
+def step_records(step, records):
+    """
+    Przekazuje rekordy strumienia zwróconego przez krok, sprawdzając termin uruchomienia
+    przed każdym rekordem. Błąd generatora jest zapisywany jako błąd kroku (note_failure),
+    aby nieudany strumień trafił do kolejki martwych wiadomości, i przerywa strumień.
+
+    Args:
+        step (PlanStep): Krok, który zwrócił strumień
+        records (Iterator): Rekordy zwrócone przez krok
+
+    Yields:
+        dict: Rekordy kroku
+
+    Raises:
+        StreamStepError: Gdy generator kroku zgłosił wyjątek
+    """
+    label = f"krok {step.number} (plugin '{step.plugin}')"
+    iterator = iter(records)
+    while True:
+        check_deadline(label)
+        try:
+            record = next(iterator)
+        except StopIteration:
+            return
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            note_failure(step.number, step.plugin, e)
+            raise StreamStepError(f"Błąd strumienia rekordów kroku {label}: {e}") from e
+        yield record
+
+
+def stream_step(step, records):
+    """
+    Leniwie stosuje krok planu do każdego rekordu strumienia (termin uruchomienia
+    jest sprawdzany przed każdym rekordem). Jeśli krok zwróci strumień dla rekordu,
+    jego rekordy są wstawiane do strumienia.
+
+    Args:
+        step (PlanStep): Skompilowany krok
+        records (Iterator): Rekordy wejściowe
+
+    Yields:
+        dict: Rekordy wyjściowe
+    """
+    label = f"krok {step.number} (plugin '{step.plugin}')"
+    for record in records:
+        check_deadline(label)
+        try:
+            output = step.run(record)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Błąd podczas wykonywania kroku {step.number} (plugin '{step.plugin}') dla rekordu: {e}"
+            )
+            note_failure(step.number, step.plugin, e)
+            output = record
+
+        if is_stream(output):
+            yield from step_records(step, output)
+        else:
+            yield output
+
+
+class CollectSink:
+    """
+    Ujście zbierające rekordy do listy zwracanej jako wynik chaina.
+    """
+
+    def __init__(self, config):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        return {"records": self.records, "count": len(self.records)}
+
+
+class FileSink:
+    """
+    Ujście zapisujące rekordy do pliku NDJSON, opróżniające bufor co `flush_every` rekordów.
+
+    Domyślnie rekordy są dopisywane na końcu pliku (`"append": false` nadpisuje plik).
+    Bufor jest zapisywany jednym wywołaniem write() w trybie dopisywania, więc
+    równoległe uruchomienia chaina nie nadpisują ani nie rozdzielają swoich wierszy.
+    """
+
+    def __init__(self, config):
+        self.path = config["path"]
+        self.flush_every = max(1, int(config.get("flush_every", DEFAULT_FLUSH_EVERY)))
+        self.count = 0
+        self.pending = []
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "ab" if config.get("append", True) else "wb", buffering=0)
+
+    def write(self, record):
+        self.pending.append(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+        if len(self.pending) >= self.flush_every:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.file.write(("\n".join(self.pending) + "\n").encode("utf-8"))
+            self.pending = []
+
+    def close(self):
+        try:
+            self._flush()
+        finally:
+            self.file.close()
+        return {"count": self.count, "path": self.path}
+
+
+class MqttSink:
+    """
+    Ujście publikujące każdy rekord na temat MQTT.
+    """
+
+    def __init__(self, config, mqtt_client):
+        if mqtt_client is None:
+            raise ValueError("Ujście MQTT wymaga klienta MQTT")
+        self.mqtt_client = mqtt_client
+        self.topic = config["topic"]
+        self.count = 0
+        self.failed = 0
+
+    def write(self, record):
+        if self.mqtt_client.publish(topic=self.topic, payload=record) is False:
+            self.failed += 1
+        self.count += 1
+
+    def close(self):
+        return {"count": self.count, "failed": self.failed, "topic": self.topic}
+
+
+def validate_sink(config):
+    """
+    Sprawdza poprawność konfiguracji ujścia strumienia.
+
+    Args:
+        config (dict): Konfiguracja ujścia z pola 'sink' definicji chaina
+
+    Returns:
+        str: Opis błędu lub None, jeśli konfiguracja jest poprawna
+    """
+    if not isinstance(config, dict):
+        return "Pole 'sink' musi być słownikiem"
+
+    sink_type = config.get("type", SINK_COLLECT)
+    if sink_type not in SINK_TYPES:
+        return f"Nieznany typ ujścia strumienia: {sink_type}"
+    if sink_type == SINK_FILE and not config.get("path"):
+        return "Ujście 'file' wymaga pola 'path'"
+    if sink_type == SINK_MQTT and not config.get("topic"):
+        return "Ujście 'mqtt' wymaga pola 'topic'"
+    return None
+
+
+def create_sink(config, mqtt_client=None):
+    """
+    Tworzy ujście strumienia na podstawie konfiguracji chaina.
+
+    Args:
+        config (dict, optional): Konfiguracja ujścia (domyślnie collect)
+        mqtt_client: Klient MQTT dla ujścia 'mqtt'
+
+    Returns:
+        Obiekt ujścia z metodami write(record) i close()
+    """
+    config = config or {}
+    sink_type = config.get("type", SINK_COLLECT)
+
+    if sink_type == SINK_FILE:
+        return FileSink(config)
+    if sink_type == SINK_MQTT:
+        return MqttSink(config, mqtt_client)
+    return CollectSink(config)
+
+
+def drain(records, sink):
+    """
+    Przepuszcza strumień rekordów do ujścia i zamyka je.
+    Błąd w trakcie iteracji przerywa strumień - rekordy zapisane wcześniej pozostają w ujściu,
+    a błąd jest zapisywany (note_failure). Upływ terminu uruchomienia (DeadlineExceeded)
+    jest przekazywany dalej po zamknięciu ujścia.
+
+    Args:
+        records (Iterator): Strumień rekordów
+        sink: Ujście strumienia
+
+    Returns:
+        dict: Podsumowanie ujścia (liczba rekordów i jego parametry)
+    """
+    interrupted = None
+    try:
+        for record in records:
+            sink.write(record)
+    except DeadlineExceeded:
+        raise
+    except StreamStepError as e:
+        interrupted = str(e)
+        logger.error(f"Przerwano przetwarzanie strumienia rekordów: {e}")
+    except Exception as e:
+        interrupted = str(e)
+        logger.error(f"Przerwano przetwarzanie strumienia rekordów: {e}")
+        note_failure(None, None, e)
+    finally:
+        summary = sink.close()
+
+    if interrupted is not None:
+        summary["error"] = interrupted
+    return summary
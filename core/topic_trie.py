@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł drzewa tematów (trie) MQTT dla systemu Morris.
+Pozwala dopasować temat wiadomości do wielu filtrów z symbolami
+wieloznacznymi `+` i `#` w czasie zależnym od głębokości tematu,
+a nie od liczby zarejestrowanych filtrów.
+"""
+
+import logging
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SINGLE_LEVEL_WILDCARD = "+"
+MULTI_LEVEL_WILDCARD = "#"
+
+
+class _TrieNode:
+    """
+    Węzeł drzewa tematów.
+    """
+
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children = {}
+        # Krotka zamiast listy - podmieniana przy każdej zmianie (bezpieczne odczyty)
+        self.values = ()
+
+
+class TopicTrie:
+    """
+    Drzewo tematów MQTT przechowujące wartości przypisane do filtrów tematów.
+
+    Obsługuje symbole wieloznaczne zgodnie ze specyfikacją MQTT:
+    - `+` dopasowuje dokładnie jeden poziom tematu,
+    - `#` (tylko jako ostatni poziom) dopasowuje poziom nadrzędny i dowolną liczbę poziomów niżej,
+    - tematy zaczynające się od `$` nie są dopasowywane przez symbole wieloznaczne na pierwszym poziomie.
+    """
+
+    def __init__(self):
+        """
+        Inicjalizacja pustego drzewa tematów.
+        """
+        self.root = _TrieNode()
+        self.size = 0
+
+    @staticmethod
+    def is_wildcard(topic_filter):
+        """
+        Sprawdza, czy filtr tematu zawiera symbole wieloznaczne.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+
+        Returns:
+            bool: True jeśli filtr zawiera `+` lub `#`
+        """
+        return (
+            SINGLE_LEVEL_WILDCARD in topic_filter
+            or MULTI_LEVEL_WILDCARD in topic_filter
+        )
+
+    @staticmethod
+    def validate_filter(topic_filter):
+        """
+        Sprawdza poprawność filtra tematu MQTT.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+
+        Returns:
+            bool: True jeśli filtr jest poprawny, False w przeciwnym wypadku
+        """
+        if not isinstance(topic_filter, str) or not topic_filter:
+            return False
+
+        levels = topic_filter.split("/")
+        for i, level in enumerate(levels):
+            if MULTI_LEVEL_WILDCARD in level:
+                # `#` musi zajmować cały poziom i być ostatnim poziomem
+                if level != MULTI_LEVEL_WILDCARD or i != len(levels) - 1:
+                    return False
+            elif SINGLE_LEVEL_WILDCARD in level and level != SINGLE_LEVEL_WILDCARD:
+                return False
+
+        return True
+
+    def insert(self, topic_filter, value):
+        """
+        Dodaje wartość dla podanego filtra tematu.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+            value: Wartość przypisana do filtra (np. identyfikator chaina)
+        """
+        node = self.root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = _TrieNode()
+                node.children[level] = child
+            node = child
+
+        if value not in node.values:
+            node.values = node.values + (value,)
+            self.size += 1
+
+    def remove(self, topic_filter, value):
+        """
+        Usuwa wartość przypisaną do filtra tematu i przycina puste gałęzie.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+            value: Wartość do usunięcia
+
+        Returns:
+            bool: True jeśli wartość została usunięta, False jeśli nie istniała
+        """
+        path = []
+        node = self.root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                return False
+            path.append((node, level))
+            node = child
+
+        if value not in node.values:
+            return False
+
+        node.values = tuple(v for v in node.values if v != value)
+        self.size -= 1
+
+        # Przycinanie pustych węzłów od liścia w górę
+        for parent, level in reversed(path):
+            child = parent.children[level]
+            if child.values or child.children:
+                break
+            del parent.children[level]
+
+        return True
+
+    def match(self, topic):
+        """
+        Zwraca wartości wszystkich filtrów pasujących do tematu.
+
+        Args:
+            topic (str): Temat wiadomości MQTT (bez symboli wieloznacznych)
+
+        Returns:
+            list: Lista pasujących wartości (bez duplikatów)
+        """
+        levels = topic.split("/")
+        results = []
+        # Tematy systemowe ($SYS/...) nie pasują do wildcardów na pierwszym poziomie
+        self._match(self.root, levels, 0, results, topic.startswith("$"))
+
+        # Usunięcie duplikatów z zachowaniem kolejności
+        return list(dict.fromkeys(results))
+
+    def _match(self, node, levels, depth, results, system_topic):
+        """
+        Rekurencyjne dopasowanie poziomów tematu do węzłów drzewa.
+        """
+        wildcards_allowed = not (system_topic and depth == 0)
+
+        if wildcards_allowed:
+            # `#` dopasowuje bieżący poziom i wszystkie poniżej (także poziom nadrzędny)
+            multi = node.children.get(MULTI_LEVEL_WILDCARD)
+            if multi is not None:
+                results.extend(multi.values)
+
+        if depth == len(levels):
+            results.extend(node.values)
+            return
+
+        level = levels[depth]
+        child = node.children.get(level)
+        if child is not None:
+            self._match(child, levels, depth + 1, results, system_topic)
+
+        if wildcards_allowed and level != SINGLE_LEVEL_WILDCARD:
+            single = node.children.get(SINGLE_LEVEL_WILDCARD)
+            if single is not None:
+                self._match(single, levels, depth + 1, results, system_topic)
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moduł puli wątków roboczych dla systemu Morris.
+Ogranicza liczbę wątków i długość kolejki zadań przetwarzanych asynchronicznie
+oraz definiuje zachowanie przy przepełnieniu kolejki.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Dostępne polityki obsługi przepełnienia kolejki
+OVERFLOW_BLOCK = "block"  # Czekaj na wolne miejsce w kolejce
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # Usuń najstarsze zadanie z kolejki
+OVERFLOW_DROP_NEWEST = "drop_newest"  # Odrzuć nowe zadanie (zliczane jako porzucone)
+OVERFLOW_REJECT = "reject"  # Odrzuć nowe zadanie (zliczane jako odrzucone)
+OVERFLOW_POLICIES = (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_REJECT,
+)
+
+
+class WorkerPool:
+    """
+    Pula wątków roboczych z ograniczoną kolejką zadań.
+
+    Wątki są tworzone przy pierwszym zgłoszeniu zadania. Liczba wątków
+    i rozmiar kolejki są stałe, więc nagły napływ wiadomości nie powoduje
+    tworzenia nowych wątków, a jedynie zapełnia kolejkę zgodnie z polityką przepełnienia.
+    """
+
+    def __init__(
+        self,
+        workers=4,
+        queue_size=1000,
+        overflow_policy=OVERFLOW_BLOCK,
+        block_timeout=None,
+        name="morris-worker",
+    ):
+        """
+        Inicjalizacja puli wątków.
+
+        Args:
+            workers (int): Liczba wątków roboczych
+            queue_size (int): Maksymalna liczba zadań oczekujących w kolejce
+            overflow_policy (str): Polityka przepełnienia: block, drop_oldest, drop_newest lub reject
+            block_timeout (float, optional): Maksymalny czas oczekiwania (w sekundach) na miejsce
+                                             w kolejce dla polityki block. Domyślnie bez limitu.
+            name (str): Prefiks nazw wątków roboczych
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia kolejki: {overflow_policy}")
+
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.name = name
+
+        self.tasks = deque()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.running = False
+
+        # Metryki
+        self.busy_workers = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.busy_time = 0.0
+        self.started_at = None
+
+    def start(self):
+        """
+        Uruchamia wątki robocze (jeśli nie zostały jeszcze uruchomione).
+        """
+        with self.condition:
+            if self.running:
+                return
+
+            self.running = True
+            self.started_at = time.monotonic()
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"{self.name}-{i}", daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+        logger.info(
+            f"Uruchomiono pulę wątków '{self.name}' ({self.workers} wątków, kolejka {self.queue_size})"
+        )
+
+    def submit(self, fn, *args, on_drop=None, block=True, **kwargs):
+        """
+        Zgłasza zadanie do wykonania w puli.
+
+        Args:
+            fn (callable): Funkcja do wykonania
+            *args: Argumenty pozycyjne funkcji
+            on_drop (callable, optional): Funkcja wywoływana (bez argumentów), gdy przyjęte
+                                          zadanie zostanie usunięte z kolejki przez
+                                          politykę drop_oldest
+            block (bool): Czy przy polityce block czekać na miejsce w kolejce; False
+                          odrzuca zadanie od razu (np. zgłoszenie z wątku roboczego puli)
+            **kwargs: Argumenty nazwane funkcji
+
+        Returns:
+            bool: True jeśli zadanie zostało przyjęte do kolejki, False jeśli zostało
+                  odrzucone lub porzucone zgodnie z polityką przepełnienia
+        """
+        if not self.running:
+            self.start()
+
+        task = (fn, args, kwargs, on_drop)
+        dropped = None
+
+        with self.condition:
+            if len(self.tasks) >= self.queue_size:
+                if self.overflow_policy == OVERFLOW_BLOCK:
+                    has_space = block and self.condition.wait_for(
+                        lambda: len(self.tasks) < self.queue_size or not self.running,
+                        timeout=self.block_timeout,
+                    )
+                    if not has_space or not self.running:
+                        self.rejected += 1
+                        if block:
+                            logger.warning(
+                                f"Pula '{self.name}': przekroczono czas oczekiwania na miejsce w kolejce"
+                            )
+                        else:
+                            logger.warning(f"Pula '{self.name}': kolejka pełna, odrzucono zadanie")
+                        return False
+
+                elif self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                    dropped = self.tasks.popleft()
+                    self.dropped += 1
+                    logger.warning(f"Pula '{self.name}': kolejka pełna, porzucono najstarsze zadanie")
+
+                elif self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                    self.dropped += 1
+                    logger.warning(f"Pula '{self.name}': kolejka pełna, porzucono nowe zadanie")
+                    return False
+
+                else:
+                    self.rejected += 1
+                    logger.warning(f"Pula '{self.name}': kolejka pełna, odrzucono zadanie")
+                    return False
+
+            self.tasks.append(task)
+            self.submitted += 1
+            self.condition.notify()
+
+        # Powiadomienie o porzuconym zadaniu poza blokadą (może zgłaszać kolejne zadania)
+        if dropped is not None and dropped[3] is not None:
+            try:
+                dropped[3]()
+            except Exception as e:
+                logger.error(f"Błąd obsługi porzuconego zadania w puli '{self.name}': {e}")
+
+        return True
+
+    def _worker_loop(self):
+        """
+        Pętla wątku roboczego - pobiera zadania z kolejki i je wykonuje.
+        """
+        while True:
+            with self.condition:
+                while not self.tasks and self.running:
+                    self.condition.wait()
+
+                if not self.tasks:
+                    # Pula została zatrzymana, a kolejka jest pusta
+                    return
+
+                fn, args, kwargs, _ = self.tasks.popleft()
+                self.busy_workers += 1
+                # Zwolnienie miejsca w kolejce - budzimy oczekujących w submit()
+                self.condition.notify_all()
+
+            started = time.monotonic()
+            failed = False
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                failed = True
+                logger.error(f"Błąd podczas wykonywania zadania w puli '{self.name}': {e}")
+            finally:
+                with self.condition:
+                    self.busy_workers -= 1
+                    self.busy_time += time.monotonic() - started
+                    if failed:
+                        self.failed += 1
+                    else:
+                        self.completed += 1
+
+    def shutdown(self, wait=True, timeout=None):
+        """
+        Zatrzymuje pulę. Zadania pozostałe w kolejce są dokańczane.
+
+        Args:
+            wait (bool): Czy czekać na zakończenie wątków roboczych
+            timeout (float, optional): Maksymalny czas oczekiwania na każdy wątek
+        """
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            self.condition.notify_all()
+
+        if wait:
+            for thread in self.threads:
+                thread.join(timeout=timeout)
+
+        self.threads = []
+        logger.info(f"Zatrzymano pulę wątków '{self.name}'")
+
+    def get_metrics(self):
+        """
+        Zwraca metryki pracy puli.
+
+        Returns:
+            dict: Głębokość kolejki, wykorzystanie wątków i liczniki zadań
+        """
+        with self.condition:
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+            return {
+                "workers": self.workers,
+                "busy_workers": self.busy_workers,
+                "utilisation": self.busy_workers / self.workers,
+                "average_utilisation": (
+                    min(1.0, self.busy_time / (elapsed * self.workers)) if elapsed else 0.0
+                ),
+                "queue_depth": len(self.tasks),
+                "queue_size": self.queue_size,
+                "overflow_policy": self.overflow_policy,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+            }
@@ -10,6 +10,10 @@ import signal
 import subprocess
 import time
 import json
+import argparse
+import urllib.error
+import urllib.parse
+import urllib.request
 import psutil
 import logging
 from pathlib import Path
@@ -360,6 +364,171 @@ def wyswietl_status():
     print("================================\n")
 
 
+def wyslij_zadanie_api(metoda, url, dane=None):
+    """
+    Wysyła żądanie do REST API działającej aplikacji Morris.
+
+    Args:
+        metoda (str): Metoda HTTP
+        url (str): Adres endpointu
+        dane (dict, optional): Dane JSON żądania
+
+    Returns:
+        dict: Odpowiedź JSON
+
+    Raises:
+        RuntimeError: Gdy aplikacja nie odpowiada lub zwróciła błąd
+    """
+    body = json.dumps(dane).encode("utf-8") if dane is not None else None
+    zadanie = urllib.request.Request(
+        url, data=body, method=metoda, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(zadanie) as odpowiedz:
+            return json.loads(odpowiedz.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            komunikat = json.loads(e.read().decode("utf-8")).get("message", e.reason)
+        except ValueError:
+            komunikat = e.reason
+        raise RuntimeError(f"Błąd API ({e.code}): {komunikat}") from None
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Nie można połączyć się z aplikacją Morris: {e.reason}") from None
+
+
+def czekaj_na_zadanie(adres, odpowiedz, interwal=0.5):
+    """
+    Czeka na zakończenie zadania przyjętego przez API (odpowiedź 202 z polem status_url),
+    odpytując adres jego statusu.
+
+    Args:
+        adres (str): Adres aplikacji Morris
+        odpowiedz (dict): Odpowiedź API z polem status_url
+        interwal (float): Odstęp między kolejnymi zapytaniami w sekundach
+
+    Returns:
+        dict: Wyniki zakończonego zadania (pole results)
+
+    Raises:
+        RuntimeError: Gdy zadanie zakończyło się błędem lub zniknęło z rejestru
+    """
+    while True:
+        zadanie = wyslij_zadanie_api("GET", f"{adres}{odpowiedz['status_url']}")["run"]
+        if zadanie["status"] == "completed":
+            return zadanie["results"]
+        if zadanie["status"] == "failed":
+            raise RuntimeError(f"Zadanie {zadanie['id']} zakończyło się błędem: {zadanie['error']}")
+        time.sleep(interwal)
+
+
+def odtworz_dlq(adres, tempo, paczka, limit=None, chain_id=None):
+    """
+    Ponownie wykonuje uruchomienia z kolejki martwych wiadomości paczkami
+    z ograniczeniem liczby uruchomień na sekundę. Przerywa, gdy żadne
+    uruchomienie w paczce się nie powiodło (zależność nadal niedostępna).
+
+    Args:
+        adres (str): Adres aplikacji Morris
+        tempo (float): Maksymalna liczba uruchomień na sekundę
+        paczka (int): Liczba uruchomień w jednym żądaniu do API
+        limit (int, optional): Maksymalna łączna liczba uruchomień
+        chain_id (str, optional): Tylko uruchomienia danego chaina
+
+    Returns:
+        dict: Łączna liczba udanych, nieudanych i pominiętych uruchomień
+    """
+    suma = {"replayed": 0, "failed": 0, "skipped": 0, "pending": None}
+    # Nieudane i pominięte wpisy pozostają w kolejce - kolejne paczki je pomijają
+    pominiete = 0
+    while limit is None or suma["replayed"] + suma["failed"] + suma["skipped"] < limit:
+        rozmiar = paczka
+        if limit is not None:
+            rozmiar = min(paczka, limit - suma["replayed"] - suma["failed"] - suma["skipped"])
+
+        # API wykonuje paczkę w puli wątków - oczekiwanie na jej zakończenie
+        wynik = czekaj_na_zadanie(adres, wyslij_zadanie_api(
+            "POST",
+            f"{adres}/api/engine/dead-letters/replay",
+            {"limit": rozmiar, "rate": tempo, "offset": pominiete, "chain_id": chain_id},
+        ))
+        for klucz in ("replayed", "failed", "skipped"):
+            suma[klucz] += wynik[klucz]
+        suma["pending"] = wynik["pending"]
+        pominiete += wynik["failed"] + wynik["skipped"]
+
+        przetworzone = wynik["replayed"] + wynik["failed"] + wynik["skipped"]
+        print(
+            f"Paczka: {wynik['replayed']} udanych, {wynik['failed']} nieudanych, "
+            f"{wynik['skipped']} pominiętych (w kolejce: {wynik['pending']})"
+        )
+        if przetworzone < rozmiar:
+            break
+        if wynik["failed"] and not wynik["replayed"]:
+            print("Żadne uruchomienie w paczce się nie powiodło - przerwano ponawianie")
+            break
+
+    return suma
+
+
+def kolejka_dlq(argumenty):
+    """
+    Obsługuje polecenie `dlq` - przegląd, ponowne wykonanie i czyszczenie
+    kolejki martwych wiadomości działającej aplikacji.
+
+    Args:
+        argumenty (list): Argumenty polecenia (po `dlq`)
+
+    Returns:
+        int: Kod wyjścia
+    """
+    parser = argparse.ArgumentParser(
+        prog="python morris.py dlq",
+        description="Kolejka martwych wiadomości (nieudane uruchomienia chainów)",
+    )
+    parser.add_argument("akcja", choices=["list", "replay", "purge"])
+    parser.add_argument("--url", default=f"http://localhost:{APP_PORT}", help="Adres aplikacji Morris")
+    parser.add_argument("--chain", default=None, help="Tylko uruchomienia danego chaina")
+    parser.add_argument("--limit", type=int, default=None, help="Maksymalna liczba wpisów")
+    parser.add_argument("--rate", type=float, default=10.0, help="Uruchomień na sekundę (replay)")
+    parser.add_argument("--batch", type=int, default=None, help="Uruchomień w jednym żądaniu (replay)")
+    opcje = parser.parse_args(argumenty)
+    adres = opcje.url.rstrip("/")
+
+    try:
+        if opcje.akcja == "list":
+            parametry = {"limit": opcje.limit or 20}
+            if opcje.chain:
+                parametry["chain_id"] = opcje.chain
+            wynik = wyslij_zadanie_api(
+                "GET", f"{adres}/api/engine/dead-letters?{urllib.parse.urlencode(parametry)}"
+            )
+            for wpis in wynik["entries"]:
+                bledy = "; ".join(
+                    f"krok {blad['step']} ({blad['plugin']}): {blad['error']}"
+                    for blad in wpis["failures"]
+                )
+                print(f"{wpis['id']}  {wpis['timestamp']}  {wpis['chain_id']}  {bledy}")
+            print(f"\nW kolejce: {wynik['metrics']['pending']} wpisów")
+
+        elif opcje.akcja == "replay":
+            paczka = opcje.batch or max(1, int(opcje.rate))
+            suma = odtworz_dlq(adres, opcje.rate, paczka, opcje.limit, opcje.chain)
+            print(
+                f"\nPonowiono: {suma['replayed']} udanych, {suma['failed']} nieudanych, "
+                f"{suma['skipped']} pominiętych (w kolejce: {suma['pending']})"
+            )
+
+        else:
+            wynik = wyslij_zadanie_api("DELETE", f"{adres}/api/engine/dead-letters")
+            print(f"Usunięto {wynik['removed']} wpisów z kolejki martwych wiadomości")
+
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+
+    return 0
+
+
 def main():
     """
     Główna funkcja programu.
@@ -374,6 +543,7 @@ Opcje:
   stop    - Zatrzymuje aplikację Morris
   restart - Restartuje aplikację Morris
   status  - Wyświetla status aplikacji Morris
+  dlq     - Kolejka martwych wiadomości: dlq list|replay|purge [--rate N] [--limit N] [--chain ID]
         """
         )
         sys.exit(1)
@@ -408,6 +578,9 @@ Opcje:
         wyswietl_status()
         sys.exit(0)
 
+    elif komenda == "dlq":
+        sys.exit(kolejka_dlq(sys.argv[2:]))
+
     else:
         print(f"Nieznana opcja: {komenda}")
         sys.exit(1)
@@ -5,11 +5,41 @@ import time
 import paho.mqtt.client as mqtt_client
 import random
 import string
+from collections import namedtuple
+
+from core import codec
+from core.mqtt_outbox import MqttOutbox
+from core.topic_trie import TopicTrie
+from core.worker_pool import OVERFLOW_DROP_OLDEST, WorkerPool
 
 # Konfiguracja loggera
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Wiadomość przekazywana handlerom zarejestrowanym przez register_handler
+# (payload jako bajty - handler dekoduje go przez core.codec tylko wtedy, gdy go potrzebuje)
+MqttMessage = namedtuple("MqttMessage", ["topic", "payload"])
+
+# Domyślna konfiguracja puli dekodującej i kierującej odebrane wiadomości
+# (nadpisywana sekcją "dispatch" w config/mqtt.json)
+DEFAULT_DISPATCH = {
+    "workers": 1,
+    "queue_size": 10000,
+    "overflow_policy": OVERFLOW_DROP_OLDEST,
+    "block_timeout": 0,
+}
+
+# Domyślna konfiguracja kolejki wychodzącej publikowanych wiadomości
+# (nadpisywana sekcją "outbox" w config/mqtt.json; enabled: false - publikacja synchroniczna)
+DEFAULT_OUTBOX = {
+    "enabled": True,
+    "queue_size": 10000,
+    "batch_size": 100,
+    "linger_ms": 5,
+    "retry_interval": 1,
+    "spill_path": None,
+}
+
 
 class MqttClient:
     """
@@ -38,6 +68,39 @@ class MqttClient:
         )
         self.config["client_id"] = f"{self.config['client_id']}_{random_suffix}"
 
+        # Router tematów: filtr tematu -> handlery rejestrowane przez komponenty
+        # (PluginManager, Chain Engine); wiadomość dopasowywana jest raz, przez drzewo tematów
+        self.router = TopicTrie()
+        self.router_lock = threading.Lock()
+        self.route_counts = {}  # Filtr -> liczba zarejestrowanych handlerów
+        self.route_subscriptions = set()  # Filtry subskrybowane z powodu register_handler
+
+        # Wiadomości odebrane w wątku sieciowym paho trafiają jako surowe (temat, bajty)
+        # do ograniczonej kolejki; dekodowanie i routing wykonuje osobna pula wątków.
+        # Przy jednym wątku zachowana jest kolejność przetwarzania wiadomości.
+        dispatch_config = dict(DEFAULT_DISPATCH, **self.config.get("dispatch", {}))
+        self.dispatcher = WorkerPool(
+            workers=dispatch_config["workers"],
+            queue_size=dispatch_config["queue_size"],
+            overflow_policy=dispatch_config["overflow_policy"],
+            block_timeout=dispatch_config["block_timeout"],
+            name="morris-mqtt-dispatch",
+        )
+
+        # Publikowane wiadomości trafiają do kolejki wychodzącej opróżnianej przez osobny
+        # wątek - publish() nie czeka na brokera, a wiadomości czekają na ponowne połączenie
+        outbox_config = dict(DEFAULT_OUTBOX, **self.config.get("outbox", {}))
+        self.outbox = None
+        if outbox_config["enabled"]:
+            self.outbox = MqttOutbox(
+                self._send,
+                queue_size=outbox_config["queue_size"],
+                batch_size=outbox_config["batch_size"],
+                linger_ms=outbox_config["linger_ms"],
+                retry_interval=outbox_config["retry_interval"],
+                spill_path=outbox_config["spill_path"],
+            )
+
     def set_chain_engine(self, chain_engine):
         """
         Ustawia referencję do Chain Engine.
@@ -98,6 +161,10 @@ class MqttClient:
             self.connected = True
             logger.info("Połączono z brokerem MQTT")
 
+            # Wznowienie wysyłki wiadomości oczekujących w kolejce wychodzącej
+            if self.outbox is not None:
+                self.outbox.wake()
+
             # Subskrypcja tematów
             for topic in self.config["topics"]["subscribe"]:
                 client.subscribe(topic)
@@ -109,97 +176,96 @@ class MqttClient:
     def _on_message(self, client, userdata, msg):
         """
         Callback wywoływany po otrzymaniu wiadomości MQTT.
+        Działa w wątku sieciowym paho, więc jedynie przekazuje temat i surową treść
+        do kolejki puli dispatcher - dekodowanie i routing wykonuje _dispatch_message.
 
         Args:
             client: Instancja klienta MQTT
             userdata: Dane użytkownika przekazane do klienta
             msg: Otrzymana wiadomość
         """
-        try:
-            topic = msg.topic
-            payload = msg.payload.decode("utf-8")
-
-            # Obsługa aktualizacji statusu wtyczki
-            if topic.startswith("status/"):
-                plugin_id = topic.split("/")[1]
-                try:
-                    status_data = json.loads(payload)
-                    required_fields = ["status", "timestamp"]
-
-                    if not all(field in status_data for field in required_fields):
-                        logger.warning(
-                            f"Brak wymaganych pól w aktualizacji statusu dla {plugin_id}"
-                        )
-                        return
-
-                    # Sprawdź autoryzację przez PluginManager
-                    if not self.plugin_manager.verify_status_update(
-                        plugin_id, status_data
-                    ):
-                        logger.warning(
-                            f"Nieautoryzowana aktualizacja statusu dla {plugin_id}"
-                        )
-                        return
-
-                    # Zaktualizuj status wtyczki
-                    self.plugin_manager.update_plugin_status(
-                        plugin_id,
-                        status=status_data["status"],
-                        timestamp=status_data["timestamp"],
-                        details=status_data.get("details"),
-                    )
-                except json.JSONDecodeError:
-                    logger.error(
-                        f"Nieprawidłowy JSON w aktualizacji statusu dla {plugin_id}"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Błąd podczas aktualizacji statusu przez MQTT: {str(e)}"
-                    )
-
-            # Sprawdzenie, czy wiadomość jest odpowiedzią od zdalnej wtyczki
-            if msg.topic.startswith("plugin/") and msg.topic.endswith("/output"):
-                # Ta wiadomość zostanie obsłużona przez Chain Engine
-                return
-
-            # Próba parsowania JSON
+        self.dispatcher.submit(self._dispatch_message, msg.topic, msg.payload)
+
+    def _dispatch_message(self, topic, payload):
+        """
+        Przekazuje odebraną wiadomość do handlerów, których filtry pasują do tematu
+        (zadanie puli dispatcher). Temat jest dopasowywany raz, przez drzewo tematów.
+
+        Args:
+            topic (str): Temat wiadomości
+            payload (bytes): Surowa treść wiadomości
+        """
+        handlers = self.router.match(topic)
+        if not handlers:
+            logger.debug(f"Brak handlera dla wiadomości z tematu '{topic}'")
+            return
+
+        message = MqttMessage(topic, payload)
+        for handler in handlers:
             try:
-                payloadJson = json.loads(payload)
-            except json.JSONDecodeError:
-                logger.warning(
-                    f"Otrzymana wiadomość nie jest poprawnym JSON: {payload}"
-                )
-                return
-
-            # Sprawdzenie, czy Chain Engine jest dostępny
-            if self.chain_engine:
-                # Utworzenie triggera dla Chain Engine
-                triggerId = f"mqtt:{msg.topic}"
-
-                # Sprawdzenie, czy istnieje chain dla tego triggera
-                chainId, chain = self.chain_engine.get_chain_for_trigger(triggerId)
-
-                if chainId:
-                    logger.info(
-                        f"Znaleziono chain '{chainId}' dla triggera '{triggerId}'. Uruchamianie..."
-                    )
-
-                    # Uruchomienie chaina asynchronicznie
-                    def on_chain_complete(result):
-                        logger.info(
-                            f"Chain '{chainId}' zakończył przetwarzanie. Wynik: {result}"
-                        )
-
-                    self.chain_engine.run_chain_async(
-                        triggerId, payloadJson, on_chain_complete
-                    )
-                else:
-                    logger.debug(
-                        f"Nie znaleziono chaina dla triggera '{triggerId}'. Wiadomość została tylko zalogowana."
-                    )
+                handler(message)
+            except Exception as e:
+                logger.error(f"Błąd podczas przetwarzania wiadomości MQTT z tematu '{topic}': {e}")
 
-        except Exception as e:
-            logger.error(f"Błąd podczas przetwarzania wiadomości MQTT: {e}")
+    def register_handler(self, topic_filter, handler):
+        """
+        Rejestruje handler wiadomości dla filtra tematu (z symbolami `+` i `#`).
+        Filtr jest dodawany do subskrybowanych tematów (także po połączeniu z brokerem).
+        Handler jest wywoływany w puli dispatcher z obiektem MqttMessage (topic, payload
+        jako bajty) - raz na wiadomość, nawet jeśli pasuje do kilku jego filtrów.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+            handler (callable): Funkcja przyjmująca wiadomość
+
+        Raises:
+            ValueError: Gdy filtr tematu jest nieprawidłowy
+        """
+        if not TopicTrie.validate_filter(topic_filter):
+            raise ValueError(f"Nieprawidłowy filtr tematu MQTT: {topic_filter}")
+
+        with self.router_lock:
+            self.router.insert(topic_filter, handler)
+            self.route_counts[topic_filter] = self.route_counts.get(topic_filter, 0) + 1
+            subscriptions = self.config["topics"]["subscribe"]
+            subscribe = topic_filter not in subscriptions
+            if subscribe:
+                subscriptions.append(topic_filter)
+                self.route_subscriptions.add(topic_filter)
+
+        if subscribe and self.client and self.connected:
+            self.client.subscribe(topic_filter)
+            logger.info(f"Zasubskrybowano temat: {topic_filter}")
+
+    def unregister_handler(self, topic_filter, handler):
+        """
+        Usuwa handler zarejestrowany dla filtra tematu. Subskrypcja dodana przez
+        register_handler jest usuwana razem z ostatnim handlerem filtra.
+
+        Args:
+            topic_filter (str): Filtr tematu MQTT
+            handler (callable): Zarejestrowany handler
+
+        Returns:
+            bool: True jeśli handler został usunięty, False jeśli nie był zarejestrowany
+        """
+        with self.router_lock:
+            if not self.router.remove(topic_filter, handler):
+                return False
+            self.route_counts[topic_filter] -= 1
+            unsubscribe = (
+                not self.route_counts[topic_filter] and topic_filter in self.route_subscriptions
+            )
+            if not self.route_counts[topic_filter]:
+                del self.route_counts[topic_filter]
+            if unsubscribe:
+                self.route_subscriptions.discard(topic_filter)
+                self.config["topics"]["subscribe"].remove(topic_filter)
+
+        if unsubscribe and self.client and self.connected:
+            self.client.unsubscribe(topic_filter)
+            logger.info(f"Anulowano subskrypcję tematu: {topic_filter}")
+        return True
 
     def _on_disconnect(self, client, userdata, rc):
         """
@@ -211,6 +277,9 @@ class MqttClient:
             rc: Kod wyniku rozłączenia
         """
         self.connected = False
+        # Nowe wiadomości QoS 1 i 2 trafiają na dysk do czasu ponownego połączenia
+        if self.outbox is not None:
+            self.outbox.suspend()
         if rc != 0:
             logger.warning(f"Nieoczekiwane rozłączenie z brokerem MQTT, kod: {rc}")
             # Próba ponownego połączenia zostanie obsłużona przez automatic reconnect
@@ -289,6 +358,11 @@ class MqttClient:
             logger.warning("Klient MQTT nie jest uruchomiony")
             return
 
+        # Wysłanie wiadomości z kolejki wychodzącej przed rozłączeniem
+        # (niewysłane wiadomości QoS 1 i 2 trafiają na dysk, jeśli ustawiono spill_path)
+        if self.outbox is not None:
+            self.outbox.stop(timeout=2)
+
         self.running = False
         if self.thread:
             self.thread.join(timeout=2)
@@ -296,24 +370,62 @@ class MqttClient:
         if self.client and self.connected:
             self.client.disconnect()
 
+        # Dokończenie przetwarzania wiadomości odebranych przed zatrzymaniem
+        self.dispatcher.shutdown(wait=True, timeout=2)
+
         logger.info("Zatrzymano klienta MQTT")
 
-    def publish(self, topic=None, payload=None, qos=0, retain=False):
+    def get_metrics(self):
+        """
+        Zwraca metryki klienta MQTT.
+
+        Returns:
+            dict: Stan połączenia oraz metryki kolejki odebranych wiadomości
+                  (głębokość, liczniki przetworzonych i porzuconych wiadomości)
+                  i kolejki wychodzącej
         """
-        Publikuje wiadomość MQTT.
+        metrics = {
+            "connected": self.connected,
+            "dispatch": self.dispatcher.get_metrics(),
+        }
+        if self.outbox is not None:
+            metrics["outbox"] = self.outbox.get_metrics()
+        return metrics
+
+    def publish(self, topic=None, payload=None, qos=0, retain=False, queued=True):
+        """
+        Publikuje wiadomość MQTT. Wiadomość trafia do kolejki wychodzącej i jest wysyłana
+        przez jej wątek (także po ponownym połączeniu z brokerem), więc wywołanie nie czeka
+        na brokera. Przy wyłączonej kolejce (outbox.enabled: false) lub queued=False
+        publikacja jest synchroniczna.
 
         Args:
             topic (str, optional): Temat, na który ma zostać opublikowana wiadomość.
                                    Jeśli nie podano, używany jest domyślny temat z konfiguracji.
-            payload (str/dict, optional): Treść wiadomości. Jeśli podano słownik, zostanie on
-                                          przekonwertowany do formatu JSON.
+            payload (str/bytes/dict/list, optional): Treść wiadomości. Słownik lub lista
+                                          są kodowane do JSON (core.codec).
             qos (int, optional): Poziom QoS (0, 1 lub 2). Domyślnie 0.
             retain (bool, optional): Czy wiadomość ma być zachowana przez broker. Domyślnie False.
+            queued (bool, optional): False - publikacja z pominięciem kolejki wychodzącej, np. dla
+                                     żądań oczekujących na odpowiedź, które po upływie limitu
+                                     czasu nie powinny być wysłane. Domyślnie True.
 
         Returns:
-            bool: True jeśli publikacja się powiodła, False w przeciwnym wypadku
+            bool: True jeśli wiadomość została przyjęta do kolejki wychodzącej (lub opublikowana
+                  przy wyłączonej kolejce), False w przeciwnym wypadku
         """
-        # Jeśli klient nie jest połączony, spróbuj ponownie połączyć
+        # Użyj domyślnego tematu, jeśli nie podano
+        if topic is None:
+            topic = self.config["topics"]["publish"]
+
+        # Konwersja słownika lub listy do JSON
+        if isinstance(payload, (dict, list)):
+            payload = codec.dumps(payload)
+
+        if self.outbox is not None and queued:
+            return self.outbox.put(topic, payload, qos, retain)
+
+        # Jeśli klient nie jest połączony, wiadomość nie zostanie wysłana
         if not self.client or not self.connected:
             logger.warning(
                 "Nie można opublikować wiadomości - klient MQTT nie jest połączony"
@@ -321,24 +433,27 @@ class MqttClient:
             # Zwróć False, ale nie generuj błędu - aplikacja może działać bez MQTT
             return False
 
-        # Użyj domyślnego tematu, jeśli nie podano
-        if topic is None:
-            topic = self.config["topics"]["publish"]
-
-        # Konwersja słownika do JSON
-        if isinstance(payload, dict):
-            payload = json.dumps(payload)
-
         try:
-            result = self.client.publish(topic, payload, qos, retain)
-            if result.rc == 0:
-                logger.info(f"Opublikowano wiadomość na temat {topic}: {payload}")
-                return True
-            else:
-                logger.error(
-                    f"Nie udało się opublikować wiadomości, kod błędu: {result.rc}"
-                )
-                return False
+            return self._send(topic, payload, qos, retain)
         except Exception as e:
             logger.error(f"Błąd podczas publikacji wiadomości MQTT: {e}")
             return False
+
+    def _send(self, topic, payload, qos, retain):
+        """
+        Przekazuje wiadomość do klienta paho (wywoływane przez wątek kolejki wychodzącej).
+
+        Returns:
+            bool: True jeśli wiadomość została przekazana, False jeśli klient nie jest
+                  połączony lub paho zwrócił błąd (wysyłka zostanie ponowiona)
+        """
+        if not self.client or not self.connected:
+            return False
+
+        result = self.client.publish(topic, payload, qos, retain)
+        if result.rc != 0:
+            logger.error(f"Nie udało się opublikować wiadomości, kod błędu: {result.rc}")
+            return False
+
+        logger.debug(f"Opublikowano wiadomość na temat {topic}")
+        return True
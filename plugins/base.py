@@ -19,6 +19,14 @@ class BasePlugin(ABC):
     Definiuje interfejs, który muszą implementować wszystkie wtyczki.
     """
     
+    # Tryb wykonywania przez Chain Engine: "thread" (bieżący wątek) lub "process"
+    # (pula procesów - dla wtyczek obciążających CPU; klasa musi być importowalna z modułu)
+    execution = "thread"
+    
+    # Czy wyniki wtyczki mogą być zapamiętywane przez Chain Engine (wtyczka deterministyczna,
+    # bez efektów ubocznych). True lub słownik {"ttl": sekundy, "max_size": liczba wpisów}.
+    cacheable = False
+    
     def __init__(self, config=None):
         """
         Inicjalizacja wtyczki.
@@ -28,7 +36,23 @@ class BasePlugin(ABC):
         """
         self.name = self.__class__.__name__
         self.config = config or {}
-        logger.info(f"Zainicjalizowano wtyczkę: {self.name}")
+        logger.debug(f"Zainicjalizowano wtyczkę: {self.name}")
+    
+    def setup(self):
+        """
+        Metoda cyklu życia wywoływana raz po utworzeniu instancji przez Chain Engine.
+        Instancje są współdzielone między uruchomieniami chainów (jedna na parę
+        wtyczka + konfiguracja), więc tu należy otwierać zasoby (połączenia, pliki).
+        Metoda process() nie powinna modyfikować stanu instancji.
+        """
+        pass
+    
+    def teardown(self):
+        """
+        Metoda cyklu życia wywoływana, gdy Chain Engine zwalnia instancję wtyczki
+        (usunięcie lub zmiana chaina, zatrzymanie silnika). Zamyka zasoby otwarte w setup().
+        """
+        pass
     
     @abstractmethod
     def process(self, data, params=None):
@@ -36,6 +60,10 @@ class BasePlugin(ABC):
         Metoda abstrakcyjna, którą muszą implementować wszystkie wtyczki.
         Przetwarza dane wejściowe i zwraca wynik.
         
+        Wtyczki wykonujące operacje wejścia/wyjścia mogą zdefiniować ją jako
+        `async def process` - AsyncChainEngine czeka na nią bezpośrednio w pętli
+        zdarzeń, a synchroniczny ChainEngine uruchamia ją przez asyncio.run().
+        
         Args:
             data (dict): Dane wejściowe do przetworzenia.
             params (dict, optional): Dodatkowe parametry dla przetwarzania. Domyślnie None.
@@ -45,6 +73,21 @@ class BasePlugin(ABC):
         """
         pass
     
+    def process_batch(self, payloads, params=None):
+        """
+        Przetwarza listę danych wejściowych (mikro-paczkę) i zwraca listę wyników.
+        Domyślnie wywołuje process() dla każdego elementu; wtyczki mogą ją nadpisać,
+        aby rozłożyć stały narzut (walidacja, logowanie, przygotowanie) na całą paczkę.
+        
+        Args:
+            payloads (list): Lista danych wejściowych (słowników).
+            params (dict, optional): Dodatkowe parametry dla przetwarzania. Domyślnie None.
+            
+        Returns:
+            list: Lista wyników w tej samej kolejności co dane wejściowe.
+        """
+        return [self.process(data, params) for data in payloads]
+    
     def validate_input(self, data):
         """
         Walidacja danych wejściowych.
@@ -14,6 +14,8 @@ import threading
 import time
 from datetime import datetime
 
+from core import codec
+
 # Konfiguracja loggera
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,6 +51,8 @@ class PluginManager:
         self.lock = (
             threading.Lock()
         )  # Blokada do bezpiecznego dostępu do słownika wtyczek
+        # Funkcje wywoływane przy zmianie statusu wtyczki (nazwa, status)
+        self.status_listeners = []
 
         # Utworzenie katalogu dla pliku plugins.json, jeśli nie istnieje
         os.makedirs(os.path.dirname(self.plugins_file), exist_ok=True)
@@ -140,39 +144,22 @@ class PluginManager:
             )
             return
 
-        # Dodanie tematu plugin/announce do listy subskrybowanych tematów w kliencie MQTT
-        if (
-            "topics" in self.mqtt_client.config
-            and "subscribe" in self.mqtt_client.config["topics"]
-        ):
-            if "plugin/announce" not in self.mqtt_client.config["topics"]["subscribe"]:
-                self.mqtt_client.config["topics"]["subscribe"].append("plugin/announce")
-
-        # Jeśli klient MQTT ma już zainicjalizowany obiekt client, dodajemy callback
-        if hasattr(self.mqtt_client, "client") and self.mqtt_client.client:
-            # Dodanie callbacka dla wiadomości
-            self.mqtt_client.client.message_callback_add(
-                "plugin/announce", self._handle_plugin_announcement
-            )
-
-            # Jeśli klient jest już połączony, dodajemy subskrypcję bezpośrednio
-            if self.mqtt_client.connected:
-                self.mqtt_client.client.subscribe("plugin/announce")
+        # Handlery w routerze tematów klienta MQTT (router dodaje też subskrypcje)
+        self.mqtt_client.register_handler("plugin/announce", self._handle_plugin_announcement)
+        self.mqtt_client.register_handler("status/+", self._handle_status_update)
 
-        logger.info("Skonfigurowano subskrypcje MQTT dla ogłoszeń wtyczek")
+        logger.info("Skonfigurowano subskrypcje MQTT dla ogłoszeń i statusów wtyczek")
 
-    def _handle_plugin_announcement(self, client, userdata, message):
+    def _handle_plugin_announcement(self, message):
         """
         Obsługuje ogłoszenia wtyczek przychodzące przez MQTT.
 
         Args:
-            client: Klient MQTT
-            userdata: Dane użytkownika
-            message: Wiadomość MQTT
+            message: Wiadomość MQTT (topic, payload)
         """
         try:
             # Dekodowanie wiadomości JSON
-            payload = json.loads(message.payload.decode("utf-8"))
+            payload = codec.loads(message.payload)
 
             # Sprawdzenie wymaganych pól
             if not all(
@@ -188,16 +175,50 @@ class PluginManager:
 
             # Aktualizacja lub dodanie wtyczki
             with self.lock:
+                previous = self.plugins.get(plugin_name, {}).get("status")
                 self.plugins[plugin_name] = payload
                 self._save_plugins()
 
             logger.info(f"Zarejestrowano/zaktualizowano wtyczkę: {plugin_name}")
+            if payload["status"] != previous:
+                self._notify_status(plugin_name, payload["status"])
 
-        except json.JSONDecodeError:
+        except ValueError:
             logger.error(f"Otrzymano nieprawidłowy format JSON: {message.payload}")
         except Exception as e:
             logger.error(f"Błąd podczas przetwarzania ogłoszenia wtyczki: {e}")
 
+    def _handle_status_update(self, message):
+        """
+        Obsługuje aktualizacje statusu wtyczek z tematów status/<plugin_id>.
+
+        Args:
+            message: Wiadomość MQTT (topic, payload)
+        """
+        plugin_id = message.topic.split("/")[1]
+        try:
+            status_data = codec.loads(message.payload)
+
+            if not all(field in status_data for field in ["status", "timestamp"]):
+                logger.warning(f"Brak wymaganych pól w aktualizacji statusu dla {plugin_id}")
+                return
+
+            # Sprawdzenie autoryzacji (klucz API wtyczki)
+            if not self.verify_status_update(plugin_id, status_data):
+                logger.warning(f"Nieautoryzowana aktualizacja statusu dla {plugin_id}")
+                return
+
+            self.update_plugin_status(
+                plugin_id,
+                status=status_data["status"],
+                timestamp=status_data["timestamp"],
+                details=status_data.get("details"),
+            )
+        except ValueError:
+            logger.error(f"Nieprawidłowy JSON w aktualizacji statusu dla {plugin_id}")
+        except Exception as e:
+            logger.error(f"Błąd podczas aktualizacji statusu przez MQTT: {str(e)}")
+
     def _start_status_monitor(self):
         """
         Uruchamia wątek monitorujący status wtyczek.
@@ -232,6 +253,8 @@ class PluginManager:
                     # Jeśli są wtyczki do aktualizacji, zapisz zmiany
                     if plugins_to_update:
                         self._save_plugins()
+                        for name in plugins_to_update:
+                            self._notify_status(name, "offline")
 
                 except Exception as e:
                     logger.error(f"Błąd w monitorze statusu wtyczek: {e}")
@@ -302,10 +325,13 @@ class PluginManager:
 
             # Aktualizacja lub dodanie wtyczki
             with self.lock:
+                previous = self.plugins.get(plugin_name, {}).get("status")
                 self.plugins[plugin_name] = plugin_data
                 self._save_plugins()
 
             logger.info(f"Ręcznie zarejestrowano/zaktualizowano wtyczkę: {plugin_name}")
+            if plugin_data["status"] != previous:
+                self._notify_status(plugin_name, plugin_data["status"])
             return True
 
         except Exception as e:
@@ -335,3 +361,74 @@ class PluginManager:
         except Exception as e:
             logger.error(f"Błąd podczas usuwania wtyczki: {e}")
             return False
+
+    def verify_status_update(self, plugin_id, status_data):
+        """
+        Sprawdza, czy aktualizacja statusu (np. przez MQTT) dotyczy znanej wtyczki
+        i zawiera jej klucz API (jeśli wtyczka go posiada).
+
+        Args:
+            plugin_id (str): Identyfikator wtyczki
+            status_data (dict): Dane aktualizacji statusu (opcjonalnie 'api_key')
+
+        Returns:
+            bool: True, jeśli aktualizacja jest dozwolona
+        """
+        plugin = self.get_plugin(plugin_id)
+        if not plugin:
+            return False
+        api_key = plugin.get("api_key")
+        return api_key is None or status_data.get("api_key") == api_key
+
+    def update_plugin_status(self, plugin_id, status, timestamp=None, details=None):
+        """
+        Aktualizuje status wtyczki i powiadamia obserwatorów o zmianie.
+
+        Args:
+            plugin_id (str): Identyfikator wtyczki
+            status (str): Nowy status (online, offline, error, working)
+            timestamp (str, optional): Czas zgłoszenia statusu
+            details (dict, optional): Dodatkowe informacje o statusie
+
+        Returns:
+            bool: True, jeśli status został zaktualizowany, False jeśli wtyczka nie istnieje
+        """
+        with self.lock:
+            plugin = self.plugins.get(plugin_id)
+            if plugin is None:
+                logger.warning(f"Próba aktualizacji statusu nieistniejącej wtyczki: {plugin_id}")
+                return False
+
+            previous = plugin.get("status")
+            plugin["status"] = status
+            plugin["last_seen"] = datetime.now().isoformat()
+            if timestamp is not None:
+                plugin["status_timestamp"] = timestamp
+            if details is not None:
+                plugin["status_details"] = details
+            self._save_plugins()
+
+        logger.info(f"Zaktualizowano status wtyczki {plugin_id}: {status}")
+        if status != previous:
+            self._notify_status(plugin_id, status)
+        return True
+
+    def add_status_listener(self, listener):
+        """
+        Rejestruje funkcję wywoływaną przy zmianie statusu wtyczki
+        (np. wyłączniki zdalnych wtyczek w Chain Engine).
+
+        Args:
+            listener (function): Funkcja przyjmująca (nazwa wtyczki, status)
+        """
+        self.status_listeners.append(listener)
+
+    def _notify_status(self, name, status):
+        """
+        Powiadamia obserwatorów o zmianie statusu wtyczki (poza blokadą słownika wtyczek).
+        """
+        for listener in list(self.status_listeners):
+            try:
+                listener(name, status)
+            except Exception as e:
+                logger.error(f"Błąd podczas powiadamiania o statusie wtyczki {name}: {e}")
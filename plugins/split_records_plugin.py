@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Wtyczka SplitRecordsPlugin do systemu Morris.
+Rozdziela listę rekordów z danych wejściowych na strumień pojedynczych rekordów.
+"""
+
+import logging
+from plugins.base import BasePlugin
+
+# Konfiguracja loggera
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SplitRecordsPlugin(BasePlugin):
+    """
+    Wtyczka SplitRecordsPlugin.
+    Zwraca generator rekordów z pola danych wejściowych (domyślnie 'records'),
+    dzięki czemu kolejne kroki chaina przetwarzają rekordy pojedynczo (tryb strumieniowy).
+
+    Konfiguracja:
+        field (str): Pole z listą rekordów. Domyślnie 'records'.
+        include (list): Pola danych wejściowych kopiowane do każdego rekordu. Domyślnie brak.
+    """
+
+    def process(self, data, params=None):
+        """
+        Rozdziela listę rekordów na strumień.
+
+        Args:
+            data (dict): Dane wejściowe zawierające listę rekordów.
+            params (dict, optional): Dodatkowe parametry dla przetwarzania. Domyślnie None.
+
+        Returns:
+            generator: Strumień rekordów lub dane wejściowe, jeśli nie zawierają listy rekordów.
+        """
+        field = self.config.get("field", "records")
+        records = data.get(field) if self.validate_input(data) else None
+
+        if not isinstance(records, list):
+            logger.error(f"Dane wejściowe nie zawierają listy rekordów w polu '{field}'")
+            return data
+
+        shared = {key: data[key] for key in self.config.get("include", []) if key in data}
+        return self._iterate(records, shared)
+
+    @staticmethod
+    def _iterate(records, shared):
+        """
+        Generator rekordów - pola wspólne są dołączane do każdego rekordu.
+        """
+        for record in records:
+            if shared and isinstance(record, dict):
+                yield {**shared, **record}
+            else:
+                yield record
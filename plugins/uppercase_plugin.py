@@ -57,3 +57,45 @@ class UppercasePlugin(BasePlugin):
         self.log_processing(data, result)
         
         return result
+    
+    def process_batch(self, payloads, params=None):
+        """
+        Przetwarza listę danych wejściowych jednym przebiegiem.
+        Parametry są odczytywane, a poziom logowania sprawdzany raz dla całej paczki.
+        
+        Args:
+            payloads (list): Lista danych wejściowych do przetworzenia.
+            params (dict, optional): Dodatkowe parametry dla przetwarzania (jak w process()).
+                                    Domyślnie None.
+            
+        Returns:
+            list: Lista przetworzonych danych w kolejności danych wejściowych.
+        """
+        params = params or {}
+        specific_keys = params.get('keys', None)
+        log_enabled = logger.isEnabledFor(logging.DEBUG)
+        
+        results = []
+        for data in payloads:
+            if not isinstance(data, dict):
+                logger.error("Nieprawidłowy format danych wejściowych")
+                results.append(data)
+                continue
+            
+            if specific_keys:
+                result = data.copy()
+                for key in specific_keys:
+                    value = result.get(key)
+                    if isinstance(value, str):
+                        result[key] = value.upper()
+            else:
+                result = {
+                    key: value.upper() if isinstance(value, str) else value
+                    for key, value in data.items()
+                }
+            
+            if log_enabled:
+                self.log_processing(data, result)
+            results.append(result)
+        
+        return results
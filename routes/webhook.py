@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 import logging
 
+from core.record_reader import JSON_MIMETYPES, NDJSON_MIMETYPES, iter_records
+from core.step_policy import DeadlineExceeded
+
 # Konfiguracja loggera
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -8,6 +11,24 @@ logger = logging.getLogger(__name__)
 # Utworzenie blueprintu dla webhooków
 webhook_bp = Blueprint('webhook', __name__)
 
+def _wants_async(chains):
+    """
+    Sprawdza, czy webhook ma być obsłużony asynchronicznie (odpowiedź 202
+    z identyfikatorem uruchomienia zamiast wyniku chainów).
+
+    Args:
+        chains (list): Lista krotek (chain_id, definicja) pasujących do triggera
+
+    Returns:
+        bool: True dla parametru ?async=1, nagłówka "Prefer: respond-async"
+              lub chaina z polem "async": true
+    """
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if 'respond-async' in request.headers.get('Prefer', '').lower():
+        return True
+    return any(chain.get('async', False) for _, chain in chains)
+
 @webhook_bp.route('/hook/<modul>', methods=['POST'])
 def handle_webhook(modul):
     """
@@ -39,27 +60,171 @@ def handle_webhook(modul):
         chainEngine = current_app.config.get('chain_engine')
         
         if chainEngine:
-            # Sprawdzenie, czy istnieje chain dla tego triggera
-            chainId, chain = chainEngine.get_chain_for_trigger(triggerId)
+            # Sprawdzenie, czy istnieją chainy dla tego triggera
+            chains = chainEngine.get_chains_for_trigger(triggerId)
             
-            if chainId:
+            if chains and _wants_async(chains):
+                # Przyjęcie uruchomienia bez oczekiwania na wynik
+                runId = chainEngine.submit_run(triggerId, daneJson)
+                if runId is None:
+                    return jsonify({
+                        "status": "error",
+                        "message": "Przekroczono limit oczekujących uruchomień, spróbuj ponownie później"
+                    }), 503
+                
+                statusUrl = url_for('webhook.get_run', run_id=runId)
+                response = jsonify({
+                    "status": "accepted",
+                    "message": f"Dane dla modułu {modul} zostały przyjęte do przetworzenia",
+                    "run_id": runId,
+                    "status_url": statusUrl
+                })
+                response.status_code = 202
+                response.headers['Location'] = statusUrl
+                return response
+            elif len(chains) == 1:
+                chainId, chain = chains[0]
                 logger.info(f"Znaleziono chain '{chainId}' dla triggera '{triggerId}'. Uruchamianie...")
                 
-                # Uruchomienie chaina
-                result = chainEngine.run_chain(triggerId, daneJson)
+                # Uruchomienie chaina (przy włączonej trwałej kolejce dane są w niej zapisane do czasu zakończenia)
+                with chainEngine.durable_run(triggerId, daneJson):
+                    result = chainEngine.run_chain(triggerId, daneJson)
                 
                 return jsonify({
                     "status": "success", 
                     "message": f"Dane dla modułu {modul} zostały przetworzone przez chain {chainId}",
                     "result": result
                 })
+            elif chains:
+                chainIds = ", ".join(chainId for chainId, _ in chains)
+                logger.info(f"Znaleziono chainy '{chainIds}' dla triggera '{triggerId}'. Uruchamianie...")
+                
+                # Uruchomienie wszystkich pasujących chainów równolegle
+                with chainEngine.durable_run(triggerId, daneJson):
+                    results = chainEngine.run_chains(triggerId, daneJson)
+                
+                return jsonify({
+                    "status": "success", 
+                    "message": f"Dane dla modułu {modul} zostały przetworzone przez chainy {chainIds}",
+                    "results": results
+                })
             else:
                 logger.info(f"Nie znaleziono chaina dla triggera '{triggerId}'. Dane zostały tylko zalogowane.")
         else:
             logger.warning("Chain Engine nie jest dostępny w kontekście aplikacji")
     
+    except DeadlineExceeded as e:
+        logger.warning(f"Przerwano przetwarzanie webhooka dla modułu '{modul}': {e}")
+        return jsonify({"status": "error", "message": str(e)}), 504
+
     except Exception as e:
         logger.error(f"Błąd podczas przetwarzania danych przez Chain Engine: {e}")
     
     # Jeśli nie znaleziono chaina lub wystąpił błąd, zwracamy standardową odpowiedź
     return jsonify({"status": "success", "message": f"Dane dla modułu {modul} zostały przyjęte"})
+
+@webhook_bp.route('/hook/<modul>/bulk', methods=['POST'])
+def handle_bulk_webhook(modul):
+    """
+    Obsługa webhooków zbiorczych pod adresem /hook/<modul>/bulk
+    
+    Treść żądania (NDJSON lub tablica JSON) jest odczytywana przyrostowo, a rekordy
+    są przekazywane do Chain Engine paczkami (run_chains_batch).
+    
+    Args:
+        modul (str): Nazwa modułu, do którego kierowany jest webhook
+        
+    Returns:
+        Response: Odpowiedź JSON z wynikiem przetwarzania każdego rekordu
+    """
+    if request.mimetype not in NDJSON_MIMETYPES + JSON_MIMETYPES:
+        logger.warning(f"Otrzymano nieprawidłowe dane (nie NDJSON ani JSON) dla modułu {modul}")
+        return jsonify({
+            "status": "error",
+            "message": "Oczekiwano danych w formacie NDJSON lub tablicy JSON"
+        }), 400
+    
+    triggerId = f"webhook:{modul}"
+    chainEngine = current_app.config.get('chain_engine')
+    if not chainEngine:
+        logger.warning("Chain Engine nie jest dostępny w kontekście aplikacji")
+    batchSize = chainEngine.config["bulk_ingest"]["batch_size"] if chainEngine else 1
+    
+    wyniki = []
+    paczka = []
+    
+    def przetworzPaczke():
+        # Uruchomienie chainów dla zebranych rekordów i zapis wyniku każdego z nich
+        if not paczka:
+            return
+        indeksy = [indeks for indeks, _ in paczka]
+        rekordy = [rekord for _, rekord in paczka]
+        paczka.clear()
+        
+        if not chainEngine:
+            wyniki.extend({"index": indeks, "status": "success"} for indeks in indeksy)
+            return
+        # Błędy kroków zgłoszone dla każdego rekordu (krok z błędem przekazuje dane dalej)
+        bledyKrokow = [[] for _ in rekordy]
+        try:
+            with chainEngine.durable_batch(triggerId, rekordy):
+                wynikiChainow = chainEngine.run_chains_batch(triggerId, rekordy, failures=bledyKrokow)
+        except Exception as e:
+            logger.error(f"Błąd podczas przetwarzania paczki {len(rekordy)} rekordów dla modułu '{modul}': {e}")
+            wyniki.extend({"index": indeks, "status": "error", "message": str(e)} for indeks in indeksy)
+            return
+        for indeks, wynikChainow, bledyRekordu in zip(indeksy, wynikiChainow, bledyKrokow):
+            if bledyRekordu:
+                wyniki.append({
+                    "index": indeks,
+                    "status": "error",
+                    "message": "; ".join(blad["error"] for blad in bledyRekordu),
+                    "failures": bledyRekordu,
+                    "results": wynikChainow
+                })
+            else:
+                wyniki.append({"index": indeks, "status": "success", "results": wynikChainow})
+    
+    for indeks, (rekord, blad) in enumerate(iter_records(request.stream, request.mimetype)):
+        if blad is not None:
+            wyniki.append({"index": indeks, "status": "error", "message": blad})
+            continue
+        paczka.append((indeks, rekord))
+        if len(paczka) >= batchSize:
+            przetworzPaczke()
+    przetworzPaczke()
+    
+    wyniki.sort(key=lambda wynik: wynik["index"])
+    bledy = sum(1 for wynik in wyniki if wynik["status"] == "error")
+    logger.info(
+        f"Webhook zbiorczy dla modułu '{modul}' przetworzył {len(wyniki) - bledy} rekordów "
+        f"({bledy} błędów)"
+    )
+    
+    return jsonify({
+        "status": "success",
+        "message": f"Dane dla modułu {modul} zostały przyjęte",
+        "processed": len(wyniki) - bledy,
+        "failed": bledy,
+        "records": wyniki
+    })
+
+@webhook_bp.route('/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    """
+    Zwraca status i wyniki uruchomienia przyjętego w trybie asynchronicznym
+    
+    Args:
+        run_id (str): Identyfikator uruchomienia zwrócony w odpowiedzi 202
+        
+    Returns:
+        Response: Odpowiedź JSON z opisem uruchomienia (status: queued, running,
+                  completed lub failed) albo błąd 404
+    """
+    chainEngine = current_app.config.get('chain_engine')
+    run = chainEngine.get_run(run_id) if chainEngine else None
+    
+    if run is None:
+        return jsonify({"status": "error", "message": f"Nie znaleziono uruchomienia {run_id}"}), 404
+    
+    return jsonify({"status": "success", "run": run})
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla asynchronicznego trybu Chain Engine (AsyncChainEngine).
+"""
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+import logging
+import threading
+from unittest.mock import MagicMock
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class SyncPlugin(BasePlugin):
+    """
+    Synchroniczna wtyczka testowa - zapisuje nazwę wątku, w którym została uruchomiona.
+    """
+    def process(self, data, params=None):
+        result = dict(data)
+        result["sync_thread"] = threading.current_thread().name
+        return result
+
+class AsyncPlugin(BasePlugin):
+    """
+    Asynchroniczna wtyczka testowa (async def process).
+    """
+    async def process(self, data, params=None):
+        await asyncio.sleep(0)
+        result = dict(data)
+        result["async"] = True
+        return result
+
+class AsyncChainEngineTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla klasy AsyncChainEngine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z chainami zawierającymi wtyczki synchroniczne, asynchroniczne i zdalne.
+        """
+        self.mqtt_client_mock = MagicMock()
+        self.engine = ChainEngine(mqtt_client=self.mqtt_client_mock, chains_file=os.devnull)
+        self.engine.plugin_classes.update({"SyncPlugin": SyncPlugin, "AsyncPlugin": AsyncPlugin})
+        self.engine.chains = {
+            "local_chain": {
+                "trigger": "webhook:local",
+                "steps": [{"plugin": "SyncPlugin"}, {"plugin": "AsyncPlugin"}]
+            },
+            "remote_chain": {
+                "trigger": "webhook:remote",
+                "steps": [{"plugin": "remote:device1:Times10", "config": {"timeout": 5}}]
+            }
+        }
+        self.engine._rebuild_trigger_index()
+        self.async_engine = AsyncChainEngine(self.engine)
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+
+    def test_run_chain_local_plugins(self):
+        """
+        Test chaina z wtyczką synchroniczną (pula wątków) i asynchroniczną (pętla zdarzeń).
+        """
+        result = asyncio.run(self.async_engine.run_chain("webhook:local", {"n": 1}))
+
+        self.assertEqual(result["n"], 1)
+        self.assertTrue(result["async"])
+        # Wtyczka synchroniczna nie blokuje wątku pętli zdarzeń
+        self.assertNotEqual(result["sync_thread"], threading.current_thread().name)
+
+    def test_sync_engine_runs_async_plugin(self):
+        """
+        Test uruchamiania wtyczki z `async def process` przez synchroniczny ChainEngine.
+        """
+        result = self.engine.run_chain("webhook:local", {"n": 1})
+        self.assertTrue(result["async"])
+
+    def test_sync_engine_async_plugin_inside_running_loop(self):
+        """
+        Test synchronicznego ChainEngine wywołanego z korutyny - wtyczka z `async def process`
+        jest wykonywana w pętli osobnego wątku zamiast zgłaszać RuntimeError z asyncio.run().
+        """
+        async def scenario():
+            return self.engine.run_chain("webhook:local", {"n": 1})
+
+        result = asyncio.run(scenario())
+        self.assertTrue(result["async"])
+
+    def test_concurrent_remote_chains(self):
+        """
+        Test wielu równoległych chainów czekających na zdalną wtyczkę jako korutyny.
+        """
+        requests = []
+        self.mqtt_client_mock.publish.side_effect = lambda topic, payload, **kwargs: requests.append(payload) or True
+        count = 500
+
+        async def scenario():
+            tasks = [
+                asyncio.ensure_future(self.async_engine.run_chain("webhook:remote", {"n": i}))
+                for i in range(count)
+            ]
+            while len(requests) < count:
+                await asyncio.sleep(0.01)
+
+            active_threads = threading.active_count()
+
+            # Odpowiedzi publikowane z innego wątku (jak wątek sieciowy paho)
+            def respond():
+                for request in reversed(requests):
+                    msg_mock = MagicMock()
+                    msg_mock.topic = "plugin/device1/output"
+                    msg_mock.payload = json.dumps({
+                        "correlation_id": request["correlation_id"],
+                        "data": {"n": request["data"]["n"] * 10}
+                    }).encode()
+                    self.engine._handle_plugin_response(msg_mock)
+
+            responder = threading.Thread(target=respond)
+            responder.start()
+            results = await asyncio.gather(*tasks)
+            responder.join()
+            return results, active_threads
+
+        results, active_threads = asyncio.run(scenario())
+
+        self.assertEqual(results, [{"n": i * 10} for i in range(count)])
+        # Oczekujące chainy nie zajmują wątków
+        self.assertLess(active_threads, 50)
+        self.assertEqual(self.engine.pending_requests, {})
+
+    def test_remote_timeout(self):
+        """
+        Test timeoutu zdalnej wtyczki w trybie asyncio.
+        """
+        self.engine.chains["remote_chain"]["steps"][0]["config"]["timeout"] = 0.05
+        result = asyncio.run(self.async_engine.run_chain("webhook:remote", {"n": 1}))
+
+        self.assertEqual(result, {"n": 1})
+        self.assertEqual(self.engine.pending_requests, {})
+
+    def test_dag_chain(self):
+        """
+        Test chaina DAG w trybie asyncio - gałęzie wykonywane równolegle i scalane.
+        """
+        self.engine.chains["dag_chain"] = {
+            "trigger": "webhook:dag",
+            "steps": [
+                {"id": "sync", "plugin": "SyncPlugin"},
+                {"id": "async", "plugin": "AsyncPlugin"},
+                {"id": "join", "plugin": "SyncPlugin", "depends_on": ["sync", "async"], "join": "by_id"}
+            ]
+        }
+        self.engine._rebuild_trigger_index()
+
+        result = asyncio.run(self.async_engine.run_chain("webhook:dag", {"n": 1}))
+
+        self.assertEqual(result["sync"]["n"], 1)
+        self.assertEqual(result["async"], {"n": 1, "async": True})
+        self.assertIn("sync_thread", result)
+
+    def test_run_chains_without_match(self):
+        """
+        Test uruchamiania chainów dla nieznanego triggera.
+        """
+        self.assertEqual(asyncio.run(self.async_engine.run_chains("webhook:unknown", {})), {})
+
+if __name__ == '__main__':
+    unittest.main()
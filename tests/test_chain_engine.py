@@ -12,11 +12,15 @@ import tempfile
 from unittest.mock import MagicMock, patch
 import sys
 import logging
+import threading
+import time
 
 # Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from core import codec
 from core.chain_engine import ChainEngine
+from mqtt_client import MqttClient
 from plugins.base import BasePlugin
 
 # Wyłączenie logowania podczas testów
@@ -41,6 +45,14 @@ class TestPlugin(BasePlugin):
         
         return result
 
+class MutatingPlugin(BasePlugin):
+    """
+    Testowa wtyczka modyfikująca dane wejściowe w miejscu.
+    """
+    def process(self, data, params=None):
+        data["mutated"] = True
+        return data
+
 class ErrorPlugin(BasePlugin):
     """
     Testowa wtyczka, która zawsze zgłasza wyjątek.
@@ -51,6 +63,30 @@ class ErrorPlugin(BasePlugin):
         """
         raise ValueError("Testowy błąd wtyczki")
 
+class SlowPlugin(BasePlugin):
+    """
+    Testowa wtyczka symulująca opóźnienie (np. zdalne wyszukiwanie).
+    Czeka config['delay'] sekund i ustawia pole config['key'].
+    """
+    def process(self, data, params=None):
+        time.sleep(self.config.get("delay", 0))
+        result = dict(data)
+        result[self.config["key"]] = True
+        return result
+
+class BatchPlugin(BasePlugin):
+    """
+    Testowa wtyczka z process_batch() zapisującą rozmiary otrzymanych paczek.
+    """
+    batch_sizes = []
+
+    def process(self, data, params=None):
+        return self.process_batch([data])[0]
+
+    def process_batch(self, payloads, params=None):
+        BatchPlugin.batch_sizes.append(len(payloads))
+        return [dict(data, batched=True) for data in payloads]
+
 class ChainEngineTest(unittest.TestCase):
     """
     Testy jednostkowe dla klasy ChainEngine.
@@ -145,6 +181,9 @@ class ChainEngineTest(unittest.TestCase):
         
         # Zatrzymanie patchera
         self.import_module_patcher.stop()
+        
+        # Zatrzymanie puli wątków silnika
+        self.chain_engine.shutdown()
     
     def test_load_chains(self):
         """
@@ -204,6 +243,116 @@ class ChainEngineTest(unittest.TestCase):
         self.assertIsNone(chain_id)
         self.assertIsNone(chain)
     
+    def test_trigger_index_maintenance(self):
+        """
+        Test aktualizacji indeksu triggerów przy dodawaniu, zmianie i usuwaniu chainów.
+        """
+        # Indeks zbudowany podczas wczytywania chainów
+        self.assertEqual(self.chain_engine.trigger_index["webhook:test"], ["test_chain"])
+
+        new_chain = {
+            "trigger": "webhook:indexed",
+            "steps": [{"plugin": "TestPlugin"}]
+        }
+        self.chain_engine.add_chain("indexed_chain", new_chain)
+        chain_id, _ = self.chain_engine.get_chain_for_trigger("webhook:indexed")
+        self.assertEqual(chain_id, "indexed_chain")
+
+        # Zmiana triggera istniejącego chaina usuwa stary wpis z indeksu
+        changed_chain = {
+            "trigger": "webhook:changed",
+            "steps": [{"plugin": "TestPlugin"}]
+        }
+        self.chain_engine.add_chain("indexed_chain", changed_chain)
+        self.assertNotIn("webhook:indexed", self.chain_engine.trigger_index)
+        chain_id, _ = self.chain_engine.get_chain_for_trigger("webhook:changed")
+        self.assertEqual(chain_id, "indexed_chain")
+
+        # Usunięcie chaina usuwa go z indeksu
+        self.chain_engine.remove_chain("indexed_chain")
+        self.assertNotIn("webhook:changed", self.chain_engine.trigger_index)
+        chain_id, chain = self.chain_engine.get_chain_for_trigger("webhook:changed")
+        self.assertIsNone(chain_id)
+        self.assertIsNone(chain)
+
+    def test_mqtt_wildcard_trigger(self):
+        """
+        Test dopasowania triggerów MQTT z symbolami wieloznacznymi.
+        """
+        wildcard_chain = {
+            "trigger": "mqtt:core/+/temperature",
+            "steps": [{"plugin": "TestPlugin"}]
+        }
+        self.assertTrue(self.chain_engine.add_chain("wildcard_chain", wildcard_chain))
+
+        chain_id, _ = self.chain_engine.get_chain_for_trigger("mqtt:core/kitchen/temperature")
+        self.assertEqual(chain_id, "wildcard_chain")
+
+        chain_id, _ = self.chain_engine.get_chain_for_trigger("mqtt:core/kitchen/humidity")
+        self.assertIsNone(chain_id)
+
+        # Nieprawidłowy filtr tematu jest odrzucany
+        invalid_chain = {
+            "trigger": "mqtt:core/#/temperature",
+            "steps": [{"plugin": "TestPlugin"}]
+        }
+        self.assertFalse(self.chain_engine.add_chain("invalid_chain", invalid_chain))
+
+        self.chain_engine.remove_chain("wildcard_chain")
+        chain_id, _ = self.chain_engine.get_chain_for_trigger("mqtt:core/kitchen/temperature")
+        self.assertIsNone(chain_id)
+
+    def test_mqtt_trigger_routes(self):
+        """
+        Test rejestracji handlerów triggerów MQTT w routerze tematów klienta
+        i uruchamiania chainów dla wiadomości z pasujących tematów.
+        """
+        register = self.mqtt_client_mock.register_handler
+        register.assert_any_call("plugin/+/output", self.chain_engine._handle_plugin_response)
+        register.assert_any_call("test", self.chain_engine._handle_mqtt_trigger)
+
+        wildcard_chain = {"trigger": "mqtt:core/+/temperature", "steps": [{"plugin": "TestPlugin"}]}
+        self.assertTrue(self.chain_engine.add_chain("wildcard_chain", wildcard_chain))
+        register.assert_any_call("core/+/temperature", self.chain_engine._handle_mqtt_trigger)
+
+        self.chain_engine.remove_chain("wildcard_chain")
+        self.mqtt_client_mock.unregister_handler.assert_called_once_with(
+            "core/+/temperature", self.chain_engine._handle_mqtt_trigger
+        )
+
+        message = MagicMock(topic="test", payload=b'{"value": 1}')
+        with patch.object(self.chain_engine, 'run_chain_async', return_value=True) as run_async:
+            self.chain_engine._handle_mqtt_trigger(message)
+            self.chain_engine._handle_mqtt_trigger(MagicMock(topic="test", payload=b"nie JSON"))
+        run_async.assert_called_once()
+        self.assertEqual(run_async.call_args.args[:2], ("mqtt:test", {"value": 1}))
+
+    def test_mqtt_trigger_does_not_block_dispatcher(self):
+        """
+        Test wiadomości triggera MQTT przy pełnej kolejce puli z polityką block -
+        dispatcher nie czeka na miejsce, a wiadomość jest odrzucana i zliczana.
+        """
+        engine = ChainEngine(
+            chains_file=os.devnull,
+            config={"worker_pool": {"workers": 1, "queue_size": 1, "block_timeout": 5}}
+        )
+        engine.chains = {"mqtt_chain": {"trigger": "mqtt:test", "steps": [{"plugin": "TestPlugin"}]}}
+        engine._rebuild_trigger_index()
+
+        release = threading.Event()
+        running = threading.Event()
+        engine.worker_pool.submit(lambda: running.set() or release.wait(5))
+        self.assertTrue(running.wait(timeout=5))
+        engine.worker_pool.submit(release.wait, 5)
+        try:
+            started = time.monotonic()
+            engine._handle_mqtt_trigger(MagicMock(topic="test", payload=b'{"value": 1}'))
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertEqual(engine.get_metrics()["worker_pool"]["rejected"], 1)
+        finally:
+            release.set()
+            engine.shutdown()
+
     def test_add_and_remove_chain(self):
         """
         Test dodawania i usuwania chainów.
@@ -258,23 +407,287 @@ class ChainEngineTest(unittest.TestCase):
         # Mimo błędu, chain powinien kontynuować działanie i zwrócić dane wejściowe
         self.assertEqual(result, input_data)
     
-    @patch('threading.Thread')
-    def test_run_chain_async(self, thread_mock):
+    def test_run_chains_fan_out(self):
         """
-        Test asynchronicznego uruchamiania chaina.
+        Test uruchamiania wszystkich chainów pasujących do jednego triggera.
         """
+        second_chain = {
+            "trigger": "webhook:test",
+            "steps": [{"plugin": "TestPlugin"}]
+        }
+        self.chain_engine.add_chain("second_chain", second_chain)
+
+        chains = self.chain_engine.get_chains_for_trigger("webhook:test")
+        self.assertEqual([chain_id for chain_id, _ in chains], ["test_chain", "second_chain"])
+
         input_data = {"message": "hello"}
-        callback = MagicMock()
-        
-        self.chain_engine.run_chain_async("webhook:test", input_data, callback)
-        
-        # Sprawdzenie, czy utworzono wątek
-        thread_mock.assert_called_once()
-        
-        # Sprawdzenie, czy wątek został uruchomiony
-        thread_instance = thread_mock.return_value
-        thread_instance.start.assert_called_once()
-    
+        results = self.chain_engine.run_chains("webhook:test", input_data)
+
+        self.assertEqual(results["test_chain"]["message"], "test_test_hello")
+        self.assertEqual(results["second_chain"]["message"], "test_hello")
+        # Dane wejściowe nie zostały zmodyfikowane
+        self.assertEqual(input_data, {"message": "hello"})
+
+        # Brak chainów dla triggera
+        self.assertEqual(self.chain_engine.run_chains("webhook:nonexistent", input_data), {})
+
+    def test_run_chains_single_chain_mutable_payload(self):
+        """
+        Test wtyczki modyfikującej dane w miejscu, gdy triggerowi odpowiada jeden chain.
+        """
+        self.chain_engine.plugin_classes["MutatingPlugin"] = MutatingPlugin
+        self.chain_engine.add_chain("mutating_chain", {
+            "trigger": "webhook:mutating",
+            "steps": [{"plugin": "MutatingPlugin"}]
+        })
+        input_data = {"a": 1}
+
+        results = self.chain_engine.run_chains("webhook:mutating", input_data)
+
+        self.assertEqual(results, {"mutating_chain": {"a": 1, "mutated": True}})
+        self.assertEqual(input_data, {"a": 1})
+
+    def test_read_only_payload(self):
+        """
+        Test współdzielonych danych wejściowych tylko do odczytu.
+        """
+        from core.chain_engine import ReadOnlyPayload
+
+        shared = ReadOnlyPayload.wrap({"message": "hello"})
+        with self.assertRaises(TypeError):
+            shared["message"] = "changed"
+        with self.assertRaises(TypeError):
+            shared.update({"other": 1})
+
+        # Kopia jest zwykłym, modyfikowalnym słownikiem
+        copied = shared.copy()
+        copied["message"] = "changed"
+        self.assertEqual(shared["message"], "hello")
+
+    def test_run_chain_by_id(self):
+        """
+        Test uruchamiania chaina na podstawie identyfikatora.
+        """
+        result = self.chain_engine.run_chain_by_id("test_chain", {"message": "hello"})
+        self.assertEqual(result["message"], "test_test_hello")
+
+    def test_run_chain_async(self):
+        """
+        Test asynchronicznego uruchamiania chaina w puli wątków.
+        """
+        input_data = {"message": "hello"}
+        done = threading.Event()
+        results = []
+
+        def callback(result):
+            results.append(result)
+            done.set()
+
+        self.assertTrue(self.chain_engine.run_chain_async("webhook:test", input_data, callback))
+
+        # Sprawdzenie, czy chain został wykonany w puli i wywołano callback
+        self.assertTrue(done.wait(timeout=5))
+        self.assertEqual(results[0]["message"], "test_test_hello")
+
+        metrics = self.chain_engine.get_metrics()["worker_pool"]
+        self.assertEqual(metrics["submitted"], 1)
+        self.assertEqual(metrics["workers"], self.chain_engine.worker_pool.workers)
+
+    def test_micro_batching(self):
+        """
+        Test mikro-paczek - uruchomienia czekające w kolejce trafiają razem do process_batch().
+        """
+        engine = ChainEngine(
+            chains_file=os.devnull,
+            config={"micro_batch": {"max_size": 64}, "worker_pool": {"workers": 1}}
+        )
+        engine.plugin_classes.update({"BatchPlugin": BatchPlugin, "TestPlugin": TestPlugin})
+        engine.chains = {
+            "batch_chain": {
+                "trigger": "webhook:batch",
+                "steps": [{"plugin": "BatchPlugin"}, {"plugin": "TestPlugin"}]
+            }
+        }
+        engine._rebuild_trigger_index()
+        BatchPlugin.batch_sizes = []
+
+        # Zajęcie jedynego wątku puli, aby uruchomienia zebrały się w kolejce
+        release = threading.Event()
+        engine.worker_pool.submit(release.wait, 5)
+
+        results = []
+        lock = threading.Lock()
+        all_done = threading.Event()
+
+        def callback(result):
+            with lock:
+                results.append(result)
+                if len(results) == 10:
+                    all_done.set()
+
+        try:
+            for i in range(10):
+                self.assertTrue(engine.run_chain_async("webhook:batch", {"message": str(i)}, callback))
+            release.set()
+            self.assertTrue(all_done.wait(timeout=5))
+        finally:
+            engine.shutdown()
+
+        self.assertEqual(BatchPlugin.batch_sizes, [10])
+        self.assertEqual(
+            sorted(r["message"] for r in results), sorted(f"test_{i}" for i in range(10))
+        )
+        self.assertTrue(all(r["batched"] for r in results))
+
+    def test_micro_batch_overflow_policy(self):
+        """
+        Test pełnej kolejki mikro-paczek z polityką drop_oldest puli wątków.
+        """
+        engine = ChainEngine(
+            chains_file=os.devnull,
+            config={
+                "micro_batch": {"max_size": 64},
+                "worker_pool": {"workers": 1, "queue_size": 2, "overflow_policy": "drop_oldest"},
+            }
+        )
+        engine.plugin_classes["BatchPlugin"] = BatchPlugin
+        engine.chains = {
+            "batch_chain": {"trigger": "webhook:batch", "steps": [{"plugin": "BatchPlugin"}]}
+        }
+        engine._rebuild_trigger_index()
+
+        release = threading.Event()
+        engine.worker_pool.submit(release.wait, 5)
+
+        results = []
+        all_done = threading.Event()
+
+        def callback(result):
+            results.append(result)
+            if len(results) == 2:
+                all_done.set()
+
+        try:
+            for i in range(4):
+                self.assertTrue(engine.run_chain_async("webhook:batch", {"message": str(i)}, callback))
+            self.assertEqual(engine.get_metrics()["micro_batch"]["dropped"], 2)
+            release.set()
+            self.assertTrue(all_done.wait(timeout=5))
+        finally:
+            engine.shutdown()
+
+        # Porzucone zostały najstarsze uruchomienia
+        self.assertEqual(sorted(r["message"] for r in results), ["2", "3"])
+
+    def test_micro_batch_drain_task_dropped(self):
+        """
+        Test zadania opróżniającego kolejkę mikro-paczek usuniętego z kolejki puli
+        przez drop_oldest - kolejne wiadomości triggera są nadal przetwarzane.
+        """
+        engine = ChainEngine(
+            chains_file=os.devnull,
+            config={
+                "micro_batch": {"max_size": 64},
+                "worker_pool": {"workers": 1, "queue_size": 1, "overflow_policy": "drop_oldest"},
+            }
+        )
+        engine.plugin_classes["BatchPlugin"] = BatchPlugin
+        engine.chains = {
+            "batch_chain": {"trigger": "webhook:batch", "steps": [{"plugin": "BatchPlugin"}]}
+        }
+        engine._rebuild_trigger_index()
+
+        release = threading.Event()
+        running = threading.Event()
+        engine.worker_pool.submit(lambda: running.set() or release.wait(5))
+        self.assertTrue(running.wait(timeout=5))
+
+        results = []
+        done = threading.Event()
+
+        def callback(result):
+            results.append(result)
+            done.set()
+
+        try:
+            self.assertTrue(engine.run_chain_async("webhook:batch", {"message": "0"}, callback))
+            # Inne zadanie wypiera z kolejki puli zadanie opróżniające kolejkę triggera
+            engine.worker_pool.submit(lambda: None)
+            self.assertEqual(engine.get_metrics()["micro_batch"]["dropped"], 1)
+            release.set()
+
+            self.assertTrue(engine.run_chain_async("webhook:batch", {"message": "1"}, callback))
+            self.assertTrue(done.wait(timeout=5))
+        finally:
+            engine.shutdown()
+
+        self.assertEqual([r["message"] for r in results], ["1"])
+
+    def test_submit_run_dropped(self):
+        """
+        Test uruchomienia porzuconego przez pulę (drop_oldest) - uruchomienie jest
+        oznaczane jako nieudane zamiast pozostawać w stanie oczekiwania.
+        """
+        engine = ChainEngine(
+            chains_file=os.devnull,
+            config={"worker_pool": {"workers": 1, "queue_size": 1, "overflow_policy": "drop_oldest"}}
+        )
+        engine.chains = {"test_chain": {"trigger": "webhook:test", "steps": [{"plugin": "TestPlugin"}]}}
+        engine._rebuild_trigger_index()
+
+        release = threading.Event()
+        running = threading.Event()
+        engine.worker_pool.submit(lambda: running.set() or release.wait(5))
+        self.assertTrue(running.wait(timeout=5))
+        try:
+            run_id = engine.submit_run("webhook:test", {"message": "hello"})
+            engine.worker_pool.submit(lambda: None)
+            run = engine.get_run(run_id)
+            self.assertEqual(run["status"], "failed")
+            self.assertIsNotNone(run["error"])
+            self.assertEqual(engine.run_registry.get_metrics()["queued"], 0)
+        finally:
+            release.set()
+            engine.shutdown()
+
+    def test_batch_with_cache_policy_and_fallback(self):
+        """
+        Test paczki dla kroku z cache'em, polityką i krokiem zastępczym - krok nadal
+        otrzymuje całą paczkę (process_batch), a trafienia cache'a są pomijane.
+        """
+        self.chain_engine.plugin_classes["BatchPlugin"] = BatchPlugin
+        self.chain_engine.chains["wrapped_batch"] = {
+            "trigger": "webhook:wrapped",
+            "steps": [{
+                "plugin": "BatchPlugin",
+                "config": {"cacheable": True},
+                "retries": 1,
+                "fallback": {"plugin": "TestPlugin"},
+            }]
+        }
+        self.chain_engine._rebuild_trigger_index()
+        BatchPlugin.batch_sizes = []
+
+        payloads = [{"message": str(i)} for i in range(3)]
+        results = self.chain_engine.run_chains_batch("webhook:wrapped", payloads)
+        self.assertEqual([r["wrapped_batch"]["batched"] for r in results], [True] * 3)
+        self.assertEqual(BatchPlugin.batch_sizes, [3])
+
+        payloads.append({"message": "3"})
+        results = self.chain_engine.run_chains_batch("webhook:wrapped", payloads)
+        self.assertEqual([r["wrapped_batch"]["message"] for r in results], ["0", "1", "2", "3"])
+        self.assertEqual(BatchPlugin.batch_sizes, [3, 1])
+
+    def test_process_batch_fallback(self):
+        """
+        Test domyślnej implementacji process_batch() (process() dla każdego elementu).
+        """
+        plugin = TestPlugin()
+        self.assertEqual(
+            plugin.process_batch([{"message": "a"}, {"message": "b"}]),
+            [{"message": "test_a"}, {"message": "test_b"}]
+        )
+
     def test_run_local_plugin(self):
         """
         Test uruchamiania lokalnej wtyczki.
@@ -295,21 +708,378 @@ class ChainEngineTest(unittest.TestCase):
         # W przypadku błędu, wtyczka powinna zwrócić dane wejściowe bez zmian
         self.assertEqual(result, input_data)
     
+    def test_compiled_plan(self):
+        """
+        Test kompilacji chaina do planu wykonania i przebudowy po zmianie chaina.
+        """
+        plan = self.chain_engine.plans["remote_chain"]
+        remote_step = plan.steps[0]
+        self.assertEqual(remote_step.kind, "remote")
+        self.assertEqual(remote_step.device_id, "device1")
+        self.assertEqual(remote_step.plugin_id, "TestPlugin")
+
+        # Plan jest używany ponownie przy kolejnych uruchomieniach
+        self.chain_engine.run_chain("webhook:test", {"message": "hello"})
+        test_plan = self.chain_engine.plans["test_chain"]
+        self.chain_engine.run_chain("webhook:test", {"message": "hello"})
+        self.assertIs(self.chain_engine.plans["test_chain"], test_plan)
+        self.assertEqual(len(test_plan.steps), 2)
+
+        # Zmiana chaina przebudowuje plan
+        self.chain_engine.add_chain("test_chain", {
+            "trigger": "webhook:test",
+            "steps": [{"plugin": "TestPlugin", "config": {"option": 1}}]
+        })
+        new_plan = self.chain_engine.plans["test_chain"]
+        self.assertIsNot(new_plan, test_plan)
+        self.assertEqual(new_plan.steps[0].config, {"option": 1})
+        result = self.chain_engine.run_chain("webhook:test", {"message": "hello"})
+        self.assertEqual(result["message"], "test_hello")
+
+        # Usunięcie chaina usuwa plan
+        self.chain_engine.remove_chain("test_chain")
+        self.assertNotIn("test_chain", self.chain_engine.plans)
+
+    def test_plugin_instance_cache(self):
+        """
+        Test cache'a instancji wtyczek lokalnych i metod cyklu życia.
+        """
+        config = {"option": 1}
+        first = self.chain_engine._get_plugin_instance("TestPlugin", config)
+        second = self.chain_engine._get_plugin_instance("TestPlugin", {"option": 1})
+        other = self.chain_engine._get_plugin_instance("TestPlugin", {"option": 2})
+
+        # Ta sama konfiguracja - ta sama instancja; inna konfiguracja - nowa instancja
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+        # Moduł wtyczki importowany tylko raz
+        imports = [c for c in self.import_module_mock.call_args_list if c.args[0] == "plugins.test_plugin"]
+        self.assertEqual(len(imports), 1)
+
+        # Zwolnienie instancji wywołuje teardown()
+        first.teardown = MagicMock()
+        self.chain_engine._release_plugin_instances()
+        first.teardown.assert_called_once()
+        self.assertEqual(self.chain_engine.plugin_instances, {})
+
+    def test_fallback_instance_kept_on_chain_update(self):
+        """
+        Test zwalniania nieużywanych instancji - instancja wtyczki kroku zastępczego
+        używanego chaina nie jest zwalniana po zmianie innego chaina.
+        """
+        self.chain_engine.add_chain("fallback_chain", {
+            "trigger": "webhook:fallback",
+            "steps": [{"plugin": "ErrorPlugin", "fallback": {"plugin": "TestPlugin", "config": {"fb": 1}}}]
+        })
+        fallback = self.chain_engine._get_plugin_instance("TestPlugin", {"fb": 1})
+        fallback.teardown = MagicMock()
+
+        self.chain_engine.add_chain("test_chain", {"trigger": "webhook:test", "steps": [{"plugin": "TestPlugin"}]})
+        self.chain_engine.remove_chain("error_chain")
+
+        fallback.teardown.assert_not_called()
+        self.assertIs(self.chain_engine._get_plugin_instance("TestPlugin", {"fb": 1}), fallback)
+
+    def _respond_to_remote_requests(self, transform):
+        """
+        Konfiguruje mock klienta MQTT tak, aby odpowiadał na żądania zdalnych wtyczek
+        (symulacja wtyczki publikującej odpowiedź na plugin/<device>/output).
+        """
+        def publish(topic, payload, **kwargs):
+            device_id = topic.split("/")[1]
+            msg_mock = MagicMock()
+            msg_mock.topic = f"plugin/{device_id}/output"
+            msg_mock.payload = json.dumps({
+                "correlation_id": payload["correlation_id"],
+                "data": transform(payload["data"])
+            }).encode()
+            self.chain_engine._handle_plugin_response(msg_mock)
+            return True
+
+        self.mqtt_client_mock.publish.side_effect = publish
+
     def test_run_remote_plugin(self):
         """
         Test uruchamiania zdalnej wtyczki.
         """
         input_data = {"message": "hello"}
+        self._respond_to_remote_requests(lambda data: {"message": data["message"].upper()})
         
         # Uruchomienie zdalnej wtyczki
         result = self.chain_engine._run_remote_plugin("remote:device1:TestPlugin", input_data, {"timeout": 2})
         
-        # Sprawdzenie, czy dane zostały opublikowane przez MQTT
+        # Sprawdzenie, czy dane zostały opublikowane przez MQTT z identyfikatorem korelacji
         self.mqtt_client_mock.publish.assert_called_once()
+        _, kwargs = self.mqtt_client_mock.publish.call_args
+        self.assertEqual(kwargs["topic"], "plugin/device1/input")
+        self.assertIn("correlation_id", kwargs["payload"])
         
-        # Zdalna wtyczka powinna zwrócić dane wejściowe (w obecnej implementacji)
+        # Zdalna wtyczka zwraca przetworzone dane
+        self.assertEqual(result, {"message": "HELLO"})
+        self.assertEqual(self.chain_engine.pending_requests, {})
+    
+    def test_remote_plugin_encoding(self):
+        """
+        Test kodowania żądań i odpowiedzi zdalnej wtyczki uzgodnionego w jej ogłoszeniu.
+        """
+        announcement = {"name": "TestPlugin", "status": "online", "encodings": ["cbor", "msgpack", "json"]}
+        plugin_manager = MagicMock()
+        plugin_manager.get_plugin.side_effect = lambda name: announcement if name == "TestPlugin" else None
+        self.chain_engine.set_plugin_manager(plugin_manager)
+        expected = codec.negotiate_encoding(announcement["encodings"])
+        requests = []
+
+        def publish(topic, payload, **kwargs):
+            # Wtyczka odpowiada w kodowaniu żądania (słownik JSON koduje klient MQTT)
+            encoding = "json" if isinstance(payload, dict) else codec.detect_encoding(payload)
+            request = payload if isinstance(payload, dict) else codec.decode(payload, encoding)
+            requests.append(encoding)
+            msg_mock = MagicMock()
+            msg_mock.topic = "plugin/device1/output"
+            msg_mock.payload = codec.encode(
+                {"correlation_id": request["correlation_id"], "data": {"wartość": request["data"]["n"] * 2}},
+                encoding,
+            )
+            self.chain_engine._handle_plugin_response(msg_mock)
+            return True
+
+        self.mqtt_client_mock.publish.side_effect = publish
+
+        self.assertEqual(self.chain_engine._remote_encoding("device1", "TestPlugin"), expected)
+        self.assertEqual(self.chain_engine._remote_encoding("device1", "InnaWtyczka"), "json")
+        result = self.chain_engine._run_remote_plugin("remote:device1:TestPlugin", {"n": 21}, {"timeout": 2})
+        self.assertEqual(result, {"wartość": 42})
+
+        # Kodowania binarne wyłączone w konfiguracji silnika
+        self.chain_engine.config["remote_encodings"] = ["json"]
+        result = self.chain_engine._run_remote_plugin("remote:device1:TestPlugin", {"n": 1}, {"timeout": 2})
+        self.assertEqual(result, {"wartość": 2})
+        self.assertEqual(requests, [expected, "json"])
+
+    def test_remote_request_during_broker_outage(self):
+        """
+        Test żądania do zdalnej wtyczki bez połączenia z brokerem - wywołanie kończy się
+        od razu, a żądanie nie jest wysyłane z kolejki wychodzącej po ponownym połączeniu.
+        """
+        mqtt_client = MqttClient(config_path=os.devnull)
+        mqtt_client.client = MagicMock()
+        self.addCleanup(mqtt_client.outbox.stop, 0.1)
+        engine = ChainEngine(mqtt_client=mqtt_client, chains_file=self.temp_file.name)
+
+        started = time.monotonic()
+        result = engine._run_remote_plugin("remote:device1:TestPlugin", {"n": 1}, {"timeout": 2})
+        self.assertEqual(result, {"n": 1})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(engine.pending_requests, {})
+
+        # Po ponownym połączeniu nieaktualne żądanie nie trafia do urządzenia
+        mqtt_client._on_connect(mqtt_client.client, None, None, 0)
+        self.assertTrue(mqtt_client.outbox.flush(timeout=2))
+        mqtt_client.client.publish.assert_not_called()
+
+        def publish(topic, payload, qos, retain):
+            request = codec.loads(payload)
+            msg_mock = MagicMock(topic="plugin/device1/output")
+            msg_mock.payload = codec.dumps({"correlation_id": request["correlation_id"], "data": {"n": 2}})
+            engine._handle_plugin_response(msg_mock)
+            return MagicMock(rc=0)
+
+        mqtt_client.client.publish.side_effect = publish
+        result = engine._run_remote_plugin("remote:device1:TestPlugin", {"n": 1}, {"timeout": 2})
+        self.assertEqual(result, {"n": 2})
+        self.assertEqual(mqtt_client.client.publish.call_args.args[0], "plugin/device1/input")
+
+    def test_run_remote_plugin_timeout(self):
+        """
+        Test braku odpowiedzi od zdalnej wtyczki.
+        """
+        input_data = {"message": "hello"}
+        result = self.chain_engine._run_remote_plugin("remote:device1:TestPlugin", input_data, {"timeout": 0.05})
+        
+        # Po timeoucie wtyczka zwraca dane wejściowe, a żądanie nie jest już oczekujące
         self.assertEqual(result, input_data)
+        self.assertEqual(self.chain_engine.pending_requests, {})
     
+    def test_concurrent_remote_calls(self):
+        """
+        Test równoległych wywołań tej samej zdalnej wtyczki - odpowiedzi nie są mieszane.
+        """
+        requests = []
+        self.mqtt_client_mock.publish.side_effect = lambda topic, payload, **kwargs: requests.append(payload) or True
+        
+        results = {}
+        threads = [
+            threading.Thread(
+                target=lambda i=i: results.__setitem__(
+                    i, self.chain_engine._run_remote_plugin("remote:device1:TestPlugin", {"n": i}, {"timeout": 5})
+                )
+            )
+            for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while len(requests) < 5:
+            threading.Event().wait(0.01)
+        
+        # Odpowiedzi w odwrotnej kolejności niż żądania
+        for request in reversed(requests):
+            msg_mock = MagicMock()
+            msg_mock.topic = "plugin/device1/output"
+            msg_mock.payload = json.dumps({
+                "correlation_id": request["correlation_id"],
+                "data": {"n": request["data"]["n"] * 10}
+            }).encode()
+            self.chain_engine._handle_plugin_response(msg_mock)
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        self.assertEqual(results, {i: {"n": i * 10} for i in range(5)})
+
+    def test_batched_remote_calls(self):
+        """
+        Test grupowania wywołań zdalnej wtyczki - jedna paczka zamiast osobnych żądań.
+        """
+        requests = []
+
+        def publish(topic, payload, **kwargs):
+            requests.append(payload)
+            msg_mock = MagicMock()
+            msg_mock.topic = "plugin/device1/output"
+            msg_mock.payload = json.dumps({
+                "correlation_id": payload["correlation_id"],
+                "items": [{"data": {"n": item["n"] * 10}} for item in payload["items"]]
+            }).encode()
+            self.chain_engine._handle_plugin_response(msg_mock)
+            return True
+
+        self.mqtt_client_mock.publish.side_effect = publish
+        self.chain_engine.add_chain("batched_chain", {
+            "trigger": "batched_trigger",
+            "steps": [{"plugin": "remote:device1:TestPlugin", "config": {"batch": {"max_size": 5, "max_wait_ms": 1000}}}]
+        })
+
+        results = {}
+        threads = [
+            threading.Thread(
+                target=lambda i=i: results.__setitem__(i, self.chain_engine.run_chain("batched_trigger", {"n": i}))
+            )
+            for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Pięć uruchomień chaina - jedno żądanie run_plugin_batch
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0]["action"], "run_plugin_batch")
+        self.assertEqual(results, {i: {"n": i * 10} for i in range(5)})
+        self.assertEqual(self.chain_engine.pending_requests, {})
+
+        metrics = self.chain_engine.get_metrics()["remote_batching"]["device1:TestPlugin"]
+        self.assertEqual(metrics["messages"], 5)
+        self.assertEqual(metrics["batches"], 1)
+
+        # Niepełna paczka jest wysyłana po upływie max_wait_ms
+        self.chain_engine.add_chain("batched_chain", {
+            "trigger": "batched_trigger",
+            "steps": [{"plugin": "remote:device1:TestPlugin", "config": {"batch": {"max_size": 5, "max_wait_ms": 10}}}]
+        })
+        self.assertEqual(self.chain_engine.run_chain("batched_trigger", {"n": 7}), {"n": 70})
+        self.assertEqual(len(requests), 2)
+
+        # Obiekt grupujący poprzedniej konfiguracji jest usuwany, a po usunięciu chaina - wszystkie
+        self.assertEqual(len(self.chain_engine.remote_batchers), 1)
+        self.chain_engine.remove_chain("batched_chain")
+        self.assertEqual(self.chain_engine.remote_batchers, {})
+        self.assertEqual(self.chain_engine.get_metrics()["remote_batching"], {})
+
+        # Timeout jednego elementu nie odrzuca odpowiedzi paczki dla pozostałych
+        self.mqtt_client_mock.publish.side_effect = lambda topic, payload, **kwargs: requests.append(payload) or True
+        batcher = self.chain_engine._get_remote_batcher(
+            "device1", "TestPlugin", {"batch": {"max_size": 2, "max_wait_ms": 1000}}
+        )
+        first, second = batcher.submit({"n": 1}), batcher.submit({"n": 2})
+        batcher.abandon(first)
+        correlation_id = requests[-1]["correlation_id"]
+        self.assertIn(correlation_id, self.chain_engine.pending_requests)
+
+        msg_mock = MagicMock()
+        msg_mock.topic = "plugin/device1/output"
+        msg_mock.payload = json.dumps({
+            "correlation_id": correlation_id,
+            "items": [{"data": {"n": 10}}, {"data": {"n": 20}}]
+        }).encode()
+        self.chain_engine._handle_plugin_response(msg_mock)
+        self.assertEqual(second.result(timeout=1), {"data": {"n": 20}})
+        self.assertTrue(first.cancelled())
+
+        # Po rezygnacji ze wszystkich elementów oczekujące żądanie jest usuwane
+        first, second = batcher.submit({"n": 1}), batcher.submit({"n": 2})
+        batcher.abandon(first)
+        batcher.abandon(second)
+        self.assertNotIn(requests[-1]["correlation_id"], self.chain_engine.pending_requests)
+
+    def test_dag_chain(self):
+        """
+        Test chaina DAG - niezależne gałęzie wykonywane równolegle i scalane w kroku łączącym.
+        """
+        self.chain_engine.plugin_classes["SlowPlugin"] = SlowPlugin
+        self.chain_engine.add_chain("dag_chain", {
+            "trigger": "webhook:dag",
+            "steps": [
+                {"id": "a", "plugin": "SlowPlugin", "config": {"key": "a", "delay": 0.2}},
+                {"id": "b", "plugin": "SlowPlugin", "config": {"key": "b", "delay": 0.2}},
+                {"id": "c", "plugin": "SlowPlugin", "config": {"key": "c", "delay": 0.2}, "depends_on": ["a"]},
+                {"id": "join", "plugin": "SlowPlugin", "config": {"key": "joined"}, "depends_on": ["c", "b"]}
+            ]
+        })
+
+        started = time.monotonic()
+        result = self.chain_engine.run_chain("webhook:dag", {"n": 1})
+        elapsed = time.monotonic() - started
+
+        # Wynik gałęzi scalony w kroku łączącym
+        self.assertEqual(result, {"n": 1, "a": True, "b": True, "c": True, "joined": True})
+        # Czas zbliżony do ścieżki krytycznej (a -> c), a nie do sumy kroków
+        self.assertLess(elapsed, 0.55)
+
+    def test_dag_chain_join_by_id(self):
+        """
+        Test łączenia wyników gałęzi według identyfikatorów kroków.
+        """
+        self.chain_engine.plugin_classes["SlowPlugin"] = SlowPlugin
+        self.chain_engine.add_chain("dag_chain", {
+            "trigger": "webhook:dag",
+            "steps": [
+                {"id": "a", "plugin": "SlowPlugin", "config": {"key": "a"}},
+                {"id": "b", "plugin": "SlowPlugin", "config": {"key": "b"}},
+                {"id": "join", "plugin": "TestPlugin", "depends_on": ["a", "b"], "join": "by_id"}
+            ]
+        })
+
+        result = self.chain_engine.run_chain("webhook:dag", {"n": 1})
+        self.assertEqual(result, {"a": {"n": 1, "a": True}, "b": {"n": 1, "b": True}})
+
+    def test_dag_chain_validation(self):
+        """
+        Test odrzucania chainów DAG z cyklem lub nieistniejącą zależnością.
+        """
+        cyclic = {
+            "trigger": "webhook:cycle",
+            "steps": [
+                {"id": "a", "plugin": "TestPlugin", "depends_on": ["b"]},
+                {"id": "b", "plugin": "TestPlugin", "depends_on": ["a"]}
+            ]
+        }
+        missing = {
+            "trigger": "webhook:missing",
+            "steps": [{"id": "a", "plugin": "TestPlugin", "depends_on": ["x"]}]
+        }
+        self.assertFalse(self.chain_engine._validate_chain(cyclic))
+        self.assertFalse(self.chain_engine._validate_chain(missing))
+
     def test_run_remote_plugin_no_mqtt(self):
         """
         Test uruchamiania zdalnej wtyczki bez klienta MQTT.
@@ -327,27 +1097,31 @@ class ChainEngineTest(unittest.TestCase):
         """
         Test obsługi odpowiedzi od zdalnej wtyczki.
         """
+        from concurrent.futures import Future
+        
+        # Rejestracja oczekującego żądania
+        future = Future()
+        self.chain_engine.pending_requests["abc123"] = ("device1", future)
+        
         # Utworzenie mocka wiadomości MQTT
         msg_mock = MagicMock()
         msg_mock.topic = "plugin/device1/output"
-        msg_mock.payload = json.dumps({"data": {"message": "processed"}}).encode()
-        
-        # Dodanie kolejki dla odpowiedzi
-        from queue import Queue
-        response_queue = Queue()
-        self.chain_engine.response_queues["plugin/device1"] = response_queue
+        msg_mock.payload = json.dumps({"correlation_id": "abc123", "data": {"message": "processed"}}).encode()
         
         # Wywołanie metody obsługi odpowiedzi
         self.chain_engine._handle_plugin_response(msg_mock)
         
-        # Sprawdzenie, czy odpowiedź została dodana do kolejki
-        self.assertFalse(response_queue.empty())
-        response = response_queue.get()
-        self.assertEqual(response["data"]["message"], "processed")
+        # Sprawdzenie, czy Future został rozwiązany odpowiedzią
+        self.assertTrue(future.done())
+        self.assertEqual(future.result()["data"]["message"], "processed")
+        self.assertNotIn("abc123", self.chain_engine.pending_requests)
         
-        # Sprawdzenie, czy odpowiedź została zapisana w słowniku
-        self.assertIn("plugin/device1", self.chain_engine.remote_responses)
-        self.assertEqual(self.chain_engine.remote_responses["plugin/device1"]["data"]["message"], "processed")
+        # Odpowiedź bez identyfikatora korelacji trafia do najstarszego żądania dla urządzenia
+        legacy_future = Future()
+        self.chain_engine.pending_requests["legacy"] = ("device1", legacy_future)
+        msg_mock.payload = json.dumps({"data": {"message": "legacy"}}).encode()
+        self.chain_engine._handle_plugin_response(msg_mock)
+        self.assertEqual(legacy_future.result(timeout=1)["data"]["message"], "legacy")
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla wyłączników zdalnych wtyczek i kroków zastępczych.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import logging
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from core.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+from plugins.base import BasePlugin
+from plugins.manager import PluginManager
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class FallbackPlugin(BasePlugin):
+    """
+    Wtyczka testowa oznaczająca dane jako obsłużone przez krok zastępczy.
+    """
+    def process(self, data, params=None):
+        return dict(data, fallback=True)
+
+def respond(device_id, request_data):
+    """
+    Natychmiastowa odpowiedź zdalnej wtyczki.
+    """
+    future = Future()
+    future.set_result({"data": dict(request_data["data"], remote=True)})
+    return "id", future
+
+def no_response(device_id, request_data):
+    """
+    Żądanie, na które zdalna wtyczka nie odpowiada.
+    """
+    return "id", Future()
+
+class CircuitBreakerTest(unittest.TestCase):
+    """
+    Testy przejść stanów wyłącznika.
+    """
+
+    def test_opens_after_failure_rate(self):
+        """
+        Test otwarcia wyłącznika po przekroczeniu odsetka błędów w oknie.
+        """
+        breaker = CircuitBreaker("device1:plugin", failure_rate=0.5, min_calls=4)
+
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_CLOSED)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.get_metrics()["rejected"], 1)
+
+    def test_half_open_probe(self):
+        """
+        Test wywołania próbnego: udana próba zamyka, nieudana ponownie otwiera wyłącznik.
+        """
+        breaker = CircuitBreaker("device1:plugin", min_calls=1, open_seconds=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_OPEN)
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, STATE_HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_OPEN)
+
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, STATE_CLOSED)
+        self.assertEqual(breaker.get_metrics()["opened"], 2)
+
+class ChainEngineCircuitBreakerTest(unittest.TestCase):
+    """
+    Testy wyłączników w Chain Engine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z wyłącznikiem otwieranym po dwóch błędach.
+        """
+        self.engine = ChainEngine(mqtt_client=MagicMock(), chains_file=os.devnull)
+        self.engine.config["circuit_breaker"].update(min_calls=2, failure_rate=1.0)
+        self.engine.plugin_classes["FallbackPlugin"] = FallbackPlugin
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+
+    def _add_chain(self, step):
+        self.engine.chains["remote_chain"] = {"trigger": "webhook:remote", "steps": [step]}
+        self.engine._rebuild_trigger_index()
+
+    def test_open_circuit_skips_request(self):
+        """
+        Test odrzucenia wywołania bez publikacji żądania, gdy wyłącznik jest otwarty.
+        """
+        self._add_chain({"plugin": "remote:device1:slow", "config": {"timeout": 0.01}})
+
+        with patch.object(self.engine, "_send_remote_request", side_effect=no_response) as send:
+            for _ in range(3):
+                result = self.engine.run_chain("webhook:remote", {"n": 1})
+                self.assertEqual(result, {"n": 1})
+
+        self.assertEqual(send.call_count, 2)
+        metrics = self.engine.get_metrics()["circuit_breakers"]["device1:slow"]
+        self.assertEqual(metrics["state"], STATE_OPEN)
+        self.assertEqual(metrics["rejected"], 1)
+
+    def test_error_response_keeps_circuit_closed(self):
+        """
+        Test, że odpowiedź z błędem wtyczki nie otwiera wyłącznika.
+        """
+        self._add_chain({"plugin": "remote:device1:broken"})
+
+        def error_response(device_id, request_data):
+            future = Future()
+            future.set_result({"error": "błąd wtyczki"})
+            return "id", future
+
+        with patch.object(self.engine, "_send_remote_request", side_effect=error_response) as send:
+            for _ in range(3):
+                self.engine.run_chain("webhook:remote", {"n": 1})
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(self.engine.circuit_breakers[("device1", "broken")].state, STATE_CLOSED)
+
+    def test_fallback_step_when_circuit_open(self):
+        """
+        Test uruchomienia kroku zastępczego zamiast zdalnej wtyczki z otwartym wyłącznikiem.
+        """
+        self._add_chain({
+            "plugin": "remote:device1:sensor",
+            "fallback": {"plugin": "FallbackPlugin"}
+        })
+        self.engine._get_circuit_breaker("device1", "sensor").trip("test")
+
+        with patch.object(self.engine, "_send_remote_request", side_effect=respond) as send:
+            result = self.engine.run_chain("webhook:remote", {"n": 1})
+            async_result = asyncio.run(
+                AsyncChainEngine(self.engine).run_chain("webhook:remote", {"n": 1})
+            )
+
+        send.assert_not_called()
+        self.assertEqual(result, {"n": 1, "fallback": True})
+        self.assertEqual(async_result, {"n": 1, "fallback": True})
+
+    def test_plugin_status_drives_circuit(self):
+        """
+        Test otwarcia wyłącznika po statusie offline z Plugin Managera i wywołania
+        próbnego po ponownym zgłoszeniu wtyczki jako online.
+        """
+        plugins_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+        plugins_file.close()
+        self.addCleanup(os.unlink, plugins_file.name)
+        plugin_manager = PluginManager(mqtt_client=MagicMock(), plugins_file=plugins_file.name)
+        plugin_manager.register_plugin({
+            "name": "sensor", "type": "remote", "description": "Czujnik", "status": "online"
+        })
+        self.engine.set_plugin_manager(plugin_manager)
+        self._add_chain({"plugin": "remote:device1:sensor"})
+
+        with patch.object(self.engine, "_send_remote_request", side_effect=respond) as send:
+            self.assertEqual(
+                self.engine.run_chain("webhook:remote", {"n": 1}), {"n": 1, "remote": True}
+            )
+
+            self.assertTrue(plugin_manager.update_plugin_status("sensor", "offline"))
+            self.assertEqual(self.engine.run_chain("webhook:remote", {"n": 1}), {"n": 1})
+            self.assertEqual(send.call_count, 1)
+
+            plugin_manager.update_plugin_status("sensor", "online")
+            breaker = self.engine.circuit_breakers[("device1", "sensor")]
+            self.assertEqual(breaker.state, STATE_HALF_OPEN)
+            self.engine.run_chain("webhook:remote", {"n": 1})
+
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(breaker.state, STATE_CLOSED)
+
+    def test_fallback_validation(self):
+        """
+        Test walidacji kroku zastępczego.
+        """
+        chain = {"trigger": "webhook:remote"}
+        self.assertTrue(self.engine._validate_chain(dict(chain, steps=[
+            {"plugin": "remote:device1:sensor", "fallback": {"plugin": "FallbackPlugin"}}
+        ])))
+        self.assertFalse(self.engine._validate_chain(dict(chain, steps=[
+            {"plugin": "remote:device1:sensor", "fallback": "FallbackPlugin"}
+        ])))
+        self.assertFalse(self.engine._validate_chain(dict(chain, steps=[
+            {"plugin": "remote:device1:sensor", "fallback": {"plugin": "FallbackPlugin", "retries": -1}}
+        ])))
+
+class PluginManagerStatusTest(unittest.TestCase):
+    """
+    Testy aktualizacji statusu wtyczek w Plugin Managerze.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie managera z jedną zdalną wtyczką.
+        """
+        self.temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+        self.temp_file.close()
+        self.plugin_manager = PluginManager(mqtt_client=MagicMock(), plugins_file=self.temp_file.name)
+        self.plugin_manager.register_plugin({
+            "name": "sensor", "type": "remote", "description": "Czujnik",
+            "status": "online", "api_key": "secret"
+        })
+
+    def tearDown(self):
+        """
+        Usunięcie pliku wtyczek.
+        """
+        os.unlink(self.temp_file.name)
+
+    def test_verify_status_update(self):
+        """
+        Test weryfikacji klucza API przy aktualizacji statusu.
+        """
+        self.assertTrue(self.plugin_manager.verify_status_update("sensor", {"api_key": "secret"}))
+        self.assertFalse(self.plugin_manager.verify_status_update("sensor", {"api_key": "zły"}))
+        self.assertFalse(self.plugin_manager.verify_status_update("unknown", {}))
+
+    def test_status_listener(self):
+        """
+        Test powiadamiania obserwatorów tylko o zmianach statusu.
+        """
+        listener = MagicMock()
+        self.plugin_manager.add_status_listener(listener)
+
+        self.assertTrue(self.plugin_manager.update_plugin_status("sensor", "error", details={"code": 1}))
+        self.plugin_manager.update_plugin_status("sensor", "error")
+        self.assertFalse(self.plugin_manager.update_plugin_status("unknown", "online"))
+
+        listener.assert_called_once_with("sensor", "error")
+        self.assertEqual(self.plugin_manager.get_plugin("sensor")["status_details"], {"code": 1})
+
+if __name__ == '__main__':
+    unittest.main()
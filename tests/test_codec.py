@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla kodeka JSON wiadomości MQTT.
+"""
+
+import unittest
+import json
+import os
+import sys
+import logging
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import codec
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class CodecTest(unittest.TestCase):
+    """
+    Testy implementacji kodeka i ich wyboru.
+    """
+
+    def tearDown(self):
+        """
+        Przywrócenie automatycznego wyboru implementacji.
+        """
+        codec.BACKENDS.pop("test", None)
+        codec.use_backend(codec.AUTO)
+
+    def test_backends_roundtrip(self):
+        """
+        Test zgodności kodowania i dekodowania dla każdej dostępnej implementacji.
+        """
+        document = {"tekst": "zażółć", "liczby": [1, 2.5, None, True], "duża": 2 ** 70, 1: "klucz"}
+        for name in list(codec.BACKENDS):
+            with self.subTest(backend=name):
+                codec.use_backend(name)
+                encoded = codec.dumps(document)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(json.loads(encoded), json.loads(json.dumps(document)))
+                self.assertEqual(codec.loads(encoded), codec.loads(encoded.decode("utf-8")))
+                with self.assertRaises(ValueError):
+                    codec.loads(b"nie JSON")
+                with self.assertRaises(ValueError):
+                    codec.loads(b'"\xff"')
+
+    def test_default_hook(self):
+        """
+        Test zamiany nieobsługiwanych obiektów funkcją default.
+        """
+        for name in list(codec.BACKENDS):
+            with self.subTest(backend=name):
+                codec.use_backend(name)
+                self.assertEqual(codec.loads(codec.dumps({"obiekt": object}, default=lambda o: "x")), {"obiekt": "x"})
+                with self.assertRaises(TypeError):
+                    codec.dumps({"obiekt": object})
+
+    def test_select_backend(self):
+        """
+        Test wyboru automatycznego, własnej implementacji i nieznanej nazwy.
+        """
+        self.assertEqual(codec.use_backend(codec.AUTO), next(n for n in codec.PREFERENCE if n in codec.BACKENDS))
+
+        codec.register_backend("test", lambda data: {"test": True}, lambda obj, default=None: b"{}")
+        self.assertEqual(codec.use_backend("test"), "test")
+        self.assertEqual(codec.backend(), "test")
+        self.assertEqual(codec.loads(b"[]"), {"test": True})
+
+        with self.assertRaises(ValueError):
+            codec.use_backend("brak")
+
+class EncodingTest(unittest.TestCase):
+    """
+    Testy kodowań treści żądań zdalnych wtyczek.
+    """
+
+    def test_encodings_roundtrip(self):
+        """
+        Test zgodności kodowania i dekodowania dla każdego dostępnego kodowania.
+        """
+        document = {"correlation_id": "abc", "data": {"temperatura": [21.5, 22, -3], "opis": "zażółć"}}
+        for name in list(codec.ENCODINGS):
+            with self.subTest(encoding=name):
+                encoded = codec.encode(document, name)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(codec.decode(encoded, name), document)
+                # Odpowiedzi (słowniki) są rozpoznawane bez podania kodowania
+                self.assertEqual(codec.detect_encoding(encoded), name)
+                self.assertEqual(codec.decode(encoded), document)
+
+    def test_detect_encoding(self):
+        """
+        Test rozpoznawania kodowania po pierwszym bajcie treści.
+        """
+        self.assertEqual(codec.detect_encoding(b'{"a": 1}'), "json")
+        self.assertEqual(codec.detect_encoding(b' {"a": 1}'), "json")
+        self.assertEqual(codec.detect_encoding('{"a": 1}'), "json")
+        self.assertEqual(codec.detect_encoding(b"\x81\xa1a\x01"), "msgpack")
+        self.assertEqual(codec.detect_encoding(b"\xa1aa\x01"), "cbor")
+        self.assertEqual(codec.detect_encoding(b""), "json")
+
+    def test_negotiate_encoding(self):
+        """
+        Test wyboru kodowania z kodowań ogłoszonych przez wtyczkę.
+        """
+        offered = ["brak", "cbor", "msgpack", "json"]
+        expected = next(name for name in offered if name in codec.ENCODINGS)
+
+        # Kolejność preferencji wtyczki, pomijając niedostępne kodowania
+        self.assertEqual(codec.negotiate_encoding(offered), expected)
+        self.assertEqual(codec.negotiate_encoding("json"), "json")
+        self.assertEqual(codec.negotiate_encoding(None), "json")
+        self.assertEqual(codec.negotiate_encoding(["brak"]), "json")
+
+        # Kodowania niedozwolone w konfiguracji silnika nie są wybierane
+        self.assertEqual(codec.negotiate_encoding(["msgpack", "cbor"], allowed=["json"]), "json")
+
+    def test_unknown_encoding(self):
+        """
+        Test kodowania niedostępnego lub niepoprawnych danych.
+        """
+        with self.assertRaises(ValueError):
+            codec.encode({}, "brak")
+        with self.assertRaises(ValueError):
+            codec.decode(b"{}", "brak")
+        with self.assertRaises(ValueError):
+            codec.decode(b"nie JSON")
+        if "msgpack" not in codec.ENCODINGS:
+            # Treść rozpoznana jako MessagePack bez zainstalowanej biblioteki
+            with self.assertRaises(ValueError):
+                codec.decode(b"\x81\xa1a\x01")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla kolejki martwych wiadomości i ponownego wykonania uruchomień.
+"""
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+import shutil
+import tempfile
+import time
+import logging
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.engine import engine_bp
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from core.dead_letter import DeadLetterStore
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class DependencyPlugin(BasePlugin):
+    """
+    Wtyczka testowa zależna od usługi, której dostępność ustawia test.
+    """
+    available = False
+
+    def process(self, data, params=None):
+        if not DependencyPlugin.available:
+            raise ConnectionError("usługa niedostępna")
+        return dict(data, processed=True)
+
+class DeadLetterStoreTest(unittest.TestCase):
+    """
+    Testy segmentów, potwierdzeń i limitu rozmiaru kolejki.
+    """
+
+    def setUp(self):
+        """
+        Utworzenie katalogu kolejki.
+        """
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Usunięcie katalogu kolejki.
+        """
+        shutil.rmtree(self.directory)
+
+    def _failures(self):
+        return [{"step": 1, "plugin": "X", "error": "błąd", "error_type": "RuntimeError"}]
+
+    def test_append_ack_and_reload(self):
+        """
+        Test zapisu, potwierdzenia i wczytania niepotwierdzonych wpisów po ponownym otwarciu.
+        """
+        store = DeadLetterStore(self.directory)
+        first = store.append("chain", {"n": 1}, self._failures())
+        store.append("chain", {"n": 2}, self._failures())
+        store.append("other", {"n": 3}, self._failures())
+
+        self.assertEqual([e["payload"]["n"] for e in store.pending(chain_id="chain")], [1, 2])
+        self.assertEqual([e["payload"]["n"] for e in store.pending(limit=1, offset=1)], [2])
+
+        store.ack([first])
+        store.close()
+
+        reopened = DeadLetterStore(self.directory)
+        self.assertEqual([e["payload"]["n"] for e in reopened.pending()], [2, 3])
+        self.assertEqual(reopened.get_metrics()["pending"], 2)
+        reopened.close()
+
+    def test_segments_rotation_and_size_limit(self):
+        """
+        Test podziału na segmenty, usuwania w pełni potwierdzonych segmentów
+        i usuwania najstarszych segmentów po przekroczeniu limitu rozmiaru.
+        """
+        store = DeadLetterStore(self.directory, segment_bytes=300, max_bytes=1000)
+        ids = [store.append("chain", {"n": i, "pad": "x" * 100}, self._failures()) for i in range(12)]
+
+        metrics = store.get_metrics()
+        self.assertGreater(metrics["segments"], 1)
+        self.assertLessEqual(metrics["bytes"], 1000)
+        self.assertGreater(metrics["dropped"], 0)
+        self.assertEqual(metrics["pending"] + metrics["dropped"], 12)
+
+        segments_before = metrics["segments"]
+        store.ack([entry["id"] for entry in store.pending()][:2])
+        self.assertLess(store.get_metrics()["segments"], segments_before)
+        self.assertEqual(store.pending()[-1]["id"], ids[-1])
+        store.close()
+
+    def test_incomplete_line_skipped(self):
+        """
+        Test pominięcia niepełnego wiersza po przerwanym zapisie.
+        """
+        store = DeadLetterStore(self.directory)
+        store.append("chain", {"n": 1}, self._failures())
+        store.close()
+        segment = [name for name in os.listdir(self.directory) if name.endswith(".ndjson")][0]
+        with open(os.path.join(self.directory, segment), "a", encoding="utf-8") as f:
+            f.write('{"id": "przerwany"')
+
+        reopened = DeadLetterStore(self.directory)
+        self.assertEqual(len(reopened.pending()), 1)
+        reopened.close()
+
+class ChainEngineDeadLetterTest(unittest.TestCase):
+    """
+    Testy zapisu nieudanych uruchomień i ich ponownego wykonania.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z włączoną kolejką martwych wiadomości.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.engine = ChainEngine(
+            mqtt_client=MagicMock(),
+            chains_file=os.devnull,
+            config={"dead_letter": {"enabled": True, "directory": self.directory}}
+        )
+        self.engine.plugin_classes["DependencyPlugin"] = DependencyPlugin
+        self.engine.chains["dependent"] = {
+            "trigger": "webhook:dependent",
+            "steps": [{"plugin": "DependencyPlugin"}]
+        }
+        self.engine._rebuild_trigger_index()
+        DependencyPlugin.available = False
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika i usunięcie katalogu kolejki.
+        """
+        self.engine.shutdown()
+        shutil.rmtree(self.directory)
+
+    def test_failed_run_captured(self):
+        """
+        Test zapisu danych wejściowych, kroku i błędu nieudanego uruchomienia.
+        """
+        result = self.engine.run_chain("webhook:dependent", {"n": 1})
+        self.assertEqual(result, {"n": 1})
+
+        entries = self.engine.dead_letters.pending()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["chain_id"], "dependent")
+        self.assertEqual(entries[0]["payload"], {"n": 1})
+        self.assertEqual(entries[0]["failures"][0]["step"], 1)
+        self.assertEqual(entries[0]["failures"][0]["plugin"], "DependencyPlugin")
+        self.assertEqual(entries[0]["failures"][0]["error_type"], "ConnectionError")
+
+        DependencyPlugin.available = True
+        self.engine.run_chain("webhook:dependent", {"n": 2})
+        self.assertEqual(len(self.engine.dead_letters.pending()), 1)
+
+    def test_batch_and_async_failures_captured(self):
+        """
+        Test zapisu nieudanych uruchomień mikro-paczki i trybu asyncio.
+        """
+        self.engine.run_chains_batch("webhook:dependent", [{"n": 1}, {"n": 2}])
+        asyncio.run(AsyncChainEngine(self.engine).run_chain("webhook:dependent", {"n": 3}))
+
+        payloads = [entry["payload"] for entry in self.engine.dead_letters.pending()]
+        self.assertEqual(payloads, [{"n": 1}, {"n": 2}, {"n": 3}])
+
+    def test_replay(self):
+        """
+        Test ponownego wykonania: nieudane uruchomienia pozostają w kolejce bez duplikatów,
+        udane są z niej usuwane.
+        """
+        for n in range(3):
+            self.engine.run_chain("webhook:dependent", {"n": n})
+
+        summary = self.engine.replay_dead_letters(limit=10)
+        self.assertEqual(summary, {"replayed": 0, "failed": 3, "skipped": 0, "pending": 3})
+
+        DependencyPlugin.available = True
+        summary = self.engine.replay_dead_letters(limit=2, rate=1000)
+        self.assertEqual(summary["replayed"], 2)
+        self.assertEqual(summary["pending"], 1)
+        self.assertEqual(self.engine.dead_letters.pending()[0]["payload"], {"n": 2})
+
+    def test_api(self):
+        """
+        Test endpointów przeglądu, ponownego wykonania i czyszczenia kolejki.
+        """
+        app = Flask(__name__)
+        app.register_blueprint(engine_bp)
+        app.config['chain_engine'] = self.engine
+        client = app.test_client()
+
+        self.engine.run_chain("webhook:dependent", {"n": 1})
+        self.engine.run_chain("webhook:dependent", {"n": 2})
+
+        response = client.get('/api/engine/dead-letters?limit=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["metrics"]["pending"], 2)
+
+        DependencyPlugin.available = True
+        response = client.post('/api/engine/dead-letters/replay', json={"limit": 1, "rate": 100})
+        self.assertEqual(response.status_code, 202)
+        status_url = json.loads(response.data)["status_url"]
+        self.assertEqual(response.headers["Location"], status_url)
+
+        # Ponowne wykonanie działa w puli wątków - oczekiwanie na zakończenie
+        deadline = time.monotonic() + 5
+        run = json.loads(client.get(status_url).data)["run"]
+        while run["status"] not in ("completed", "failed") and time.monotonic() < deadline:
+            time.sleep(0.01)
+            run = json.loads(client.get(status_url).data)["run"]
+        self.assertEqual(run["status"], "completed")
+        self.assertEqual(run["results"]["replayed"], 1)
+
+        response = client.delete('/api/engine/dead-letters')
+        self.assertEqual(json.loads(response.data)["removed"], 1)
+
+        store, self.engine.dead_letters = self.engine.dead_letters, None
+        self.assertEqual(client.get('/api/engine/dead-letters').status_code, 404)
+        self.engine.dead_letters = store
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla trwałej kolejki wejściowej i odzyskiwania uruchomień po restarcie.
+"""
+
+import unittest
+import json
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import logging
+from unittest.mock import MagicMock, patch
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.chain_engine import ChainEngine
+from core.durable_queue import DurableQueue
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class RecordingPlugin(BasePlugin):
+    """
+    Wtyczka testowa zapamiętująca przetworzone dane.
+    """
+    processed = []
+    done = threading.Event()
+
+    def process(self, data, params=None):
+        RecordingPlugin.processed.append(dict(data))
+        if len(RecordingPlugin.processed) >= self.config.get("expected", 1):
+            RecordingPlugin.done.set()
+        return data
+
+class DurableQueueTest(unittest.TestCase):
+    """
+    Testy zapisu, potwierdzeń i odzyskiwania wpisów kolejki.
+    """
+
+    def setUp(self):
+        """
+        Utworzenie katalogu bazy kolejki.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "inbound.db")
+
+    def tearDown(self):
+        """
+        Usunięcie katalogu bazy kolejki.
+        """
+        shutil.rmtree(self.directory)
+
+    def test_recover_unacked(self):
+        """
+        Test odzyskania niepotwierdzonych wpisów po ponownym otwarciu kolejki.
+        """
+        queue = DurableQueue(self.path, fsync="always")
+        first = queue.put("webhook:a", {"n": 1})
+        queue.put("webhook:b", {"n": 2})
+        queue.ack(first)
+        self.assertEqual(queue.get_metrics()["depth"], 1)
+        queue.close()
+
+        reopened = DurableQueue(self.path)
+        recovered = list(reopened.recover())
+        self.assertEqual([(trigger, payload) for _, trigger, payload in recovered],
+                         [("webhook:b", {"n": 2})])
+
+        reopened.ack(recovered[0][0])
+        self.assertEqual(reopened.get_metrics()["depth"], 0)
+        reopened.close()
+
+    def test_invalid_fsync_policy(self):
+        """
+        Test odrzucenia nieznanej polityki zapisu.
+        """
+        with self.assertRaises(ValueError):
+            DurableQueue(self.path, fsync="sometimes")
+
+class ChainEngineDurableQueueTest(unittest.TestCase):
+    """
+    Testy trwałej kolejki w Chain Engine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie katalogu kolejki i wtyczki testowej.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "inbound.db")
+        RecordingPlugin.processed = []
+        RecordingPlugin.done = threading.Event()
+
+    def tearDown(self):
+        """
+        Usunięcie katalogu kolejki.
+        """
+        shutil.rmtree(self.directory)
+
+    def _create_engine(self, expected=1):
+        # Chain wczytywany z pliku - musi być dostępny przed odzyskiwaniem wpisów przy starcie
+        chains_file = os.path.join(self.directory, "chains.json")
+        with open(chains_file, "w") as f:
+            json.dump({"durable": {
+                "trigger": "mqtt:sensors/1",
+                "steps": [{"plugin": "RecordingPlugin", "config": {"expected": expected}}]
+            }}, f)
+
+        with patch.object(ChainEngine, "_resolve_plugin_class", return_value=RecordingPlugin):
+            return ChainEngine(
+                mqtt_client=MagicMock(),
+                chains_file=chains_file,
+                config={"inbound_queue": {"enabled": True, "path": self.path}}
+            )
+
+    def test_async_run_acked_after_processing(self):
+        """
+        Test potwierdzenia wpisu po zakończeniu asynchronicznego uruchomienia.
+        """
+        engine = self._create_engine()
+        self.assertTrue(engine.run_chain_async("mqtt:sensors/1", {"n": 1}))
+        engine.shutdown()
+
+        metrics = engine.get_metrics()["inbound_queue"]
+        self.assertEqual(metrics["enqueued"], 1)
+        self.assertEqual(metrics["depth"], 0)
+        self.assertEqual(RecordingPlugin.processed, [{"n": 1}])
+
+    def test_recovery_on_startup(self):
+        """
+        Test ponownego przetworzenia wpisów niepotwierdzonych przed restartem.
+        """
+        queue = DurableQueue(self.path)
+        queue.put("mqtt:sensors/1", {"n": 1})
+        queue.put("mqtt:sensors/1", {"n": 2})
+        queue.close()
+
+        engine = self._create_engine(expected=2)
+        self.assertTrue(RecordingPlugin.done.wait(5))
+        engine.shutdown()
+
+        self.assertEqual(sorted(p["n"] for p in RecordingPlugin.processed), [1, 2])
+        self.assertEqual(engine.get_metrics()["inbound_queue"]["depth"], 0)
+
+    def test_durable_run(self):
+        """
+        Test potwierdzania wpisu po zakończeniu bloku (także błędem) i pozostawienia
+        go w kolejce po przerwaniu procesu.
+        """
+        engine = self._create_engine()
+
+        with self.assertRaises(RuntimeError):
+            with engine.durable_run("webhook:a", {"n": 1}):
+                raise RuntimeError("błąd chaina")
+        self.assertEqual(engine.inbound_queue.get_metrics()["depth"], 0)
+
+        with self.assertRaises(KeyboardInterrupt):
+            with engine.durable_run("webhook:a", {"n": 2}):
+                raise KeyboardInterrupt()
+        self.assertEqual(engine.inbound_queue.get_metrics()["depth"], 1)
+        engine.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
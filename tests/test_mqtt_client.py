@@ -3,11 +3,13 @@ import json
 import sys
 import os
 import tempfile
+import threading
 from unittest.mock import patch, MagicMock, mock_open
 
 # Dodanie katalogu głównego projektu do ścieżki, aby umożliwić import modułów
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from core import codec
 from mqtt_client import MqttClient
 
 class TestMqttClient(unittest.TestCase):
@@ -112,8 +114,9 @@ class TestMqttClient(unittest.TestCase):
         # Publikacja wiadomości
         result = mqttClient.publish(topic=testTopic, payload=testPayload)
         
-        # Sprawdzenie, czy publikacja się powiodła
+        # Sprawdzenie, czy wiadomość została przyjęta i wysłana przez kolejkę wychodzącą
         self.assertTrue(result)
+        self.assertTrue(mqttClient.outbox.flush(timeout=2))
         mockClientInstance.publish.assert_called_once()
         # Sprawdzenie argumentów wywołania
         args, kwargs = mockClientInstance.publish.call_args
@@ -149,6 +152,109 @@ class TestMqttClient(unittest.TestCase):
         # Nie ma bezpośredniego sposobu na sprawdzenie, czy wiadomość została zalogowana,
         # ale możemy sprawdzić, czy nie wystąpił żaden wyjątek
     
+    def test_on_message_enqueues_raw_payload(self):
+        """
+        Test przekazania surowej wiadomości do kolejki i jej przetworzenia w puli dispatcher.
+        """
+        mqttClient = MqttClient(config_path=self.tempConfigFile.name)
+        handler = MagicMock()
+        mqttClient.register_handler("test/#", handler)
+        
+        with patch.object(mqttClient.dispatcher, 'submit') as mockSubmit:
+            mockMsg = MagicMock(topic="test/topic", payload=b'{"value": 1}')
+            mqttClient._on_message(None, None, mockMsg)
+        mockSubmit.assert_called_once_with(mqttClient._dispatch_message, "test/topic", b'{"value": 1}')
+        handler.assert_not_called()
+        
+        mqttClient._on_message(None, None, mockMsg)
+        mqttClient.dispatcher.shutdown(wait=True)
+        handler.assert_called_once()
+        self.assertEqual(tuple(handler.call_args.args[0]), ("test/topic", b'{"value": 1}'))
+    
+    def test_topic_router(self):
+        """
+        Test routera tematów: dopasowanie filtrów, jedno wywołanie handlera na wiadomość,
+        subskrypcje dodawane i usuwane razem z handlerami.
+        """
+        mqttClient = MqttClient(config_path=self.tempConfigFile.name)
+        mqttClient.client = MagicMock()
+        mqttClient.connected = True
+        
+        sensors = MagicMock()
+        outputs = MagicMock()
+        mqttClient.register_handler("sensors/+/temperature", sensors)
+        mqttClient.register_handler("sensors/#", sensors)
+        mqttClient.register_handler("plugin/+/output", outputs)
+        mqttClient.client.subscribe.assert_any_call("plugin/+/output")
+        
+        mqttClient._dispatch_message("sensors/1/temperature", b"1")
+        mqttClient._dispatch_message("plugin/dev/output", b"2")
+        mqttClient._dispatch_message("other/topic", b"3")
+        self.assertEqual(sensors.call_count, 1)
+        self.assertEqual(outputs.call_args.args[0].payload, b"2")
+        
+        self.assertTrue(mqttClient.unregister_handler("plugin/+/output", outputs))
+        self.assertFalse(mqttClient.unregister_handler("plugin/+/output", outputs))
+        mqttClient.client.unsubscribe.assert_called_once_with("plugin/+/output")
+        self.assertNotIn("plugin/+/output", mqttClient.config["topics"]["subscribe"])
+        
+        with self.assertRaises(ValueError):
+            mqttClient.register_handler("sensors/#/x", sensors)
+    
+    def test_dispatch_queue_drops_oldest(self):
+        """
+        Test porzucania najstarszych wiadomości przy pełnej kolejce i metryk kolejki.
+        """
+        self.testConfig["dispatch"] = {"workers": 1, "queue_size": 2}
+        with open(self.tempConfigFile.name, 'w') as f:
+            json.dump(self.testConfig, f)
+        mqttClient = MqttClient(config_path=self.tempConfigFile.name)
+        
+        started = threading.Event()
+        release = threading.Event()
+        dispatched = []
+        
+        def dispatch(topic, payload):
+            started.set()
+            release.wait(5)
+            dispatched.append(payload)
+        
+        with patch.object(mqttClient, '_dispatch_message', side_effect=dispatch):
+            mqttClient._on_message(None, None, MagicMock(topic="test/topic", payload=b"1"))
+            self.assertTrue(started.wait(5))
+            for payload in (b"2", b"3", b"4"):
+                mqttClient._on_message(None, None, MagicMock(topic="test/topic", payload=payload))
+            
+            metrics = mqttClient.get_metrics()["dispatch"]
+            self.assertEqual(metrics["queue_depth"], 2)
+            self.assertEqual(metrics["dropped"], 1)
+            
+            release.set()
+            mqttClient.dispatcher.shutdown(wait=True)
+        
+        self.assertEqual(dispatched, [b"1", b"3", b"4"])
+    
+    def test_publish_waits_for_reconnect(self):
+        """
+        Test publikacji bez połączenia - wiadomości czekają w kolejce wychodzącej
+        i są wysyłane w kolejności po połączeniu z brokerem.
+        """
+        mqttClient = MqttClient(config_path=self.tempConfigFile.name)
+        mqttClient.client = MagicMock()
+        mqttClient.client.publish.return_value = MagicMock(rc=0)
+        
+        self.assertTrue(mqttClient.publish(topic="test/a", payload={"n": 1}, qos=1))
+        self.assertTrue(mqttClient.publish(topic="test/b", payload="2"))
+        self.assertFalse(mqttClient.outbox.flush(timeout=0.1))
+        mqttClient.client.publish.assert_not_called()
+        
+        mqttClient._on_connect(mqttClient.client, None, None, 0)
+        self.assertTrue(mqttClient.outbox.flush(timeout=2))
+        calls = [c.args for c in mqttClient.client.publish.call_args_list]
+        self.assertEqual(calls, [("test/a", codec.dumps({"n": 1}), 1, False), ("test/b", "2", 0, False)])
+        self.assertEqual(mqttClient.get_metrics()["outbox"]["published"], 2)
+        mqttClient.outbox.stop()
+    
     @patch('mqtt_client.open', new_callable=mock_open, read_data='{"invalid": "json"')
     def test_mqtt_client_load_invalid_config(self, mockOpen):
         """
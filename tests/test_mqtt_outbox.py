@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla kolejki wychodzącej (outbox) klienta MQTT.
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+import logging
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.mqtt_outbox import MqttOutbox
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class FakeBroker:
+    """
+    Funkcja wysyłająca zapamiętująca wiadomości; bez połączenia zwraca False.
+    """
+
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, topic, payload, qos, retain):
+        if topic == "zły/#":
+            raise ValueError("Nieprawidłowy temat")
+        with self.lock:
+            if not self.connected:
+                return False
+            self.sent.append((topic, payload, qos, retain))
+            return True
+
+class MqttOutboxTest(unittest.TestCase):
+    """
+    Testy wysyłki, ponawiania i zapisu wiadomości na dysku.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.temp_dir, "outbox.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_batches_and_coalesces_retained(self):
+        """
+        Test wysyłki serii wiadomości paczkami z pominięciem nadpisanych wiadomości zachowywanych.
+        """
+        broker = FakeBroker(connected=False)
+        outbox = MqttOutbox(broker, batch_size=10, linger_ms=0, retry_interval=60)
+        self.addCleanup(outbox.stop, 0.1)
+
+        for n in range(3):
+            self.assertTrue(outbox.put("stan/salon", str(n), retain=True))
+        # Wiadomości zachowywane QoS 1 nie są pomijane
+        for n in range(2):
+            self.assertTrue(outbox.put("stan/kuchnia", str(n), qos=1, retain=True))
+        self.assertTrue(outbox.put("zdarzenia", "a"))
+        self.assertTrue(outbox.put("zły/#", "x"))
+        self.assertFalse(outbox.flush(timeout=0.1))
+
+        broker.connected = True
+        outbox.wake()
+        self.assertTrue(outbox.flush(timeout=2))
+
+        self.assertEqual(broker.sent, [
+            ("stan/salon", "2", 0, True),
+            ("stan/kuchnia", "0", 1, True),
+            ("stan/kuchnia", "1", 1, True),
+            ("zdarzenia", "a", 0, False)
+        ])
+        metrics = outbox.get_metrics()
+        self.assertEqual(metrics["published"], 4)
+        self.assertEqual(metrics["coalesced"], 2)
+        self.assertEqual(metrics["failed"], 1)
+        self.assertGreaterEqual(metrics["retries"], 1)
+        self.assertFalse(metrics["stalled"])
+
+    def test_full_queue_respects_qos(self):
+        """
+        Test pełnej kolejki bez zapisu na dysku - nowe wiadomości są odrzucane.
+        """
+        outbox = MqttOutbox(FakeBroker(connected=False), queue_size=2, retry_interval=60)
+        self.addCleanup(outbox.stop, 0.1)
+
+        self.assertTrue(outbox.put("t", "1", qos=1))
+        self.assertTrue(outbox.put("t", "2", qos=1))
+        self.assertFalse(outbox.put("t", "3", qos=1))
+        self.assertEqual(outbox.get_metrics()["dropped"], 1)
+
+    def test_spill_to_disk_and_recover(self):
+        """
+        Test zapisu wiadomości QoS 1 na dysku przy pełnej kolejce, zachowania kolejności
+        i wysłania wiadomości zapisanych przed zatrzymaniem po ponownym uruchomieniu.
+        """
+        broker = FakeBroker(connected=False)
+        outbox = MqttOutbox(broker, queue_size=2, retry_interval=60, spill_path=self.spill_path)
+
+        for n in range(4):
+            self.assertTrue(outbox.put("t", str(n), qos=1))
+        # QoS 0 przy pełnej kolejce jest porzucane
+        self.assertFalse(outbox.put("t", "qos0", qos=0))
+        metrics = outbox.get_metrics()
+        self.assertEqual(metrics["spilled"], 2)
+        self.assertEqual(metrics["spill_depth"], 2)
+
+        broker.connected = True
+        outbox.wake()
+        self.assertTrue(outbox.flush(timeout=2))
+        self.assertEqual([payload for _, payload, _, _ in broker.sent], ["0", "1", b"2", b"3"])
+        self.assertEqual(outbox.get_metrics()["spill_depth"], 0)
+
+        # Niewysłane wiadomości QoS 1 są zapisywane na dysku przy zatrzymaniu
+        broker.connected = False
+        outbox.put("t", "4", qos=1)
+        outbox.stop(timeout=0.1)
+        outbox.spill.close()
+
+        broker.connected = True
+        restarted = MqttOutbox(broker, retry_interval=60, spill_path=self.spill_path)
+        self.addCleanup(restarted.spill.close)
+        self.addCleanup(restarted.stop, 0.1)
+        restarted.wake()
+        self.assertTrue(restarted.flush(timeout=2))
+        self.assertEqual(broker.sent[-1], ("t", b"4", 1, False))
+        self.assertEqual(restarted.get_metrics()["spill_depth"], 0)
+
+    def test_spill_while_disconnected(self):
+        """
+        Test zapisu wiadomości QoS 1 na dysku po utracie połączenia, mimo wolnego
+        miejsca w kolejce w pamięci.
+        """
+        broker = FakeBroker(connected=False)
+        outbox = MqttOutbox(broker, retry_interval=60, spill_path=self.spill_path)
+        self.addCleanup(outbox.spill.close)
+        self.addCleanup(outbox.stop, 0.1)
+
+        outbox.suspend()
+        self.assertTrue(outbox.put("t", "1", qos=1))
+        self.assertTrue(outbox.put("t", "qos0"))
+        metrics = outbox.get_metrics()
+        self.assertEqual(metrics["spill_depth"], 1)
+        self.assertEqual(metrics["queue_depth"], 1)
+        self.assertTrue(metrics["stalled"])
+
+        broker.connected = True
+        outbox.wake()
+        self.assertTrue(outbox.flush(timeout=2))
+        self.assertEqual([payload for _, payload, _, _ in broker.sent], ["qos0", b"1"])
+        metrics = outbox.get_metrics()
+        self.assertEqual(metrics["spill_depth"], 0)
+        self.assertFalse(metrics["stalled"])
+
+        # Po udanej wysyłce wiadomości QoS 1 znów trafiają do pamięci
+        outbox.put("t", "2", qos=1)
+        self.assertEqual(outbox.get_metrics()["spilled"], 1)
+        self.assertTrue(outbox.flush(timeout=2))
+
+    def test_spill_load_error_backoff(self):
+        """
+        Test błędu odczytu wiadomości z dysku - ponowienie po retry_interval zamiast
+        ciągłych prób odczytu, wysyłka po wznowieniu.
+        """
+        broker = FakeBroker()
+        outbox = MqttOutbox(broker, queue_size=1, retry_interval=60, spill_path=self.spill_path)
+        self.addCleanup(outbox.spill.close)
+        self.addCleanup(outbox.stop, 0.1)
+
+        load = outbox.spill.load
+        calls = []
+
+        def failing_load(*args):
+            calls.append(args)
+            raise sqlite3.OperationalError("database is locked")
+
+        outbox.spill.load = failing_load
+        for n in range(3):
+            self.assertTrue(outbox.put("t", str(n), qos=1))
+        self.assertFalse(outbox.flush(timeout=0.2))
+        self.assertLessEqual(len(calls), 2)
+
+        outbox.spill.load = load
+        outbox.wake()
+        self.assertTrue(outbox.flush(timeout=2))
+        self.assertEqual([payload for _, payload, _, _ in broker.sent], ["0", b"1", b"2"])
+
+if __name__ == '__main__':
+    unittest.main()
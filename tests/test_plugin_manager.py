@@ -183,7 +183,7 @@ class PluginManagerTest(unittest.TestCase):
         }).encode('utf-8')
         
         # Wywołanie metody obsługi ogłoszenia
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy wtyczka została dodana
         plugins = self.plugin_manager.get_plugins()
@@ -203,7 +203,7 @@ class PluginManagerTest(unittest.TestCase):
         message_mock.payload = b"invalid json"
         
         # Wywołanie metody obsługi ogłoszenia
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy słownik wtyczek jest pusty
         self.assertEqual(len(self.plugin_manager.get_plugins()), 0)
@@ -216,7 +216,7 @@ class PluginManagerTest(unittest.TestCase):
         }).encode('utf-8')
         
         # Wywołanie metody obsługi ogłoszenia
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy słownik wtyczek jest nadal pusty
         self.assertEqual(len(self.plugin_manager.get_plugins()), 0)
@@ -273,14 +273,15 @@ class PluginManagerTest(unittest.TestCase):
             offline_timeout=1
         )
         
-        # Sprawdzenie, czy metoda message_callback_add została wywołana z odpowiednim tematem
-        mqtt_client_mock.client.message_callback_add.assert_called_with(
+        # Sprawdzenie, czy handlery zostały zarejestrowane w routerze tematów klienta MQTT
+        mqtt_client_mock.register_handler.assert_any_call(
             "plugin/announce", 
             plugin_manager._handle_plugin_announcement
         )
-        
-        # Sprawdzenie, czy metoda subscribe została wywołana
-        mqtt_client_mock.client.subscribe.assert_called_with("plugin/announce")
+        mqtt_client_mock.register_handler.assert_any_call(
+            "status/+", 
+            plugin_manager._handle_status_update
+        )
     
 if __name__ == '__main__':
     unittest.main()
@@ -34,19 +34,23 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         self.temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
         self.temp_file.close()
         
-        # Utworzenie mocka dla klienta MQTT z odpowiednią konfiguracją
-        self.mqtt_client_mock = MagicMock()
-        self.mqtt_client_mock.config = {
-            "topics": {
-                "subscribe": ["plugin/announce"]
-            }
-        }
-        self.mqtt_client_mock.client = MagicMock()
-        self.mqtt_client_mock.connected = True
+        # Klient MQTT z konfiguracją testową (bez połączenia z brokerem - połączenie symulowane)
+        self.config_file = tempfile.NamedTemporaryFile(delete=False, mode='w', suffix='.json')
+        json.dump({
+            "broker": "localhost",
+            "port": 1883,
+            "client_id": "test_client",
+            "keepalive": 60,
+            "topics": {"subscribe": ["core/#"], "publish": "core/output"}
+        }, self.config_file)
+        self.config_file.close()
+        self.mqtt_client = MqttClient(config_path=self.config_file.name)
+        self.mqtt_client.client = MagicMock()
+        self.mqtt_client.connected = True
         
         # Utworzenie instancji PluginManager do testów
         self.plugin_manager = PluginManager(
-            mqtt_client=self.mqtt_client_mock,
+            mqtt_client=self.mqtt_client,
             plugins_file=self.temp_file.name,
             offline_timeout=1  # Krótki timeout dla testów
         )
@@ -55,21 +59,54 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         """
         Czyszczenie po każdym teście.
         """
-        # Usunięcie tymczasowego pliku
+        # Usunięcie tymczasowych plików
+        self.mqtt_client.dispatcher.shutdown(wait=True)
         os.unlink(self.temp_file.name)
+        os.unlink(self.config_file.name)
     
     def test_mqtt_subscription_setup(self):
         """
         Test poprawności konfiguracji subskrypcji MQTT.
         """
-        # Sprawdzenie, czy metoda message_callback_add została wywołana z odpowiednim tematem
-        self.mqtt_client_mock.client.message_callback_add.assert_called_with(
-            "plugin/announce", 
-            self.plugin_manager._handle_plugin_announcement
+        # Sprawdzenie, czy handlery zostały zarejestrowane w routerze tematów
+        self.assertEqual(
+            self.mqtt_client.router.match("plugin/announce"),
+            [self.plugin_manager._handle_plugin_announcement]
+        )
+        self.assertEqual(
+            self.mqtt_client.router.match("status/sensor"),
+            [self.plugin_manager._handle_status_update]
         )
         
-        # Sprawdzenie, czy metoda subscribe została wywołana
-        self.mqtt_client_mock.client.subscribe.assert_called_with("plugin/announce")
+        # Sprawdzenie, czy tematy zostały zasubskrybowane (klient jest już połączony)
+        self.assertIn("plugin/announce", self.mqtt_client.config["topics"]["subscribe"])
+        self.mqtt_client.client.subscribe.assert_any_call("plugin/announce")
+        self.mqtt_client.client.subscribe.assert_any_call("status/+")
+    
+    def test_mqtt_message_routing(self):
+        """
+        Test dostarczenia ogłoszenia i aktualizacji statusu przez router klienta MQTT.
+        """
+        plugin_data = {
+            "name": "routed_plugin",
+            "type": "mqtt",
+            "description": "Wtyczka ogłoszona przez router",
+            "status": "online"
+        }
+        status_data = {"status": "error", "timestamp": "2025-04-05T12:00:00Z"}
+        
+        # Wiadomości odebrane w wątku sieciowym są przetwarzane w puli dispatcher
+        self.mqtt_client._on_message(None, None, MagicMock(
+            topic="plugin/announce", payload=json.dumps(plugin_data).encode('utf-8')
+        ))
+        self.mqtt_client._on_message(None, None, MagicMock(
+            topic="status/routed_plugin", payload=json.dumps(status_data).encode('utf-8')
+        ))
+        self.mqtt_client.dispatcher.shutdown(wait=True)
+        
+        plugin = self.plugin_manager.get_plugin("routed_plugin")
+        self.assertEqual(plugin["status"], "error")
+        self.assertEqual(plugin["status_timestamp"], "2025-04-05T12:00:00Z")
     
     def test_mqtt_announcement_handling(self):
         """
@@ -89,7 +126,7 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         message_mock.payload = json.dumps(plugin_data).encode('utf-8')
         
         # Wywołanie callbacka
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy wtyczka została zarejestrowana
         plugins = self.plugin_manager.get_plugins()
@@ -108,7 +145,7 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         message_mock.payload = b"nieprawidlowy json"
         
         # Wywołanie callbacka
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy słownik wtyczek jest nadal pusty
         plugins = self.plugin_manager.get_plugins()
@@ -131,7 +168,7 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         message_mock.payload = json.dumps(plugin_data).encode('utf-8')
         
         # Wywołanie callbacka
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy wtyczka nie została zarejestrowana
         plugins = self.plugin_manager.get_plugins()
@@ -169,7 +206,7 @@ class PluginManagerMqttIntegrationTest(unittest.TestCase):
         message_mock.payload = json.dumps(updated_data).encode('utf-8')
         
         # Wywołanie callbacka
-        self.plugin_manager._handle_plugin_announcement(None, None, message_mock)
+        self.plugin_manager._handle_plugin_announcement(message_mock)
         
         # Sprawdzenie, czy dane wtyczki zostały zaktualizowane
         plugins = self.plugin_manager.get_plugins()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla puli procesów wtyczek lokalnych (execution: process).
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import logging
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from core.chain_plan import STEP_LOCAL, STEP_PROCESS
+from core.process_pool import PluginProcessPool
+from plugins.base import BasePlugin
+from plugins.uppercase_plugin import UppercasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class MarkerPlugin(BasePlugin):
+    """
+    Wtyczka testowa zapisująca plik config['path'] w teardown().
+    """
+    def process(self, data, params=None):
+        return data
+
+    def teardown(self):
+        with open(self.config["path"], "w") as f:
+            f.write(str(os.getpid()))
+
+class ProcessPoolTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla klasy PluginProcessPool i kroków wykonywanych w procesach.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z chainem wykonywanym w puli procesów.
+        """
+        self.engine = ChainEngine(chains_file=os.devnull, config={"process_pool": {"workers": 2}})
+        self.engine.chains = {
+            "cpu_chain": {
+                "trigger": "webhook:cpu",
+                "steps": [{"plugin": "UppercasePlugin", "config": {"execution": "process"}}]
+            },
+            "thread_chain": {
+                "trigger": "webhook:thread",
+                "steps": [{"plugin": "UppercasePlugin"}]
+            }
+        }
+        self.engine._rebuild_trigger_index()
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika i procesów roboczych.
+        """
+        self.engine.shutdown()
+
+    def test_execution_mode(self):
+        """
+        Test wyboru trybu wykonywania kroku na podstawie konfiguracji.
+        """
+        cpu_plan = self.engine._get_plan("cpu_chain", self.engine.chains["cpu_chain"])
+        thread_plan = self.engine._get_plan("thread_chain", self.engine.chains["thread_chain"])
+
+        self.assertEqual(cpu_plan.steps[0].kind, STEP_PROCESS)
+        self.assertEqual(thread_plan.steps[0].kind, STEP_LOCAL)
+        # Wtyczka jest rejestrowana do wczytania przy starcie procesów roboczych
+        self.assertEqual(len(self.engine.process_pool.preload), 1)
+
+    def test_run_chain_in_process(self):
+        """
+        Test uruchamiania chaina z krokiem wykonywanym w procesie roboczym.
+        """
+        result = self.engine.run_chain("webhook:cpu", {"message": "hello"})
+        self.assertEqual(result, {"message": "HELLO"})
+
+        # Liczniki są aktualizowane w callbacku future, który może się wykonać
+        # chwilę po zwróceniu wyniku - krótkie oczekiwanie na ich aktualizację
+        deadline = time.monotonic() + 2
+        metrics = self.engine.get_metrics()["process_pool"]
+        while metrics["completed"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            metrics = self.engine.get_metrics()["process_pool"]
+        self.assertEqual(metrics["workers"], 2)
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["in_flight"], 0)
+
+    def test_run_chain_in_process_async(self):
+        """
+        Test kroku wykonywanego w procesie roboczym w trybie asyncio.
+        """
+        async_engine = AsyncChainEngine(self.engine)
+        result = asyncio.run(async_engine.run_chain("webhook:cpu", {"message": "async"}))
+        self.assertEqual(result, {"message": "ASYNC"})
+
+    def test_pool_submit(self):
+        """
+        Test zgłaszania wielu zadań bezpośrednio do puli procesów.
+        """
+        pool = PluginProcessPool(workers=1)
+        try:
+            futures = [pool.submit(UppercasePlugin, "{}", {}, {"n": str(i)}) for i in range(10)]
+            self.assertEqual([f.result(timeout=30) for f in futures], [{"n": str(i)} for i in range(10)])
+        finally:
+            pool.shutdown()
+
+    def test_worker_teardown_on_shutdown(self):
+        """
+        Test wywołania teardown() instancji wtyczek procesu roboczego przy zatrzymaniu puli.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "teardown.txt")
+            pool = PluginProcessPool(workers=1)
+            try:
+                future = pool.submit(MarkerPlugin, "marker", {"path": path}, {"n": 1})
+                self.assertEqual(future.result(timeout=30), {"n": 1})
+                self.assertFalse(os.path.exists(path))
+            finally:
+                pool.shutdown()
+            self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
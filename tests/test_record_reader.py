@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla przyrostowego odczytu rekordów NDJSON i tablic JSON.
+"""
+
+import unittest
+import io
+import json
+import os
+import sys
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.record_reader import iter_records
+
+class RecordReaderTest(unittest.TestCase):
+    """
+    Testy odczytu rekordów ze strumienia.
+    """
+
+    def _read(self, data, mimetype, chunk_size=64):
+        return list(iter_records(io.BytesIO(data), mimetype, chunk_size))
+
+    def test_json_array_chunks(self):
+        """
+        Test odczytu elementów podzielonych między fragmenty strumienia (także znaki UTF-8 i liczby).
+        """
+        records = [{"n": i, "tekst": "zażółć" * i} for i in range(20)] + [12345, "x", [1, 2]]
+        data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+        for chunk_size in (1, 3, 7, 1024):
+            self.assertEqual(
+                [record for record, _ in self._read(data, "application/json", chunk_size)], records
+            )
+
+    def test_json_array_number_split(self):
+        """
+        Test liczby przeciętej granicą fragmentu po znaku '.' lub 'e' (np. "12.|5").
+        """
+        for data in (b"[1,12.5,3]", b"[1,12e2,3]", b"[1,12 ,3]"):
+            records = self._read(data, "application/json", chunk_size=6)
+            self.assertEqual(records, [(record, None) for record in json.loads(data)])
+
+    def test_json_array_errors(self):
+        """
+        Test zgłoszenia błędu składni jako ostatniego rekordu.
+        """
+        self.assertEqual(self._read(b"[1, 2 3]", "application/json")[-1][0], None)
+        self.assertEqual(self._read(b"[1, 2", "application/json")[-1][1], "Niepełna tablica JSON - brak znaku ']'")
+        self.assertEqual(self._read(b'{"n": 1}', "application/json"), [(None, "Oczekiwano tablicy JSON")])
+        self.assertEqual(self._read(b"[]", "application/json"), [])
+        self.assertEqual(
+            self._read(b"[1, ]", "application/json"),
+            [(1, None), (None, "Oczekiwano elementu tablicy JSON po ','")]
+        )
+
+    def test_ndjson(self):
+        """
+        Test odczytu NDJSON z pominięciem pustych wierszy i kontynuacją po błędzie.
+        """
+        records = self._read(b'{"a": 1}\n\nzly\n{"b": 2}', "application/x-ndjson")
+        self.assertEqual(records[0], ({"a": 1}, None))
+        self.assertIsNone(records[1][0])
+        self.assertEqual(records[2], ({"b": 2}, None))
+
+    def test_unsupported_mimetype(self):
+        """
+        Test odrzucenia nieobsługiwanego typu treści.
+        """
+        with self.assertRaises(ValueError):
+            iter_records(io.BytesIO(b""), "text/plain")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla cache'a wyników kroków chainów.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import logging
+from unittest.mock import MagicMock, patch
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from core.result_cache import MISS, ResultCache
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class PurePlugin(BasePlugin):
+    """
+    Deterministyczna wtyczka testowa zliczająca wywołania.
+    """
+    cacheable = True
+    calls = 0
+
+    def process(self, data, params=None):
+        PurePlugin.calls += 1
+        return dict(data, doubled=data.get("value", 0) * 2)
+
+class FailingPlugin(BasePlugin):
+    """
+    Wtyczka testowa zawsze zgłaszająca błąd.
+    """
+    cacheable = True
+    calls = 0
+
+    def process(self, data, params=None):
+        FailingPlugin.calls += 1
+        raise RuntimeError("błąd testowy")
+
+class ResultCacheTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla klasy ResultCache.
+    """
+
+    def test_hits_and_misses(self):
+        """
+        Test liczników trafień i chybień.
+        """
+        cache = ResultCache("PurePlugin", "{}")
+        key = cache.make_key({"value": 1})
+
+        self.assertIs(cache.get(key), MISS)
+        cache.put(key, {"doubled": 2})
+        self.assertEqual(cache.get(key), {"doubled": 2})
+        self.assertEqual(cache.make_key({"value": 1}), key)
+        self.assertNotEqual(cache.make_key({"value": 2}), key)
+
+        metrics = cache.get_metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"]), (1, 1))
+        self.assertEqual(metrics["hit_ratio"], 0.5)
+
+    def test_key_depends_on_config(self):
+        """
+        Test rozróżniania kluczy dla różnych konfiguracji wtyczki.
+        """
+        first = ResultCache("PurePlugin", '{"a":1}')
+        second = ResultCache("PurePlugin", '{"a":2}')
+        self.assertNotEqual(first.make_key({"value": 1}), second.make_key({"value": 1}))
+        self.assertIsNone(first.make_key({"value": object()}))
+
+    def test_lru_eviction(self):
+        """
+        Test usuwania najdawniej używanego wpisu po przekroczeniu rozmiaru.
+        """
+        cache = ResultCache("PurePlugin", "{}", max_size=2)
+        keys = [cache.make_key({"value": i}) for i in range(3)]
+
+        cache.put(keys[0], 0)
+        cache.put(keys[1], 1)
+        cache.get(keys[0])
+        cache.put(keys[2], 2)
+
+        self.assertEqual(cache.get(keys[0]), 0)
+        self.assertIs(cache.get(keys[1]), MISS)
+        self.assertEqual(cache.get_metrics()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """
+        Test wygasania wpisów po upływie czasu życia.
+        """
+        cache = ResultCache("PurePlugin", "{}", ttl=10)
+        key = cache.make_key({"value": 1})
+
+        with patch("core.result_cache.time.monotonic", return_value=100.0):
+            cache.put(key, 1)
+        with patch("core.result_cache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get(key), 1)
+        with patch("core.result_cache.time.monotonic", return_value=111.0):
+            self.assertIs(cache.get(key), MISS)
+
+        self.assertEqual(cache.get_metrics()["expirations"], 1)
+
+class CachedStepTest(unittest.TestCase):
+    """
+    Testy wykonywania kroków `cacheable` przez Chain Engine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z wtyczkami testowymi.
+        """
+        self.mqtt_client_mock = MagicMock()
+        self.engine = ChainEngine(mqtt_client=self.mqtt_client_mock, chains_file=os.devnull)
+        self.engine.plugin_classes.update({
+            "PurePlugin": PurePlugin,
+            "FailingPlugin": FailingPlugin
+        })
+        PurePlugin.calls = 0
+        FailingPlugin.calls = 0
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+
+    def _add_chain(self, steps):
+        self.engine.chains["cached_chain"] = {"trigger": "webhook:cached", "steps": steps}
+        self.engine._rebuild_trigger_index()
+
+    def test_cached_local_step(self):
+        """
+        Test pomijania wykonania wtyczki dla powtórzonych danych wejściowych.
+        """
+        self._add_chain([{"plugin": "PurePlugin"}])
+
+        first = self.engine.run_chain("webhook:cached", {"value": 2})
+        second = self.engine.run_chain("webhook:cached", {"value": 2})
+        self.engine.run_chain("webhook:cached", {"value": 3})
+
+        self.assertEqual(first, {"value": 2, "doubled": 4})
+        self.assertEqual(second, first)
+        self.assertEqual(PurePlugin.calls, 2)
+
+        metrics = self.engine.get_metrics()["result_cache"]
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]["plugin"], "PurePlugin")
+        self.assertEqual((metrics[0]["hits"], metrics[0]["misses"]), (1, 2))
+
+    def test_cacheable_disabled_in_step_config(self):
+        """
+        Test wyłączenia cache'a w konfiguracji kroku.
+        """
+        self._add_chain([{"plugin": "PurePlugin", "config": {"cacheable": False}}])
+
+        self.engine.run_chain("webhook:cached", {"value": 2})
+        self.engine.run_chain("webhook:cached", {"value": 2})
+
+        self.assertEqual(PurePlugin.calls, 2)
+        self.assertEqual(self.engine.get_metrics()["result_cache"], [])
+
+    def test_errors_not_cached(self):
+        """
+        Test pomijania zapisu wyniku po błędzie wtyczki.
+        """
+        self._add_chain([{"plugin": "FailingPlugin"}])
+
+        self.engine.run_chain("webhook:cached", {"value": 2})
+        self.engine.run_chain("webhook:cached", {"value": 2})
+
+        self.assertEqual(FailingPlugin.calls, 2)
+
+    def test_cached_remote_step(self):
+        """
+        Test pomijania wywołania zdalnego dla powtórzonych danych wejściowych.
+        """
+        self._add_chain([{"plugin": "remote:device1:temperature", "config": {"cacheable": {"ttl": 60}}}])
+
+        with patch.object(self.engine, "_call_remote_plugin", return_value={"remote": True}) as call:
+            first = self.engine.run_chain("webhook:cached", {"value": 2})
+            second = self.engine.run_chain("webhook:cached", {"value": 2})
+
+        self.assertEqual(first, {"remote": True})
+        self.assertEqual(second, first)
+        self.assertEqual(call.call_count, 1)
+
+    def test_cached_step_async(self):
+        """
+        Test cache'a wyników w trybie asyncio.
+        """
+        self._add_chain([{"plugin": "PurePlugin"}])
+        async_engine = AsyncChainEngine(self.engine)
+
+        async def run_twice():
+            first = await async_engine.run_chain("webhook:cached", {"value": 5})
+            second = await async_engine.run_chain("webhook:cached", {"value": 5})
+            return first, second
+
+        first, second = asyncio.run(run_twice())
+
+        self.assertEqual(first, {"value": 5, "doubled": 10})
+        self.assertEqual(second, first)
+        self.assertEqual(PurePlugin.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
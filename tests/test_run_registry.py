@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla rejestru uruchomień asynchronicznych.
+"""
+
+import unittest
+import os
+import sys
+import logging
+from unittest.mock import patch
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.run_registry import RunRegistry
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class RunRegistryTest(unittest.TestCase):
+    """
+    Testy statusów, limitu rozmiaru i wygasania uruchomień.
+    """
+
+    def test_lifecycle(self):
+        """
+        Test przejść statusów uruchomienia.
+        """
+        registry = RunRegistry()
+        ok = registry.create("webhook:a")
+        failed = registry.create("webhook:a")
+        self.assertEqual(registry.get(ok)["status"], "queued")
+
+        registry.start(ok)
+        self.assertEqual(registry.get(ok)["status"], "running")
+        registry.finish(ok, results={"chain": {"n": 1}})
+        registry.finish(failed, error="Przekroczono termin")
+
+        self.assertEqual(registry.get(ok)["results"], {"chain": {"n": 1}})
+        self.assertEqual(registry.get(failed)["status"], "failed")
+        self.assertEqual(registry.get(failed)["error"], "Przekroczono termin")
+        self.assertIsNone(registry.get("nieznany"))
+
+    def test_limit_and_ttl(self):
+        """
+        Test limitu rozmiaru (usuwanie zakończonych uruchomień, odrzucanie przy samych
+        uruchomieniach w toku) i usuwania zakończonych po czasie życia.
+        """
+        registry = RunRegistry(max_runs=2, ttl=10)
+        first = registry.create("webhook:a")
+        second = registry.create("webhook:a")
+        # Uruchomienia w toku nie są usuwane - nowe jest odrzucane
+        self.assertIsNone(registry.create("webhook:a"))
+        self.assertEqual(registry.get_metrics()["rejected"], 1)
+
+        # Przy pełnym rejestrze usuwane jest zakończone uruchomienie, nie najstarsze
+        registry.start(first)
+        registry.finish(second, results={})
+        third = registry.create("webhook:a")
+        self.assertIsNone(registry.get(second))
+        self.assertEqual(registry.get(first)["status"], "running")
+        self.assertEqual(registry.get_metrics()["evicted"], 1)
+
+        registry.finish(first, results={})
+        with patch("core.run_registry.time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(registry.get(first))
+            self.assertIsNotNone(registry.get(third))
+
+if __name__ == '__main__':
+    unittest.main()
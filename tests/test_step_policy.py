@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla limitów czasu, ponowień i terminu wykonania chainów.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+import logging
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.async_engine import AsyncChainEngine
+from core.chain_engine import ChainEngine
+from core.step_policy import Backoff, DeadlineExceeded, backoff_delay, step_policy
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+# Szybkie ponowienia w testach
+FAST_BACKOFF = {"initial_ms": 1, "max_ms": 1, "jitter": False}
+
+class FlakyPlugin(BasePlugin):
+    """
+    Wtyczka testowa zgłaszająca błąd przy pierwszych config['failures'] wywołaniach.
+    """
+    calls = 0
+
+    def process(self, data, params=None):
+        FlakyPlugin.calls += 1
+        if FlakyPlugin.calls <= self.config.get("failures", 0):
+            raise RuntimeError("chwilowy błąd")
+        return dict(data, attempts=FlakyPlugin.calls)
+
+class SleepPlugin(BasePlugin):
+    """
+    Wtyczka testowa czekająca config['seconds'] sekund.
+    """
+    calls = 0
+
+    def process(self, data, params=None):
+        SleepPlugin.calls += 1
+        time.sleep(self.config.get("seconds", 0))
+        return dict(data, slept=True)
+
+class AsyncSleepPlugin(BasePlugin):
+    """
+    Asynchroniczna wtyczka testowa czekająca config['seconds'] sekund.
+    """
+    async def process(self, data, params=None):
+        await asyncio.sleep(self.config.get("seconds", 0))
+        return dict(data, slept=True)
+
+class StepPolicyTest(unittest.TestCase):
+    """
+    Testy wyznaczania polityki kroku i opóźnień ponowień.
+    """
+
+    def test_step_overrides_chain_defaults(self):
+        """
+        Test pierwszeństwa wartości kroku przed wartościami domyślnymi chaina.
+        """
+        chain = {"timeout_ms": 2000, "retries": 1}
+        policy = step_policy({"plugin": "X", "retries": 3}, chain)
+
+        self.assertEqual(policy.timeout, 2.0)
+        self.assertEqual(policy.retries, 3)
+        self.assertIsNone(step_policy({"plugin": "X"}, {}))
+
+    def test_backoff_delay(self):
+        """
+        Test wykładniczego wzrostu opóźnienia ograniczonego przez max.
+        """
+        backoff = Backoff(0.1, 2.0, 0.5, False)
+        self.assertEqual(
+            [backoff_delay(backoff, attempt) for attempt in range(4)], [0.1, 0.2, 0.4, 0.5]
+        )
+        jittered = Backoff(0.1, 2.0, 0.5, True)
+        self.assertTrue(all(0 <= backoff_delay(jittered, 3) <= 0.5 for _ in range(20)))
+
+class ChainEnginePolicyTest(unittest.TestCase):
+    """
+    Testy limitów czasu, ponowień i terminów w Chain Engine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z wtyczkami testowymi.
+        """
+        self.mqtt_client_mock = MagicMock()
+        self.engine = ChainEngine(mqtt_client=self.mqtt_client_mock, chains_file=os.devnull)
+        self.engine.plugin_classes.update({
+            "FlakyPlugin": FlakyPlugin,
+            "SleepPlugin": SleepPlugin,
+            "AsyncSleepPlugin": AsyncSleepPlugin
+        })
+        FlakyPlugin.calls = 0
+        SleepPlugin.calls = 0
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+
+    def _add_chain(self, chain):
+        self.engine.chains["policy_chain"] = dict(chain, trigger="webhook:policy")
+        self.engine._rebuild_trigger_index()
+
+    def test_retries_until_success(self):
+        """
+        Test ponowienia kroku po chwilowych błędach.
+        """
+        self._add_chain({"steps": [
+            {"plugin": "FlakyPlugin", "config": {"failures": 2}, "retries": 2, "backoff": FAST_BACKOFF}
+        ]})
+
+        result = self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(result, {"n": 1, "attempts": 3})
+
+    def test_retries_exhausted(self):
+        """
+        Test przekazania danych wejściowych dalej po wyczerpaniu ponowień.
+        """
+        self._add_chain({"retries": 1, "backoff": FAST_BACKOFF, "steps": [
+            {"plugin": "FlakyPlugin", "config": {"failures": 5}}
+        ]})
+
+        result = self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(result, {"n": 1})
+        self.assertEqual(FlakyPlugin.calls, 2)
+
+    def test_remote_step_timeout_and_retry(self):
+        """
+        Test limitu czasu kroku zdalnego krótszego niż timeout z konfiguracji oraz ponowienia.
+        """
+        self._add_chain({"steps": [{
+            "plugin": "remote:device1:slow",
+            "config": {"timeout": 5},
+            "timeout_ms": 50,
+            "retries": 1,
+            "backoff": FAST_BACKOFF
+        }]})
+
+        with patch.object(
+            self.engine, "_send_remote_request", side_effect=lambda *args: ("id", Future())
+        ) as send:
+            started = time.monotonic()
+            result = self.engine.run_chain("webhook:policy", {"n": 1})
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(result, {"n": 1})
+        self.assertEqual(send.call_count, 2)
+        self.assertLess(elapsed, 1)
+
+    def test_deadline_propagated_to_remote_request(self):
+        """
+        Test przekazania pozostałego czasu chaina w żądaniu do zdalnej wtyczki.
+        """
+        self._add_chain({"deadline_ms": 2000, "steps": [{"plugin": "remote:device1:fast"}]})
+
+        def respond(device_id, request_data):
+            future = Future()
+            future.set_result({"data": {"ok": True}})
+            return "id", future
+
+        with patch.object(self.engine, "_send_remote_request", side_effect=respond) as send:
+            result = self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(result, {"ok": True})
+        request_data = send.call_args[0][1]
+        self.assertTrue(0 < request_data["deadline_ms"] <= 2000)
+
+    def test_deadline_cancels_remaining_steps(self):
+        """
+        Test przerwania chaina po upływie terminu - kolejne kroki nie są uruchamiane.
+        """
+        self._add_chain({"deadline_ms": 50, "steps": [
+            {"plugin": "SleepPlugin", "config": {"seconds": 0.1}},
+            {"plugin": "FlakyPlugin"}
+        ]})
+
+        with self.assertRaises(DeadlineExceeded):
+            self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(SleepPlugin.calls, 1)
+        self.assertEqual(FlakyPlugin.calls, 0)
+
+    def test_deadline_includes_queue_time(self):
+        """
+        Test pominięcia uruchomienia, którego termin upłynął w kolejce.
+        """
+        self._add_chain({"deadline_ms": 100, "steps": [{"plugin": "FlakyPlugin"}]})
+        chain = self.engine.chains["policy_chain"]
+
+        with self.assertRaises(DeadlineExceeded):
+            self.engine._execute_chain("policy_chain", chain, {"n": 1}, time.monotonic() - 1)
+
+        self.assertEqual(FlakyPlugin.calls, 0)
+
+    def test_async_plugin_step_timeout(self):
+        """
+        Test przerwania wtyczki z `async def process` po przekroczeniu limitu czasu kroku.
+        """
+        self._add_chain({"steps": [
+            {"plugin": "AsyncSleepPlugin", "config": {"seconds": 5}, "timeout_ms": 50}
+        ]})
+
+        started = time.monotonic()
+        result = self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(result, {"n": 1})
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_dag_deadline(self):
+        """
+        Test przerwania chaina DAG po upływie terminu.
+        """
+        self._add_chain({"deadline_ms": 50, "steps": [
+            {"id": "a", "plugin": "SleepPlugin", "config": {"seconds": 0.1}},
+            {"id": "b", "plugin": "SleepPlugin", "config": {"seconds": 0.1}},
+            {"id": "c", "plugin": "FlakyPlugin", "depends_on": ["a", "b"]}
+        ]})
+
+        with self.assertRaises(DeadlineExceeded):
+            self.engine.run_chain("webhook:policy", {"n": 1})
+
+        self.assertEqual(FlakyPlugin.calls, 0)
+
+    def test_fanout_deadline(self):
+        """
+        Test upływu terminu przy kilku chainach triggera - run_chains i run_chains_batch
+        zgłaszają DeadlineExceeded jak przy pojedynczym chainie, zamiast zwracać dane wejściowe.
+        """
+        self._add_chain({"deadline_ms": 50, "steps": [
+            {"plugin": "SleepPlugin", "config": {"seconds": 0.1}},
+            {"plugin": "FlakyPlugin"}
+        ]})
+        for run in (
+            lambda: self.engine.run_chains("webhook:policy", {"n": 1}),
+            lambda: self.engine.run_chains_batch("webhook:policy", [{"n": 1}, {"n": 2}])
+        ):
+            with self.assertRaises(DeadlineExceeded):
+                run()
+
+        self.engine.chains["other_chain"] = {"trigger": "webhook:policy", "steps": [{"plugin": "FlakyPlugin"}]}
+        self.engine._rebuild_trigger_index()
+        for run in (
+            lambda: self.engine.run_chains("webhook:policy", {"n": 1}),
+            lambda: self.engine.run_chains_batch("webhook:policy", [{"n": 1}, {"n": 2}]),
+            lambda: asyncio.run(AsyncChainEngine(self.engine).run_chains("webhook:policy", {"n": 1}))
+        ):
+            with self.assertRaises(DeadlineExceeded):
+                run()
+
+    def test_policy_validation(self):
+        """
+        Test walidacji pól polityki w definicji chaina i kroków.
+        """
+        chain = {"trigger": "webhook:policy", "steps": [{"plugin": "FlakyPlugin"}]}
+        self.assertTrue(self.engine._validate_chain(dict(chain, deadline_ms=100, retries=2)))
+        self.assertFalse(self.engine._validate_chain(dict(chain, deadline_ms=-1)))
+        self.assertFalse(self.engine._validate_chain(dict(chain, retries="3")))
+        self.assertFalse(self.engine._validate_chain(
+            dict(chain, steps=[{"plugin": "FlakyPlugin", "timeout_ms": 0}])
+        ))
+
+    def test_async_engine_retries_and_deadline(self):
+        """
+        Test ponowień i terminu chaina w trybie asyncio.
+        """
+        async_engine = AsyncChainEngine(self.engine)
+        self._add_chain({"steps": [
+            {"plugin": "FlakyPlugin", "config": {"failures": 1}, "retries": 1, "backoff": FAST_BACKOFF}
+        ]})
+        result = asyncio.run(async_engine.run_chain("webhook:policy", {"n": 1}))
+        self.assertEqual(result, {"n": 1, "attempts": 2})
+
+        self._add_chain({"deadline_ms": 50, "steps": [
+            {"plugin": "AsyncSleepPlugin", "config": {"seconds": 5}}
+        ]})
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(async_engine.run_chain("webhook:policy", {"n": 1}))
+        self.assertLess(time.monotonic() - started, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla strumieniowego przetwarzania rekordów w chainach.
+"""
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import logging
+from unittest.mock import MagicMock
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.chain_engine import ChainEngine
+from core.step_policy import DeadlineExceeded
+from plugins.base import BasePlugin
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class CounterSourcePlugin(BasePlugin):
+    """
+    Wtyczka generująca config['count'] rekordów i zliczająca wygenerowane rekordy.
+    """
+    produced = 0
+
+    def process(self, data, params=None):
+        for i in range(self.config.get("count", 10)):
+            CounterSourcePlugin.produced += 1
+            yield {"n": i}
+
+class LagPlugin(BasePlugin):
+    """
+    Wtyczka zapisująca w rekordzie liczbę rekordów wygenerowanych do chwili jego przetworzenia.
+    """
+    def process(self, data, params=None):
+        return dict(data, produced=CounterSourcePlugin.produced)
+
+class SlowSourcePlugin(BasePlugin):
+    """
+    Wtyczka generująca rekordy co config['delay'] sekund.
+    """
+    def process(self, data, params=None):
+        for i in range(self.config.get("count", 10)):
+            time.sleep(self.config.get("delay", 0))
+            yield {"n": i}
+
+class BrokenSourcePlugin(BasePlugin):
+    """
+    Wtyczka, której generator zgłasza błąd po pierwszym rekordzie.
+    """
+    def process(self, data, params=None):
+        yield {"n": 0}
+        raise ConnectionError("źródło niedostępne")
+
+class StreamingTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla trybu strumieniowego Chain Engine.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie silnika z wtyczkami testowymi.
+        """
+        self.mqtt_client_mock = MagicMock()
+        self.engine = ChainEngine(mqtt_client=self.mqtt_client_mock, chains_file=os.devnull)
+        self.engine.plugin_classes.update({
+            "CounterSourcePlugin": CounterSourcePlugin,
+            "LagPlugin": LagPlugin,
+            "SlowSourcePlugin": SlowSourcePlugin,
+            "BrokenSourcePlugin": BrokenSourcePlugin
+        })
+        CounterSourcePlugin.produced = 0
+
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+
+    def _add_chain(self, chain):
+        self.engine.chains["stream_chain"] = dict(chain, trigger="webhook:stream")
+        self.engine._rebuild_trigger_index()
+
+    def test_records_streamed_lazily(self):
+        """
+        Test leniwego przetwarzania - rekord trafia do kolejnych kroków zanim powstanie następny.
+        """
+        self._add_chain({
+            "steps": [
+                {"plugin": "CounterSourcePlugin", "config": {"count": 100}},
+                {"plugin": "LagPlugin"},
+                {"plugin": "UppercasePlugin"}
+            ]
+        })
+
+        result = self.engine.run_chain("webhook:stream", {})
+
+        self.assertEqual(result["count"], 100)
+        self.assertEqual([r["produced"] for r in result["records"]], list(range(1, 101)))
+
+    def test_file_sink(self):
+        """
+        Test zapisu strumienia rekordów do pliku NDJSON.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.ndjson")
+            self._add_chain({
+                "steps": [
+                    {"plugin": "SplitRecordsPlugin", "config": {"include": ["source"]}},
+                    {"plugin": "UppercasePlugin"}
+                ],
+                "sink": {"type": "file", "path": path, "flush_every": 2}
+            })
+
+            result = self.engine.run_chain(
+                "webhook:stream",
+                {"source": "export", "records": [{"name": "a"}, {"name": "b"}, {"name": "c"}]}
+            )
+
+            self.assertEqual(result, {"count": 3, "path": path})
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(records, [
+                {"source": "EXPORT", "name": "A"},
+                {"source": "EXPORT", "name": "B"},
+                {"source": "EXPORT", "name": "C"}
+            ])
+
+    def test_file_sink_concurrent_runs(self):
+        """
+        Test równoległych uruchomień chaina z ujściem plikowym - rekordy są dopisywane
+        (domyślnie) całymi wierszami, bez nadpisywania wyników innego uruchomienia.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.ndjson")
+            self._add_chain({
+                "steps": [{"plugin": "SplitRecordsPlugin", "config": {"include": ["source"]}}],
+                "sink": {"type": "file", "path": path, "flush_every": 3}
+            })
+
+            def run(n):
+                records = [{"name": f"{n}-{i}"} for i in range(50)]
+                self.engine.run_chain("webhook:stream", {"source": str(n), "records": records})
+
+            threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), 200)
+            for n in range(4):
+                self.assertEqual(
+                    [r["name"] for r in records if r["source"] == str(n)],
+                    [f"{n}-{i}" for i in range(50)]
+                )
+
+    def test_mqtt_sink(self):
+        """
+        Test publikacji każdego rekordu strumienia na temat MQTT.
+        """
+        self._add_chain({
+            "steps": [{"plugin": "CounterSourcePlugin", "config": {"count": 5}}],
+            "sink": {"type": "mqtt", "topic": "core/records"}
+        })
+
+        result = self.engine.run_chain("webhook:stream", {})
+
+        self.assertEqual(result["count"], 5)
+        self.assertEqual(self.mqtt_client_mock.publish.call_count, 5)
+        _, kwargs = self.mqtt_client_mock.publish.call_args
+        self.assertEqual(kwargs, {"topic": "core/records", "payload": {"n": 4}})
+
+    def test_batch_streams(self):
+        """
+        Test paczki uruchomień (run_chains_batch), w której krok zwraca strumień dla każdego elementu.
+        """
+        self._add_chain({
+            "steps": [
+                {"plugin": "CounterSourcePlugin", "config": {"count": 3}},
+                {"plugin": "LagPlugin"}
+            ]
+        })
+
+        results = self.engine.run_chains_batch("webhook:stream", [{"a": 1}, {"a": 2}])
+
+        self.assertEqual([result["stream_chain"]["count"] for result in results], [3, 3])
+        self.assertEqual(
+            [record["n"] for record in results[1]["stream_chain"]["records"]], [0, 1, 2]
+        )
+
+    def test_dag_step_stream_rejected(self):
+        """
+        Test kroku chaina DAG zwracającego strumień - traktowany jak błąd kroku.
+        """
+        self._add_chain({
+            "steps": [
+                {"id": "source", "plugin": "CounterSourcePlugin"},
+                {"id": "lag", "plugin": "LagPlugin", "depends_on": ["source"]}
+            ]
+        })
+
+        result = self.engine.run_chain("webhook:stream", {"a": 1})
+
+        self.assertEqual(result, {"a": 1, "produced": 0})
+
+    def test_stream_deadline(self):
+        """
+        Test terminu chaina (`deadline_ms`) w trybie strumieniowym - upływ terminu
+        przerywa strumień zamiast kończyć chain podsumowaniem z błędem.
+        """
+        self._add_chain({
+            "deadline_ms": 100,
+            "steps": [
+                {"plugin": "SlowSourcePlugin", "config": {"count": 50, "delay": 0.01}},
+                {"plugin": "LagPlugin"}
+            ]
+        })
+
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            self.engine.run_chain("webhook:stream", {})
+        self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_stream_generator_error_recorded(self):
+        """
+        Test błędu generatora rekordów - strumień jest przerywany, a uruchomienie
+        trafia do kolejki martwych wiadomości z błędem kroku.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            engine = ChainEngine(
+                chains_file=os.devnull,
+                config={"dead_letter": {"enabled": True, "directory": directory}}
+            )
+            self.addCleanup(engine.shutdown)
+            engine.plugin_classes["BrokenSourcePlugin"] = BrokenSourcePlugin
+            engine.chains["stream_chain"] = {
+                "trigger": "webhook:stream",
+                "steps": [{"plugin": "BrokenSourcePlugin"}, {"plugin": "UppercasePlugin"}]
+            }
+            engine._rebuild_trigger_index()
+
+            result = engine.run_chain("webhook:stream", {})
+            self.assertEqual(result["count"], 1)
+            self.assertIn("źródło niedostępne", result["error"])
+
+            entries = engine.dead_letters.pending()
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(entries[0]["failures"][0]["step"], 1)
+            self.assertEqual(entries[0]["failures"][0]["plugin"], "BrokenSourcePlugin")
+
+    def test_sink_validation(self):
+        """
+        Test walidacji konfiguracji ujścia strumienia.
+        """
+        chain = {"trigger": "webhook:stream", "steps": [{"plugin": "SplitRecordsPlugin"}]}
+        self.assertTrue(self.engine._validate_chain(dict(chain, sink={"type": "collect"})))
+        self.assertFalse(self.engine._validate_chain(dict(chain, sink={"type": "file"})))
+        self.assertFalse(self.engine._validate_chain(dict(chain, sink={"type": "unknown"})))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla drzewa tematów MQTT (TopicTrie).
+"""
+
+import unittest
+import os
+import sys
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.topic_trie import TopicTrie
+
+class TopicTrieTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla klasy TopicTrie.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie drzewa z przykładowymi filtrami.
+        """
+        self.trie = TopicTrie()
+        self.trie.insert("core/sensor/temp", "exact")
+        self.trie.insert("core/+/temp", "single")
+        self.trie.insert("core/#", "multi")
+        self.trie.insert("#", "all")
+
+    def test_exact_and_wildcard_match(self):
+        """
+        Test dopasowania tematu do filtrów dokładnych i wieloznacznych.
+        """
+        matches = self.trie.match("core/sensor/temp")
+        self.assertEqual(set(matches), {"exact", "single", "multi", "all"})
+
+        matches = self.trie.match("core/kitchen/temp")
+        self.assertEqual(set(matches), {"single", "multi", "all"})
+
+        matches = self.trie.match("other/topic")
+        self.assertEqual(matches, ["all"])
+
+    def test_multi_level_matches_parent(self):
+        """
+        Test dopasowania `#` do poziomu nadrzędnego (core/# pasuje do core).
+        """
+        self.assertIn("multi", self.trie.match("core"))
+        # `+` nie dopasowuje brakującego poziomu
+        self.assertNotIn("single", self.trie.match("core/sensor"))
+
+    def test_system_topics(self):
+        """
+        Test pomijania tematów $SYS przez wildcardy na pierwszym poziomie.
+        """
+        self.trie.insert("$SYS/#", "sys")
+        self.assertEqual(self.trie.match("$SYS/broker/uptime"), ["sys"])
+
+    def test_remove(self):
+        """
+        Test usuwania wartości i przycinania pustych gałęzi.
+        """
+        self.assertTrue(self.trie.remove("core/+/temp", "single"))
+        self.assertFalse(self.trie.remove("core/+/temp", "single"))
+        self.assertNotIn("single", self.trie.match("core/kitchen/temp"))
+        self.assertNotIn("+", self.trie.root.children["core"].children)
+        self.assertEqual(len(self.trie), 3)
+
+    def test_validate_filter(self):
+        """
+        Test walidacji filtrów tematów.
+        """
+        self.assertTrue(TopicTrie.validate_filter("core/+/temp"))
+        self.assertTrue(TopicTrie.validate_filter("core/#"))
+        self.assertFalse(TopicTrie.validate_filter("core/#/temp"))
+        self.assertFalse(TopicTrie.validate_filter("core/sens+/temp"))
+        self.assertFalse(TopicTrie.validate_filter(""))
+
+if __name__ == '__main__':
+    unittest.main()
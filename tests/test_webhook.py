@@ -2,14 +2,36 @@ import unittest
 import json
 import sys
 import os
+import threading
 from flask import Flask
 from unittest.mock import patch, MagicMock
 
 # Dodanie katalogu głównego projektu do ścieżki, aby umożliwić import modułów
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from core.chain_engine import ChainEngine
+from plugins.base import BasePlugin
 from routes.webhook import webhook_bp
 
+class GatedPlugin(BasePlugin):
+    """
+    Wtyczka testowa czekająca na zezwolenie testu przed zwróceniem wyniku.
+    """
+    gate = threading.Event()
+
+    def process(self, data, params=None):
+        GatedPlugin.gate.wait(5)
+        return dict(data, processed=True)
+
+class PickyPlugin(BasePlugin):
+    """
+    Wtyczka testowa zgłaszająca błąd dla rekordów z polem 'zly'.
+    """
+    def process(self, data, params=None):
+        if "zly" in data:
+            raise ValueError("nieprawidłowy rekord")
+        return dict(data, checked=True)
+
 class TestWebhook(unittest.TestCase):
     """
     Klasa testowa dla modułu webhook.
@@ -94,5 +116,162 @@ class TestWebhook(unittest.TestCase):
             self.assertEqual(responseData['status'], 'success')
             self.assertIn(moduł, responseData['message'])
 
+class TestWebhookAsync(unittest.TestCase):
+    """
+    Testy asynchronicznego trybu webhooków (odpowiedź 202 i status uruchomienia).
+    """
+    
+    def setUp(self):
+        """
+        Przygotowanie aplikacji z Chain Engine i chainem z wtyczką testową.
+        """
+        self.engine = ChainEngine(mqtt_client=MagicMock(), chains_file=os.devnull, config={})
+        self.engine.plugin_classes["GatedPlugin"] = GatedPlugin
+        self.engine.chains["gated"] = {"trigger": "webhook:gated", "steps": [{"plugin": "GatedPlugin"}]}
+        self.engine._rebuild_trigger_index()
+        GatedPlugin.gate = threading.Event()
+        
+        self.app = Flask(__name__)
+        self.app.register_blueprint(webhook_bp)
+        self.app.config['chain_engine'] = self.engine
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        GatedPlugin.gate.set()
+        self.engine.shutdown()
+    
+    def test_async_request(self):
+        """
+        Test odpowiedzi 202 z identyfikatorem uruchomienia i odczytu wyniku po zakończeniu.
+        """
+        response = self.client.post('/hook/gated?async=1', json={"n": 1})
+        self.assertEqual(response.status_code, 202)
+        responseData = json.loads(response.data)
+        statusUrl = responseData['status_url']
+        self.assertEqual(response.headers['Location'], statusUrl)
+        self.assertEqual(statusUrl, f"/runs/{responseData['run_id']}")
+        
+        runData = json.loads(self.client.get(statusUrl).data)['run']
+        self.assertIn(runData['status'], ('queued', 'running'))
+        
+        GatedPlugin.gate.set()
+        self.engine.worker_pool.shutdown(wait=True)
+        
+        runData = json.loads(self.client.get(statusUrl).data)['run']
+        self.assertEqual(runData['status'], 'completed')
+        self.assertEqual(runData['results'], {"gated": {"n": 1, "processed": True}})
+    
+    def test_async_chain_and_prefer_header(self):
+        """
+        Test trybu asynchronicznego włączonego w definicji chaina i nagłówkiem Prefer.
+        """
+        GatedPlugin.gate.set()
+        response = self.client.post('/hook/gated', json={"n": 1}, headers={'Prefer': 'respond-async'})
+        self.assertEqual(response.status_code, 202)
+        
+        self.engine.chains["gated"]["async"] = True
+        response = self.client.post('/hook/gated', json={"n": 2})
+        self.assertEqual(response.status_code, 202)
+        
+        self.assertEqual(self.client.get('/runs/nieznany').status_code, 404)
+    
+    def test_async_rejected(self):
+        """
+        Test odpowiedzi 503, gdy pula wątków odrzuca uruchomienie.
+        """
+        with patch.object(self.engine.worker_pool, 'submit', return_value=False):
+            response = self.client.post('/hook/gated?async=true', json={"n": 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.engine.get_metrics()['runs']['created'], 1)
+        self.assertEqual(self.engine.get_metrics()['runs']['queued'], 0)
+
+class TestBulkWebhook(unittest.TestCase):
+    """
+    Testy webhooków zbiorczych (NDJSON i tablica JSON).
+    """
+    
+    def setUp(self):
+        """
+        Przygotowanie aplikacji z Chain Engine i chainem z wtyczką testową.
+        """
+        GatedPlugin.gate = threading.Event()
+        GatedPlugin.gate.set()
+        self.engine = ChainEngine(
+            mqtt_client=MagicMock(), chains_file=os.devnull, config={"bulk_ingest": {"batch_size": 2}}
+        )
+        self.engine.plugin_classes["GatedPlugin"] = GatedPlugin
+        self.engine.chains["gated"] = {"trigger": "webhook:gated", "steps": [{"plugin": "GatedPlugin"}]}
+        self.engine._rebuild_trigger_index()
+        
+        self.app = Flask(__name__)
+        self.app.register_blueprint(webhook_bp)
+        self.app.config['chain_engine'] = self.engine
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """
+        Zatrzymanie silnika.
+        """
+        self.engine.shutdown()
+    
+    def test_ndjson(self):
+        """
+        Test przetworzenia rekordów NDJSON paczkami z wynikiem dla każdego rekordu.
+        """
+        body = '{"n": 1}\n{"n": 2}\nto nie jest JSON\n\n{"n": 3}\n'
+        with patch.object(self.engine, 'run_chains_batch', wraps=self.engine.run_chains_batch) as runBatch:
+            response = self.client.post('/hook/gated/bulk', data=body, content_type='application/x-ndjson')
+        
+        self.assertEqual(response.status_code, 200)
+        responseData = json.loads(response.data)
+        self.assertEqual(responseData['processed'], 3)
+        self.assertEqual(responseData['failed'], 1)
+        self.assertEqual([r['status'] for r in responseData['records']], ['success', 'success', 'error', 'success'])
+        self.assertEqual(responseData['records'][3]['results'], {"gated": {"n": 3, "processed": True}})
+        self.assertEqual([len(c.args[1]) for c in runBatch.call_args_list], [2, 1])
+    
+    def test_json_array(self):
+        """
+        Test przetworzenia tablicy JSON i odrzucenia nieobsługiwanego typu treści.
+        """
+        response = self.client.post('/hook/gated/bulk', json=[{"n": 1}, {"n": 2}, {"n": 3}])
+        responseData = json.loads(response.data)
+        self.assertEqual(responseData['processed'], 3)
+        self.assertEqual([r['index'] for r in responseData['records']], [0, 1, 2])
+        
+        response = self.client.post('/hook/gated/bulk', data='n=1', content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_step_failures_per_record(self):
+        """
+        Test zgłoszenia błędu kroku dla rekordu zamiast statusu 'success'
+        (także przy kilku chainach triggera i przy przetwarzaniu paczką).
+        """
+        self.engine.plugin_classes["PickyPlugin"] = PickyPlugin
+        self.engine.chains["picky"] = {"trigger": "webhook:gated", "steps": [{"plugin": "PickyPlugin"}]}
+        self.engine._rebuild_trigger_index()
+        
+        for chains in (["gated", "picky"], ["picky"]):
+            for chainId in set(self.engine.chains) - set(chains):
+                del self.engine.chains[chainId]
+            self.engine._rebuild_trigger_index()
+            
+            response = self.client.post('/hook/gated/bulk', json=[{"n": 1}, {"n": 2, "zly": True}, {"n": 3}])
+            responseData = json.loads(response.data)
+            self.assertEqual(responseData['processed'], 2)
+            self.assertEqual(responseData['failed'], 1)
+            self.assertEqual([r['status'] for r in responseData['records']], ['success', 'error', 'success'])
+            record = responseData['records'][1]
+            self.assertEqual(record['failures'][0]['plugin'], "PickyPlugin")
+            self.assertIn("nieprawidłowy rekord", record['message'])
+        
+        # Tablica JSON z przecinkiem przed ']' jest odrzucana
+        response = self.client.post('/hook/gated/bulk', data='[{"n": 1},]', content_type='application/json')
+        responseData = json.loads(response.data)
+        self.assertEqual([r['status'] for r in responseData['records']], ['success', 'error'])
+
 if __name__ == '__main__':
     unittest.main()
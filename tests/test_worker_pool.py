@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testy jednostkowe dla puli wątków roboczych (WorkerPool).
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+import logging
+
+# Dodanie katalogu głównego do ścieżki, aby umożliwić importowanie modułów
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.worker_pool import WorkerPool
+
+# Wyłączenie logowania podczas testów
+logging.disable(logging.CRITICAL)
+
+class WorkerPoolTest(unittest.TestCase):
+    """
+    Testy jednostkowe dla klasy WorkerPool.
+    """
+
+    def setUp(self):
+        """
+        Przygotowanie blokady wstrzymującej jedyny wątek roboczy.
+        """
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        """
+        Zwolnienie wątków roboczych po teście.
+        """
+        self.release.set()
+
+    def _blocking_task(self):
+        self.started.set()
+        self.release.wait(timeout=5)
+
+    def _fill_pool(self, policy):
+        """
+        Tworzy pulę z jednym zajętym wątkiem i pełną kolejką (2 zadania).
+        """
+        pool = WorkerPool(workers=1, queue_size=2, overflow_policy=policy, block_timeout=0.05)
+        pool.submit(self._blocking_task)
+        self.assertTrue(self.started.wait(timeout=5))
+        self.executed = []
+        pool.submit(self.executed.append, "first")
+        pool.submit(self.executed.append, "second")
+        return pool
+
+    def test_executes_tasks(self):
+        """
+        Test wykonywania zadań i liczników metryk.
+        """
+        pool = WorkerPool(workers=2, queue_size=10)
+        done = threading.Event()
+        self.assertTrue(pool.submit(done.set))
+        self.assertTrue(done.wait(timeout=5))
+        pool.shutdown()
+
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["submitted"], 1)
+        self.assertEqual(metrics["completed"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_drop_oldest(self):
+        """
+        Test polityki drop_oldest - najstarsze zadanie jest usuwane z kolejki.
+        """
+        pool = self._fill_pool("drop_oldest")
+        self.assertTrue(pool.submit(self.executed.append, "third"))
+        self.assertEqual(pool.get_metrics()["dropped"], 1)
+
+        self.release.set()
+        pool.shutdown()
+        self.assertEqual(self.executed, ["second", "third"])
+
+    def test_drop_callback_and_non_blocking_submit(self):
+        """
+        Test powiadomienia o zadaniu porzuconym przez drop_oldest oraz zgłoszenia
+        bez czekania przy polityce block.
+        """
+        pool = WorkerPool(workers=1, queue_size=1, overflow_policy="drop_oldest")
+        pool.submit(self._blocking_task)
+        self.assertTrue(self.started.wait(timeout=5))
+        dropped = []
+        pool.submit(lambda: None, on_drop=lambda: dropped.append("first"))
+        pool.submit(lambda: None)
+        self.assertEqual(dropped, ["first"])
+
+        running = threading.Event()
+        blocking_pool = WorkerPool(workers=1, queue_size=1, overflow_policy="block")
+        blocking_pool.submit(lambda: running.set() or self.release.wait(5))
+        self.assertTrue(running.wait(timeout=5))
+        blocking_pool.submit(self.release.wait, 5)
+        started = time.monotonic()
+        self.assertFalse(blocking_pool.submit(self.release.wait, 5, block=False))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(blocking_pool.get_metrics()["rejected"], 1)
+
+    def test_drop_newest(self):
+        """
+        Test polityki drop_newest - nowe zadanie jest porzucane.
+        """
+        pool = self._fill_pool("drop_newest")
+        self.assertFalse(pool.submit(self.executed.append, "third"))
+        self.assertEqual(pool.get_metrics()["dropped"], 1)
+
+        self.release.set()
+        pool.shutdown()
+        self.assertEqual(self.executed, ["first", "second"])
+
+    def test_reject_and_block_timeout(self):
+        """
+        Test polityk reject i block (z limitem czasu oczekiwania).
+        """
+        pool = self._fill_pool("reject")
+        self.assertFalse(pool.submit(self.executed.append, "third"))
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertEqual(metrics["queue_depth"], 2)
+        self.assertEqual(metrics["busy_workers"], 1)
+
+        blocking_pool = WorkerPool(workers=1, queue_size=1, overflow_policy="block", block_timeout=0.05)
+        blocking_pool.submit(self.release.wait, 5)
+        blocking_pool.submit(self.release.wait, 5)
+        blocking_pool.submit(self.release.wait, 5)
+        self.assertGreaterEqual(blocking_pool.get_metrics()["rejected"], 1)
+
+    def test_invalid_policy(self):
+        """
+        Test odrzucenia nieznanej polityki przepełnienia.
+        """
+        with self.assertRaises(ValueError):
+            WorkerPool(overflow_policy="unknown")
+
+if __name__ == '__main__':
+    unittest.main()